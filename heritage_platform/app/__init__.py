@@ -29,13 +29,14 @@ from flask_limiter.util import get_remote_address
 from flask_cors import CORS
 from .utils.logging_config import setup_logging, log_access
 from .utils.security_config import setup_security
+from .utils.db_session import RoutingSession
 from flask import Response, request # 导入 Response 和 request
 import os
 import markdown
 
 # 初始化扩展模块
 # db: SQLAlchemy数据库ORM对象，用于处理所有数据库操作和模型定义
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # 只读请求使用自动提交连接，见 app/utils/db_session.py
 # login_manager: Flask-Login扩展，管理用户会话和身份验证
 login_manager = LoginManager()
 # csrf: Flask-WTF CSRF保护扩展，防止跨站请求伪造攻击
@@ -75,6 +76,10 @@ def create_app(config_name='default'):
     # 初始化日志系统，配置日志记录器和处理器
     setup_logging(app)
 
+    # JSON编码使用 orjson（未安装时退回标准库），API响应和Socket.IO数据包共用
+    from app.utils import json_provider
+    json_provider.init_json(app)
+
     # 初始化安全配置，设置安全相关的HTTP头部
     setup_security(app)
 
@@ -121,7 +126,29 @@ def create_app(config_name='default'):
         return response
 
     # 初始化各种Flask扩展
+    # 只读副本登记为附加绑定，需要在初始化数据库之前完成
+    from app.utils.replicas import configure_replica_binds, init_replicas
+    configure_replica_binds(app)
     db.init_app(app)  # 初始化数据库
+    # 使用SQLite时为每个连接设置WAL等PRAGMA
+    from app.utils.sqlite_config import setup_sqlite
+    setup_sqlite(app)
+    # 配置了只读副本时启用读写分离
+    init_replicas(app)
+    # 初始化SQL查询分析，记录每个请求的查询并检测N+1问题
+    from app.utils.query_profiler import init_query_profiler
+    init_query_profiler(app)
+    # 初始化请求追踪，输出 Server-Timing 响应头并采样写入追踪文件
+    from app.utils.tracing import init_tracing, traced
+    init_tracing(app)
+    # 安全方法的请求使用只读会话，附带的写入在响应发送后执行
+    from app.utils.db_session import init_read_only_requests
+    init_read_only_requests(app)
+    from app.utils.deferred import init_deferred_writes
+    init_deferred_writes(app)
+    # 初始化查询结果缓存，后端由 CACHE_BACKEND 选择
+    from app.utils.cache import init_cache
+    init_cache(app)
     login_manager.init_app(app)  # 初始化登录管理器
     csrf.init_app(app)  # 初始化CSRF保护
     migrate.init_app(app, db)  # 初始化数据库迁移
@@ -134,11 +161,20 @@ def create_app(config_name='default'):
         ping_timeout=20,
         ping_interval=10,
         async_mode='eventlet',
+        json=json_provider,
         logger=True,
         engineio_logger=True
     )
     limiter.init_app(app)  # 初始化请求速率限制器
 
+    # 注册汇总数据的增量维护（每日活跃度、用户统计、论坛主题计数、热度）
+    from app.utils import activity_stats  # noqa: F401
+    from app.utils import user_stats  # noqa: F401
+    from app.utils import forum_counters  # noqa: F401
+    from app.utils import trending  # noqa: F401
+    # 注册非遗项目注册表的失效事件
+    from app.utils import heritage_registry  # noqa: F401
+
     # 初始化WebSocket管理器，处理WebSocket连接和事件
     from app.utils.websocket_manager import init_websocket_manager
     init_websocket_manager(app)
@@ -192,6 +228,7 @@ def create_app(config_name='default'):
 
     # 添加模板过滤器 - Markdown渲染
     @app.template_filter('markdown')
+    @traced('markdown', 'markdown')
     def render_markdown(content):
         """将Markdown格式文本转换为HTML
 
@@ -13,6 +13,7 @@ API接口分类：
 - user: 用户管理相关API
 - forum: 论坛相关API
 - notification: 通知相关API
+- batch: 在一个请求中执行多个API子请求
 """
 
 from flask import Blueprint
@@ -28,4 +29,4 @@ csrf.exempt(api_bp)
 
 # 导入API视图函数模块
 # 使用装饰器方式注册路由，不需要手动注册
-from . import heritage, content, user, forum, notification
+from . import heritage, content, user, forum, notification, batch
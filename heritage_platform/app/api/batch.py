@@ -0,0 +1,228 @@
+"""
+批量请求API模块
+
+前端每次加载页面都会分别请求个人资料、未读通知数、未读私信数、最新主题和内容列表，
+每个请求都要经过完整的Flask分发、用户加载、限流检查和一次网络往返。
+/api/batch 在一个请求中执行多个指向 api 蓝图已有路由的子请求：
+- 子请求直接调用视图函数，不再执行 before_request/after_request 钩子：
+  全局限流、请求追踪和查询统计按整个批量请求计算，视图上单独声明的限流（@limiter.limit）仍对每个子请求生效
+- 顺序执行的子请求共享本次请求的应用上下文：同一个已登录用户（g 中缓存的 current_user）、
+  同一个数据库会话和同一个会话Cookie；全部子请求都是安全方法时，共享会话按只读请求模式执行
+- 声明 "independent": true 的GET子请求可以在原生线程中并发执行（见 app/utils/offload.py），
+  每个并发子请求使用独立的应用上下文和数据库会话，用户身份从同一个会话Cookie加载；
+  并发子请求先于顺序子请求执行，不会看到本批次中的写入
+- 单个子请求失败只体现在它自己的结果中；子请求抛出未处理的异常时回滚共享会话
+
+请求格式:
+    POST /api/batch
+    {"requests": [
+        {"id": "profile", "path": "/api/user/profile"},
+        {"id": "unread", "path": "/api/notifications/unread-count", "independent": true},
+        {"id": "topics", "path": "/api/forum/latest_topics", "params": {"limit": 5}, "independent": true},
+        {"id": "like", "method": "POST", "path": "/api/contents/3/like/toggle", "body": {}}
+    ]}
+
+响应格式（data 与请求顺序一致）:
+    {"success": true, "message": "操作成功", "data": [
+        {"id": "profile", "status": 200, "body": {...}},
+        {"id": "unread", "status": 200, "body": {"count": 3}},
+        ...
+    ]}
+
+相关配置项（见config.py）:
+- BATCH_MAX_REQUESTS: 单个批量请求中子请求数量的上限
+- BATCH_CONCURRENCY_ENABLED: 是否并发执行声明为独立的子请求
+- BATCH_MAX_WORKERS: 并发执行的线程数上限
+"""
+
+from http import HTTPStatus
+from typing import Any, Dict, List, Tuple
+
+from flask import current_app, g, request
+from flask.ctx import RequestContext
+from flask.globals import _cv_request, request_ctx
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from app import db
+from app.utils.db_session import SAFE_METHODS, begin_read_only, end_read_only
+from app.utils.offload import map_concurrent
+from app.utils.response import api_error, api_success
+from . import api_bp
+
+# 转发给子请求的请求头：会话Cookie、认证信息和客户端特征
+FORWARDED_HEADERS = ('Cookie', 'Authorization', 'User-Agent', 'Accept-Language', 'X-Requested-With')
+
+
+class BatchRequestError(ValueError):
+    """批量请求格式错误"""
+
+
+def _parse_requests(payload) -> List[Dict[str, Any]]:
+    """校验并规范化子请求列表"""
+    items = payload.get('requests') if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        raise BatchRequestError('requests 必须是非空列表')
+    limit = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+    if len(items) > limit:
+        raise BatchRequestError(f'一次最多提交 {limit} 个子请求')
+
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str) or not item['path'].startswith('/'):
+            raise BatchRequestError(f'第 {index + 1} 个子请求缺少以 / 开头的 path')
+        params = item.get('params') or {}
+        if not isinstance(params, dict):
+            raise BatchRequestError(f'第 {index + 1} 个子请求的 params 必须是对象')
+        method = str(item.get('method') or 'GET').upper()
+        path, _, query = item['path'].partition('?')
+        parsed.append({
+            'id': item.get('id', index),
+            'method': method,
+            'path': path,
+            'query_string': query or params,
+            'body': item.get('body'),
+            'independent': bool(item.get('independent')) and method in SAFE_METHODS,
+        })
+    return parsed
+
+
+def _build_environ(item: Dict[str, Any]) -> dict:
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    builder = EnvironBuilder(
+        path=item['path'],
+        base_url=request.host_url.rstrip('/') + request.script_root,
+        method=item['method'],
+        query_string=item['query_string'],
+        json=item['body'] if item['body'] is not None else None,
+        headers=headers,
+        environ_base={'REMOTE_ADDR': request.remote_addr},
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def _dispatch(app, ctx: RequestContext) -> Dict[str, Any]:
+    """调用子请求对应的视图函数，返回该子请求的结果（不含id）"""
+    sub_request = ctx.request
+    try:
+        if sub_request.routing_exception is not None:
+            raise sub_request.routing_exception
+        endpoint = sub_request.url_rule.endpoint
+        if not endpoint.startswith(f'{api_bp.name}.') or endpoint == f'{api_bp.name}.batch':
+            return {'status': int(HTTPStatus.NOT_FOUND), 'body': {'success': False, 'message': '只能批量调用API接口'}}
+        rv = app.ensure_sync(app.view_functions[endpoint])(**sub_request.view_args)
+        response = app.make_response(rv)
+    except HTTPException as e:
+        # abort()、get_or_404()、视图上声明的限流等
+        return {'status': e.code, 'body': {'success': False, 'message': e.description}}
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"批量请求中的子请求 {sub_request.method} {sub_request.path} 失败: {str(e)}")
+        return {'status': int(HTTPStatus.INTERNAL_SERVER_ERROR), 'body': {'success': False, 'message': '子请求处理失败'}}
+
+    try:
+        result = {'status': response.status_code}
+        if response.is_json:
+            result['body'] = response.get_json()
+        elif 300 <= response.status_code < 400:
+            # 例如未登录时 login_required 重定向到登录页
+            result['location'] = response.location
+        else:
+            result['body'] = response.get_data(as_text=True)
+        return result
+    finally:
+        response.close()
+
+
+def _run_shared(app, environ: dict) -> Dict[str, Any]:
+    """在当前请求的应用上下文中执行子请求：共享 g、current_user、数据库会话和会话Cookie
+
+    只替换当前请求对象，不推入新的上下文，因此不会触发请求钩子和 teardown_request，
+    也不会清理本次批量请求在 g 中保存的追踪、查询统计等状态。
+    """
+    ctx = RequestContext(app, environ, session=request_ctx.session)
+    ctx.match_request()
+    token = _cv_request.set(ctx)
+    try:
+        return _dispatch(app, ctx)
+    finally:
+        _cv_request.reset(token)
+
+
+def _run_isolated(app, environ: dict) -> Tuple[Dict[str, Any], list]:
+    """在工作线程中以独立的应用上下文和数据库会话执行只读子请求
+
+    Returns:
+        tuple: (结果, 子请求登记的延后写入任务)，任务交给批量请求在响应发送后执行
+    """
+    with app.request_context(environ) as ctx:
+        read_only = app.config.get('READ_ONLY_REQUESTS')
+        if read_only:
+            begin_read_only(db.session)
+        try:
+            return _dispatch(app, ctx), g.pop('_deferred_jobs', [])
+        finally:
+            if read_only:
+                end_read_only(db.session)
+
+
+@api_bp.route('/batch', methods=['POST'])
+def batch():
+    """批量执行多个API请求
+
+    路由: /api/batch
+    方法: POST
+    权限: 与各子请求对应的接口相同，子请求共享当前登录用户
+
+    请求体:
+        requests: 子请求列表，每项包含
+            path (str): 接口路径，如 /api/notifications/unread-count，可以带查询字符串
+            method (str, 可选): 请求方法，默认GET
+            params (dict, 可选): 查询参数
+            body (可选): JSON请求体
+            id (可选): 调用方的标识，原样返回，默认为序号
+            independent (bool, 可选): 不依赖其他子请求，允许并发执行（仅GET）
+
+    Returns:
+        JSON: data 为与请求顺序一致的结果列表，每项包含 id、status 和 body（重定向时为 location）
+
+    错误响应:
+        400: 请求格式错误或子请求数量超过上限
+    """
+    try:
+        items = _parse_requests(request.get_json(silent=True))
+    except BatchRequestError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_BATCH')
+
+    app = current_app._get_current_object()
+    environs = [_build_environ(item) for item in items]
+    results: List[Dict[str, Any]] = [None] * len(items)
+
+    concurrent = []
+    if current_app.config.get('BATCH_CONCURRENCY_ENABLED', True):
+        concurrent = [index for index, item in enumerate(items) if item['independent']]
+    if len(concurrent) > 1:
+        outputs = map_concurrent(lambda index: _run_isolated(app, environs[index]), concurrent,
+                                 current_app.config.get('BATCH_MAX_WORKERS', 4))
+        for index, (output, jobs) in zip(concurrent, outputs):
+            results[index] = output
+            if jobs:
+                g.setdefault('_deferred_jobs', []).extend(jobs)
+
+    # 全部子请求都是安全方法时，共享会话与普通GET请求一样按只读模式执行
+    read_only = current_app.config.get('READ_ONLY_REQUESTS') and all(
+        item['method'] in SAFE_METHODS for item in items)
+    if read_only:
+        begin_read_only(db.session)
+    try:
+        for index, environ in enumerate(environs):
+            if results[index] is None:
+                results[index] = _run_shared(app, environ)
+    finally:
+        if read_only:
+            end_read_only(db.session)
+
+    return api_success([{'id': item['id'], **result} for item, result in zip(items, results)])
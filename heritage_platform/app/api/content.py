@@ -5,22 +5,31 @@
 1. 获取内容列表（支持分页和筛选）
 2. 获取内容详情
 3. 创建新内容
-4. 点赞内容
+4. 点赞和收藏内容（幂等设置与切换）
 5. 评论内容
+6. 评论回复的键集分页
 
 所有API返回标准化的JSON响应，使用app.utils.response中的工具函数。
 错误处理采用统一的异常捕获和日志记录机制。
+列表和详情接口支持 fields / include 参数选择返回的字段和展开项（见 app/utils/serializers.py）。
 """
 
+from http import HTTPStatus
+
 from flask import jsonify, request, current_app
 from . import api_bp
-from app.models import Content, HeritageItem, Comment, Like, Favorite
+from app.models import Content, HeritageItem, Comment, Favorite
 from app import db
 from flask_login import current_user, login_required
 from app.utils.response import api_success, api_error
+from app.utils.serializers import ContentSerializer, FieldSelectionError
+from app.utils.reactions import set_reaction, toggle_reaction
+from app.utils import trending
+from app.utils.query_profiler import query_budget
 import traceback
 
 @api_bp.route('/contents', methods=['GET'])
+@query_budget(10)  # 分页及总数、三项计数、非遗项目、图片、访问者的点赞和收藏状态、身份加载
 def get_contents():
     """获取内容列表API
 
@@ -35,6 +44,9 @@ def get_contents():
         per_page (int, optional): 每页数量，默认为10
         heritage_id (int, optional): 按非遗项目ID筛选
         content_type (str, optional): 按内容类型筛选，可选值为article/video/image/multimedia
+        sort (str, optional): 排序方式，newest（默认，按创建时间）或 trending（按热度）
+        fields (str, optional): 逗号分隔的返回字段，如 id,title,author_name；默认返回全部字段和 viewer
+        include (str, optional): 逗号分隔的展开项 images、recent_comments，默认展开 images
 
     Returns:
         JSON: 包含内容列表和分页信息的标准成功响应
@@ -54,7 +66,8 @@ def get_contents():
                         "created_at": "2023-01-01 12:00:00",
                         "views": 100,
                         "comments_count": 10,
-                        "likes_count": 20
+                        "likes_count": 20,
+                        "viewer": {"liked": false, "favorited": false}  // 当前用户的点赞和收藏状态，未登录时均为false
                     },
                     ...
                 ],
@@ -65,15 +78,19 @@ def get_contents():
         }
 
     错误响应:
+        400: fields 或 include 中包含未知的字段
         500: 服务器内部错误
     """
     try:
+        serializer = ContentSerializer.from_request(default_fields=ContentSerializer.default_fields + ('viewer',))
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         heritage_id = request.args.get('heritage_id', type=int)
         content_type = request.args.get('content_type')
+        sort = trending.parse_sort(request.args.get('sort'))
 
-        query = Content.query
+        # 只加载所选字段需要的列和关联
+        query = Content.query.options(*serializer.query_options())
 
         if heritage_id:
             query = query.filter_by(heritage_id=heritage_id)
@@ -81,19 +98,23 @@ def get_contents():
         if content_type:
             query = query.filter_by(content_type=content_type)
 
-        pagination = query.order_by(Content.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False)
-
-        items = pagination.items
+        if sort == trending.SORT_TRENDING:
+            query = query.order_by(*trending.order_by_trending(Content))
+        else:
+            query = query.order_by(Content.created_at.desc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
+        # 计数、图片和当前用户的点赞收藏状态对整页内容批量查询
         result = {
-            'items': [item.to_dict() for item in items],
+            'items': serializer.dump_many(pagination.items),
             'total': pagination.total,
             'pages': pagination.pages,
             'current_page': page
         }
 
         return api_success(result)
+    except FieldSelectionError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         current_app.logger.error(f"获取内容列表出错：{str(e)}")
         return api_error("获取内容列表失败")
@@ -112,6 +133,10 @@ def get_content(id):
     Args:
         id (int): 内容ID
 
+    Query参数:
+        fields (str, optional): 逗号分隔的返回字段，默认返回全部字段和 viewer
+        include (str, optional): 逗号分隔的展开项，默认展开 images 和 recent_comments
+
     Returns:
         JSON: 包含内容详情的标准成功响应
         {
@@ -133,6 +158,7 @@ def get_content(id):
                 "views": 101,
                 "comments_count": 10,
                 "likes_count": 20,
+                "viewer": {"liked": true, "favorited": false},
                 "recent_comments": [
                     {
                         "id": 1,
@@ -147,12 +173,17 @@ def get_content(id):
         }
 
     错误响应:
+        400: fields 或 include 中包含未知的字段
         404: 内容不存在
         500: 服务器内部错误
     """
     try:
-        content = Content.query.get_or_404(id)
-        return api_success(content.to_dict(include_comments=True))
+        serializer = ContentSerializer.from_request(default_fields=ContentSerializer.default_fields + ('viewer',),
+                                                    default_include=('images', 'recent_comments'))
+        content = Content.query.options(*serializer.query_options()).filter_by(id=id).first_or_404()
+        return api_success(serializer.dump(content))
+    except FieldSelectionError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         current_app.logger.error(f"获取内容详情出错：{str(e)}")
         return api_error("获取内容详情失败")
@@ -244,7 +275,7 @@ def like_content(id):
     """点赞内容API
 
     为指定ID的内容添加点赞，需要用户登录。
-    每个用户只能对同一内容点赞一次。
+    每个用户只能对同一内容点赞一次；需要幂等语义时使用 PUT /contents/<id>/like。
 
     路由: /contents/<id>/like
     方法: POST
@@ -270,27 +301,141 @@ def like_content(id):
         500: 服务器内部错误
     """
     try:
-        content = Content.query.get_or_404(id)
-
-        # 检查是否已点赞
-        existing_like = Like.query.filter_by(
-            user_id=current_user.id,
-            content_id=id
-        ).first()
-
-        if existing_like:
+        result = set_reaction('like', current_user.id, id, True)
+        if result is None:
+            return api_error("内容不存在", 404)
+        if not result.changed:
+            db.session.rollback()
             return api_error("您已经点赞过该内容")
 
-        like = Like(user_id=current_user.id, content_id=id)
-        db.session.add(like)
         db.session.commit()
-
-        return api_success({"likes_count": content.likes.count()}, "点赞成功")
+        return api_success({"likes_count": result.count}, "点赞成功")
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"点赞内容出错：{str(e)}")
         return api_error("点赞失败")
 
+# 点赞/收藏接口的响应字段: 类型 -> (状态字段, 计数字段, 名称)
+REACTION_FIELDS = {
+    'like': ('liked', 'likes_count', '点赞'),
+    'favorite': ('favorited', 'favorites_count', '收藏'),
+}
+
+def _reaction_response(kind, id, active=None):
+    """执行点赞/收藏操作并返回标准响应
+
+    Args:
+        kind: 'like' 或 'favorite'
+        id: 内容ID
+        active: True 添加，False 取消，None 切换
+    """
+    state_field, count_field, name = REACTION_FIELDS[kind]
+    try:
+        if active is None:
+            result = toggle_reaction(kind, current_user.id, id)
+        else:
+            result = set_reaction(kind, current_user.id, id, active)
+        if result is None:
+            db.session.rollback()
+            return api_error("内容不存在", 404)
+
+        db.session.commit()
+        message = f"{name}成功" if result.active else f"取消{name}成功"
+        return api_success({
+            state_field: result.active,
+            count_field: result.count,
+            'changed': result.changed
+        }, message)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"{name}操作出错：{str(e)}")
+        return api_error(f"{name}操作失败")
+
+@api_bp.route('/contents/<int:id>/like', methods=['PUT', 'DELETE'])
+@login_required
+def set_like(id):
+    """设置点赞状态API（幂等）
+
+    PUT 添加点赞，DELETE 取消点赞。重复请求不会报错，也不会产生重复记录，
+    通常只需一条写语句和一条COUNT。
+
+    路由: /contents/<id>/like
+    方法: PUT, DELETE
+    权限: 需要用户登录
+
+    Args:
+        id (int): 内容ID
+
+    Returns:
+        JSON: 标准成功响应
+        {
+            "success": true,
+            "message": "点赞成功",
+            "data": {
+                "liked": true,        // 操作后的点赞状态
+                "likes_count": 21,    // 操作后的点赞总数
+                "changed": true       // 本次请求是否改变了状态
+            }
+        }
+
+    错误响应:
+        401: 用户未登录
+        404: 内容不存在
+        500: 服务器内部错误
+    """
+    return _reaction_response('like', id, request.method == 'PUT')
+
+@api_bp.route('/contents/<int:id>/like/toggle', methods=['POST'])
+@login_required
+def toggle_like(id):
+    """切换点赞状态API
+
+    已点赞则取消，否则添加。响应格式同 PUT/DELETE /contents/<id>/like。
+
+    路由: /contents/<id>/like/toggle
+    方法: POST
+    权限: 需要用户登录
+    """
+    return _reaction_response('like', id)
+
+@api_bp.route('/contents/<int:id>/favorite', methods=['PUT', 'DELETE'])
+@login_required
+def set_favorite(id):
+    """设置收藏状态API（幂等）
+
+    PUT 添加收藏，DELETE 取消收藏，语义同 PUT/DELETE /contents/<id>/like。
+
+    路由: /contents/<id>/favorite
+    方法: PUT, DELETE
+    权限: 需要用户登录
+
+    Returns:
+        JSON: 标准成功响应
+        {
+            "success": true,
+            "message": "收藏成功",
+            "data": {
+                "favorited": true,
+                "favorites_count": 5,
+                "changed": true
+            }
+        }
+    """
+    return _reaction_response('favorite', id, request.method == 'PUT')
+
+@api_bp.route('/contents/<int:id>/favorite/toggle', methods=['POST'])
+@login_required
+def toggle_favorite(id):
+    """切换收藏状态API
+
+    已收藏则取消，否则添加。响应格式同 PUT/DELETE /contents/<id>/favorite。
+
+    路由: /contents/<id>/favorite/toggle
+    方法: POST
+    权限: 需要用户登录
+    """
+    return _reaction_response('favorite', id)
+
 @api_bp.route('/contents/<int:id>/comments', methods=['POST'])
 @login_required
 def comment_content(id):
@@ -354,3 +499,54 @@ def comment_content(id):
         db.session.rollback()
         current_app.logger.error(f"评论内容出错：{str(e)}")
         return api_error("评论失败")
+
+@api_bp.route('/comments/<int:id>/replies', methods=['GET'])
+def get_comment_replies(id):
+    """获取评论的回复API（键集分页）
+
+    内容详情页每条评论只直接展示前几条回复，"加载更多回复"通过本接口继续获取。
+    使用上一批最后一条回复的ID作为游标，翻页代价与页数无关。
+
+    路由: /comments/<id>/replies
+    方法: GET
+    权限: 无需登录
+
+    Args:
+        id (int): 父评论ID
+
+    Query参数:
+        after (int, optional): 游标，上一批最后一条回复的ID；不传时从第一条开始
+        limit (int, optional): 每批数量，默认为5，最大50
+
+    Returns:
+        JSON: 包含回复列表和下一批游标的标准成功响应
+        {
+            "success": true,
+            "data": {
+                "replies": [...],  // 每项同评论字典，另含 reply_count（该回复自身的回复数）
+                "next_cursor": 15  // 没有更多时为null
+            },
+            "message": "success"
+        }
+
+    错误响应:
+        404: 评论不存在
+        500: 服务器内部错误
+    """
+    try:
+        from app.utils.comment_tree import load_replies
+
+        if db.session.get(Comment, id) is None:
+            return api_error("评论不存在", 404)
+
+        after = request.args.get('after', type=int)
+        limit = min(max(request.args.get('limit', 5, type=int), 1), 50)
+        replies, next_cursor = load_replies(id, after_id=after, limit=limit)
+
+        return api_success({
+            'replies': [reply.to_dict() for reply in replies],
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        current_app.logger.error(f"获取评论回复出错：{str(e)}")
+        return api_error("获取评论回复失败")
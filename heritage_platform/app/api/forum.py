@@ -10,14 +10,20 @@
 
 所有API返回标准化的JSON响应，使用app.utils.response中的工具函数。
 错误处理采用统一的异常捕获和日志记录机制。
+列表接口支持 fields 参数选择返回的字段（见 app/utils/serializers.py）。
 """
 
+from http import HTTPStatus
+
 from flask import request, current_app
 from . import api_bp
 from app.models import ForumTopic, ForumPost
 from app import db
 from flask_login import current_user, login_required
 from app.utils.response import api_success, api_error
+from app.utils import trending
+from app.utils.serializers import ForumPostSerializer, ForumTopicSerializer, FieldSelectionError
+from app.utils.query_profiler import query_budget
 
 @api_bp.route('/forum/latest_topics', methods=['GET'])
 def get_latest_topics():
@@ -27,6 +33,7 @@ def get_latest_topics():
 
     Query参数:
         limit (int, optional): 返回的主题数量，默认为5
+        fields (str, optional): 逗号分隔的返回字段，如 id,title,last_activity，默认返回全部字段
 
     Returns:
         JSON: 包含最新主题列表的标准成功响应
@@ -56,18 +63,23 @@ def get_latest_topics():
         500: 服务器内部错误
     """
     try:
+        serializer = ForumTopicSerializer.from_request()
         limit = request.args.get('limit', 5, type=int)
-        topics = ForumTopic.query.order_by(
+        # 只加载所选字段需要的列；创建者和最后回复者与主题在同一条查询中取得
+        topics = ForumTopic.query.options(*serializer.query_options()).order_by(
             ForumTopic.last_activity.desc()).limit(limit).all()
 
         return api_success({
-            'topics': [topic.to_dict() for topic in topics]
+            'topics': serializer.dump_many(topics)
         })
+    except FieldSelectionError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         current_app.logger.error(f"获取最新主题出错：{str(e)}")
         return api_error("获取最新主题失败")
 
 @api_bp.route('/forum/topics', methods=['GET'])
+@query_budget(3)  # 分页及总数、身份加载
 def get_topics():
     """获取论坛主题列表API
 
@@ -78,6 +90,8 @@ def get_topics():
         page (int, optional): 页码，默认为1
         per_page (int, optional): 每页数量，默认为20
         category (str, optional): 按分类筛选
+        sort (str, optional): 排序方式，newest（默认，置顶优先、按最后活动时间）或 trending（按热度）
+        fields (str, optional): 逗号分隔的返回字段，默认返回全部字段
 
     Returns:
         JSON: 包含主题列表和分页信息的标准成功响应
@@ -110,29 +124,32 @@ def get_topics():
         500: 服务器内部错误
     """
     try:
+        # 按请求的字段构建序列化器
+        serializer = ForumTopicSerializer.from_request()
+
         # 获取分页和筛选参数
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         category = request.args.get('category')
+        sort = trending.parse_sort(request.args.get('sort'))
 
-        # 构建查询
-        query = ForumTopic.query
+        # 构建查询，只加载所选字段需要的列，创建者和最后回复者随主题一并加载
+        query = ForumTopic.query.options(*serializer.query_options())
 
         # 如果提供了分类参数，添加分类筛选
         if category:
             query = query.filter_by(category=category)
 
-        # 执行分页查询，按置顶状态和最后活动时间排序
-        pagination = query.order_by(ForumTopic.is_pinned.desc(),
-                                    ForumTopic.last_activity.desc()).paginate(
-            page=page, per_page=per_page, error_out=False)
-
-        # 获取当前页的主题列表
-        topics = pagination.items
+        # 执行分页查询，默认按置顶状态和最后活动时间排序，热门按热度排序
+        if sort == trending.SORT_TRENDING:
+            query = query.order_by(*trending.order_by_trending(ForumTopic))
+        else:
+            query = query.order_by(ForumTopic.is_pinned.desc(), ForumTopic.last_activity.desc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
         # 构建响应结果
         result = {
-            'topics': [topic.to_dict() for topic in topics],  # 将每个主题转换为字典格式
+            'topics': serializer.dump_many(pagination.items),  # 将每个主题转换为字典格式
             'total': pagination.total,  # 总主题数
             'pages': pagination.pages,  # 总页数
             'current_page': page  # 当前页码
@@ -140,6 +157,8 @@ def get_topics():
 
         # 返回成功响应
         return api_success(result)
+    except FieldSelectionError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         # 记录错误日志
         current_app.logger.error(f"获取论坛主题列表出错：{str(e)}")
@@ -237,6 +256,7 @@ def get_topic_posts(topic_id):
     Query参数:
         page (int, optional): 页码，默认为1
         per_page (int, optional): 每页数量，默认为20
+        fields (str, optional): 逗号分隔的帖子返回字段，如 id,author,content，默认返回全部字段；主题信息不受影响
 
     Returns:
         JSON: 包含主题信息、帖子列表和分页信息的标准成功响应
@@ -280,25 +300,27 @@ def get_topic_posts(topic_id):
         500: 服务器内部错误
     """
     try:
+        serializer = ForumPostSerializer.from_request()
+        topic_serializer = ForumTopicSerializer()
+
         # 获取主题，如果不存在则返回404错误
-        topic = ForumTopic.query.get_or_404(topic_id)
+        topic = ForumTopic.query.options(*topic_serializer.query_options()).filter_by(
+            id=topic_id).first_or_404()
 
         # 获取分页参数
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
 
-        # 查询主题下的帖子，按创建时间升序排序
-        pagination = ForumPost.query.filter_by(topic_id=topic_id).order_by(
+        # 查询主题下的帖子，按创建时间升序排序，作者和回复目标用户随帖子一并加载
+        pagination = ForumPost.query.options(*serializer.query_options()).filter_by(
+            topic_id=topic_id).order_by(
             ForumPost.created_at.asc()).paginate(
             page=page, per_page=per_page, error_out=False)
 
-        # 获取当前页的帖子列表
-        posts = pagination.items
-
         # 构建响应结果
         result = {
-            'topic': topic.to_dict(),  # 主题信息
-            'posts': [post.to_dict() for post in posts],  # 帖子列表
+            'topic': topic_serializer.dump(topic),  # 主题信息
+            'posts': serializer.dump_many(pagination.items),  # 帖子列表
             'total': pagination.total,  # 总帖子数
             'pages': pagination.pages,  # 总页数
             'current_page': page  # 当前页码
@@ -306,6 +328,8 @@ def get_topic_posts(topic_id):
 
         # 返回成功响应
         return api_success(result)
+    except FieldSelectionError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         # 记录错误日志
         current_app.logger.error(f"获取主题帖子列表出错：{str(e)}")
@@ -360,7 +384,7 @@ def create_post(topic_id):
     """
     try:
         # 获取主题，如果不存在则返回404错误
-        topic = ForumTopic.query.get_or_404(topic_id)
+        ForumTopic.query.get_or_404(topic_id)
 
         # 获取请求数据
         data = request.get_json()
@@ -379,10 +403,7 @@ def create_post(topic_id):
             reply_to_user_id=data.get('reply_to_user_id')
         )
 
-        # 更新主题最后活动时间为帖子创建时间
-        topic.last_activity = post.created_at
-
-        # 将新帖子添加到数据库
+        # 将新帖子添加到数据库，主题的回复数和最后活动时间自动维护
         db.session.add(post)
         # 提交事务
         db.session.commit()
@@ -7,8 +7,11 @@
 - 创建新的非遗项目（仅限教师用户）
 
 这些API接口支持前端与后端的数据交互，为用户提供非遗项目的浏览和管理功能。
+列表和详情接口支持 fields / include 参数选择返回的字段和展开项（见 app/utils/serializers.py）。
 """
 
+from http import HTTPStatus
+
 from flask import request, current_app
 from . import api_bp  # 导入API蓝图
 from app.models import HeritageItem  # 导入非遗项目模型
@@ -16,9 +19,13 @@ from app import db  # 导入数据库实例
 from flask_login import current_user, login_required  # 导入用户认证相关功能
 from app.utils.decorators import teacher_required  # 导入教师权限装饰器
 from app.utils.response import api_success, api_error  # 导入API响应工具函数
+from app.utils import heritage_registry  # 导入非遗项目注册表
+from app.utils.serializers import HeritageItemSerializer, FieldSelectionError  # 导入按字段序列化工具
+from app.utils.query_profiler import query_budget  # 导入查询预算声明
 import traceback  # 导入异常追踪模块
 
 @api_bp.route('/heritage_items', methods=['GET'])
+@query_budget(4)  # 分页及总数、内容计数、身份加载
 def get_heritage_items():
     """获取非遗项目列表API
 
@@ -28,6 +35,8 @@ def get_heritage_items():
         page (int, 可选): 当前页码，默认为1
         per_page (int, 可选): 每页项目数量，默认为10
         category (str, 可选): 按项目分类筛选
+        fields (str, 可选): 逗号分隔的返回字段，如 id,name,category，默认返回全部字段
+        include (str, 可选): 逗号分隔的展开项，可选 recent_contents，默认不展开
 
     返回:
         JSON: 包含项目列表、总数、总页数和当前页码的响应
@@ -43,13 +52,16 @@ def get_heritage_items():
         }
     """
     try:
+        # 按请求的字段和展开项构建序列化器
+        serializer = HeritageItemSerializer.from_request()
+
         # 从请求参数中获取分页和筛选条件
         page = request.args.get('page', 1, type=int)  # 获取页码，默认为第1页
         per_page = request.args.get('per_page', 10, type=int)  # 获取每页数量，默认为10条
         category = request.args.get('category')  # 获取分类筛选条件
 
-        # 构建查询对象
-        query = HeritageItem.query
+        # 构建查询对象，只加载所选字段需要的列和关联
+        query = HeritageItem.query.options(*serializer.query_options())
 
         # 如果提供了分类参数，添加分类筛选条件
         if category:
@@ -59,12 +71,9 @@ def get_heritage_items():
         pagination = query.order_by(HeritageItem.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False)
 
-        # 获取当前页的项目列表
-        items = pagination.items
-
-        # 构建响应结果
+        # 构建响应结果，内容数量等统计对整页项目批量查询
         result = {
-            'items': [item.to_dict() for item in items],  # 将每个项目转换为字典格式
+            'items': serializer.dump_many(pagination.items),  # 将每个项目转换为字典格式
             'total': pagination.total,  # 总项目数
             'pages': pagination.pages,  # 总页数
             'current_page': page  # 当前页码
@@ -72,6 +81,9 @@ def get_heritage_items():
 
         # 返回成功响应
         return api_success(result)
+    except FieldSelectionError as e:
+        # 请求了未知的字段或展开项
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         # 记录错误日志
         current_app.logger.error(f"获取非遗项目列表出错：{str(e)}")
@@ -79,6 +91,64 @@ def get_heritage_items():
         # 返回错误响应
         return api_error("获取非遗项目列表失败")
 
+@api_bp.route('/heritage_items/categories', methods=['GET'])
+def get_heritage_categories():
+    """获取非遗项目分类及各分类项目数API
+
+    用于构建分类筛选器（facets），数据来自进程内的非遗项目注册表，不访问数据库。
+
+    返回:
+        JSON: 分类列表，按项目数降序排列
+        {
+            "success": true,
+            "data": {
+                "categories": [{"name": "武术", "count": 12}, ...],
+                "total": 30,    # 项目总数
+                "version": 3    # 注册表版本号，项目变更后递增
+            },
+            "message": "success"
+        }
+    """
+    try:
+        counts = heritage_registry.category_counts()
+        return api_success({
+            'categories': [{'name': name, 'count': count} for name, count in counts.items()],
+            'total': len(heritage_registry.get_items()),
+            'version': heritage_registry.version()
+        })
+    except Exception as e:
+        current_app.logger.error(f"获取非遗项目分类出错：{str(e)}")
+        return api_error("获取非遗项目分类失败")
+
+@api_bp.route('/heritage_items/choices', methods=['GET'])
+def get_heritage_choices():
+    """获取非遗项目精简列表API
+
+    只返回ID、名称、分类和封面，用于前端下拉框和筛选器，数据来自进程内的非遗项目注册表。
+
+    查询参数:
+        category (str, 可选): 按项目分类筛选
+
+    返回:
+        JSON: 项目列表，按ID排序
+        {
+            "success": true,
+            "data": {
+                "items": [{"id": 1, "name": "太极拳", "category": "武术", "cover_image": "..."}, ...],
+                "version": 3
+            },
+            "message": "success"
+        }
+    """
+    try:
+        category = request.args.get('category')
+        items = [entry._asdict() for entry in heritage_registry.get_items()
+                 if not category or entry.category == category]
+        return api_success({'items': items, 'version': heritage_registry.version()})
+    except Exception as e:
+        current_app.logger.error(f"获取非遗项目精简列表出错：{str(e)}")
+        return api_error("获取非遗项目列表失败")
+
 @api_bp.route('/heritage_items/<int:id>', methods=['GET'])
 def get_heritage_item(id):
     """获取非遗项目详情API
@@ -88,6 +158,10 @@ def get_heritage_item(id):
     URL参数:
         id (int): 非遗项目ID，作为URL路径的一部分
 
+    查询参数:
+        fields (str, 可选): 逗号分隔的返回字段，嵌套内容的字段以 recent_contents. 为前缀
+        include (str, 可选): 逗号分隔的展开项，默认展开 recent_contents（最近10条内容）
+
     返回:
         JSON: 包含项目详细信息的响应
         {
@@ -100,16 +174,19 @@ def get_heritage_item(id):
                 "cover_image": "封面图片路径",
                 "created_at": "创建时间",
                 "created_by": "创建者ID",
-                "contents": [...]  # 关联的内容列表
+                "recent_contents": [...]  # 最近的关联内容列表
             },
             "message": "success"
         }
     """
     try:
+        serializer = HeritageItemSerializer.from_request(default_include=('recent_contents',))
         # 查询项目，如果不存在则返回404错误
-        item = HeritageItem.query.get_or_404(id)
-        # 返回项目详情，包括关联的内容
-        return api_success(item.to_dict(include_contents=True))
+        item = HeritageItem.query.options(*serializer.query_options()).filter_by(id=id).first_or_404()
+        # 返回项目详情，默认包括最近的关联内容
+        return api_success(serializer.dump(item))
+    except FieldSelectionError as e:
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         # 记录错误日志
         current_app.logger.error(f"获取非遗项目详情出错：{str(e)}")
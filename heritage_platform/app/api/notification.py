@@ -2,9 +2,11 @@
 通知和消息API模块
 
 本模块提供与用户通知和私信相关的RESTful API接口，包括：
+- 分页获取通知列表（键集分页，按日期分组）
 - 获取未读通知数量
 - 将单个通知标记为已读
 - 将所有通知标记为已读
+- 将指定ID及之前的通知标记为已读
 - 获取未读私信数量
 
 这些API接口需要用户登录后才能访问，用于支持实时通知系统和私信功能。
@@ -16,6 +18,78 @@ from app.models import Notification, Message  # 通知和消息模型
 from app import db, limiter  # 数据库和请求限制器
 from . import api_bp  # API蓝图
 import traceback  # 异常追踪
+from app.utils.notification_feed import (  # 通知分页和批量已读
+    DEFAULT_PAGE_SIZE, load_notifications, mark_read_up_to, parse_notification_id
+)
+
+def _serialize_notification(notification):
+    """通知列表项的JSON表示"""
+    return {
+        'id': notification.id,
+        'type': notification.type,
+        'content': notification.content,
+        'link': notification.link,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.strftime('%Y-%m-%d %H:%M:%S') if notification.created_at else None,
+        'updated_at': notification.updated_at.strftime('%Y-%m-%d %H:%M:%S') if notification.updated_at else None,
+        'sender_id': notification.sender_id,
+        'sender': notification.sender.username if notification.sender else None,
+        'target': notification.target,
+        'actor_count': notification.actor_count or 1,
+        'recent_actor_ids': [int(v) for v in notification.recent_actor_ids.split(',') if v]
+        if notification.recent_actor_ids else []
+    }
+
+@api_bp.route('/notifications', methods=['GET'])
+@login_required
+def list_notifications():
+    """分页获取通知列表API
+
+    按ID倒序键集分页返回当前登录用户的通知，并按日期分组。
+    翻页时把上一页返回的 next_cursor 作为 before 参数传入。
+
+    路由: /notifications
+    方法: GET
+    权限: 需要用户登录
+
+    Query参数:
+        before (int, optional): 分页游标，只返回ID小于该值的通知
+        limit (int, optional): 每页数量，默认为20，最大为100
+        unread (int, optional): 为1时只返回未读通知
+
+    Returns:
+        JSON: 通知列表
+        {
+            "groups": [
+                {"date": "2025-05-01", "items": [{...}, ...]},
+                ...
+            ],
+            "next_cursor": 980,  // 下一页游标，没有更多时为null
+            "max_id": 1000       // 本页最新通知的ID，可用于 mark-read-up-to
+        }
+
+    错误响应:
+        401: 用户未登录
+        500: 服务器内部错误
+    """
+    try:
+        page = load_notifications(
+            current_user.id,
+            before=request.args.get('before', type=int),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            unread_only=request.args.get('unread', type=int) == 1
+        )
+        return jsonify({
+            'groups': [{
+                'date': day.strftime('%Y-%m-%d') if day else None,
+                'items': [_serialize_notification(n) for n in items]
+            } for day, items in page.groups],
+            'next_cursor': page.next_cursor,
+            'max_id': page.max_id
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error in list_notifications: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'error': '获取通知列表失败'}), 500
 
 @api_bp.route('/notifications/unread-count')
 @login_required
@@ -133,42 +207,80 @@ def mark_as_read():
 def mark_all_as_read():
     """将所有通知标记为已读API
 
-    将当前登录用户的所有未读通知标记为已读状态。
+    将当前登录用户的所有未读通知用一条UPDATE语句标记为已读状态，不逐条加载通知。
     需要用户登录。
 
     路由: /notifications/mark-all-read
     方法: POST
     权限: 需要用户登录
 
+    请求体(JSON，可选):
+        {
+            "up_to_id": 120  // 只标记ID不大于该值的通知，避免误标页面打开后才到达的新通知
+        }
+
     Returns:
         JSON: 操作成功的响应
         {
-            "message": "所有通知已标记为已读"
+            "message": "所有通知已标记为已读",
+            "count": 12  // 实际标记的通知数
         }
 
     错误响应:
+        400: up_to_id 格式错误
         401: 用户未登录
         500: 服务器内部错误
     """
-    try:
-        # 查询当前用户的所有未读通知
-        notifications = Notification.query.filter_by(
-            user_id=current_user.id,  # 当前登录用户
-            is_read=False  # 未读状态
-        ).all()
+    return _mark_read_up_to(required=False, message='所有通知已标记为已读')
 
-        # 将每个通知标记为已读
-        for notification in notifications:
-            notification.is_read = True
+@api_bp.route('/notifications/mark-read-up-to', methods=['POST'])
+@login_required
+def mark_read_up_to_id():
+    """将指定ID及之前的通知标记为已读API
 
-        # 提交事务
-        db.session.commit()
+    将当前登录用户ID不大于 up_to_id 的未读通知用一条UPDATE语句标记为已读，
+    适合通知很多的用户"读到这里"的场景，不需要逐条加载通知。
 
-        # 返回成功响应
-        return jsonify({'message': '所有通知已标记为已读'})
+    路由: /notifications/mark-read-up-to
+    方法: POST
+    权限: 需要用户登录
+
+    请求体(JSON):
+        {
+            "up_to_id": 120  // 必填，已读上界（包含）
+        }
+
+    Returns:
+        JSON: 操作成功的响应
+        {
+            "message": "标记成功",
+            "count": 12  // 实际标记的通知数
+        }
+
+    错误响应:
+        400: 缺少 up_to_id 或格式错误
+        401: 用户未登录
+        500: 服务器内部错误
+    """
+    return _mark_read_up_to(required=True, message='标记成功')
+
+def _mark_read_up_to(required, message):
+    """解析 up_to_id 并执行批量已读"""
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            up_to_id = parse_notification_id(data.get('up_to_id'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'up_to_id必须是正整数'}), 400
+        if required and up_to_id is None:
+            return jsonify({'error': 'up_to_id是必需参数'}), 400
+
+        count = mark_read_up_to(current_user.id, up_to_id)
+        db.session.commit()
+        return jsonify({'message': message, 'count': count})
     except Exception as e:
         # 记录错误日志
-        current_app.logger.error(f"Error in mark_all_as_read: {str(e)}\n{traceback.format_exc()}")
+        current_app.logger.error(f"Error in mark_read_up_to: {str(e)}\n{traceback.format_exc()}")
         # 回滚事务
         db.session.rollback()
         # 返回错误响应
@@ -8,17 +8,24 @@
 - 修改用户密码
 
 这些API接口需要用户登录后才能访问，用于支持用户中心和个人资料页面的功能。
+内容列表接口支持 fields / include 参数选择返回的字段和展开项（见 app/utils/serializers.py）。
 """
 
+from http import HTTPStatus
+
 from flask import request, current_app
 from . import api_bp  # 导入API蓝图
 from app.models import Content, Favorite  # 导入用户相关模型
 from app import db  # 导入数据库实例
 from flask_login import current_user, login_required  # 导入用户认证相关功能
 from app.utils.response import api_success, api_error  # 导入API响应工具函数
+from app.utils.query_profiler import query_budget  # 导入查询预算声明
+from app.utils.user_stats import get_user_stats  # 导入用户统计查询
+from app.utils.serializers import ContentSerializer, FieldSelectionError  # 导入按字段序列化工具
 
 @api_bp.route('/user/profile', methods=['GET'])
 @login_required  # 要求用户登录
+@query_budget(3)  # 身份、完整用户信息、统计行
 def get_user_profile():
     """获取用户个人资料API
 
@@ -59,28 +66,12 @@ def get_user_profile():
             'created_at': current_user.created_at.strftime('%Y-%m-%d %H:%M:%S')  # 格式化注册时间
         }
 
-        # 导入需要用于统计的模型类
-        from app.models import Comment, Like, Favorite, ForumTopic, ForumPost
-
-        # 计算内容相关统计数据
-        content_count = Content.query.filter_by(user_id=current_user.id).count()  # 发布内容数
-        comment_count = Comment.query.filter_by(user_id=current_user.id).count()  # 评论数
-        like_count = Like.query.filter_by(user_id=current_user.id).count()  # 点赞数
-        favorite_count = Favorite.query.filter_by(user_id=current_user.id).count()  # 收藏数
-
-        # 计算论坛相关统计数据
-        topic_count = ForumTopic.query.filter_by(user_id=current_user.id).count()  # 发布话题数
-        post_count = ForumPost.query.filter_by(user_id=current_user.id).count()  # 论坛回复数
-
-        # 将所有统计数据合并到一个字典中
-        stats = {
-            'content_count': content_count,
-            'comment_count': comment_count,
-            'like_count': like_count,
-            'favorite_count': favorite_count,
-            'topic_count': topic_count,
-            'post_count': post_count
-        }
+        # 统计数据从用户统计表中一次读取
+        user_stats = get_user_stats(current_user.id)
+        stats = {column: user_stats[column] for column in (
+            'content_count', 'comment_count', 'like_count',
+            'favorite_count', 'topic_count', 'post_count'
+        )}
 
         # 将统计数据添加到用户信息中
         user_data['stats'] = stats
@@ -104,6 +95,8 @@ def get_user_contents():
     URL参数:
         page (int, 可选): 当前页码，默认为1
         per_page (int, 可选): 每页内容数量，默认为10
+        fields (str, 可选): 逗号分隔的返回字段，默认返回全部字段
+        include (str, 可选): 逗号分隔的展开项，默认展开 images
 
     返回:
         JSON: 包含用户发布内容列表的分页响应
@@ -119,21 +112,22 @@ def get_user_contents():
         }
     """
     try:
+        # 按请求的字段和展开项构建序列化器
+        serializer = ContentSerializer.from_request()
+
         # 从请求参数中获取分页信息
         page = request.args.get('page', 1, type=int)  # 获取页码，默认为第1页
         per_page = request.args.get('per_page', 10, type=int)  # 获取每页数量，默认为10条
 
         # 查询当前用户发布的内容，按创建时间降序排序
-        pagination = Content.query.filter_by(user_id=current_user.id).order_by(
+        pagination = Content.query.options(*serializer.query_options()).filter_by(
+            user_id=current_user.id).order_by(
             Content.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False)
 
-        # 获取当前页的内容列表
-        contents = pagination.items
-
-        # 构建响应结果
+        # 构建响应结果，计数和图片对整页内容批量查询
         result = {
-            'items': [content.to_dict() for content in contents],  # 将每个内容转换为字典格式
+            'items': serializer.dump_many(pagination.items),  # 将每个内容转换为字典格式
             'total': pagination.total,  # 总内容数
             'pages': pagination.pages,  # 总页数
             'current_page': page  # 当前页码
@@ -141,6 +135,9 @@ def get_user_contents():
 
         # 返回成功响应
         return api_success(result)
+    except FieldSelectionError as e:
+        # 请求了未知的字段或展开项
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         # 记录错误日志
         current_app.logger.error(f"获取用户内容出错：{str(e)}")
@@ -149,6 +146,7 @@ def get_user_contents():
 
 @api_bp.route('/user/favorites', methods=['GET'])
 @login_required  # 要求用户登录
+@query_budget(8)  # 身份、收藏ID、分页及总数、三项计数、图片
 def get_user_favorites():
     """获取用户收藏内容API
 
@@ -158,6 +156,8 @@ def get_user_favorites():
     URL参数:
         page (int, 可选): 当前页码，默认为1
         per_page (int, 可选): 每页内容数量，默认为10
+        fields (str, 可选): 逗号分隔的返回字段，默认返回全部字段
+        include (str, 可选): 逗号分隔的展开项，默认展开 images
 
     返回:
         JSON: 包含用户收藏内容列表的分页响应
@@ -173,6 +173,9 @@ def get_user_favorites():
         }
     """
     try:
+        # 按请求的字段和展开项构建序列化器
+        serializer = ContentSerializer.from_request()
+
         # 从请求参数中获取分页信息
         page = request.args.get('page', 1, type=int)  # 获取页码，默认为第1页
         per_page = request.args.get('per_page', 10, type=int)  # 获取每页数量，默认为10条
@@ -186,16 +189,14 @@ def get_user_favorites():
         # 如果有收藏内容，则查询这些内容的详细信息
         if favorite_ids:
             # 使用ID列表查询内容，按创建时间降序排序
-            pagination = Content.query.filter(Content.id.in_(favorite_ids)).order_by(
+            pagination = Content.query.options(*serializer.query_options()).filter(
+                Content.id.in_(favorite_ids)).order_by(
                 Content.created_at.desc()).paginate(
                 page=page, per_page=per_page, error_out=False)
 
-            # 获取当前页的内容列表
-            contents = pagination.items
-
-            # 构建响应结果
+            # 构建响应结果，计数和图片对整页内容批量查询
             result = {
-                'items': [content.to_dict() for content in contents],  # 将每个内容转换为字典格式
+                'items': serializer.dump_many(pagination.items),  # 将每个内容转换为字典格式
                 'total': pagination.total,  # 总收藏数
                 'pages': pagination.pages,  # 总页数
                 'current_page': page  # 当前页码
@@ -211,6 +212,9 @@ def get_user_favorites():
 
         # 返回成功响应
         return api_success(result)
+    except FieldSelectionError as e:
+        # 请求了未知的字段或展开项
+        return api_error(str(e), HTTPStatus.BAD_REQUEST, 'INVALID_FIELDS')
     except Exception as e:
         # 记录错误日志
         current_app.logger.error(f"获取用户收藏出错：{str(e)}")
@@ -14,6 +14,9 @@
 - forum.py: 论坛模型，包括主题和回复
 - notification.py: 通知模型，处理系统通知和公告
 - message.py: 消息模型，处理私信和群组消息
+- activity.py: 活跃度汇总模型，按天汇总全站和用户的发布数量，以及用户累计统计
+- archive.py: 归档模型，保存超过保留期的消息和通知
+- outbox.py: 发件箱模型，保存随业务事务写入、由后台分发的实时推送事件
 
 这些模型共同构成了应用的数据层，定义了数据库结构和业务逻辑。
 """
@@ -44,6 +47,9 @@ from . import interaction
 from . import forum  # 添加论坛模型导入
 from . import notification  # 添加通知模型导入
 from . import message  # 添加私信模型导入
+from . import activity  # 活跃度汇总模型
+from . import archive  # 归档模型
+from . import outbox  # 发件箱模型
 
 # 为方便使用，导出主要模型类
 # 这些导出允许其他模块直接从app.models导入这些类，而不需要从具体的子模块导入
@@ -56,3 +62,6 @@ from .forum import ForumTopic, ForumPost  # 导出论坛模型类
 from .notification import Notification  # 导出通知模型类
 # 从message模块导入模型类，现在已经没有循环导入的问题
 from .message import Message, MessageGroup, UserGroup, MessageReadStatus
+from .activity import DailyActivity, UserDailyActivity, UserStats  # 导出活跃度汇总模型
+from .archive import MessageArchive, NotificationArchive  # 导出归档模型
+from .outbox import OutboxEvent  # 导出发件箱模型
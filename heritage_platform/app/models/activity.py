@@ -0,0 +1,101 @@
+"""
+活跃度汇总模型模块
+
+本模块定义了按天汇总的活跃度统计表，用于控制面板和活跃度统计接口：
+- DailyActivity: 全站每日新增数据汇总（用户、非遗项目、内容、主题、帖子、评论）
+- UserDailyActivity: 每个用户每日的发布数量汇总（内容、主题、帖子、评论）
+- UserStats: 每个用户的累计统计（内容、评论、点赞、收藏、主题、帖子、非遗项目），用于个人资料页
+
+汇总数据在相关记录插入或删除时增量维护（见 app/utils/activity_stats.py），
+30天的图表只需读取最多31行数据，不再对原始表做 GROUP BY 聚合。
+数据不一致时可以使用 flask backfill-activity 命令根据原始数据重建。
+
+UserStats 同样增量维护（见 app/utils/user_stats.py），个人资料只需读取一行，
+可以使用 flask reconcile-user-stats 命令校正。
+"""
+
+from app import db
+
+
+class DailyActivity(db.Model):
+    """全站每日活跃度汇总
+
+    每天一行，各列为当天新增（减去已删除）的记录数。
+
+    属性:
+        day: 日期（按记录的created_at划分）
+        users: 新注册用户数
+        heritage_items: 新建非遗项目数
+        contents: 新发布内容数
+        topics: 新建论坛主题数
+        posts: 新发论坛帖子数
+        comments: 新发评论数
+    """
+    __tablename__ = 'daily_activity'
+
+    day = db.Column(db.Date, primary_key=True)
+    users = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    heritage_items = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    contents = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    topics = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    posts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<DailyActivity {self.day}>'
+
+
+class UserDailyActivity(db.Model):
+    """用户每日活跃度汇总
+
+    每个用户每天一行，用户被删除时由外键级联删除。
+
+    属性:
+        user_id: 用户ID
+        day: 日期
+        contents: 当天发布的内容数
+        topics: 当天创建的主题数
+        posts: 当天发表的帖子数
+        comments: 当天发表的评论数
+    """
+    __tablename__ = 'user_daily_activity'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    contents = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    topics = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    posts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<UserDailyActivity {self.user_id} {self.day}>'
+
+
+class UserStats(db.Model):
+    """用户累计统计
+
+    每个用户一行，在用户第一次产生相关数据时创建，用户被删除时由外键级联删除。
+
+    属性:
+        user_id: 用户ID
+        content_count: 发布的内容数
+        comment_count: 发表的评论数
+        like_count: 点赞数
+        favorite_count: 收藏数
+        topic_count: 创建的论坛主题数
+        post_count: 发表的论坛帖子数
+        heritage_count: 创建的非遗项目数
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    content_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    topic_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    heritage_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id}>'
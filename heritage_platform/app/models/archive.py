@@ -0,0 +1,60 @@
+"""
+归档模型模块
+
+本模块定义了私信和通知的归档表，结构与原表一致，另加归档时间：
+- MessageArchive: 超过保留期的私信、群组消息和广播消息
+- NotificationArchive: 超过保留期的已读通知
+
+归档由 app/utils/retention.py 按保留策略分批搬移，原表只保留近期数据，
+收件箱、通知列表等高频查询使用的索引保持小而紧凑。
+归档表不设外键约束，用户或群组删除后历史记录仍可保留；
+会话视图通过只读关系读取归档消息的发送者和接收者。
+"""
+
+from app import db
+
+
+class MessageArchive(db.Model):
+    """已归档的消息
+
+    列与 Message 一致，id 沿用原消息的ID。
+    """
+    __tablename__ = 'messages_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    sender_id = db.Column(db.Integer, index=True)
+    receiver_id = db.Column(db.Integer, index=True)
+    group_id = db.Column(db.Integer, index=True)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime)
+    is_read = db.Column(db.Boolean, default=False)
+    sender_deleted = db.Column(db.Boolean, default=False)
+    receiver_deleted = db.Column(db.Boolean, default=False)
+    message_type = db.Column(db.String(20), default='personal')
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    # 只读关系，便于模板与 Message 共用
+    sender = db.relationship('User', primaryjoin='foreign(MessageArchive.sender_id) == User.id', viewonly=True)
+    receiver = db.relationship('User', primaryjoin='foreign(MessageArchive.receiver_id) == User.id', viewonly=True)
+
+
+class NotificationArchive(db.Model):
+    """已归档的通知
+
+    列与 Notification 一致，id 沿用原通知的ID。
+    """
+    __tablename__ = 'notifications_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    sender_id = db.Column(db.Integer)
+    type = db.Column(db.String(20), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    link = db.Column(db.String(255))
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    target = db.Column(db.String(100))
+    actor_count = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    recent_actor_ids = db.Column(db.String(255))
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
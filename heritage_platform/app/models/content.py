@@ -13,7 +13,6 @@
 - 关联关系：与非遗项目、作者和互动记录关联
 """
 
-from tokenize import Comment
 from app import db
 from . import beijing_time
 
@@ -42,6 +41,7 @@ class Content(db.Model):
         created_at: 创建时间
         updated_at: 更新时间
         views: 浏览量
+        trending_score: 随时间衰减的热度分（对数形式），用于热门排序，见 app/utils/trending.py
     """
     __tablename__ = 'contents'
 
@@ -64,6 +64,7 @@ class Content(db.Model):
     likes = db.relationship('Like', backref='content', lazy='dynamic')
     favorites = db.relationship('Favorite', backref='content', lazy='dynamic')
     views = db.Column(db.Integer, default=0)  # 添加浏览量字段
+    trending_score = db.Column(db.Float, nullable=False, default=0, server_default='0', index=True)  # 热度分
 
     # 添加与图片的关系
     images = db.relationship('ContentImage', backref='content', lazy='dynamic', cascade='all, delete-orphan')
@@ -81,9 +82,8 @@ class Content(db.Model):
     def to_dict(self, include_comments=False):
         """将内容转换为字典格式
 
-        用于API响应和JSON序列化，包含内容的完整信息。
-        同时获取关联的非遗项目和作者信息，避免前端需要额外查询。
-        可选择是否包含最近的评论。
+        用于API响应和JSON序列化，包含内容的完整信息和图片列表。
+        由 ContentSerializer 生成，API列表应使用序列化器的 dump_many 批量计数（见 app/utils/serializers.py）。
 
         Args:
             include_comments (bool): 是否包含最近的评论，默认为False
@@ -91,39 +91,9 @@ class Content(db.Model):
         Returns:
             dict: 包含内容数据的字典，包括统计信息和关联数据
         """
-        # 导入HeritageItem以便获取关联的非遗项目
-        from app.models import HeritageItem
-
-        # 获取关联的非遗项目
-        heritage_item = HeritageItem.query.get(self.heritage_id) if self.heritage_id else None
-
-        result = {
-            'id': self.id,
-            'title': self.title,
-            'heritage_id': self.heritage_id,
-            'heritage_name': heritage_item.name if heritage_item else None,
-            'user_id': self.user_id,
-            'author_name': self.author.username if self.author else None,
-            'author_avatar': self.author.avatar if self.author else None,
-            'content_type': self.content_type,
-            'text_content': self.text_content,
-            'file_path': self.file_path,
-            'cover_image': self.cover_image,
-            'rich_content': self.rich_content if hasattr(self, 'rich_content') else None,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'comment_count': self.comments.count(),
-            'like_count': self.likes.count(),
-            'favorite_count': self.favorites.count(),
-            'views': self.views,  # 添加浏览量到字典
-            'images': [image.to_dict() for image in self.images.all()]  # 添加图片列表
-        }
-
-        if include_comments:
-            comments = self.comments.order_by(Comment.created_at.desc()).limit(10).all()
-            result['recent_comments'] = [comment.to_dict() for comment in comments]
-
-        return result
+        from app.utils.serializers import ContentSerializer
+        include = ('images', 'recent_comments') if include_comments else ('images',)
+        return ContentSerializer(include=include).dump(self)
 
 class ContentImage(db.Model):
     """内容图片模型
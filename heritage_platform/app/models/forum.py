@@ -11,6 +11,7 @@
 - 关闭功能：可以关闭主题，阻止新回复
 - 嵌套回复：支持回复特定的帖子，形成对话
 - 活动跟踪：记录最后活动时间，便于排序
+- 计数冗余：主题上保存帖子数和最后回复，列表页无需逐行统计
 """
 
 from app import db
@@ -32,6 +33,13 @@ class ForumTopic(db.Model):
         is_closed: 是否关闭（不允许新回复）
         created_at: 创建时间
         last_activity: 最后活动时间，用于排序
+        reply_count: 主题下的帖子总数（包含首帖）
+        last_post_id: 最后一个帖子的ID
+        last_poster_id: 最后发帖的用户ID
+        trending_score: 随时间衰减的热度分（对数形式），用于热门排序，见 app/utils/trending.py
+
+    reply_count、last_post_id、last_poster_id 和 last_activity 在帖子插入和删除时
+    由计数处理函数在同一事务中维护（见 app/utils/forum_counters.py），不需要在视图中修改。
     """
     __tablename__ = 'forum_topics'
 
@@ -44,9 +52,15 @@ class ForumTopic(db.Model):
     is_closed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=beijing_time)
     last_activity = db.Column(db.DateTime, default=beijing_time)
+    reply_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # 不设外键，避免与 forum_posts 形成循环依赖，批量删除帖子时也不受约束限制
+    last_post_id = db.Column(db.Integer, nullable=True)
+    last_poster_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    trending_score = db.Column(db.Float, nullable=False, default=0, server_default='0', index=True)
 
     # 关系
     posts = db.relationship('ForumPost', backref='topic', lazy='dynamic')
+    last_poster = db.relationship('User', foreign_keys=[last_poster_id])
 
     def __repr__(self):
         """返回主题的字符串表示
@@ -62,38 +76,24 @@ class ForumTopic(db.Model):
     def post_count(self):
         """获取主题下的帖子数量
 
-        计算与主题关联的帖子总数，用于显示回复数量。
+        返回冗余保存的帖子总数，不再执行COUNT查询。
 
         Returns:
             int: 帖子数量
         """
-        return self.posts.count()
+        return self.reply_count or 0
 
     def to_dict(self):
         """将主题转换为字典格式
 
-        用于API响应和JSON序列化，包含主题的完整信息。
-        同时获取创建者用户名，避免前端需要额外查询。
+        用于API响应和JSON序列化，由 ForumTopicSerializer 生成（见 app/utils/serializers.py）。
+        列表查询应使用序列化器的 query_options() 预加载创建者和最后回复者。
 
         Returns:
             dict: 包含主题数据的字典
         """
-        from app.models import User
-        creator = User.query.get(self.user_id)
-
-        return {
-            'id': self.id,
-            'title': self.title,
-            'category': self.category,
-            'user_id': self.user_id,
-            'creator': creator.username if creator else None,
-            'views': self.views,
-            'post_count': self.post_count,
-            'is_pinned': self.is_pinned,
-            'is_closed': self.is_closed,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
-            'last_activity': self.last_activity.strftime('%Y-%m-%d %H:%M:%S') if self.last_activity else None
-        }
+        from app.utils.serializers import ForumTopicSerializer
+        return ForumTopicSerializer().dump(self)
 
 class ForumPost(db.Model):
     """论坛帖子回复模型
@@ -162,26 +162,11 @@ class ForumPost(db.Model):
     def to_dict(self):
         """将帖子转换为字典格式
 
-        用于API响应和JSON序列化，包含帖子的完整信息。
-        同时获取作者和回复目标用户信息，避免前端需要额外查询。
+        用于API响应和JSON序列化，包含帖子的完整信息和作者、回复目标用户信息。
+        由 ForumPostSerializer 生成（见 app/utils/serializers.py）。
 
         Returns:
             dict: 包含帖子数据的字典，包括作者信息和回复关系
         """
-        from app.models import User
-        author = User.query.get(self.user_id)
-        reply_to = User.query.get(self.reply_to_user_id) if self.reply_to_user_id else None
-
-        return {
-            'id': self.id,
-            'topic_id': self.topic_id,
-            'user_id': self.user_id,
-            'author': author.username if author else None,
-            'author_avatar': author.avatar if author else None,
-            'content': self.content,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'parent_id': self.parent_id,
-            'reply_to_user_id': self.reply_to_user_id,
-            'reply_to_username': reply_to.username if reply_to else None
-        }
+        from app.utils.serializers import ForumPostSerializer
+        return ForumPostSerializer().dump(self)
@@ -32,8 +32,8 @@ class HeritageItem(db.Model):
     def to_dict(self, include_contents=False):
         """转换为字典格式，用于API响应
         
-        将模型实例转换为字典格式，便于序列化为JSON响应。
-        可选择是否包含关联的内容数据。
+        由 HeritageItemSerializer 生成（见 app/utils/serializers.py），
+        可选择是否包含最近的10条关联内容。
         
         Args:
             include_contents (bool): 是否包含关联的内容数据，默认为False
@@ -41,27 +41,5 @@ class HeritageItem(db.Model):
         Returns:
             dict: 包含模型数据的字典
         """
-        from app.models import User
-        # 获取创建者信息
-        creator = User.query.get(self.created_by)
-        
-        # 构建基本数据字典
-        result = {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category,
-            'description': self.description,
-            'cover_image': self.cover_image,
-            'created_by': self.created_by,
-            'creator_name': creator.username if creator else None,  # 创建者用户名
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),  # 格式化创建时间
-            'content_count': self.contents.count()  # 关联内容数量
-        }
-        
-        # 如果需要包含内容数据，则查询最近的10条内容
-        if include_contents:
-            from app.models import Content
-            contents = Content.query.filter_by(heritage_id=self.id).order_by(Content.created_at.desc()).limit(10).all()
-            result['recent_contents'] = [content.to_dict() for content in contents]  # 将内容模型也转换为字典
-            
-        return result
+        from app.utils.serializers import HeritageItemSerializer
+        return HeritageItemSerializer(include=('recent_contents',) if include_contents else ()).dump(self)
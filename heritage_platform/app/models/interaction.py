@@ -123,6 +123,10 @@ class Like(db.Model):
         created_at: 点赞时间
     """
     __tablename__ = 'likes'
+    __table_args__ = (
+        # 同一用户对同一内容只能点赞一次，并发重复提交由数据库保证不会产生重复记录
+        db.UniqueConstraint('user_id', 'content_id', name='uq_likes_user_content'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -153,6 +157,10 @@ class Favorite(db.Model):
         created_at: 收藏时间
     """
     __tablename__ = 'favorites'
+    __table_args__ = (
+        # 同一用户对同一内容只能收藏一次，并发重复提交由数据库保证不会产生重复记录
+        db.UniqueConstraint('user_id', 'content_id', name='uq_favorites_user_content'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -29,8 +29,20 @@ class Notification(db.Model):
         link: 相关链接，如帖子URL（可选）
         is_read: 是否已读
         created_at: 创建时间
+        target: 通知目标，如 content:12、comment:7（可聚合的互动通知才有）
+        actor_count: 参与者人数，聚合后的通知大于1
+        recent_actor_ids: 最近参与者ID，逗号分隔，最新的在前
+        updated_at: 最后一次聚合更新的时间
+
+    索引 (user_id, id) 用于通知列表的键集分页，(user_id, is_read) 用于未读计数和批量已读，
+    (user_id, type, target) 用于查找可以合并的通知（见 app/utils/notification_aggregation.py）。
     """
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_id', 'user_id', 'id'),
+        db.Index('ix_notifications_user_id_is_read', 'user_id', 'is_read'),
+        db.Index('ix_notifications_user_id_type_target', 'user_id', 'type', 'target'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     # 接收通知的用户
@@ -47,6 +59,14 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     # 创建时间
     created_at = db.Column(db.DateTime, default=beijing_time)
+    # 通知目标(可选)，同一目标的通知在时间窗口内合并
+    target = db.Column(db.String(100))
+    # 参与者人数
+    actor_count = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    # 最近参与者ID，逗号分隔
+    recent_actor_ids = db.Column(db.String(255))
+    # 最后更新时间
+    updated_at = db.Column(db.DateTime, default=beijing_time)
 
     # 关系
     user = db.relationship('User', foreign_keys=[user_id], backref='notifications')
@@ -78,5 +98,8 @@ class Notification(db.Model):
             'link': self.link,
             'is_read': self.is_read,
             'created_at': self.created_at,
-            'sender': self.sender.username if self.sender else None
+            'updated_at': self.updated_at,
+            'sender': self.sender.username if self.sender else None,
+            'target': self.target,
+            'actor_count': self.actor_count or 1
         }
@@ -0,0 +1,52 @@
+"""
+发件箱模型模块
+
+本模块定义了实时推送的发件箱表（事务性发件箱模式）：
+- OutboxEvent: 一条待推送的 WebSocket 事件
+
+请求在自己的事务中写入通知、私信等业务数据时，把对应的推送事件一并写入本表，
+两者同时提交或同时回滚；事件由后台分发器读取并推送（见 app/utils/outbox.py），
+请求本身不等待推送完成。
+"""
+
+from app import db
+from . import beijing_time
+
+
+class OutboxEvent(db.Model):
+    """待推送的 WebSocket 事件
+
+    属性:
+        id: 事件唯一标识符，分发按ID顺序进行
+        event: Socket.IO 事件名，如 new_notification
+        room: 推送目标房间，如 user_3、topic_5
+        payload: 事件数据（JSON）
+        dedupe_key: 合并键，同一合并键的未分发事件只推送最新数据（可选）
+        created_at: 创建时间
+        available_at: 最早可分发的时间，用于延迟推送、重试退避和分发租约
+        claimed_at: 被分发器领取的时间，未领取时为空
+        claim_token: 最近一次领取的随机令牌，分发器按令牌读回自己领取的行
+        attempts: 失败次数
+        last_error: 最近一次失败的原因
+        dispatched_at: 分发完成的时间，未分发时为空
+    """
+    __tablename__ = 'outbox_events'
+    __table_args__ = (
+        db.Index('ix_outbox_events_dispatched_at_available_at', 'dispatched_at', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(50), nullable=False)
+    room = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    dedupe_key = db.Column(db.String(100), index=True)
+    created_at = db.Column(db.DateTime, default=beijing_time)
+    available_at = db.Column(db.DateTime, default=beijing_time, nullable=False)
+    claimed_at = db.Column(db.DateTime)
+    claim_token = db.Column(db.String(32))
+    attempts = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    last_error = db.Column(db.Text)
+    dispatched_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.event} -> {self.room}>'
@@ -6,7 +6,7 @@
 1. 定义User类，包含用户基本信息和身份验证方法
 2. 实现与其他模型的关联关系
 3. 提供用户角色判断的便捷属性
-4. 实现Flask-Login所需的用户加载函数
+4. 实现Flask-Login所需的用户加载函数（读取缓存的精简身份）
 
 用户角色体系：
 - admin: 管理员，拥有最高权限
@@ -15,8 +15,8 @@
 """
 
 from app import db, login_manager
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from app.utils import passwords
 from . import beijing_time
 
 class User(UserMixin, db.Model):
@@ -85,18 +85,18 @@ class User(UserMixin, db.Model):
         """密码属性setter
 
         设置密码时自动进行哈希处理，不存储明文密码。
-        使用werkzeug的generate_password_hash函数生成安全的密码哈希。
+        哈希算法和成本参数由 PASSWORD_HASH_METHOD 配置，计算在执行器中进行，不阻塞事件循环。
 
         Args:
             password: 明文密码
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def verify_password(self, password):
         """验证密码
 
         比较提供的明文密码与存储的密码哈希是否匹配。
-        使用werkzeug的check_password_hash函数进行安全比较。
+        使用哈希中记录的算法和参数进行安全比较，计算在执行器中进行，不阻塞事件循环。
 
         Args:
             password: 待验证的明文密码
@@ -104,7 +104,23 @@ class User(UserMixin, db.Model):
         Returns:
             bool: 密码匹配返回True，否则返回False
         """
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        """密码哈希的算法或成本参数已过时时，用刚验证通过的明文密码重新哈希
+
+        调用方负责提交会话。
+
+        Args:
+            password: 已验证通过的明文密码
+
+        Returns:
+            bool: 是否重新哈希
+        """
+        if not passwords.needs_rehash(self.password_hash):
+            return False
+        self.password = password
+        return True
 
     @property
     def is_admin(self):
@@ -130,11 +146,14 @@ def load_user(user_id):
 
     根据用户ID加载用户对象，供Flask-Login使用。
     这个函数是Flask-Login的必要组件，用于从会话中恢复用户。
+    HTTP请求和Socket.IO事件都经过这里，因此读取缓存的精简身份而不是完整的用户行，
+    其余属性在访问时才加载（见app.utils.user_identity）。
 
     Args:
         user_id: 用户ID，通常是字符串形式
 
     Returns:
-        User: 找到的用户对象，如果不存在则返回None
+        UserIdentity: 精简用户对象，如果不存在则返回None
     """
-    return User.query.get(int(user_id))
+    from app.utils.user_identity import load_identity
+    return load_identity(user_id)
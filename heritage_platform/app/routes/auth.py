@@ -9,7 +9,7 @@
 这些路由共同构成了平台的用户认证系统，是用户访问平台功能的入口。
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models.user import User
@@ -57,6 +57,15 @@ def login():
 
         # 验证用户存在且密码正确
         if user is not None and user.verify_password(form.password.data):
+            # 哈希参数调整后，用本次输入的密码按新参数重新哈希，失败不影响登录
+            if current_app.config.get('PASSWORD_REHASH_ON_LOGIN', True):
+                try:
+                    if user.rehash_password_if_needed(form.password.data):
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f"重新哈希用户 {user.id} 的密码失败: {str(e)}")
+
             # 登录用户，设置记住我选项
             login_user(user, remember=form.remember_me.data)
 
@@ -22,12 +22,18 @@ import os
 import uuid
 import traceback
 from werkzeug.utils import secure_filename
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
+from werkzeug.exceptions import HTTPException
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort
 from flask_login import current_user, login_required
 from app import db, csrf
-from app.models import Content, HeritageItem, Comment, Like, Favorite, ContentImage
+from app.models import Content, Comment, Like, Favorite, ContentImage
 from app.forms.content import ContentForm, CommentForm
 from app.utils.file_handlers import ALLOWED_IMAGE_EXTENSIONS, allowed_file, save_file
+from app.utils import counters, deferred, heritage_registry, trending
+from app.utils.comment_tree import load_comment_page
+from app.utils.viewer_state import get_viewer_state
+from app.utils.reactions import toggle_reaction
+from app.utils.notification_aggregation import notify, target_key
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import or_
 
@@ -40,7 +46,7 @@ def list():
 
     显示所有内容的列表，支持按内容类型、非遗项目筛选和关键词搜索。
     使用JOIN查询优化数据库性能，减少查询次数。
-    内容按创建时间倒序排列，支持分页。
+    内容默认按创建时间倒序排列，也可按热度排序，支持分页。
 
     路由: /list
     方法: GET
@@ -51,14 +57,17 @@ def list():
         type (str, optional): 按内容类型筛选，可选值为article/video/image/multimedia
         heritage_id (int, optional): 按非遗项目ID筛选
         q (str, optional): 搜索关键词，用于全文搜索
+        sort (str, optional): 排序方式，newest（默认，按创建时间）或 trending（按热度）
 
     模板上下文:
         items: 内容列表，包含完整的内容信息
         pagination: 分页对象，用于生成分页控件
         heritage_items: 所有非遗项目列表，用于筛选器
+        viewer_state: 当前用户对本页内容的点赞和收藏状态
         current_type: 当前选中的内容类型
         current_heritage_id: 当前选中的非遗项目ID
         search_query: 当前搜索关键词
+        current_sort: 当前排序方式
 
     性能优化:
         - 使用JOIN查询一次性获取内容和关联的非遗项目信息
@@ -69,6 +78,7 @@ def list():
     content_type = request.args.get('type')
     heritage_id = request.args.get('heritage_id', type=int)
     search_query = request.args.get('q', '')  # 获取搜索关键词
+    sort = trending.parse_sort(request.args.get('sort'))
     per_page = 12
 
     try:
@@ -90,9 +100,12 @@ def list():
         if heritage_id:
             query = query.filter(Content.heritage_id == heritage_id)
 
-        # 应用排序并进行分页
-        pagination = query.order_by(Content.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False)
+        # 应用排序并进行分页，热门排序走 trending_score 索引
+        if sort == trending.SORT_TRENDING:
+            query = query.order_by(*trending.order_by_trending(Content))
+        else:
+            query = query.order_by(Content.created_at.desc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
         items = pagination.items
 
@@ -102,9 +115,12 @@ def list():
         items = []
         pagination = None
 
-    # 获取所有非遗项目供筛选用
+    # 当前用户对本页内容的点赞和收藏状态（每种关系一条查询）
+    viewer_state = get_viewer_state([item.id for item in items])
+
+    # 获取所有非遗项目供筛选用（读取进程内注册表，只包含ID、名称、分类和封面）
     try:
-        heritage_items = HeritageItem.query.all()
+        heritage_items = heritage_registry.get_items()
     except Exception as e:
         current_app.logger.error(f"获取非遗项目列表错误: {str(e)}")
         heritage_items = []
@@ -113,8 +129,10 @@ def list():
                            items=items,
                            pagination=pagination,
                            heritage_items=heritage_items,
+                           viewer_state=viewer_state,
                            current_type=content_type,
                            current_heritage_id=heritage_id,
+                           current_sort=sort,
                            search_query=search_query)  # 传递搜索关键词到模板
 
 @content_bp.route('/detail/<int:id>', methods=['GET', 'POST'])
@@ -141,7 +159,7 @@ def detail(id):
     模板上下文:
         content: 内容详情，包含标题、类型、作者等完整信息
         form: 评论表单
-        comments: 评论列表，按时间倒序排列
+        comments: 评论树节点列表，顶级评论按时间倒序排列，回复按时间正序嵌套在 replies 中
         pagination: 评论分页对象
         has_liked: 当前用户是否已点赞
         has_favorited: 当前用户是否已收藏
@@ -154,13 +172,8 @@ def detail(id):
     """
     content = Content.query.options(db.joinedload(Content.heritage)).get_or_404(id)
 
-    # 更新浏览量
-    content.views += 1
-    try:
-        db.session.commit()
-    except Exception as e:
-        current_app.logger.error(f"更新浏览量失败: {str(e)}")
-        db.session.rollback()
+    # 浏览量和热度在响应发送后合并写入，页面直接显示包含本次浏览的浏览量
+    deferred.record_view(Content, content)
 
     # 评论表单
     form = CommentForm()
@@ -177,14 +190,14 @@ def detail(id):
 
             # 如果评论者不是内容作者本人，发送通知
             if current_user.id != content.user_id:
-                from app.routes.notification import send_notification
-                content_msg = f"{current_user.username} 评论了你的内容 \"{content.title}\""
-                send_notification(
+                notify(
                     user_id=content.user_id,
-                    content=content_msg,
                     notification_type='reply',
-                    link=url_for('content.detail', id=id),
-                    sender_id=current_user.id
+                    target=target_key('content', id),
+                    action=f"评论了你的内容 \"{content.title}\"",
+                    sender_id=current_user.id,
+                    sender_name=current_user.username,
+                    link=url_for('content.detail', id=id)
                 )
 
             db.session.commit()
@@ -196,30 +209,14 @@ def detail(id):
             current_app.logger.error(f"发布评论失败: {str(e)}")
             flash('发布评论失败，请稍后重试', 'danger')
 
-    # 获取顶级评论列表（不包括回复）
+    # 获取一页顶级评论及其回复树（固定3条查询，不随评论数量增加）
     page = request.args.get('page', 1, type=int)
-    comments_pagination = Comment.query.filter_by(
-        content_id=id,
-        parent_id=None
-    ).order_by(Comment.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False
-    )
-
-    # 检查当前用户是否已点赞
-    has_liked = False
-    if current_user.is_authenticated:
-        has_liked = Like.query.filter_by(
-            user_id=current_user.id,
-            content_id=id
-        ).first() is not None
-
-    # 检查当前用户是否已收藏
-    has_favorited = False
-    if current_user.is_authenticated:
-        has_favorited = Favorite.query.filter_by(
-            user_id=current_user.id,
-            content_id=id
-        ).first() is not None
+    comments, comments_pagination = load_comment_page(id, page=page, per_page=10)
+
+    # 当前用户的点赞和收藏状态
+    viewer_state = get_viewer_state([id])
+    has_liked = viewer_state.liked(id)
+    has_favorited = viewer_state.favorited(id)
 
     # 获取相关内容推荐 - 相同非遗项目且相同类型的内容，排除当前内容
     related_contents = Content.query.filter(
@@ -248,7 +245,7 @@ def detail(id):
     return render_template('content/detail.html',
                            content=content,
                            form=form,
-                           comments=comments_pagination.items,
+                           comments=comments,
                            pagination=comments_pagination,
                            has_liked=has_liked,
                            has_favorited=has_favorited,
@@ -268,7 +265,7 @@ def edit(id):
     form = ContentForm(obj=content)
 
     # 动态加载非遗项目选项
-    form.heritage_id.choices = [(h.id, h.name) for h in HeritageItem.query.all()]
+    form.heritage_id.choices = heritage_registry.choices()
 
     if form.validate_on_submit():
         try:
@@ -412,9 +409,8 @@ def create():
 
     # 动态加载非遗项目选项
     try:
-        heritage_items = HeritageItem.query.all()
-        form.heritage_id.choices = [(h.id, h.name) for h in heritage_items]
-        current_app.logger.info(f"加载了 {len(heritage_items)} 个非遗项目选项")
+        form.heritage_id.choices = heritage_registry.choices()
+        current_app.logger.info(f"加载了 {len(form.heritage_id.choices)} 个非遗项目选项")
     except Exception as e:
         current_app.logger.error(f"加载非遗项目选项失败: {str(e)}")
         form.heritage_id.choices = []
@@ -791,41 +787,33 @@ def upload_image():
 @content_bp.route('/like/<int:id>', methods=['POST'])
 @login_required
 def like(id):
-    """点赞内容"""
-    content = Content.query.get_or_404(id)
-
-    # 检查是否已点赞
-    existing_like = Like.query.filter_by(
-        user_id=current_user.id,
-        content_id=id
-    ).first()
-
+    """点赞内容（切换点赞状态）"""
     try:
-        if existing_like:
-            # 取消点赞
-            db.session.delete(existing_like)
-            message = '取消点赞成功'
-        else:
-            # 添加点赞
-            like = Like(user_id=current_user.id, content_id=id)
-            db.session.add(like)
-            message = '点赞成功'
-
-            # 如果点赞者不是内容作者本人，发送通知
+        result = toggle_reaction('like', current_user.id, id)
+        if result is None:
+            abort(404)
+        message = '点赞成功' if result.active else '取消点赞成功'
+
+        # 新增点赞且点赞者不是内容作者本人时，发送通知
+        if result.active and result.changed:
+            content = db.session.get(Content, id)
             if current_user.id != content.user_id:
-                from app.routes.notification import send_notification
-                content_msg = f"{current_user.username} 点赞了你的内容\"{content.title}\""
-                send_notification(
+                notify(
                     user_id=content.user_id,
-                    content=content_msg,
                     notification_type='like',
-                    link=url_for('content.detail', id=id),
-                    sender_id=current_user.id
+                    target=target_key('content', id),
+                    action=f"点赞了你的内容\"{content.title}\"",
+                    sender_id=current_user.id,
+                    sender_name=current_user.username,
+                    link=url_for('content.detail', id=id)
                 )
 
         db.session.commit()
         flash(message, 'success')
 
+    except HTTPException:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"点赞操作失败: {str(e)}")
@@ -929,10 +917,10 @@ def delete(id):
             except Exception as e:
                 current_app.logger.error(f"删除图片文件失败: {str(e)}")
 
-        # 删除关联数据
-        Comment.query.filter_by(content_id=id).delete()
-        Like.query.filter_by(content_id=id).delete()
-        Favorite.query.filter_by(content_id=id).delete()
+        # 删除关联数据（同步维护汇总计数）
+        counters.bulk_delete(Comment.query.filter_by(content_id=id))
+        counters.bulk_delete(Like.query.filter_by(content_id=id))
+        counters.bulk_delete(Favorite.query.filter_by(content_id=id))
 
         # 删除内容
         db.session.delete(content)
@@ -984,14 +972,14 @@ def reply_comment(content_id, comment_id):
 
             # 发送通知给被回复的用户（如果回复者不是被回复者本人）
             if current_user.id != parent_comment.user_id:
-                from app.routes.notification import send_notification
-                content_msg = f"{current_user.username} 回复了你在内容 \"{content.title}\" 中的评论"
-                send_notification(
+                notify(
                     user_id=parent_comment.user_id,
-                    content=content_msg,
                     notification_type='reply',
-                    link=url_for('content.detail', id=content_id),
-                    sender_id=current_user.id
+                    target=target_key('comment', comment_id),
+                    action=f"回复了你在内容 \"{content.title}\" 中的评论",
+                    sender_id=current_user.id,
+                    sender_name=current_user.username,
+                    link=url_for('content.detail', id=content_id)
                 )
 
             db.session.commit()
@@ -1006,25 +994,12 @@ def reply_comment(content_id, comment_id):
 @content_bp.route('/favorite/<int:id>', methods=['POST'])
 @login_required
 def favorite(id):
-    """收藏内容"""
-    content = Content.query.get_or_404(id)
-
-    # 检查是否已收藏
-    existing_favorite = Favorite.query.filter_by(
-        user_id=current_user.id,
-        content_id=id
-    ).first()
-
+    """收藏内容（切换收藏状态）"""
     try:
-        if existing_favorite:
-            # 取消收藏
-            db.session.delete(existing_favorite)
-            message = '取消收藏成功'
-        else:
-            # 添加收藏
-            favorite = Favorite(user_id=current_user.id, content_id=id)
-            db.session.add(favorite)
-            message = '收藏成功'
+        result = toggle_reaction('favorite', current_user.id, id)
+        if result is None:
+            abort(404)
+        message = '收藏成功' if result.active else '取消收藏成功'
 
         db.session.commit()
         flash(message, 'success')
@@ -1036,8 +1011,12 @@ def favorite(id):
 
         # 处理AJAX请求
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.is_json:
-            return jsonify({'success': True, 'message': message})
+            return jsonify({'success': True, 'message': message,
+                            'favorited': result.active, 'favorites_count': result.count})
 
+    except HTTPException:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"收藏操作失败: {str(e)}")
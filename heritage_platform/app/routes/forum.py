@@ -22,6 +22,9 @@ from app import db
 from app.models import ForumTopic, ForumPost, User
 from app.forms.forum import TopicForm, PostForm
 from app.utils.decorators import admin_required
+from app.utils import counters, deferred, outbox, trending
+from app.utils.notification_aggregation import notify, target_key
+from app.utils.query_profiler import query_budget
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func
 from sqlalchemy.orm import aliased
@@ -34,30 +37,35 @@ def latest_topics():
     """获取最新论坛主题API"""
     limit = request.args.get('limit', 5, type=int)
 
-    # 查询最新主题
+    # 查询最新主题，创建者和最后回复者通过JOIN一并获取
+    LastPoster = aliased(User)
     topics = db.session.query(
         ForumTopic,
-        User.username.label('creator_name')
+        User.username.label('creator_name'),
+        LastPoster.username.label('last_poster_name')
     ).outerjoin(User, ForumTopic.user_id == User.id
+    ).outerjoin(LastPoster, ForumTopic.last_poster_id == LastPoster.id
     ).order_by(
         ForumTopic.last_activity.desc()
     ).limit(limit).all()
 
     # 格式化数据
     result = []
-    for topic, creator_name in topics:
+    for topic, creator_name, last_poster_name in topics:
         result.append({
             'id': topic.id,
             'title': topic.title,
             'category': topic.category,
             'creator': creator_name or "未知用户",
             'post_count': topic.post_count,
+            'last_poster': last_poster_name,
             'last_activity': topic.last_activity.strftime('%Y-%m-%d %H:%M')
         })
 
     return jsonify(result)
 
 @forum_bp.route('/')
+@query_budget(6)  # 分页及总数、分类列表，以及上下文处理器的身份、统计行和导航分类
 def index():
     """论坛首页 - 显示主题列表
 
@@ -72,41 +80,52 @@ def index():
     Query参数:
         page (int, optional): 页码，默认为1
         category (str, optional): 按分类筛选
+        sort (str, optional): 排序方式，newest（默认，置顶优先、按最后活动时间）或 trending（按热度）
 
     模板上下文:
         topics: 主题列表，包含完整的主题信息和创建者
         pagination: 分页对象，用于生成分页控件
         categories: 所有可用的分类列表
         current_category: 当前选中的分类
+        current_sort: 当前排序方式
 
     性能优化:
-        - 使用JOIN查询一次性获取主题和创建者信息
+        - 使用JOIN查询一次性获取主题、创建者和最后回复者信息
+        - 回复数读取主题上冗余保存的 reply_count，不再逐行COUNT
         - 使用distinct查询获取唯一分类列表
         - 预处理数据，减少模板中的逻辑处理
     """
     page = request.args.get('page', 1, type=int)
     category = request.args.get('category')
+    sort = trending.parse_sort(request.args.get('sort'))
 
-    # 使用JOIN查询一次性获取主题和创建者信息
+    # 使用JOIN查询一次性获取主题、创建者和最后回复者信息
+    LastPoster = aliased(User)
     query = db.session.query(
         ForumTopic,
-        User.username.label('creator_name')
-    ).outerjoin(User, ForumTopic.user_id == User.id)
+        User.username.label('creator_name'),
+        LastPoster.username.label('last_poster_name')
+    ).outerjoin(User, ForumTopic.user_id == User.id
+    ).outerjoin(LastPoster, ForumTopic.last_poster_id == LastPoster.id)
 
     if category:
         query = query.filter(ForumTopic.category == category)
 
-    # 按置顶和最后活动时间排序
-    query = query.order_by(
-        ForumTopic.is_pinned.desc(),
-        ForumTopic.last_activity.desc()
-    )
+    if sort == trending.SORT_TRENDING:
+        # 按热度排序，走 trending_score 索引
+        query = query.order_by(*trending.order_by_trending(ForumTopic))
+    else:
+        # 按置顶和最后活动时间排序
+        query = query.order_by(
+            ForumTopic.is_pinned.desc(),
+            ForumTopic.last_activity.desc()
+        )
 
     pagination = query.paginate(page=page, per_page=20, error_out=False)
 
     # 简化数据处理
     topic_data = []
-    for topic_obj, creator_name in pagination.items:
+    for topic_obj, creator_name, last_poster_name in pagination.items:
         topic_data.append({
             'id': topic_obj.id,
             'title': topic_obj.title,
@@ -115,6 +134,7 @@ def index():
             'is_pinned': topic_obj.is_pinned,
             'is_closed': topic_obj.is_closed,
             'post_count': topic_obj.post_count,
+            'last_poster': last_poster_name,
             'views': topic_obj.views,
             'created_at': topic_obj.created_at,
             'last_activity': topic_obj.last_activity
@@ -128,7 +148,8 @@ def index():
                            topics=topic_data,
                            pagination=pagination,
                            categories=categories,
-                           current_category=category)
+                           current_category=category,
+                           current_sort=sort)
 
 @forum_bp.route('/topic/<int:id>', methods=['GET', 'POST'])
 def topic(id):
@@ -165,8 +186,8 @@ def topic(id):
     """
     topic = ForumTopic.query.get_or_404(id)
 
-    # 增加浏览次数 - 避免每次访问都重新查询
-    topic.views += 1
+    # 浏览量和热度在响应发送后合并写入，页面直接显示包含本次浏览的浏览量
+    deferred.record_view(ForumTopic, topic)
 
     # 回复表单
     form = PostForm()
@@ -197,48 +218,40 @@ def topic(id):
                         if user:
                             post.reply_to_user_id = reply_to_user_id
 
+            # 主题的回复数、最后回复和最后活动时间在帖子插入时自动维护
             db.session.add(post)
 
-            # 更新主题最后活动时间，不直接修改post_count属性
-            topic.last_activity = post.created_at
-
             # 发送通知给主题创建者（如果回复者不是创建者本人）
             if current_user.id != topic.user_id:
-                from app.routes.notification import send_notification
-                content = f"{current_user.username} 在主题 \"{topic.title}\" 中发表了回复"
-                send_notification(
+                notify(
                     user_id=topic.user_id,
-                    content=content,
                     notification_type='reply',
-                    link=url_for('forum.topic', id=id),
-                    sender_id=current_user.id
+                    target=target_key('topic', id),
+                    action=f"在主题 \"{topic.title}\" 中发表了回复",
+                    sender_id=current_user.id,
+                    sender_name=current_user.username,
+                    link=url_for('forum.topic', id=id)
                 )
 
-            db.session.commit()
+            # 刷新以获取ID和创建时间
+            db.session.flush()
+
+            # 准备评论数据
+            post_data = {
+                'id': post.id,
+                'content': post.content,
+                'user_id': post.user_id,
+                'user_username': current_user.username,
+                'user_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
+                'parent_id': post.parent_id,
+                'reply_to_user_id': post.reply_to_user_id,
+                'created_at': post.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            }
 
-            # 添加WebSocket实时更新功能
-            try:
-                from app.socket_events import socketio
-
-                # 准备评论数据
-                post_data = {
-                    'id': post.id,
-                    'content': post.content,
-                    'user_id': post.user_id,
-                    'user_username': current_user.username,
-                    'user_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
-                    'parent_id': post.parent_id,
-                    'reply_to_user_id': post.reply_to_user_id,
-                    'created_at': post.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                }
-
-                # 发送到主题房间
-                room_name = f"topic_{id}"
-                socketio.emit('new_forum_post', post_data, to=room_name)
-
-            except Exception as e:
-                current_app.logger.error(f"发送WebSocket实时评论更新失败: {str(e)}")
-                # 即使WebSocket发送失败，也不影响评论已保存到数据库
+            # 推送到主题房间（写入发件箱，提交后由后台分发器推送）
+            room_name = f"topic_{id}"
+            outbox.enqueue('new_forum_post', post_data, room=room_name)
+            db.session.commit()
 
             flash('回复成功', 'success')
             return redirect(url_for('forum.topic', id=id))
@@ -324,9 +337,6 @@ def topic(id):
             'replies': replies_data
         })
 
-    # 提交数据库更改
-    db.session.commit()
-
     return render_template('forum/topic.html',
                            topic=topic_data,
                            posts=posts_with_authors,
@@ -458,7 +468,7 @@ def delete_topic(id):
 
     try:
         # 先删除主题下的所有帖子
-        ForumPost.query.filter_by(topic_id=id).delete()
+        counters.bulk_delete(ForumPost.query.filter_by(topic_id=id))
 
         # 再删除主题
         db.session.delete(topic)
@@ -506,15 +516,11 @@ def reply_post(topic_id, post_id):
             reply_to_user_id=post.user_id  # 回复的是评论作者
         )
 
+        # 主题的回复数、最后回复和最后活动时间在帖子插入时自动维护
         db.session.add(new_post)
 
-        # 更新主题最后活动时间
-        topic.last_activity = new_post.created_at
-
         # 如果回复的不是自己的评论，发送通知
         if post.user_id != current_user.id:
-            from app.routes.notification import send_notification
-
             # 获取主题标题，并限制长度
             topic_title = topic.title
             if len(topic_title) > 30:
@@ -525,42 +531,36 @@ def reply_post(topic_id, post_id):
             if len(reply_preview) > 30:
                 reply_preview = reply_preview[:30] + '...'
 
-            notification_content = f"{current_user.username} 回复了你在 \"{topic_title}\" 中的评论：{reply_preview}"
-
-            send_notification(
+            notify(
                 user_id=post.user_id,
-                content=notification_content,
                 notification_type='reply',
-                link=url_for('forum.topic', id=topic_id),
-                sender_id=current_user.id
+                target=target_key('post', post_id),
+                action=f"回复了你在 \"{topic_title}\" 中的评论：{reply_preview}",
+                sender_id=current_user.id,
+                sender_name=current_user.username,
+                link=url_for('forum.topic', id=topic_id)
             )
 
+        # 刷新以获取ID和创建时间
+        db.session.flush()
+
+        # 准备评论数据
+        reply_data = {
+            'id': new_post.id,
+            'content': new_post.content,
+            'user_id': new_post.user_id,
+            'user_username': current_user.username,
+            'user_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
+            'parent_id': new_post.parent_id,
+            'reply_to_user_id': new_post.reply_to_user_id,
+            'created_at': new_post.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+        # 推送到主题房间（写入发件箱，提交后由后台分发器推送）
+        room_name = f"topic_{topic_id}"
+        outbox.enqueue('new_forum_post', reply_data, room=room_name)
         db.session.commit()
 
-        # 添加WebSocket实时更新功能
-        try:
-            from app.socket_events import socketio
-
-            # 准备评论数据
-            reply_data = {
-                'id': new_post.id,
-                'content': new_post.content,
-                'user_id': new_post.user_id,
-                'user_username': current_user.username,
-                'user_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
-                'parent_id': new_post.parent_id,
-                'reply_to_user_id': new_post.reply_to_user_id,
-                'created_at': new_post.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            # 发送到主题房间
-            room_name = f"topic_{topic_id}"
-            socketio.emit('new_forum_post', reply_data, to=room_name)
-
-        except Exception as e:
-            current_app.logger.error(f"发送WebSocket实时评论回复更新失败: {str(e)}")
-            # 即使WebSocket发送失败，也不影响评论已保存到数据库
-
         flash('回复成功', 'success')
 
     except Exception as e:
@@ -589,14 +589,8 @@ def delete_post(id):
         return redirect(url_for('forum.topic', id=topic_id))
 
     try:
+        # 主题的回复数和最后回复在帖子删除时自动维护
         db.session.delete(post)
-
-        # 更新主题的回复计数（依赖于触发器或手动更新）
-        topic = ForumTopic.query.get(topic_id)
-        if topic:
-            # 减少回复计数，依赖于post_count字段的维护逻辑
-            pass
-
         db.session.commit()
         flash('回复删除成功', 'success')
     except Exception as e:
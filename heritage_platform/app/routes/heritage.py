@@ -18,6 +18,7 @@ from app.models import HeritageItem, Content
 from app.forms.heritage import HeritageItemForm
 from app.utils.decorators import teacher_required
 from app.utils.file_handlers import save_file
+from app.utils import heritage_registry
 
 # 创建蓝图，用于组织非遗项目相关的路由
 heritage_bp = Blueprint('heritage', __name__)
@@ -55,15 +56,16 @@ def list():
     # 获取当前页的项目列表
     items = pagination.items
 
-    # 获取所有可用的分类，用于构建筛选器
-    categories = db.session.query(HeritageItem.category).distinct().all()
-    categories = [c[0] for c in categories]
+    # 获取所有可用的分类及各分类的项目数，用于构建筛选器（读取进程内注册表）
+    category_counts = heritage_registry.category_counts()
+    categories = sorted(category_counts)
 
     # 渲染模板，传入项目列表、分页对象、分类列表和当前选中的分类
     return render_template('heritage/list.html',
                            items=items,
                            pagination=pagination,
                            categories=categories,
+                           category_counts=category_counts,
                            current_category=category)
 
 @heritage_bp.route('/detail/<int:id>')
@@ -3,12 +3,18 @@ from app.models import HeritageItem, Content
 from sqlalchemy.exc import SQLAlchemyError
 import os
 from flask_login import current_user
+from app.utils import trending
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def index():
-    """主页"""
+    """主页
+
+    Query参数:
+        sort (str, optional): 内容区的排序方式，newest（默认）或 trending（按热度）
+    """
+    sort = trending.parse_sort(request.args.get('sort'))
     # 调试信息：检查用户认证状态
     current_app.logger.info(f"当前用户认证状态: {current_user.is_authenticated}")
     if current_user.is_authenticated:
@@ -18,8 +24,12 @@ def index():
     try:
         # 获取精选非遗项目
         featured_items = HeritageItem.query.order_by(HeritageItem.created_at.desc()).limit(6).all()
-        # 获取最新内容
-        latest_contents = Content.query.order_by(Content.created_at.desc()).limit(8).all()
+        # 获取最新内容或热门内容
+        if sort == trending.SORT_TRENDING:
+            order = trending.order_by_trending(Content)
+        else:
+            order = (Content.created_at.desc(),)
+        latest_contents = Content.query.order_by(*order).limit(8).all()
     except SQLAlchemyError as e:
         current_app.logger.error(f"数据库查询错误: {e}")
         featured_items = []
@@ -28,6 +38,7 @@ def index():
     return render_template('main/index.html',
                            featured_items=featured_items,
                            latest_contents=latest_contents,
+                           current_sort=sort,
                            debug_auth=current_user.is_authenticated)
 
 @main_bp.route('/about')
@@ -11,24 +11,43 @@
 - 已读状态：跟踪消息的已读/未读状态
 - 实时通知：通过WebSocket向在线用户推送新消息通知
 - 权限控制：基于用户角色和群组成员身份的权限控制
+- 历史归档：超过保留期的消息移入归档表后仍可在会话视图中只读查看（见 app/utils/retention.py）
 """
 
 from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request, jsonify, abort
 from flask_login import login_required, current_user
 from app.models.message import Message, MessageGroup, UserGroup, MessageReadStatus
+from app.models.archive import MessageArchive
 from app.models.user import User
 from app.forms.message import (
     MessageForm, ReplyMessageForm, GroupMessageForm,
     BroadcastMessageForm, CreateGroupForm, AddMembersForm
 )
 from app import db, csrf
-from sqlalchemy import or_, and_
+from sqlalchemy import or_
 from app.utils.decorators import role_required
+from app.utils import deferred, outbox, retention
+from sqlalchemy.orm.attributes import set_committed_value
 import datetime
 
 # 创建消息系统蓝图
 bp = Blueprint('message', __name__)
 
+def mark_message_read(message_id, user_id):
+    """将接收者的一条私信标记为已读（延后写入任务）"""
+    Message.query.filter_by(
+        id=message_id, receiver_id=user_id, is_read=False
+    ).update({'is_read': True}, synchronize_session=False)
+
+def mark_group_read(user_id, group_id, read_at):
+    """将用户在群组中的未读消息全部标记为已读（延后写入任务）"""
+    group_message_ids = db.session.query(Message.id).filter(Message.group_id == group_id)
+    MessageReadStatus.query.filter(
+        MessageReadStatus.user_id == user_id,
+        MessageReadStatus.is_read == False,  # noqa: E712
+        MessageReadStatus.message_id.in_(group_message_ids)
+    ).update({'is_read': True, 'read_at': read_at}, synchronize_session=False)
+
 @bp.route('/messages')
 @login_required
 def message_list():
@@ -147,30 +166,24 @@ def compose():
 
         try:
             db.session.add(message)
-            db.session.commit()
+            # 刷新以获取ID和创建时间
+            db.session.flush()
+
+            # 准备消息数据
+            message_data = {
+                'id': message.id,
+                'content': message.content,
+                'sender_id': message.sender_id,
+                'sender_username': current_user.username,
+                'sender_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
+                'receiver_id': message.receiver_id,
+                'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            }
 
-            # 添加WebSocket实时通知功能
-            try:
-                from app.socket_events import socketio
-
-                # 准备消息数据
-                message_data = {
-                    'id': message.id,
-                    'content': message.content,
-                    'sender_id': message.sender_id,
-                    'sender_username': current_user.username,
-                    'sender_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
-                    'receiver_id': message.receiver_id,
-                    'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                }
-
-                # 发送到接收者的WebSocket
-                receiver_room = f"user_{receiver.id}"
-                socketio.emit('new_private_message', message_data, to=receiver_room)
-
-            except Exception as e:
-                current_app.logger.error(f"发送WebSocket实时私信失败: {str(e)}")
-                # 即使WebSocket发送失败，也不影响私信已保存到数据库
+            # 推送到接收者的房间（写入发件箱，提交后由后台分发器推送）
+            receiver_room = f"user_{receiver.id}"
+            outbox.enqueue('new_private_message', message_data, room=receiver_room)
+            db.session.commit()
 
             flash('私信已发送', 'success')
             return redirect(url_for('message.message_list'))
@@ -187,7 +200,7 @@ def view(id):
     """查看私信详情页面
 
     显示指定ID的私信详情，并提供回复功能。
-    自动将未读消息标记为已读。
+    自动将未读消息标记为已读。已归档的消息从归档表读取，只读显示。
     确保只有发送者或接收者可以查看私信。
 
     Args:
@@ -195,29 +208,23 @@ def view(id):
 
     Returns:
         render_template: 渲染私信详情页面，包含以下上下文：
-            - message: 私信对象
+            - message: 私信对象（可能来自归档表）
             - form: 回复表单，预填了接收者ID
+            - archived: 消息是否已归档
 
     Raises:
         404: 如果私信不存在或当前用户无权查看
     """
-    # 确保当前用户是发送者或接收者
-    message = Message.query.filter(
-        Message.id == id,
-        or_(
-            and_(Message.sender_id == current_user.id, Message.sender_deleted == False),
-            and_(Message.receiver_id == current_user.id, Message.receiver_deleted == False)
-        ),
-        or_(
-            Message.message_type == 'personal',
-            Message.message_type == 'broadcast'  # 允许查看群发消息
-        )
-    ).first_or_404()
+    # 确保当前用户是发送者或接收者；原表中不存在时读取归档表
+    message, archived = retention.find_message(id, current_user.id)
+    if message is None:
+        abort(404)
 
-    # 如果当前用户是接收者且消息未读，则标记为已读
-    if message.receiver_id == current_user.id and not message.is_read:
-        message.is_read = True
-        db.session.commit()
+    # 如果当前用户是接收者且消息未读，则标记为已读（归档消息只读）
+    # 已读标记在响应发送后写入，页面按已读显示
+    if not archived and message.receiver_id == current_user.id and not message.is_read:
+        deferred.defer(mark_message_read, message.id, current_user.id)
+        set_committed_value(message, 'is_read', True)
 
     # 准备回复表单
     reply_form = ReplyMessageForm()
@@ -228,7 +235,7 @@ def view(id):
         # 否则设置回复对象为发送者
         reply_form.receiver_id.data = message.sender_id
 
-    return render_template('message/view.html', message=message, form=reply_form)
+    return render_template('message/view.html', message=message, form=reply_form, archived=archived)
 
 @bp.route('/message/messages/<int:id>')
 @login_required
@@ -236,7 +243,7 @@ def view_message_alternate(id):
     """处理错误URL格式的重定向"""
     try:
         # 尝试找到消息
-        message = Message.query.get(id)
+        message = Message.query.get(id) or MessageArchive.query.get(id)
         if not message:
             # 如果消息不存在，可能已被删除
             flash('您尝试访问的消息不存在或已被删除', 'warning')
@@ -272,30 +279,24 @@ def reply():
 
         try:
             db.session.add(message)
-            db.session.commit()
+            # 刷新以获取ID和创建时间
+            db.session.flush()
+
+            # 准备消息数据
+            message_data = {
+                'id': message.id,
+                'content': message.content,
+                'sender_id': message.sender_id,
+                'sender_username': current_user.username,
+                'sender_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
+                'receiver_id': message.receiver_id,
+                'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            }
 
-            # 添加WebSocket实时通知功能
-            try:
-                from app.socket_events import socketio
-
-                # 准备消息数据
-                message_data = {
-                    'id': message.id,
-                    'content': message.content,
-                    'sender_id': message.sender_id,
-                    'sender_username': current_user.username,
-                    'sender_avatar': current_user.avatar if hasattr(current_user, 'avatar') else None,
-                    'receiver_id': message.receiver_id,
-                    'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                }
-
-                # 发送到接收者的WebSocket
-                receiver_room = f"user_{receiver_id}"
-                socketio.emit('new_private_message', message_data, to=receiver_room)
-
-            except Exception as e:
-                current_app.logger.error(f"发送WebSocket实时私信回复失败: {str(e)}")
-                # 即使WebSocket发送失败，也不影响私信已保存到数据库
+            # 推送到接收者的房间（写入发件箱，提交后由后台分发器推送）
+            receiver_room = f"user_{receiver_id}"
+            outbox.enqueue('new_private_message', message_data, room=receiver_room)
+            db.session.commit()
 
             flash('回复已发送', 'success')
         except Exception as e:
@@ -413,7 +414,8 @@ def view_group(id):
 
     实现了以下功能：
     - 权限检查：确保只有群组成员可以访问
-    - 消息加载：按时间顺序显示所有群组消息
+    - 消息加载：按时间顺序显示所有群组消息，?history=1 时在前面分页显示已归档的历史消息，
+      ?before=<消息ID> 翻到更早的一页
     - 已读状态管理：自动将未读消息标记为已读
     - 成员列表：显示所有群组成员
 
@@ -427,6 +429,10 @@ def view_group(id):
             - members: 群组成员列表
             - form: 发送消息表单
             - membership: 当前用户的成员身份信息
+            - archived_count: 已归档的消息数
+            - archived_ids: 本次显示的已归档消息ID（只读，不能删除）
+            - show_history: 是否显示已归档的历史消息
+            - history_cursor: 更早一页已归档消息的游标，没有更多时为None
 
     Raises:
         404: 如果群组不存在或当前用户不是群组成员
@@ -444,17 +450,17 @@ def view_group(id):
         group_id=id
     ).order_by(Message.created_at.asc()).all()
 
-    # 将所有未读消息标记为已读
-    unread_statuses = MessageReadStatus.query.filter_by(
-        user_id=current_user.id,
-        is_read=False
-    ).join(MessageReadStatus.message).filter(
-        Message.group_id == id
-    ).all()
+    # 已归档的历史消息只在用户请求时读取（?history=1），并排在近期消息之前
+    show_history = request.args.get('history', type=int) == 1
+    archived_count = retention.archived_group_message_count(id)
+    archived_messages, history_cursor = [], None
+    if show_history and archived_count:
+        archived_messages, history_cursor = retention.archived_group_messages(
+            id, before_id=request.args.get('before', type=int))
+    messages = archived_messages + messages
 
-    for status in unread_statuses:
-        status.is_read = True
-        status.read_at = datetime.datetime.now()
+    # 将所有未读消息标记为已读（响应发送后写入）
+    deferred.defer(mark_group_read, current_user.id, id, datetime.datetime.now())
 
     # 获取群组成员列表
     members = User.query.join(UserGroup).filter(
@@ -465,18 +471,16 @@ def view_group(id):
     form = GroupMessageForm()
     form.group_id.data = id  # 预选当前群组
 
-    try:
-        db.session.commit()  # 提交已读状态变更
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.error(f"更新消息已读状态失败: {str(e)}")
-
     return render_template('message/view_group.html',
                            group=group,
                            messages=messages,
                            members=members,
                            form=form,
-                           membership=membership)
+                           membership=membership,
+                           archived_count=archived_count,
+                           archived_ids={m.id for m in archived_messages},
+                           show_history=show_history,
+                           history_cursor=history_cursor)
 
 @bp.route('/groups/<int:id>/send', methods=['POST'])
 @login_required
@@ -755,15 +759,10 @@ def broadcast():
         elif recipient_type == 'admins':
             recipients = User.query.filter_by(role='admin').all()
         elif recipient_type == 'specific_groups':
-            # 获取所选群组的所有成员
-            for group_id in form.groups.data:
-                group = MessageGroup.query.get(group_id)
-                if group:
-                    for member in group.members:
-                        if member.user_id != current_user.id:  # 排除自己
-                            user = User.query.get(member.user_id)
-                            if user not in recipients:
-                                recipients.append(user)
+            # 所选群组的所有成员在一条查询中加载，同时属于多个群组的用户只出现一次
+            recipients = User.query.join(UserGroup, UserGroup.user_id == User.id).filter(
+                UserGroup.group_id.in_(form.groups.data)
+            ).distinct().order_by(User.id).all()
 
         # 排除自己
         recipients = [r for r in recipients if r.id != current_user.id]
@@ -2,7 +2,7 @@
 通知系统路由模块
 
 本模块实现了通知系统的路由和视图函数，包括：
-1. 用户通知列表：显示当前用户收到的所有通知
+1. 用户通知列表：分页显示当前用户收到的通知，按日期分组
 2. 创建公告：管理员和教师可以发布全站公告
 3. 公告列表：查看已发布的公告
 4. 通知标记：将通知标记为已读
@@ -21,7 +21,8 @@ from app.models import Notification, User
 from app.forms.notification import AnnouncementForm
 from app.utils.decorators import admin_required, teacher_required, role_required
 from app import db, csrf
-from app.socket_events import emit_notification
+from app.utils import outbox
+from app.utils.notification_feed import load_notifications, mark_read_up_to, parse_notification_id
 import datetime
 
 # 创建通知系统蓝图
@@ -30,23 +31,29 @@ bp = Blueprint('notification', __name__)
 @bp.route('/notifications')
 @login_required
 def list_notifications():
-    """显示当前用户的所有通知
+    """显示当前用户的通知
 
-    获取并显示当前登录用户收到的所有通知，按时间倒序排列。
+    按ID倒序键集分页加载当前登录用户的通知，并按日期分组展示。
     使用eager loading加载发送者信息，减少数据库查询次数。
 
     路由: /notifications
     方法: GET
     权限: 需要用户登录
 
+    Query参数:
+        before (int, optional): 分页游标，只显示ID小于该值的通知
+        unread (int, optional): 为1时只显示未读通知
+
     Returns:
         render_template: 渲染通知列表页面，传递以下上下文：
-            - notifications: 当前用户的通知列表
+            - page: 当前页（NotificationPage），包含按日期分组的通知和下一页游标
+            - unread_only: 是否只显示未读通知
     """
-    notifications = Notification.query.filter_by(
-        user_id=current_user.id
-    ).options(db.joinedload(Notification.sender)).order_by(Notification.created_at.desc()).all()
-    return render_template('notification/list.html', notifications=notifications)
+    before = request.args.get('before', type=int)
+    unread_only = request.args.get('unread', type=int) == 1
+    page = load_notifications(current_user.id, before=before, unread_only=unread_only)
+    return render_template('notification/list.html', page=page, unread_only=unread_only,
+                           is_first_page=before is None)
 
 @bp.route('/announcement', methods=['GET', 'POST'])
 @login_required
@@ -100,10 +107,12 @@ def create_announcement():
                 if success:
                     sent_count += 1
 
+            db.session.commit()
             flash(f'公告已成功发送给 {sent_count} 位用户', 'success')
             return redirect(url_for('notification.create_announcement'))
 
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f"发布公告失败: {str(e)}")
             flash('发布公告失败，请稍后重试', 'danger')
 
@@ -125,8 +134,9 @@ def list_announcements():
 def send_notification(user_id, content, notification_type, link=None, sender_id=None):
     """发送通知的辅助函数
 
-    创建并保存通知记录，同时通过WebSocket发送实时通知。
-    这个函数被其他模块调用，用于在各种交互场景中发送通知。
+    创建通知记录，并把实时推送写入发件箱（见 app/utils/outbox.py）。
+    本函数不提交事务，通知和推送随调用方的事务一起提交，操作回滚时通知也不会发出。
+    点赞、评论等可合并的互动通知请使用 app/utils/notification_aggregation.py 中的 notify()。
 
     支持的通知类型:
     - reply: 回复通知，当用户的内容被回复时
@@ -142,7 +152,7 @@ def send_notification(user_id, content, notification_type, link=None, sender_id=
         sender_id (int, optional): 可选的发送者ID，系统通知可为空
 
     Returns:
-        bool: 通知发送成功返回True，失败返回False
+        bool: 通知写入成功返回True，失败返回False
 
     示例:
         send_notification(
@@ -152,48 +162,35 @@ def send_notification(user_id, content, notification_type, link=None, sender_id=
             link="/forum/topic/5",
             sender_id=2
         )
+        db.session.commit()
     """
-    notification = Notification(
-        user_id=user_id,
-        content=content,
-        type=notification_type,
-        link=link,
-        sender_id=sender_id
-    )
-    db.session.add(notification)
     try:
-        db.session.commit()
-
-        # 添加WebSocket实时通知功能
-        try:
-            # 获取发送者用户名
-            sender_username = None
-            if sender_id:
-                sender = User.query.get(sender_id)
-                if sender:
-                    sender_username = sender.username
-
-            # 准备通知数据
-            notification_data = {
-                'id': notification.id,
-                'type': notification_type,
-                'content': content,
-                'link': link,
-                'sender_id': sender_id,
-                'sender_username': sender_username,
-                'created_at': notification.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            # 发送WebSocket通知
-            emit_notification(user_id, notification_data)
-
-        except Exception as e:
-            current_app.logger.error(f"发送WebSocket实时通知失败: {str(e)}")
-            # 即使WebSocket通知失败，也不影响通知已经保存到数据库
-
+        notification = Notification(
+            user_id=user_id,
+            content=content,
+            type=notification_type,
+            link=link,
+            sender_id=sender_id
+        )
+        db.session.add(notification)
+        # 刷新以获取通知ID和创建时间，事务由调用方提交
+        db.session.flush()
+
+        # 获取发送者用户名
+        sender = db.session.get(User, sender_id) if sender_id else None
+
+        # 实时推送写入发件箱，提交后由后台分发器推送
+        outbox.enqueue('new_notification', {
+            'id': notification.id,
+            'type': notification_type,
+            'content': content,
+            'link': link,
+            'sender_id': sender_id,
+            'sender_username': sender.username if sender else None,
+            'created_at': notification.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }, room=f"user_{user_id}")
         return True
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f"发送通知失败: {str(e)}")
         return False
 
@@ -247,13 +244,18 @@ def mark_notification_read(notification_id):
 def mark_all_notifications_read():
     """标记当前用户的所有通知为已读
 
-    将当前登录用户的所有未读通知一次性标记为已读状态。
+    将当前登录用户的未读通知用一条UPDATE语句标记为已读状态，不逐条加载通知。
     通常由前端通过AJAX请求调用，支持一键清除所有未读状态。
 
     路由: /read-all
     方法: POST
     权限: 需要用户登录
 
+    请求体(JSON，可选):
+        {
+            "up_to_id": 120  // 只标记ID不大于该值的通知，通常为页面上最新一条通知的ID
+        }
+
     Returns:
         JSON: 操作结果
         {
@@ -263,22 +265,20 @@ def mark_all_notifications_read():
 
     状态码:
         200: 操作成功
+        400: up_to_id 格式错误
         500: 服务器内部错误
     """
     try:
-        # 查询当前用户的所有未读通知
-        notifications = Notification.query.filter_by(
-            user_id=current_user.id,
-            is_read=False
-        ).all()
-
-        # 标记为已读
-        for notification in notifications:
-            notification.is_read = True
-
+        # 只标记客户端已看到的通知（up_to_id），未提供时标记全部未读通知
+        data = request.get_json(silent=True) or {}
+        try:
+            up_to_id = parse_notification_id(data.get('up_to_id', request.form.get('up_to_id')))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'up_to_id必须是正整数'}), 400
+        count = mark_read_up_to(current_user.id, up_to_id)
         db.session.commit()
 
-        return jsonify({'success': True, 'message': f'已标记 {len(notifications)} 条通知为已读'})
+        return jsonify({'success': True, 'message': f'已标记 {count} 条通知为已读', 'count': count})
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"标记所有通知已读失败: {str(e)}")
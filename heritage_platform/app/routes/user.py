@@ -10,18 +10,28 @@
 这些路由共同构成了平台的用户管理系统，包括普通用户的个人中心和管理员的后台管理功能。
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
+import os
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort, Response
 from flask_login import current_user, login_required
-from app import db
-from app.models import User, Content, HeritageItem, ForumTopic, ForumPost, Favorite
+from sqlalchemy.orm import joinedload
+from app import db, socketio
+from app.models import User, Content, Favorite
 from app.forms.user import ProfileForm, PasswordForm, UserForm
 from app.utils.file_handlers import save_file
 from app.utils.decorators import admin_required
+from app.utils.activity_stats import get_activity_series, get_site_totals
+from app.utils import cache, sampling_profiler
+from app.utils.query_profiler import query_budget
+from app.utils.user_stats import get_user_stats
+from app.utils.serializers import ContentSerializer
+from app.utils.viewer_state import get_viewer_state
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/profile')
 @login_required
+@query_budget(6)  # 身份、完整用户信息、统计行、最近收藏，以及上下文处理器的两条分类查询
 def profile():
     """用户个人资料页面
 
@@ -39,34 +49,29 @@ def profile():
     返回:
         HTML: 渲染后的个人资料页面，包含用户信息和统计数据
     """
-    # 获取用户发布的内容统计
-    content_count = Content.query.filter_by(user_id=current_user.id).count()
+    # 各项计数从用户统计表中一次读取
+    stats = get_user_stats(current_user.id)
 
-    # 获取用户创建的非遗项目（如果是教师或管理员）
+    # 创建的非遗项目数只对教师和管理员显示
     heritage_count = 0
     if current_user.is_teacher or current_user.is_admin:
-        heritage_count = HeritageItem.query.filter_by(created_by=current_user.id).count()
-
-    # 获取论坛统计：用户创建的主题数和发表的回复数
-    topic_count = ForumTopic.query.filter_by(user_id=current_user.id).count()
-    post_count = ForumPost.query.filter_by(user_id=current_user.id).count()
-
-    # 获取用户的最近收藏内容（最多5条）
-    favorites = Favorite.query.filter_by(user_id=current_user.id).order_by(
-        Favorite.created_at.desc()).limit(5).all()
-    favorite_contents = []
-    for fav in favorites:
-        # 获取每个收藏对应的内容对象
-        content = Content.query.get(fav.content_id)
-        if content:  # 确保内容存在（可能已被删除）
-            favorite_contents.append(content)
+        heritage_count = stats['heritage_count']
+
+    # 获取用户的最近收藏内容（最多5条），与内容及作者一起在一条查询中加载
+    favorite_contents = Content.query.join(
+        Favorite, Favorite.content_id == Content.id
+    ).filter(
+        Favorite.user_id == current_user.id
+    ).options(
+        joinedload(Content.author)
+    ).order_by(Favorite.created_at.desc()).limit(5).all()
 
     # 渲染个人资料页面模板，传入所有统计数据和收藏内容
     return render_template('user/profile.html',
-                           content_count=content_count,
+                           content_count=stats['content_count'],
                            heritage_count=heritage_count,
-                           topic_count=topic_count,
-                           post_count=post_count,
+                           topic_count=stats['topic_count'],
+                           post_count=stats['post_count'],
                            favorite_contents=favorite_contents)
 
 @user_bp.route('/edit_profile', methods=['GET', 'POST'])
@@ -143,24 +148,34 @@ def my_contents():
 
 @user_bp.route('/my_favorites')
 @login_required
+@query_budget(10)  # 身份、分页及总数、访问者状态两条、评论数和点赞数，以及上下文处理器的分类和统计行
 def my_favorites():
     """我的收藏页面"""
     page = request.args.get('page', 1, type=int)
 
-    # 获取用户收藏的内容ID
-    favorite_ids = db.session.query(Favorite.content_id).filter_by(
-        user_id=current_user.id).all()
-    favorite_ids = [f[0] for f in favorite_ids]
-
-    # 查询这些内容
-    pagination = Content.query.filter(Content.id.in_(favorite_ids)).order_by(
-        Content.created_at.desc()).paginate(
+    # 通过JOIN直接分页查询收藏的内容，作者和非遗项目一并加载
+    pagination = Content.query.join(
+        Favorite, Favorite.content_id == Content.id
+    ).filter(
+        Favorite.user_id == current_user.id
+    ).options(
+        joinedload(Content.author), joinedload(Content.heritage)
+    ).order_by(Content.created_at.desc()).paginate(
         page=page, per_page=10, error_out=False)
 
     contents = pagination.items
 
+    # 当前用户对本页内容的点赞状态
+    viewer_state = get_viewer_state([content.id for content in contents])
+
+    # 本页内容的评论数和点赞数，各用一条 GROUP BY 查询，不在模板中逐条COUNT
+    counts = {row['id']: row for row in ContentSerializer(
+        fields=('id', 'comment_count', 'like_count')).dump_many(contents)}
+
     return render_template('user/my_favorites.html',
                            contents=contents,
+                           viewer_state=viewer_state,
+                           counts=counts,
                            pagination=pagination)
 
 @user_bp.route('/dashboard')
@@ -168,11 +183,12 @@ def my_favorites():
 @admin_required
 def dashboard():
     """管理员控制面板"""
-    # 获取系统概览数据
-    user_count = User.query.count()
-    heritage_count = HeritageItem.query.count()
-    content_count = Content.query.count()
-    topic_count = ForumTopic.query.count()
+    # 获取系统概览数据，从每日活跃度汇总表求和，一条查询代替四次全表COUNT
+    totals = get_site_totals()
+    user_count = totals['users']
+    heritage_count = totals['heritage_items']
+    content_count = totals['contents']
+    topic_count = totals['topics']
 
     # 获取最近注册的用户
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
@@ -409,151 +425,136 @@ def api_delete_user():
 @user_bp.route('/api/user-activity-stats')
 @login_required
 def get_user_activity_stats():
-    """获取用户活动统计数据"""
-    from datetime import datetime, timedelta
-    from sqlalchemy import func
-
-    # 获取过去30天的数据
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-
-    # 按日期统计内容发布
-    content_stats = db.session.query(
-        func.date(Content.created_at).label('date'),
-        func.count(Content.id).label('count')
-    ).filter(
-        Content.user_id == current_user.id,
-        Content.created_at >= start_date,
-        Content.created_at <= end_date
-    ).group_by(func.date(Content.created_at)).all()
-
-    # 按日期统计论坛主题
-    topic_stats = db.session.query(
-        func.date(ForumTopic.created_at).label('date'),
-        func.count(ForumTopic.id).label('count')
-    ).filter(
-        ForumTopic.user_id == current_user.id,
-        ForumTopic.created_at >= start_date,
-        ForumTopic.created_at <= end_date
-    ).group_by(func.date(ForumTopic.created_at)).all()
-
-    # 按日期统计论坛回复
-    post_stats = db.session.query(
-        func.date(ForumPost.created_at).label('date'),
-        func.count(ForumPost.id).label('count')
-    ).filter(
-        ForumPost.user_id == current_user.id,
-        ForumPost.created_at >= start_date,
-        ForumPost.created_at <= end_date
-    ).group_by(func.date(ForumPost.created_at)).all()
-
-    # 生成日期列表和对应的统计数据
-    dates = [(start_date + timedelta(days=x)).strftime('%Y-%m-%d') for x in range(31)]
-
-    # 初始化数据数组
-    content_counts = [0] * 31
-    topic_counts = [0] * 31
-    post_counts = [0] * 31
-
-    # 填充实际数据
-    for stat in content_stats:
-        date_str = stat.date.strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            content_counts[idx] = stat.count
-
-    for stat in topic_stats:
-        date_str = stat.date.strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            topic_counts[idx] = stat.count
-
-    for stat in post_stats:
-        date_str = stat.date.strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            post_counts[idx] = stat.count
+    """获取用户活动统计数据
+
+    从用户每日活跃度汇总表读取过去30天的数据，最多31行。
+    """
+    series = get_activity_series(['contents', 'topics', 'posts'], days=30, user_id=current_user.id)
 
     return jsonify({
-        'dates': dates,
-        'content_counts': content_counts,
-        'topic_counts': topic_counts,
-        'post_counts': post_counts
+        'dates': series['dates'],
+        'content_counts': series['contents'],
+        'topic_counts': series['topics'],
+        'post_counts': series['posts']
     })
 
 @user_bp.route('/api/system-activity-stats')
 @login_required
 @admin_required
 def get_system_activity_stats():
-    """获取系统级别的活动统计数据"""
-    from datetime import datetime, timedelta
-    from sqlalchemy import func
-
-    # 获取过去30天的数据
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-
-    # 按日期统计全系统的内容发布
-    content_stats = db.session.query(
-        func.date(Content.created_at).label('date'),
-        func.count(Content.id).label('count')
-    ).filter(
-        Content.created_at >= start_date,
-        Content.created_at <= end_date
-    ).group_by(func.date(Content.created_at)).all()
-
-    # 按日期统计全系统的论坛主题
-    topic_stats = db.session.query(
-        func.date(ForumTopic.created_at).label('date'),
-        func.count(ForumTopic.id).label('count')
-    ).filter(
-        ForumTopic.created_at >= start_date,
-        ForumTopic.created_at <= end_date
-    ).group_by(func.date(ForumTopic.created_at)).all()
-
-    # 按日期统计全系统的用户注册
-    user_stats = db.session.query(
-        func.date(User.created_at).label('date'),
-        func.count(User.id).label('count')
-    ).filter(
-        User.created_at >= start_date,
-        User.created_at <= end_date
-    ).group_by(func.date(User.created_at)).all()
-
-    # 生成日期列表和对应的统计数据
-    dates = [(start_date + timedelta(days=x)).strftime('%Y-%m-%d') for x in range(31)]
-
-    # 初始化数据数组
-    content_counts = [0] * 31
-    topic_counts = [0] * 31
-    user_counts = [0] * 31
-
-    # 填充实际数据
-    for stat in content_stats:
-        date_str = stat.date.strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            content_counts[idx] = stat.count
-
-    for stat in topic_stats:
-        date_str = stat.date.strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            topic_counts[idx] = stat.count
-
-    for stat in user_stats:
-        date_str = stat.date.strftime('%Y-%m-%d')
-        if date_str in dates:
-            idx = dates.index(date_str)
-            user_counts[idx] = stat.count
+    """获取系统级别的活动统计数据
+
+    从全站每日活跃度汇总表读取过去30天的数据，最多31行。
+    """
+    series = get_activity_series(['contents', 'topics', 'users'], days=30)
 
     return jsonify({
-        'dates': dates,
-        'content_counts': content_counts,
-        'topic_counts': topic_counts,
-        'user_counts': user_counts
+        'dates': series['dates'],
+        'content_counts': series['contents'],
+        'topic_counts': series['topics'],
+        'user_counts': series['users']
     })
 
+@user_bp.route('/api/cache-stats')
+@login_required
+@admin_required
+def get_cache_stats():
+    """获取查询结果缓存的统计数据
+
+    返回当前进程中各缓存的命中、未命中、计算次数和命中率，以及后端类型和条目数。
+    """
+    return jsonify(cache.stats())
+
+@user_bp.route('/api/profiler/cpu')
+@login_required
+@admin_required
+def profile_cpu():
+    """对处理本请求的工作进程做一段时间的栈采样
+
+    请求参数:
+        seconds: 采样时长，默认10秒，不超过 PROFILER_MAX_SECONDS
+        interval_ms: 采样间隔（毫秒），默认 PROFILER_DEFAULT_INTERVAL_MS
+        idle: 为 true 时保留空闲等待的栈
+        format: collapsed（默认，折叠栈文本，可直接交给 flamegraph.pl / speedscope）或 json（热点函数统计）
+
+    多进程部署时只分析处理本请求的进程，响应头 X-Profiler-Pid 为该进程的PID。
+    """
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+
+    seconds = min(request.args.get('seconds', 10, type=float), current_app.config['PROFILER_MAX_SECONDS'])
+    interval_ms = request.args.get('interval_ms', current_app.config['PROFILER_DEFAULT_INTERVAL_MS'], type=float)
+    if seconds <= 0 or interval_ms <= 0:
+        return jsonify({'success': False, 'message': '采样时长和间隔必须大于0'}), 400
+    include_idle = request.args.get('idle', 'false').lower() == 'true'
+
+    try:
+        # 等待期间让出事件循环，采样期间本进程的其他请求照常处理
+        result = sampling_profiler.sample_stacks(seconds, interval_ms / 1000, include_idle, wait=socketio.sleep)
+    except sampling_profiler.ProfilerBusyError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+
+    current_app.logger.info(f"管理员 {current_user.username} 完成栈采样: {seconds}秒, {result['samples']}次")
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'pid': os.getpid(),
+            'duration': round(result['duration'], 3),
+            'interval_ms': interval_ms,
+            'samples': result['samples'],
+            'idle_filtered': result['idle'],
+            'top': sampling_profiler.top_functions(result['stacks']),
+        })
+    response = Response(sampling_profiler.format_collapsed(result['stacks']) + '\n', mimetype='text/plain')
+    response.headers['X-Profiler-Pid'] = str(os.getpid())
+    response.headers['X-Profiler-Samples'] = str(result['samples'])
+    return response
+
+@user_bp.route('/api/profiler/memory')
+@login_required
+@admin_required
+def profile_memory():
+    """与内存基线快照比较，列出增长最多的分配位置
+
+    请求参数:
+        limit: 返回的条目数，默认30
+        group_by: lineno（默认）、filename 或 traceback
+        reset: 为 true 时把本次快照作为新的基线
+    """
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+    try:
+        result = sampling_profiler.memory_diff(
+            limit=request.args.get('limit', 30, type=int),
+            group_by=request.args.get('group_by', 'lineno'),
+            reset_baseline=request.args.get('reset', 'false').lower() == 'true',
+        )
+    except (RuntimeError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'pid': os.getpid(), **result})
+
+@user_bp.route('/api/profiler/memory/start', methods=['POST'])
+@login_required
+@admin_required
+def start_memory_profiling():
+    """开启 tracemalloc 并记录内存基线快照"""
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+    frames = request.args.get('frames', current_app.config['PROFILER_TRACEMALLOC_FRAMES'], type=int)
+    status = sampling_profiler.start_memory_tracking(frames)
+    current_app.logger.info(f"管理员 {current_user.username} 开启了内存跟踪 (pid {os.getpid()})")
+    return jsonify({'pid': os.getpid(), **status})
+
+@user_bp.route('/api/profiler/memory/stop', methods=['POST'])
+@login_required
+@admin_required
+def stop_memory_profiling():
+    """关闭 tracemalloc，恢复正常的内存分配开销"""
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+    status = sampling_profiler.stop_memory_tracking()
+    current_app.logger.info(f"管理员 {current_user.username} 关闭了内存跟踪 (pid {os.getpid()})")
+    return jsonify({'pid': os.getpid(), **status})
+
 @user_bp.route('/api/change_role', methods=['POST'])
 @login_required
 @admin_required
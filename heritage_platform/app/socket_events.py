@@ -418,11 +418,9 @@ def handle_post_comment(data):
             reply_to_user_id=reply_to_user_id if reply_to_user_id else None
         )
 
+        # 主题的回复数、最后回复和最后活动时间在帖子插入时自动维护
         db.session.add(post)
 
-        # 更新主题最后活动时间
-        topic.last_activity = post.created_at
-
         db.session.commit()
 
         # 准备评论数据
@@ -440,65 +438,35 @@ def handle_post_comment(data):
         room_name = f"topic_{topic_id}"
         emit('new_forum_post', post_data, to=room_name)
 
+        # 通知在提交后由聚合模块推送，同一目标的多次回复合并为一条
+        from app.utils.notification_aggregation import notify, target_key
+        content_preview = post.content[:30] + '...' if len(post.content) > 30 else post.content
+
         # 如果回复了其他人的评论，则发送通知
         if reply_to_user_id and int(reply_to_user_id) != current_user.id:
-            # 发送通知
-            from app.routes.notification import send_notification
-
-            # 截取评论内容预览
-            content_preview = post.content[:30] + '...' if len(post.content) > 30 else post.content
-
-            # 构建通知内容
-            notification_content = f"{current_user.username} 回复了你在 \"{topic.title}\" 中的评论：{content_preview}"
-            send_notification(
-                user_id=reply_to_user_id,
-                content=notification_content,
+            notify(
+                user_id=int(reply_to_user_id),
                 notification_type='reply',
-                link=url_for('forum.topic', id=topic_id, _external=True),
-                sender_id=current_user.id
+                target=target_key('post', parent_id) if parent_id else target_key('topic', topic_id),
+                action=f"回复了你在 \"{topic.title}\" 中的评论：{content_preview}",
+                sender_id=current_user.id,
+                sender_name=current_user.username,
+                link=url_for('forum.topic', id=topic_id, _external=True)
             )
-
-            # 发送实时通知
-            notification_data = {
-                'type': 'reply',
-                'sender_id': current_user.id,
-                'sender_username': current_user.username,
-                'content': notification_content,
-                'link': url_for('forum.topic', id=topic_id, _external=True),
-                'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            receiver_room = f"user_{reply_to_user_id}"
-            emit('new_notification', notification_data, to=receiver_room)
+            db.session.commit()
 
         # 如果是直接回复主题，且不是自己的主题，则通知主题创建者
         elif topic.user_id != current_user.id and not parent_id:
-            # 发送通知
-            from app.routes.notification import send_notification
-
-            content_preview = post.content[:30] + '...' if len(post.content) > 30 else post.content
-            notification_content = f"{current_user.username} 在你的主题 \"{topic.title}\" 中发表了评论：{content_preview}"
-
-            send_notification(
+            notify(
                 user_id=topic.user_id,
-                content=notification_content,
                 notification_type='reply',
-                link=url_for('forum.topic', id=topic_id, _external=True),
-                sender_id=current_user.id
+                target=target_key('topic', topic_id),
+                action=f"在你的主题 \"{topic.title}\" 中发表了评论：{content_preview}",
+                sender_id=current_user.id,
+                sender_name=current_user.username,
+                link=url_for('forum.topic', id=topic_id, _external=True)
             )
-
-            # 发送实时通知
-            notification_data = {
-                'type': 'reply',
-                'sender_id': current_user.id,
-                'sender_username': current_user.username,
-                'content': notification_content,
-                'link': url_for('forum.topic', id=topic_id, _external=True),
-                'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            receiver_room = f"user_{topic.user_id}"
-            emit('new_notification', notification_data, to=receiver_room)
+            db.session.commit()
 
         return {'status': 'success', 'message': '评论发表成功', 'data': post_data}
 
@@ -513,6 +481,7 @@ def emit_notification(user_id, notification_data):
 
     通过WebSocket向指定用户发送实时通知。通知将被发送到用户的个人房间，
     前端Socket.IO客户端可以监听'new_notification'事件来接收和显示这些通知。
+    本函数同步推送；请求中保存的通知应通过发件箱推送（见 app/utils/outbox.py），随事务提交后再发出。
 
     参数:
         user_id (int): 接收通知的用户ID
@@ -125,6 +125,15 @@ function initWebSocket() {
             triggerEventHandlers('new_group_message', data);
         });
 
+        // 服务器把同一房间的多个事件合并为一批推送，逐个分发给原事件的处理函数
+        socket.on('event_batch', function(events) {
+            (events || []).forEach(function(item) {
+                if (eventHandlers[item.event]) {
+                    triggerEventHandlers(item.event, item.data);
+                }
+            });
+        });
+
         // 收到新论坛帖子事件
         socket.on('new_forum_post', function(data) {
             // console.log('收到新论坛帖子:', data); // 注释掉收到新论坛帖子日志
@@ -0,0 +1,171 @@
+"""
+活跃度统计模块
+
+维护并查询按天汇总的活跃度数据（DailyActivity / UserDailyActivity），包括：
+1. 增量维护：用户、非遗项目、内容、主题、帖子、评论插入或删除时，
+   在同一事务中用upsert语句累加当天的汇总行
+2. 数据重建：backfill() 根据原始表重新生成全部汇总数据
+3. 查询接口：按天返回最近N天的序列，以及控制面板使用的全站总数
+
+导入本模块即完成计数处理函数的注册（在 create_app 中导入）。
+"""
+
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func
+
+from app import db
+from app.models import (
+    User, HeritageItem, Content, Comment, ForumTopic, ForumPost,
+    DailyActivity, UserDailyActivity, beijing_time
+)
+from app.utils import cache, counters
+from app.utils.db_helpers import day_bucket, upsert_increment
+
+# 需要汇总的模型: (模型, DailyActivity列名, 作者ID属性, UserDailyActivity列名)
+TRACKED_MODELS = [
+    (User, 'users', None, None),
+    (HeritageItem, 'heritage_items', None, None),
+    (Content, 'contents', 'user_id', 'contents'),
+    (ForumTopic, 'topics', 'user_id', 'topics'),
+    (ForumPost, 'posts', 'user_id', 'posts'),
+    (Comment, 'comments', 'user_id', 'comments'),
+]
+
+
+def _day_of(row):
+    """返回记录所属的日期"""
+    created_at = getattr(row, 'created_at', None)
+    return created_at.date() if created_at else beijing_time().date()
+
+
+def _make_handler(daily_column: str, user_attr: Optional[str], user_column: Optional[str]):
+    """生成某个模型的计数处理函数
+
+    同一批变化先按天（以及按用户和天）合并，再逐组执行upsert。
+    """
+    def handler(connection, rows, sign):
+        per_day = Counter()
+        per_user_day = Counter()
+        for row in rows:
+            day = _day_of(row)
+            per_day[day] += sign
+            user_id = getattr(row, user_attr) if user_attr else None
+            if user_id:
+                per_user_day[(user_id, day)] += sign
+
+        for day, delta in per_day.items():
+            upsert_increment(connection, DailyActivity.__table__, {'day': day}, {daily_column: delta})
+        if per_day:
+            # Core语句不经过ORM事件，登记全站汇总的缓存标签，提交后失效
+            cache.mark_dirty(DailyActivity.__tablename__)
+        for (user_id, day), delta in per_user_day.items():
+            upsert_increment(connection, UserDailyActivity.__table__,
+                             {'user_id': user_id, 'day': day}, {user_column: delta})
+    return handler
+
+
+for _model, _daily_column, _user_attr, _user_column in TRACKED_MODELS:
+    counters.register(_model)(_make_handler(_daily_column, _user_attr, _user_column))
+
+
+def get_activity_series(columns: List[str], days: int = 30, user_id: Optional[int] = None) -> Dict[str, list]:
+    """获取最近若干天的每日活跃度序列
+
+    只读取日期范围内的汇总行（最多 days+1 行），缺失的日期补0。
+
+    Args:
+        columns: 需要的汇总列名，如 ['contents', 'topics']
+        days: 向前统计的天数，结果包含 days+1 个日期（含今天）
+        user_id: 指定时返回该用户的数据，否则返回全站数据
+
+    Returns:
+        dict: {'dates': ['2025-01-01', ...], 列名: [数量, ...], ...}
+    """
+    end_day = beijing_time().date()
+    start_day = end_day - timedelta(days=days)
+
+    if user_id is None:
+        by_day = _site_daily_rows(start_day, end_day)
+    else:
+        rows = UserDailyActivity.query.filter(
+            UserDailyActivity.user_id == user_id,
+            UserDailyActivity.day >= start_day,
+            UserDailyActivity.day <= end_day
+        ).all()
+        by_day = {row.day: {column: getattr(row, column) for column in columns} for row in rows}
+
+    all_days = [start_day + timedelta(days=i) for i in range(days + 1)]
+    series = {'dates': [day.strftime('%Y-%m-%d') for day in all_days]}
+    for column in columns:
+        series[column] = [by_day[day][column] if day in by_day else 0 for day in all_days]
+    return series
+
+
+@cache.cached('site_daily_activity', tags=[DailyActivity], ttl=600)
+def _site_daily_rows(start_day, end_day) -> Dict:
+    """全站每日汇总行 {日期: {列名: 数量}}，缓存到汇总表下次变化"""
+    columns = [column for _, column, _, _ in TRACKED_MODELS]
+    rows = DailyActivity.query.filter(DailyActivity.day >= start_day, DailyActivity.day <= end_day).all()
+    return {row.day: {column: getattr(row, column) for column in columns} for row in rows}
+
+
+@cache.cached('site_totals', tags=[DailyActivity], ttl=600)
+def get_site_totals() -> Dict[str, int]:
+    """获取全站各类数据的总数
+
+    对每日汇总表求和，一条查询代替对各原始表分别执行 COUNT(*)。
+
+    Returns:
+        dict: {'users': ..., 'heritage_items': ..., 'contents': ..., 'topics': ..., 'posts': ..., 'comments': ...}
+    """
+    columns = [column for _, column, _, _ in TRACKED_MODELS]
+    row = db.session.query(
+        *[func.coalesce(func.sum(getattr(DailyActivity, column)), 0) for column in columns]
+    ).one()
+    return {column: int(value) for column, value in zip(columns, row)}
+
+
+def backfill() -> Dict[str, int]:
+    """根据原始数据重建全部活跃度汇总
+
+    清空两张汇总表后，对每个被跟踪的原始表按天（以及按用户和天）聚合并写入。
+    在调用方的事务中执行，由本函数提交。
+
+    Returns:
+        dict: 写入的汇总行数 {'daily_rows': ..., 'user_daily_rows': ...}
+    """
+    connection = db.session.connection()
+    connection.execute(delete(UserDailyActivity.__table__))
+    connection.execute(delete(DailyActivity.__table__))
+
+    # 批量插入要求每行包含相同的列，因此先用0填充全部计数列
+    daily_columns = [column for _, column, _, _ in TRACKED_MODELS]
+    user_columns = [column for _, _, _, column in TRACKED_MODELS if column]
+    daily: Dict = {}
+    user_daily: Dict = {}
+    for model, daily_column, user_attr, user_column in TRACKED_MODELS:
+        day = day_bucket(model.created_at)
+        for row_day, count in db.session.query(day, func.count(model.id)).group_by(day):
+            daily.setdefault(row_day, dict.fromkeys(daily_columns, 0))[daily_column] = count
+        if user_attr:
+            author = getattr(model, user_attr)
+            rows = db.session.query(author, day, func.count(model.id)).filter(
+                author.isnot(None)).group_by(author, day)
+            for user_id, row_day, count in rows:
+                user_daily.setdefault((user_id, row_day), dict.fromkeys(user_columns, 0))[user_column] = count
+
+    if daily:
+        connection.execute(DailyActivity.__table__.insert(), [
+            {'day': day, **counts} for day, counts in daily.items() if day is not None
+        ])
+    if user_daily:
+        connection.execute(UserDailyActivity.__table__.insert(), [
+            {'user_id': user_id, 'day': day, **counts}
+            for (user_id, day), counts in user_daily.items() if day is not None
+        ])
+    cache.mark_dirty(DailyActivity.__tablename__)
+    db.session.commit()
+    return {'daily_rows': len(daily), 'user_daily_rows': len(user_daily)}
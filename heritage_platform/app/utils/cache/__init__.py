@@ -0,0 +1,135 @@
+"""
+缓存子系统
+
+为查询函数提供可插拔的结果缓存：
+- 后端（backends.py）: 进程内 LRU+TTL、单机多进程共享的 SQLite 文件、可选的 Redis 兼容服务，
+  由 CACHE_BACKEND 配置选择
+- @cached 装饰器: 按函数参数缓存返回值，声明依赖的标签（模型类、表名或 "表名:主键"）
+- 标签失效（invalidation.py）: ORM 写入涉及的表在事务提交后自动失效，回滚时不失效
+- 单飞合并（core.py）: 热点键未命中时只计算一次，其余并发请求等待同一结果，避免缓存击穿
+- 命中统计: 每个缓存的命中、未命中、计算次数和平均计算耗时，见 stats()
+
+缓存的值应当是普通数据（字典、列表、元组、数字、字符串），不要缓存ORM对象：
+ORM对象与会话绑定，离开请求后访问延迟加载的属性会出错，共享后端也无法可靠地序列化它们。
+缓存的计算总是读取主库（见 app/utils/db_session.py 的读写分离）。
+
+使用示例:
+    from app.utils.cache import cached
+
+    @cached('nav_forum_categories', tags=[ForumTopic], ttl=600)
+    def nav_forum_categories():
+        return [c for (c,) in db.session.query(ForumTopic.category).distinct().limit(5)]
+
+    @cached('content_summary', tags=[lambda id: f'contents:{id}'])
+    def content_summary(id):
+        ...
+
+    content_summary.invalidate(12)  # 手动删除某组参数的缓存
+
+在没有应用上下文或未初始化缓存时，被装饰的函数直接执行。
+"""
+
+import functools
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app, has_app_context
+
+from app.utils.cache.backends import (  # noqa: F401
+    BaseBackend, MemoryBackend, NullBackend, RedisBackend, SQLiteBackend, create_backend
+)
+from app.utils.cache.core import Cache, make_key, normalize_tags
+from app.utils.cache.invalidation import mark_dirty, watch
+from app.utils.db_session import primary_reads
+
+__all__ = ['cached', 'init_cache', 'get_cache', 'invalidate_tags', 'mark_dirty', 'stats', 'clear']
+
+
+def init_cache(app):
+    """根据配置为应用创建缓存，保存在 app.extensions['cache']"""
+    backend = create_backend(app.config, app.logger)
+    app.extensions['cache'] = Cache(
+        backend,
+        prefix=app.config.get('CACHE_KEY_PREFIX', 'cache'),
+        default_ttl=app.config.get('CACHE_DEFAULT_TTL', 300),
+        lock_timeout=app.config.get('CACHE_LOCK_TIMEOUT', 10),
+        logger=app.logger,
+    )
+
+
+def get_cache() -> Optional[Cache]:
+    """当前应用的缓存，没有应用上下文或未初始化时返回None"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('cache')
+
+
+def cached(key: Optional[str] = None, tags=(), ttl: Optional[float] = None):
+    """缓存函数返回值的装饰器
+
+    Args:
+        key: 缓存名称，默认使用函数的模块名和限定名；实际的键还包含调用参数
+        tags: 依赖的标签列表，元素可以是模型类、字符串，或接收相同参数、返回字符串（列表）的函数
+        ttl: 有效期（秒），为空时取 CACHE_DEFAULT_TTL
+    """
+    static_tags = normalize_tags([t for t in tags if not callable(t) or hasattr(t, '__tablename__')])
+    dynamic_tags = [t for t in tags if callable(t) and not hasattr(t, '__tablename__')]
+    watch(static_tags)
+
+    def decorator(func: Callable) -> Callable:
+        name = key or f'{func.__module__}.{func.__qualname__}'
+
+        def resolve_tags(args, kwargs):
+            result = list(static_tags)
+            for tag_func in dynamic_tags:
+                value = tag_func(*args, **kwargs)
+                extra = [value] if isinstance(value, str) else list(value)
+                watch(extra)
+                result.extend(extra)
+            return tuple(result)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            return cache.get_or_compute(
+                name, make_key(name, args, kwargs), lambda: _compute_on_primary(func, args, kwargs),
+                tags=resolve_tags(args, kwargs), ttl=ttl)
+
+        def invalidate(*args, **kwargs):
+            cache = get_cache()
+            if cache is not None:
+                cache.delete(make_key(name, args, kwargs))
+
+        wrapper.invalidate = invalidate
+        wrapper.uncached = func
+        wrapper.cache_name = name
+        return wrapper
+
+    return decorator
+
+
+def _compute_on_primary(func, args, kwargs):
+    # 失效后的重新计算读取主库，避免把只读副本上尚未同步的旧数据写入缓存
+    with primary_reads():
+        return func(*args, **kwargs)
+
+
+def invalidate_tags(*tags):
+    """立即使这些标签（模型类或字符串）的缓存失效，不等待事务提交"""
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate_tags(normalize_tags(tags))
+
+
+def stats() -> Dict[str, Any]:
+    """当前进程的缓存统计"""
+    cache = get_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def clear():
+    """清空缓存（共享后端会影响所有进程）"""
+    cache = get_cache()
+    if cache is not None:
+        cache.clear()
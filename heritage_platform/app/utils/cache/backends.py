@@ -0,0 +1,285 @@
+"""
+缓存后端
+
+所有后端实现相同的接口（get / get_many / set / add / delete / clear），值在后端内部序列化：
+- MemoryBackend: 进程内 LRU + TTL，速度最快，但每个工作进程各有一份，失效只影响本进程
+- SQLiteBackend: 同一主机上多个工作进程共享的文件存储（SQLite，WAL模式），
+  不需要额外服务，适合单机部署多个 gunicorn/eventlet 进程
+- RedisBackend: Redis 协议兼容的服务（Redis、Valkey、KeyDB 等），多台主机共享；
+  需要安装 redis 包，未安装时 create_backend() 退回到 MemoryBackend 并记录警告
+
+add() 在键不存在（或已过期）时写入并返回 True，用作跨进程的单飞锁；
+ttl 为空表示不过期（仍可能被 LRU 淘汰）。
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# 表示缓存未命中的哨兵值（缓存的值本身可能为 None）
+MISSING = object()
+
+
+class BaseBackend:
+    """缓存后端接口"""
+
+    # 后端是否在多个进程之间共享（共享后端才需要跨进程单飞锁）
+    shared = False
+    name = 'base'
+
+    def get(self, key: str) -> Any:
+        return self.get_many([key]).get(key, MISSING)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def size(self) -> Optional[int]:
+        """当前条目数，无法统计时返回None"""
+        return None
+
+
+class NullBackend(BaseBackend):
+    """不缓存任何数据（CACHE_BACKEND = 'null'），用于排查缓存相关问题"""
+
+    name = 'null'
+
+    def get_many(self, keys):
+        return {}
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def add(self, key, value, ttl=None):
+        return True
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend(BaseBackend):
+    """进程内 LRU 缓存，条目数超过 max_entries 时淘汰最久未使用的条目"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for key in keys:
+                value = self._get(key, now)
+                if value is not MISSING:
+                    result[key] = value
+        return result
+
+    def _set(self, key, value, ttl):
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            if self._get(key, time.monotonic()) is not MISSING:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self):
+        return len(self._data)
+
+
+class SQLiteBackend(BaseBackend):
+    """同一主机上多个进程共享的文件缓存
+
+    每个线程使用独立的连接；过期条目在读取时忽略，并在写入时按一定间隔批量清理。
+    """
+
+    name = 'sqlite'
+    shared = True
+
+    # 两次清理过期条目之间的写入次数
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS cache ('
+                     'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        rows = self._conn().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            f'AND (expires_at IS NULL OR expires_at > ?)', (*keys, time.time())
+        ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def _expires(self, ttl):
+        return time.time() + ttl if ttl else None
+
+    def set(self, key, value, ttl=None):
+        self._conn().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(ttl))
+        )
+        self._maybe_purge()
+
+    def add(self, key, value, ttl=None):
+        conn = self._conn()
+        now = time.time()
+        # 已过期的同名条目视为不存在
+        conn.execute('DELETE FROM cache WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?', (key, now))
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(ttl))
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache')
+
+    def size(self):
+        return self._conn().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def _maybe_purge(self):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY:
+            return
+        conn = self._conn()
+        conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+        # 超出容量时删除最早过期的条目（不过期的条目最后删除）
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            conn.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                         'ORDER BY expires_at IS NULL, expires_at LIMIT ?)', (excess,))
+
+
+class RedisBackend(BaseBackend):
+    """Redis 协议兼容的缓存服务"""
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, url: str):
+        import redis  # 可选依赖，未安装时由 create_backend 处理
+        self._client = redis.Redis.from_url(url)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        return {key: pickle.loads(value)
+                for key, value in zip(keys, self._client.mget(keys)) if value is not None}
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                         px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        return bool(self._client.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                                     px=int(ttl * 1000) if ttl else None, nx=True))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def clear(self):
+        # 只清空当前数据库，缓存应使用单独的数据库编号
+        self._client.flushdb()
+
+    def size(self):
+        return self._client.dbsize()
+
+
+def create_backend(config, logger=None) -> BaseBackend:
+    """根据配置创建缓存后端
+
+    配置项:
+        CACHE_BACKEND: memory（默认）、sqlite、redis 或 null
+        CACHE_MAX_ENTRIES: 内存/SQLite后端的最大条目数
+        CACHE_SQLITE_PATH: SQLite后端的文件路径
+        CACHE_REDIS_URL: Redis后端的连接地址
+    """
+    kind = (config.get('CACHE_BACKEND') or 'memory').lower()
+    max_entries = config.get('CACHE_MAX_ENTRIES', 10000)
+    if kind == 'null':
+        return NullBackend()
+    if kind == 'sqlite':
+        return SQLiteBackend(config['CACHE_SQLITE_PATH'], max_entries=max_entries)
+    if kind == 'redis':
+        try:
+            return RedisBackend(config['CACHE_REDIS_URL'])
+        except ImportError:
+            if logger:
+                logger.warning('未安装 redis 包，缓存退回到进程内存储')
+    elif kind != 'memory' and logger:
+        logger.warning(f'未知的缓存后端 {kind}，使用进程内存储')
+    return MemoryBackend(max_entries=max_entries)
@@ -0,0 +1,285 @@
+"""
+缓存核心：版本化标签、单飞合并和命中统计
+
+标签失效采用"版本号"方式：每个标签在后端保存一个随机版本号，缓存条目写入时记录所依赖标签的版本号，
+读取时与当前版本号比较，不一致即视为未命中。失效一个标签只需写入新的版本号，
+不需要找出并删除所有相关条目；共享后端中的失效对所有进程立即生效。
+版本号使用随机值而不是递增计数，即使被LRU淘汰后重新生成也不会与旧条目的版本号相同。
+
+单飞合并：同一个键未命中时只有一个调用方执行计算，其余调用方等待其结果。
+进程内通过等待事件实现；共享后端上再用 add() 写入一个短期锁，其他进程轮询等待结果，
+超过 CACHE_LOCK_TIMEOUT 仍未得到结果时自行计算，避免锁持有者异常退出后一直等待。
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.cache.backends import MISSING, BaseBackend
+
+# 跨进程等待锁时的轮询间隔（秒）
+_LOCK_POLL_INTERVAL = 0.02
+
+
+class CacheMetrics:
+    """按缓存名称统计的命中数据（每个进程独立统计）"""
+
+    FIELDS = ('hits', 'misses', 'computes', 'coalesced', 'errors')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+        self._compute_time: Dict[str, float] = defaultdict(float)
+        self.invalidations = 0
+
+    def incr(self, name: str, field: str, amount: int = 1):
+        with self._lock:
+            self._counts[name][field] += amount
+
+    def add_compute_time(self, name: str, seconds: float):
+        with self._lock:
+            self._compute_time[name] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for name, counts in self._counts.items():
+                lookups = counts['hits'] + counts['misses']
+                computes = counts['computes']
+                result[name] = {
+                    **counts,
+                    'hit_ratio': round(counts['hits'] / lookups, 4) if lookups else None,
+                    'avg_compute_ms': round(self._compute_time[name] / computes * 1000, 3) if computes else None,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._compute_time.clear()
+            self.invalidations = 0
+
+
+class _Flight:
+    """进程内一次进行中的计算"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = MISSING
+        self.error = None
+
+
+class Cache:
+    """绑定到一个后端的缓存
+
+    Args:
+        backend: 缓存后端
+        prefix: 键前缀，多个应用共用一个后端时用于隔离
+        default_ttl: 未指定 ttl 时的有效期（秒）
+        lock_timeout: 单飞锁的有效期，也是等待其他进程计算的最长时间（秒）
+        logger: 记录后端错误的日志对象
+    """
+
+    def __init__(self, backend: BaseBackend, prefix: str = 'cache', default_ttl: float = 300,
+                 lock_timeout: float = 10, logger=None):
+        self.backend = backend
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.lock_timeout = lock_timeout
+        self.logger = logger
+        self.metrics = CacheMetrics()
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+
+    # -- 键 -----------------------------------------------------------------
+
+    def _entry_key(self, key: str) -> str:
+        return f'{self.prefix}:v:{key}'
+
+    def _tag_key(self, tag: str) -> str:
+        return f'{self.prefix}:t:{tag}'
+
+    def _lock_key(self, key: str) -> str:
+        return f'{self.prefix}:l:{key}'
+
+    # -- 标签 ---------------------------------------------------------------
+
+    def _tag_versions(self, tags: Tuple[str, ...], known: Dict[str, Any]) -> Tuple[str, ...]:
+        """读取标签的当前版本号，尚不存在的标签生成一个新版本号"""
+        versions = []
+        for tag in tags:
+            version = known.get(self._tag_key(tag), MISSING)
+            if version is MISSING:
+                version = uuid.uuid4().hex
+                if not self.backend.add(self._tag_key(tag), version):
+                    version = self.backend.get(self._tag_key(tag))
+            versions.append(version)
+        return tuple(versions)
+
+    def invalidate_tags(self, tags: Iterable[str]):
+        """使依赖这些标签的缓存全部失效"""
+        tags = list(tags)
+        if not tags:
+            return
+        try:
+            for tag in tags:
+                self.backend.set(self._tag_key(tag), uuid.uuid4().hex)
+            self.metrics.invalidations += len(tags)
+        except Exception as e:
+            self._log_error(f'缓存标签失效失败: {str(e)}')
+
+    # -- 读写 ---------------------------------------------------------------
+
+    def _lookup(self, key: str, tags: Tuple[str, ...]):
+        """读取条目；返回 (值或MISSING, 当前标签版本号)"""
+        entry_key = self._entry_key(key)
+        found = self.backend.get_many([entry_key] + [self._tag_key(tag) for tag in tags])
+        versions = self._tag_versions(tags, found)
+        entry = found.get(entry_key, MISSING)
+        if entry is not MISSING and entry[0] == versions:
+            return entry[1], versions
+        return MISSING, versions
+
+    def get_or_compute(self, name: str, key: str, compute: Callable[[], Any],
+                       tags: Tuple[str, ...] = (), ttl: Optional[float] = None) -> Any:
+        """读取缓存，未命中时计算并写入
+
+        Args:
+            name: 统计使用的缓存名称
+            key: 完整的缓存键
+            compute: 未命中时调用的计算函数
+            tags: 依赖的标签
+            ttl: 有效期（秒），为空时取默认值
+        """
+        try:
+            value, versions = self._lookup(key, tags)
+        except Exception as e:
+            # 后端不可用时直接计算，缓存故障不影响请求
+            self.metrics.incr(name, 'errors')
+            self._log_error(f'读取缓存 {key} 失败: {str(e)}')
+            return self._timed_compute(name, compute)
+
+        if value is not MISSING:
+            self.metrics.incr(name, 'hits')
+            return value
+        self.metrics.incr(name, 'misses')
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            # 同一进程内已有调用方在计算，等待其结果
+            self.metrics.incr(name, 'coalesced')
+            if flight.event.wait(self.lock_timeout) and flight.error is None:
+                return flight.value
+            return self._timed_compute(name, compute)
+
+        try:
+            flight.value = self._compute_and_store(name, key, compute, tags, ttl, versions)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _compute_and_store(self, name, key, compute, tags, ttl, versions):
+        locked = False
+        if self.backend.shared:
+            try:
+                locked = self.backend.add(self._lock_key(key), 1, self.lock_timeout)
+                if not locked:
+                    # 其他进程正在计算，轮询等待其结果
+                    value = self._wait_for_other_process(key, tags)
+                    if value is not MISSING:
+                        self.metrics.incr(name, 'coalesced')
+                        return value
+            except Exception as e:
+                self.metrics.incr(name, 'errors')
+                self._log_error(f'获取缓存锁 {key} 失败: {str(e)}')
+
+        try:
+            # 使用计算前读取的标签版本号写入：计算期间发生的失效会使本次结果在下次读取时失效
+            value = self._timed_compute(name, compute)
+            try:
+                self.backend.set(self._entry_key(key), (versions, value),
+                                 self.default_ttl if ttl is None else ttl)
+            except Exception as e:
+                self.metrics.incr(name, 'errors')
+                self._log_error(f'写入缓存 {key} 失败: {str(e)}')
+            return value
+        finally:
+            if locked:
+                try:
+                    self.backend.delete(self._lock_key(key))
+                except Exception:
+                    pass
+
+    def _wait_for_other_process(self, key, tags):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(_LOCK_POLL_INTERVAL)
+            value, _ = self._lookup(key, tags)
+            if value is not MISSING:
+                return value
+            if self.backend.get(self._lock_key(key)) is MISSING:
+                break
+        return MISSING
+
+    def _timed_compute(self, name, compute):
+        start = time.perf_counter()
+        value = compute()
+        self.metrics.incr(name, 'computes')
+        self.metrics.add_compute_time(name, time.perf_counter() - start)
+        return value
+
+    def delete(self, key: str):
+        self.backend.delete(self._entry_key(key))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            'backend': self.backend.name,
+            'entries': size,
+            'invalidations': self.metrics.invalidations,
+            'caches': self.metrics.snapshot(),
+        }
+
+    def _log_error(self, message: str):
+        if self.logger:
+            self.logger.error(message)
+
+
+def make_key(name: str, args: tuple, kwargs: dict) -> str:
+    """由缓存名称和调用参数生成缓存键，参数较长时使用摘要"""
+    if not args and not kwargs:
+        return name
+    parts = [repr(a) for a in args] + [f'{k}={v!r}' for k, v in sorted(kwargs.items())]
+    signature = ','.join(parts)
+    if len(signature) > 100:
+        signature = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+    return f'{name}({signature})'
+
+
+def normalize_tags(tags) -> List[str]:
+    """把标签（字符串或模型类）转换为字符串，模型类使用表名"""
+    result = []
+    for tag in tags or ():
+        result.append(tag if isinstance(tag, str) else tag.__tablename__)
+    return result
@@ -0,0 +1,80 @@
+"""
+基于 SQLAlchemy 事件的标签失效
+
+ORM 写入（插入、更新、删除，以及 session.execute 执行的批量 UPDATE/DELETE）会把涉及的表名标签
+和行标签（"表名:主键"）记录在会话中，事务提交后统一失效；事务回滚时丢弃，不会误失效。
+只有被某个缓存声明依赖过的表才会记录，其他表的写入没有额外开销。
+
+直接通过连接执行的Core语句（如 counters 的增量更新）不经过ORM事件，
+需要在同一事务中调用 mark_dirty() 登记受影响的标签。
+"""
+
+from typing import Iterable, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper, Session
+
+from app import db
+
+# 被缓存依赖的表名
+_watched_tables: Set[str] = set()
+
+# 会话中待失效的标签
+_DIRTY_KEY = '_cache_dirty_tags'
+
+
+def watch(tags: Iterable[str]):
+    """登记缓存依赖的标签，其所属的表写入时才会触发失效"""
+    for tag in tags:
+        _watched_tables.add(tag.split(':', 1)[0])
+
+
+def mark_dirty(*tags: str, session=None):
+    """登记在当前事务提交后需要失效的标签"""
+    session = session or db.session
+    session.info.setdefault(_DIRTY_KEY, set()).update(tags)
+
+
+def _mark_row(mapper, connection, target):
+    table = mapper.local_table.name
+    if table not in _watched_tables:
+        return
+    session = Session.object_session(target)
+    if session is None:
+        return
+    tags = {table}
+    identity = mapper.primary_key_from_instance(target)
+    if len(identity) == 1 and identity[0] is not None:
+        tags.add(f'{table}:{identity[0]}')
+    session.info.setdefault(_DIRTY_KEY, set()).update(tags)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Mapper, _event_name, _mark_row)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_bulk(orm_execute_state):
+    """批量 UPDATE/DELETE 无法得知具体行，使整张表的标签失效"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    if name in _watched_tables:
+        orm_execute_state.session.info.setdefault(_DIRTY_KEY, set()).add(name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    tags = session.info.pop(_DIRTY_KEY, None)
+    if not tags:
+        return
+    from app.utils.cache import get_cache
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate_tags(tags)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,233 @@
+"""
+评论树加载模块
+
+内容详情页的评论按"顶级评论分页 + 嵌套回复"展示。逐条访问 Comment.replies（dynamic关系）
+和作者关系会为每条评论产生额外查询，本模块改为固定次数的批量查询：
+1. 顶级评论分页：统计总数 + 取当前页的顶级评论及作者（2条查询）
+2. 当前页全部后代：递归CTE一次取出所有层级的回复及作者、回复目标用户（1条查询）
+
+取出的行在内存中组装成树，并限制展示的深度（max_depth）和每条评论下展示的回复数（max_replies）。
+被截断的回复通过 load_replies() 按键集（created_at, id）继续分页加载。
+
+递归CTE和窗口函数需要 MySQL 8.0+ 或 SQLite 3.25+。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, literal, or_, select
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Comment, User
+
+# 默认展示的回复层级数（顶级评论为第0层）
+DEFAULT_MAX_DEPTH = 3
+# 默认每条评论下直接展示的回复数
+DEFAULT_MAX_REPLIES = 5
+
+
+@dataclass
+class CommentAuthor:
+    """评论作者的展示信息"""
+    id: Optional[int]
+    username: str
+    avatar: Optional[str] = None
+
+
+@dataclass
+class CommentNode:
+    """评论树中的一个节点
+
+    属性:
+        id, user_id, content_id, text, created_at, parent_id, reply_to_user_id: 同 Comment
+        author: 作者信息
+        reply_to_user: 回复目标用户信息，直接评论内容时为None
+        depth: 层级，顶级评论为0
+        replies: 已加载的直接回复
+        reply_count: 直接回复总数（包括未加载的）
+    """
+    id: int
+    user_id: Optional[int]
+    content_id: int
+    text: str
+    created_at: object
+    parent_id: Optional[int]
+    reply_to_user_id: Optional[int]
+    author: CommentAuthor
+    reply_to_user: Optional[CommentAuthor] = None
+    depth: int = 0
+    replies: List['CommentNode'] = field(default_factory=list)
+    reply_count: int = 0
+
+    @property
+    def more_replies(self) -> int:
+        """未加载的直接回复数"""
+        return max(0, self.reply_count - len(self.replies))
+
+    @property
+    def replies_cursor(self) -> Optional[int]:
+        """继续加载回复时使用的游标（最后一条已加载回复的ID）"""
+        return self.replies[-1].id if self.replies else None
+
+    def to_dict(self) -> dict:
+        """转换为字典，用于JSON响应"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'content_id': self.content_id,
+            'author_name': self.author.username,
+            'author_avatar': self.author.avatar,
+            'text': self.text,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'parent_id': self.parent_id,
+            'reply_to_user_id': self.reply_to_user_id,
+            'reply_to_name': self.reply_to_user.username if self.reply_to_user else None,
+            'depth': self.depth,
+            'reply_count': self.reply_count,
+            'more_replies': self.more_replies,
+            'replies': [reply.to_dict() for reply in self.replies],
+        }
+
+
+def _make_node(comment, author_name, author_avatar, reply_to_name=None, depth=0) -> CommentNode:
+    """根据查询结果行创建节点"""
+    reply_to = None
+    if comment.reply_to_user_id and reply_to_name:
+        reply_to = CommentAuthor(comment.reply_to_user_id, reply_to_name)
+    return CommentNode(
+        id=comment.id,
+        user_id=comment.user_id,
+        content_id=comment.content_id,
+        text=comment.text,
+        created_at=comment.created_at,
+        parent_id=comment.parent_id,
+        reply_to_user_id=comment.reply_to_user_id,
+        author=CommentAuthor(comment.user_id, author_name or '未知用户', author_avatar),
+        reply_to_user=reply_to,
+        depth=depth,
+    )
+
+
+def load_comment_page(content_id: int, page: int = 1, per_page: int = 10,
+                      max_depth: int = DEFAULT_MAX_DEPTH, max_replies: int = DEFAULT_MAX_REPLIES):
+    """加载一页顶级评论及其回复树
+
+    Args:
+        content_id: 内容ID
+        page: 顶级评论页码
+        per_page: 每页顶级评论数
+        max_depth: 展示的最大回复层级
+        max_replies: 每条评论下直接展示的回复数
+
+    Returns:
+        tuple: (顶级评论节点列表, 分页对象)
+    """
+    roots_query = db.session.query(
+        Comment, User.username, User.avatar
+    ).outerjoin(User, Comment.user_id == User.id).filter(
+        Comment.content_id == content_id,
+        Comment.parent_id.is_(None)
+    ).order_by(Comment.created_at.desc(), Comment.id.desc())
+
+    pagination = roots_query.paginate(page=page, per_page=per_page, error_out=False)
+    roots = [_make_node(comment, name, avatar) for comment, name, avatar in pagination.items]
+    if roots and max_depth > 0:
+        _attach_descendants(roots, max_depth, max_replies)
+    return roots, pagination
+
+
+def _attach_descendants(roots: List[CommentNode], max_depth: int, max_replies: int):
+    """一条查询取出顶级评论的全部后代并挂到树上
+
+    递归CTE多取一层（max_depth + 1），这一层只用于统计上一层节点的回复数；
+    窗口函数在同一父评论下编号，只保留前 max_replies 条，并给出兄弟总数。
+    """
+    tree = select(
+        Comment.id, Comment.parent_id, literal(1).label('depth')
+    ).where(Comment.parent_id.in_([root.id for root in roots])).cte('comment_tree', recursive=True)
+    child = aliased(Comment)
+    tree = tree.union_all(
+        select(child.id, child.parent_id, tree.c.depth + 1)
+        .join(tree, child.parent_id == tree.c.id)
+        .where(tree.c.depth <= max_depth)
+    )
+
+    ranked_comment = aliased(Comment)
+    ranked = select(
+        tree.c.id,
+        tree.c.depth,
+        func.row_number().over(
+            partition_by=tree.c.parent_id,
+            order_by=(ranked_comment.created_at, ranked_comment.id)
+        ).label('position'),
+        func.count().over(partition_by=tree.c.parent_id).label('siblings'),
+    ).join(ranked_comment, ranked_comment.id == tree.c.id).subquery()
+
+    author = aliased(User)
+    reply_to = aliased(User)
+    rows = db.session.query(
+        Comment, ranked.c.depth, ranked.c.siblings, author.username, author.avatar, reply_to.username
+    ).join(ranked, ranked.c.id == Comment.id
+    ).outerjoin(author, Comment.user_id == author.id
+    ).outerjoin(reply_to, Comment.reply_to_user_id == reply_to.id
+    ).filter(ranked.c.position <= max_replies
+    ).order_by(ranked.c.depth, Comment.created_at, Comment.id).all()
+
+    nodes: Dict[int, CommentNode] = {root.id: root for root in roots}
+    for comment, depth, siblings, author_name, author_avatar, reply_to_name in rows:
+        parent = nodes.get(comment.parent_id)
+        if parent is None:
+            # 父评论因宽度限制未展示，其后代也不展示
+            continue
+        parent.reply_count = siblings
+        if depth > max_depth:
+            continue
+        node = _make_node(comment, author_name, author_avatar, reply_to_name, depth)
+        parent.replies.append(node)
+        nodes[node.id] = node
+
+
+def load_replies(parent_id: int, after_id: Optional[int] = None, limit: int = DEFAULT_MAX_REPLIES):
+    """按键集分页加载某条评论的直接回复
+
+    Args:
+        parent_id: 父评论ID
+        after_id: 游标，上一批最后一条回复的ID；为空时从第一条开始
+        limit: 本批返回的数量
+
+    Returns:
+        tuple: (回复节点列表, 下一批的游标；没有更多时为None)
+    """
+    author = aliased(User)
+    reply_to = aliased(User)
+    child = aliased(Comment)
+    reply_count = select(func.count(child.id)).where(
+        child.parent_id == Comment.id).correlate(Comment).scalar_subquery()
+
+    query = db.session.query(
+        Comment, author.username, author.avatar, reply_to.username, reply_count
+    ).outerjoin(author, Comment.user_id == author.id
+    ).outerjoin(reply_to, Comment.reply_to_user_id == reply_to.id
+    ).filter(Comment.parent_id == parent_id)
+
+    if after_id:
+        cursor = db.session.query(Comment.created_at).filter(
+            Comment.id == after_id, Comment.parent_id == parent_id).scalar_subquery()
+        query = query.filter(or_(
+            Comment.created_at > cursor,
+            and_(Comment.created_at == cursor, Comment.id > after_id)
+        ))
+
+    # 多取一条判断是否还有更多
+    rows = query.order_by(Comment.created_at, Comment.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+
+    replies = []
+    for comment, author_name, author_avatar, reply_to_name, count in rows[:limit]:
+        node = _make_node(comment, author_name, author_avatar, reply_to_name)
+        node.reply_count = count
+        replies.append(node)
+
+    next_cursor = replies[-1].id if has_more and replies else None
+    return replies, next_cursor
@@ -11,9 +11,18 @@
 提高代码复用性和应用性能。
 """
 
-from app.models import HeritageItem, ForumTopic  # 导入非遗项目和论坛主题模型
+from app.models import ForumTopic  # 导入论坛主题模型
 from flask_login import current_user  # 获取当前登录用户
 from flask import current_app  # 获取当前应用实例，用于日志记录
+from app.utils.cache import cached  # 查询结果缓存
+
+@cached('nav_forum_categories', tags=[ForumTopic], ttl=600)
+def nav_forum_categories():
+    """导航栏显示的论坛分类（最多5个）"""
+    # 使用with_entities只获取需要的category字段，distinct()去重
+    forum_categories = ForumTopic.query.with_entities(
+        ForumTopic.category).distinct().limit(5).all()
+    return [c[0] for c in forum_categories]
 
 def common_data():
     """向所有模板提供通用数据的上下文处理器
@@ -43,25 +52,18 @@ def common_data():
     }
 
     # 获取头部导航菜单的非遗分类
-    # 使用distinct()查询不同的分类，并限制最多返回5个
+    # 读取进程内的非遗项目注册表，取项目数最多的5个分类，不访问数据库
     try:
-        # 使用with_entities优化查询，只获取需要的category字段
-        categories = HeritageItem.query.with_entities(
-            HeritageItem.category).distinct().limit(5).all()
-        # 将查询结果转换为简单的列表
-        context_data['nav_heritage_categories'] = [c[0] for c in categories]
+        from app.utils import heritage_registry
+        context_data['nav_heritage_categories'] = list(heritage_registry.category_counts())[:5]
     except Exception as e:
         # 记录错误日志，但不中断处理流程
         current_app.logger.error(f"获取非遗分类失败: {str(e)}")
 
     # 获取论坛分类
-    # 同样使用distinct()查询不同的分类，并限制最多返回5个
+    # 读取缓存，论坛主题有写入时在提交后失效
     try:
-        # 使用with_entities优化查询，只获取需要的category字段
-        forum_categories = ForumTopic.query.with_entities(
-            ForumTopic.category).distinct().limit(5).all()
-        # 将查询结果转换为简单的列表
-        context_data['nav_forum_categories'] = [c[0] for c in forum_categories]
+        context_data['nav_forum_categories'] = nav_forum_categories()
     except Exception as e:
         # 记录错误日志，但不中断处理流程
         current_app.logger.error(f"获取论坛分类失败: {str(e)}")
@@ -70,11 +72,10 @@ def common_data():
     # 这样可以避免对未登录用户进行不必要的数据库查询
     if current_user.is_authenticated:
         try:
-            # 延迟导入Favorite模型，避免循环导入问题
-            from app.models import Favorite
-            # 查询当前用户的收藏数量
-            context_data['user_favorite_count'] = Favorite.query.filter_by(
-                user_id=current_user.id).count()
+            # 延迟导入，避免循环导入问题
+            from app.utils.user_stats import get_user_stats
+            # 从用户统计表读取收藏数量（同一请求中已加载过时直接使用会话中的对象）
+            context_data['user_favorite_count'] = get_user_stats(current_user.id)['favorite_count']
         except Exception as e:
             # 记录错误日志，但不中断处理流程
             current_app.logger.error(f"获取用户收藏数量失败: {str(e)}")
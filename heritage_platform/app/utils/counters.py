@@ -0,0 +1,123 @@
+"""
+计数维护模块
+
+为随数据增删而增量维护的汇总数据（如每日活跃度汇总）提供统一的挂载机制：
+1. register(Model): 注册计数处理函数，模型插入或删除时在同一数据库连接、同一事务中执行
+2. bulk_delete(query): 代替 Query.delete()，批量删除前先把将被删除的行交给处理函数
+3. apply(Model, ...): 供使用Core语句直接写入的代码手动触发处理函数
+
+处理函数签名: handler(connection, rows, sign)
+- connection: 当前flush使用的数据库连接，处理函数应直接在该连接上执行SQL
+- rows: 发生变化的行列表，元素为模型实例或具有相同属性名的行对象
+- sign: 插入为 +1，删除为 -1
+
+被删除的对象在提交后通常处于过期状态，after_delete 事件中已无法再从数据库加载属性。
+因此本模块在会话的 before_flush 事件中预先加载将被删除对象的列值。
+"""
+
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# 模型类 -> 处理函数列表
+_handlers: Dict[type, List[Callable]] = defaultdict(list)
+
+# 会话事件只需注册一次
+_session_events_installed = False
+
+
+def register(model):
+    """注册模型的计数处理函数
+
+    Args:
+        model: 模型类
+
+    Returns:
+        装饰器函数
+
+    示例:
+        @counters.register(Content)
+        def update_daily_activity(connection, rows, sign):
+            ...
+    """
+    def decorator(handler: Callable):
+        if model not in _handlers:
+            event.listen(model, 'after_insert', _after_insert)
+            event.listen(model, 'after_delete', _after_delete)
+        _handlers[model].append(handler)
+        _install_session_events()
+        return handler
+    return decorator
+
+
+def apply(model, connection, rows, sign: int):
+    """手动触发模型的计数处理函数
+
+    用于绕过ORM、直接执行Core语句写入数据的场景。
+
+    Args:
+        model: 模型类
+        connection: 执行写入的数据库连接
+        rows: 发生变化的行列表
+        sign: 插入为 +1，删除为 -1
+    """
+    if not rows:
+        return
+    for handler in _handlers.get(model, ()):
+        handler(connection, rows, sign)
+
+
+def bulk_delete(query) -> int:
+    """批量删除并同步维护计数
+
+    先查询将被删除行的列值交给处理函数，再执行批量DELETE，两者处于同一事务。
+    未注册处理函数的模型等同于直接调用 query.delete()。
+
+    Args:
+        query: 要删除的行的查询，如 Comment.query.filter_by(content_id=id)
+
+    Returns:
+        int: 删除的行数
+    """
+    from app import db
+
+    model = query.column_descriptions[0]['entity']
+    if model in _handlers:
+        attrs = inspect(model).column_attrs
+        rows = [
+            SimpleNamespace(**dict(zip([attr.key for attr in attrs], values)))
+            for values in query.with_entities(*[attr.class_attribute for attr in attrs])
+        ]
+        apply(model, db.session.connection(), rows, -1)
+    return query.delete(synchronize_session=False)
+
+
+def _after_insert(mapper, connection, target):
+    """mapper事件：插入后触发处理函数"""
+    apply(mapper.class_, connection, [target], 1)
+
+
+def _after_delete(mapper, connection, target):
+    """mapper事件：删除后触发处理函数"""
+    apply(mapper.class_, connection, [target], -1)
+
+
+def _preload_deleted(session, flush_context, instances):
+    """会话事件：flush前加载将被删除对象的全部列值"""
+    for obj in session.deleted:
+        if type(obj) in _handlers:
+            state = inspect(obj)
+            for attr in state.mapper.column_attrs:
+                getattr(obj, attr.key)
+
+
+def _install_session_events():
+    """注册会话级别的事件（幂等）"""
+    global _session_events_installed
+    if _session_events_installed:
+        return
+    event.listen(Session, 'before_flush', _preload_deleted)
+    _session_events_installed = True
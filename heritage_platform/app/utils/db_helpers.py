@@ -1,4 +1,4 @@
-from sqlalchemy import inspect, text
+from sqlalchemy import inspect, text, func, Date
 from flask import current_app
 from app import db
 from typing import List, Dict, Any, Optional
@@ -28,6 +28,21 @@ def ensure_column_exists(table_name: str, column_name: str, column_type: str = "
         current_app.logger.error(f"添加列 {column_name} 到表 {table_name} 失败: {str(e)}")
         return False
 
+def day_bucket(column):
+    """返回按天分组用的日期表达式，兼容MySQL和SQLite
+
+    MySQL的DATE()返回date对象，而SQLite的date()返回'YYYY-MM-DD'字符串。
+    显式声明结果类型为Date后，SQLAlchemy会在SQLite上把字符串转换为date对象，
+    调用方可以统一使用 .strftime() 等date方法。
+
+    Args:
+        column: 日期时间列，如 Content.created_at
+
+    Returns:
+        SQL表达式，可用于select和group_by
+    """
+    return func.date(column, type_=Date)
+
 def table_exists(table_name: str) -> bool:
     """检查表是否存在
     
@@ -114,3 +129,78 @@ def batch_insert(model, items: List[Dict[str, Any]]) -> bool:
     except Exception as e:
         current_app.logger.error(f"批量插入数据失败: {str(e)}")
         return False
+
+def upsert_increment(connection, table, keys: Dict[str, Any], increments: Dict[str, int]) -> None:
+    """按唯一键累加计数列，记录不存在时插入
+
+    使用数据库原生的upsert语句在一条SQL中完成"存在则累加、不存在则插入"：
+    MySQL使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite和PostgreSQL使用 INSERT ... ON CONFLICT DO UPDATE。
+    其他数据库退化为先UPDATE、未命中时再INSERT。
+
+    Args:
+        connection: 数据库连接（可以是flush事件中的连接，与调用方处于同一事务）
+        table: 目标表（Table对象）
+        keys: 唯一键列及其值，如 {'user_id': 1, 'day': date(2025, 1, 1)}
+        increments: 需要累加的计数列及增量，增量可以为负数
+
+    示例:
+        upsert_increment(conn, DailyActivity.__table__, {'day': today}, {'contents': 1})
+    """
+    dialect = connection.dialect.name
+    values = {**keys, **increments}
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_duplicate_key_update({k: table.c[k] + stmt.inserted[k] for k in increments})
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={k: table.c[k] + stmt.excluded[k] for k in increments}
+        )
+    else:
+        condition = [table.c[k] == v for k, v in keys.items()]
+        result = connection.execute(
+            table.update().where(*condition).values({k: table.c[k] + v for k, v in increments.items()})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**values))
+        return
+
+    connection.execute(stmt)
+
+def insert_ignore(connection, table):
+    """构造"违反唯一约束时忽略"的INSERT语句
+
+    MySQL使用 INSERT IGNORE，SQLite和PostgreSQL使用 INSERT ... ON CONFLICT DO NOTHING。
+    执行结果的 rowcount 为实际插入的行数，可据此判断记录是否已存在。
+    其他数据库返回普通INSERT，调用方需自行处理唯一约束冲突。
+
+    Args:
+        connection: 数据库连接，用于判断方言
+        table: 目标表（Table对象）
+
+    Returns:
+        Insert: 可继续调用 .values() 或 .from_select() 的INSERT语句
+
+    示例:
+        stmt = insert_ignore(conn, Like.__table__).values(user_id=1, content_id=2)
+        inserted = conn.execute(stmt).rowcount == 1
+    """
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        return insert(table).prefix_with('IGNORE')
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table).on_conflict_do_nothing()
+    return table.insert()
@@ -0,0 +1,275 @@
+"""
+数据库会话模块
+
+为应用提供自定义的会话类和只读请求模式：
+1. RoutingSession: 在 Flask-SQLAlchemy 按 bind_key 选择引擎的基础上，
+   为标记为只读的会话返回自动提交（AUTOCOMMIT）模式的引擎视图。
+   自动提交视图与原引擎共享连接池，连接归还时恢复原有的隔离级别
+2. 只读请求: 安全方法（GET/HEAD/OPTIONS）的请求默认以只读模式执行：
+   - 查询在自动提交连接上执行，不持有事务，MySQL不会保留一致性读视图，
+     SQLite也不会因为视图中途的写入而在整个渲染期间持有写锁
+   - 渲染模板前结束会话事务、把连接归还连接池（不使已加载的对象过期），
+     模板中触发的延迟加载会重新借用连接，用完即还
+   - 视图中对会话的写入仍然生效（逐条自动提交），但会在性能日志中记录警告，
+     这类写入应当改为通过 app.utils.deferred 在响应发送后执行
+3. @allow_writes: 标记确实需要在GET请求中以事务方式写入的视图，这类请求使用普通会话
+4. 读写分离: 配置了只读副本（见 app/utils/replicas.py）时，以下SELECT语句发往健康的副本：
+   - 只读请求中的查询
+   - replica_reads() / @reads_from_replica 标记的查询辅助函数（可以容忍复制延迟的报表、归档等）
+   以下情况仍然读取主库，保证读到自己的写入：
+   - 会话已经写入过（刷新、批量UPDATE/DELETE，或通过 session.connection() 直接执行语句）
+   - 用户提交写入后的 REPLICA_STICKY_SECONDS 秒内（记录在用户的会话Cookie中，对所有工作进程有效）
+   - primary_reads() 范围内的查询，例如缓存结果的计算，避免把副本上的旧数据写入缓存
+   所有副本都不可用时自动回退到主库
+
+相关配置项（见config.py）:
+- READ_ONLY_REQUESTS: 是否为安全方法的请求启用只读模式
+- READ_ONLY_AUTOCOMMIT: 只读请求是否使用自动提交连接
+- REPLICA_STICKY_SECONDS: 用户写入后读取主库的时长（秒）
+
+使用示例:
+    @bp.route('/confirm/<token>')
+    @allow_writes
+    def confirm(token):
+        ...
+
+    @reads_from_replica
+    def archived_group_messages(group_id):
+        ...
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from flask import before_render_template, current_app, g, has_request_context, request
+from flask import session as cookie_session
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# 会话 info 中的只读标记和自动提交标记
+READ_ONLY_KEY = 'read_only'
+AUTOCOMMIT_KEY = 'read_only_autocommit'
+
+# 会话 info 中的读写分离标记: 允许读副本、强制读主库、会话已写入、当前事务已写入
+REPLICA_KEY = 'use_replica'
+PRIMARY_KEY = 'force_primary'
+WROTE_KEY = 'wrote'
+_WROTE_IN_TX_KEY = '_wrote_in_transaction'
+
+# 用户会话Cookie中记录的"读主库截止时间"
+STICKY_COOKIE_KEY = '_db_primary_until'
+
+# 只读请求适用的HTTP方法
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# 引擎 -> 自动提交视图
+_autocommit_engines: Dict[Engine, Engine] = {}
+
+_listeners_installed = False
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """按会话模式选择连接的会话类"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not isinstance(engine, Engine):
+            return engine
+        if mapper is None and clause is None:
+            # session.connection() 通常用于直接执行写入语句，之后的读取改读主库
+            self.info[WROTE_KEY] = self.info[_WROTE_IN_TX_KEY] = True
+        elif self._reads_from_replica(clause):
+            engine = _choose_replica(engine) or engine
+        if self.info.get(AUTOCOMMIT_KEY):
+            return _autocommit_view(engine)
+        return engine
+
+    def _reads_from_replica(self, clause) -> bool:
+        info = self.info
+        return bool(
+            info.get(REPLICA_KEY) and not info.get(PRIMARY_KEY) and not info.get(WROTE_KEY)
+            and not self._flushing and getattr(clause, 'is_select', False)
+        )
+
+
+def _choose_replica(engine: Engine):
+    replicas = current_app.extensions.get('db_replicas')
+    if replicas is None or replicas.primary is not engine:
+        return None
+    return replicas.choose()
+
+
+def _autocommit_view(engine: Engine) -> Engine:
+    view = _autocommit_engines.get(engine)
+    if view is None:
+        view = _autocommit_engines[engine] = engine.execution_options(isolation_level='AUTOCOMMIT')
+    return view
+
+
+def is_read_only(session=None) -> bool:
+    """会话是否处于只读模式，默认检查当前请求的会话"""
+    if session is None:
+        from app import db
+        session = db.session
+    return bool(session.info.get(READ_ONLY_KEY))
+
+
+@contextmanager
+def _session_flag(key: str):
+    from app import db
+    info = db.session.info
+    previous = info.get(key)
+    info[key] = True
+    try:
+        yield
+    finally:
+        if previous is None:
+            info.pop(key, None)
+        else:
+            info[key] = previous
+
+
+def replica_reads():
+    """在此范围内的SELECT语句读取只读副本（会话已写入时仍读主库）"""
+    return _session_flag(REPLICA_KEY)
+
+
+def primary_reads():
+    """在此范围内的查询总是读取主库"""
+    return _session_flag(PRIMARY_KEY)
+
+
+def reads_from_replica(func: Callable) -> Callable:
+    """把查询辅助函数标记为读取只读副本的装饰器"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def allow_writes(view: Callable) -> Callable:
+    """允许GET请求在事务中写入的视图装饰器"""
+    view._allow_writes = True
+    return view
+
+
+def release_connection(session=None):
+    """结束会话事务并归还连接，已加载的对象保持可用
+
+    会话中有未刷新的修改时不做处理，避免提前提交视图尚未完成的写入。
+    """
+    if session is None:
+        from app import db
+        session = db.session()
+    if not session.in_transaction() or session.new or session.dirty or session.deleted:
+        return
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+def _warn_on_write(session, flush_context, instances):
+    if not session.info.get(READ_ONLY_KEY) or session.info.get('_read_only_warned'):
+        return
+    changed = session.new | session.dirty | session.deleted
+    if not changed:
+        return
+    session.info['_read_only_warned'] = True
+    models = sorted({type(obj).__name__ for obj in changed})
+    logger = current_app.config.get('PERF_LOGGER') or current_app.logger
+    logger.warning(
+        f"只读请求中写入数据库: {request.method} {request.path} "
+        f"(endpoint={request.endpoint}, 模型={', '.join(models)})，"
+        f"应改为 deferred.defer() 或为视图添加 @allow_writes"
+    )
+
+
+def _release_before_render(sender, template, context, **extra):
+    from app import db
+    if g.get('_read_only_request') and not g.get('_read_only_released'):
+        g._read_only_released = True
+        try:
+            release_connection(db.session())
+        except Exception as e:
+            current_app.logger.error(f"渲染前释放数据库连接失败: {str(e)}")
+
+
+def _mark_wrote(session, flush_context):
+    session.info[WROTE_KEY] = session.info[_WROTE_IN_TX_KEY] = True
+
+
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_wrote(orm_execute_state.session, None)
+
+
+def _stick_to_primary(session):
+    # 用户提交写入后的一段时间内读主库，避免副本延迟导致看不到自己刚提交的内容
+    if not session.info.pop(_WROTE_IN_TX_KEY, False) or not has_request_context():
+        return
+    if 'db_replicas' in current_app.extensions:
+        cookie_session[STICKY_COOKIE_KEY] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 10)
+
+
+def _discard_write_mark(session, previous_transaction):
+    session.info.pop(_WROTE_IN_TX_KEY, None)
+
+
+def begin_read_only(session):
+    """把会话设为只读请求模式：写入时记录警告，按配置使用自动提交连接，允许读取副本"""
+    info = session.info
+    info[READ_ONLY_KEY] = True
+    info[AUTOCOMMIT_KEY] = current_app.config.get('READ_ONLY_AUTOCOMMIT', True)
+    if 'db_replicas' in current_app.extensions:
+        info[REPLICA_KEY] = time.time() >= cookie_session.get(STICKY_COOKIE_KEY, 0)
+
+
+def end_read_only(session):
+    """撤销 begin_read_only() 的设置"""
+    for key in (READ_ONLY_KEY, AUTOCOMMIT_KEY, REPLICA_KEY, '_read_only_warned'):
+        session.info.pop(key, None)
+
+
+def init_read_only_requests(app):
+    """为安全方法的请求启用只读会话模式，并注册读写分离所需的会话事件
+
+    Args:
+        app: Flask应用实例
+    """
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Session, 'before_flush', _warn_on_write)
+        event.listen(Session, 'after_flush', _mark_wrote)
+        event.listen(Session, 'do_orm_execute', _mark_bulk_write)
+        event.listen(Session, 'after_commit', _stick_to_primary)
+        event.listen(Session, 'after_soft_rollback', _discard_write_mark)
+        _listeners_installed = True
+
+    if not app.config.get('READ_ONLY_REQUESTS'):
+        return
+    before_render_template.connect(_release_before_render, app)
+
+    from app import db
+
+    @app.before_request
+    def mark_read_only():
+        if request.method not in SAFE_METHODS or request.endpoint in (None, 'static'):
+            return
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, '_allow_writes', False):
+            return
+        g._read_only_request = True
+        begin_read_only(db.session)
+
+    @app.teardown_request
+    def clear_read_only(exc):
+        if g.pop('_read_only_request', None):
+            end_read_only(db.session)
@@ -30,7 +30,7 @@ def role_required(role: Union[str, list]):
     如果用户未登录，会重定向到登录页面。
     如果用户已登录但角色不符，会返回403错误。
 
-    角色检查基于User模型中的is_role属性，如is_admin、is_teacher等。
+    角色检查直接比较用户的role字段，current_user 来自身份缓存（见app.utils.user_identity），不访问数据库。
 
     Args:
         role: 所需角色，可以是单个角色名(str)或角色列表(list)
@@ -57,7 +57,7 @@ def role_required(role: Union[str, list]):
                 return redirect(url_for('auth.login', next=request.url))
 
             roles = [role] if isinstance(role, str) else role
-            if not any(getattr(current_user, f'is_{r}', False) for r in roles):
+            if current_user.role not in roles:
                 abort(403)
             return f(*args, **kwargs)
         return decorated_function
@@ -0,0 +1,163 @@
+"""
+延后写入模块
+
+把读请求中附带的写入（浏览量、已读标记等）移出请求的关键路径：
+1. defer(func, *args, **kwargs): 登记一个写入任务，在响应发送完毕后
+   （WSGI 服务器关闭响应时）于新的应用上下文和会话中执行，每个任务单独提交，
+   失败时回滚并记录错误，不影响已经返回的页面
+2. record_view(model, obj): 浏览量写入进程内缓冲区，同一条目的多次浏览合并为一次
+   UPDATE views = views + n，并一次性记入热度分；缓冲区每隔 VIEW_FLUSH_INTERVAL 秒
+   在某个响应发送后写入数据库。本次请求渲染的页面直接显示包含缓冲区在内的浏览量
+
+缓冲区中尚未写入的浏览量在进程异常退出时会丢失，最多丢失一个写入间隔的浏览，
+对浏览量这类统计数据可以接受；进程正常退出时会写入剩余的浏览量。
+
+不在请求上下文中调用时（命令行、后台任务），defer() 立即执行任务。
+
+相关配置项（见config.py）:
+- DEFERRED_WRITES_ENABLED: 为 False 时 defer() 立即执行、浏览量立即写入（测试中便于断言）
+- VIEW_FLUSH_INTERVAL: 浏览量缓冲区的写入间隔（秒），0 表示每个响应后都写入
+
+使用示例:
+    deferred.record_view(Content, content)
+    deferred.defer(mark_group_read, current_user.id, group_id, datetime.now())
+"""
+
+import atexit
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Tuple
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+
+# (模型类, 条目ID) -> 尚未写入的浏览次数
+_pending_views: Dict[Tuple[type, int], int] = defaultdict(int)
+_views_lock = threading.Lock()
+_last_view_flush = time.monotonic()
+_atexit_registered = False
+
+
+def defer(func: Callable, *args, **kwargs):
+    """登记一个在响应发送后执行的写入任务"""
+    if not has_request_context() or not current_app.config.get('DEFERRED_WRITES_ENABLED', True):
+        _run_job(func, args, kwargs)
+        return
+    g.setdefault('_deferred_jobs', []).append((func, args, kwargs))
+
+
+def _run_job(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"延后写入任务 {getattr(func, '__name__', func)} 失败: {str(e)}")
+
+
+def run_jobs(app, jobs):
+    """在新的应用上下文中依次执行写入任务"""
+    with app.app_context():
+        for func, args, kwargs in jobs:
+            _run_job(func, args, kwargs)
+
+
+# ---------------------------------------------------------------------------
+# 浏览量缓冲
+# ---------------------------------------------------------------------------
+
+def record_view(model, obj):
+    """记录一次浏览，并让本次请求中的对象显示包含缓冲区在内的浏览量
+
+    Args:
+        model: Content 或 ForumTopic
+        obj: 被浏览的对象，其 views 属性会被更新为已提交的值，不会使对象变为脏数据
+    """
+    key = (model, obj.id)
+    with _views_lock:
+        _pending_views[key] += 1
+        pending = _pending_views[key]
+    set_committed_value(obj, 'views', (obj.views or 0) + pending)
+    # 每个请求只需登记一次写入
+    if has_request_context():
+        if g.get('_view_flush_deferred'):
+            return
+        g._view_flush_deferred = True
+    defer(flush_views)
+
+
+def flush_views(force: bool = False) -> int:
+    """把缓冲区中的浏览量写入数据库（未到写入间隔时跳过）
+
+    Returns:
+        int: 写入的浏览次数
+    """
+    global _last_view_flush
+    interval = current_app.config.get('VIEW_FLUSH_INTERVAL', 5)
+    if not current_app.config.get('DEFERRED_WRITES_ENABLED', True):
+        force = True
+    with _views_lock:
+        if not _pending_views or (not force and time.monotonic() - _last_view_flush < interval):
+            return 0
+        batch = dict(_pending_views)
+        _pending_views.clear()
+        _last_view_flush = time.monotonic()
+
+    from app.utils import trending
+
+    by_model: Dict[type, Dict[int, int]] = defaultdict(dict)
+    for (model, item_id), count in batch.items():
+        by_model[model][item_id] = count
+    try:
+        connection = db.session.connection()
+        for model, counts in by_model.items():
+            table = model.__table__
+            values = {'views': table.c.views + bindparam('n')}
+            if 'updated_at' in table.c:
+                # 浏览不是编辑，不触发 updated_at 的自动更新
+                values['updated_at'] = table.c.updated_at
+            connection.execute(
+                update(table).where(table.c.id == bindparam('item_id')).values(**values),
+                [{'item_id': item_id, 'n': count} for item_id, count in counts.items()]
+            )
+            trending.record_views(connection, model, counts)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # 写入失败时放回缓冲区，下次重试
+        with _views_lock:
+            for key, count in batch.items():
+                _pending_views[key] += count
+        raise
+    return sum(batch.values())
+
+
+def _flush_at_exit(app):
+    try:
+        with app.app_context():
+            flush_views(force=True)
+    except Exception:
+        pass
+
+
+def init_deferred_writes(app):
+    """注册响应发送后执行延后任务的钩子
+
+    Args:
+        app: Flask应用实例
+    """
+    global _atexit_registered
+    if not _atexit_registered:
+        atexit.register(_flush_at_exit, app)
+        _atexit_registered = True
+
+    @app.after_request
+    def schedule_deferred_jobs(response):
+        jobs = g.pop('_deferred_jobs', None)
+        if jobs:
+            response.call_on_close(lambda: run_jobs(app, jobs))
+        return response
@@ -23,6 +23,8 @@ from werkzeug.utils import secure_filename
 from flask import current_app
 from typing import Optional, Tuple, Union
 
+from app.utils.tracing import traced
+
 # 允许上传的文件类型
 # 图片类型：PNG、JPG、JPEG、GIF
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -85,6 +87,7 @@ def validate_image_content(file_storage) -> bool:
             os.remove(temp_path)
         return False
 
+@traced('compress_image', 'pillow')
 def compress_image(image: Image, max_size: Tuple[int, int] = (800, 800)) -> Image:
     """压缩图片
 
@@ -104,6 +107,7 @@ def compress_image(image: Image, max_size: Tuple[int, int] = (800, 800)) -> Imag
 
     return image
 
+@traced('add_watermark', 'pillow')
 def add_watermark(image: Image, text: str) -> Image:
     """添加文字水印
 
@@ -145,6 +149,7 @@ def add_watermark(image: Image, text: str) -> Image:
 
     return image
 
+@traced('save_file', 'file')
 def save_file(file, file_type: str, watermark: Optional[str] = "体育非遗平台") -> Optional[str]:
     """保存上传的文件
 
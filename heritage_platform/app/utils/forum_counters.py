@@ -0,0 +1,99 @@
+"""
+论坛主题计数维护模块
+
+在帖子插入或删除时，于同一事务中维护 ForumTopic 上的冗余字段：
+- reply_count: 主题下的帖子总数（包含首帖）
+- last_post_id / last_poster_id: 最后一个帖子及其作者
+- last_activity: 新帖子发布时更新为帖子的创建时间
+
+主题列表因此可以在一条查询中同时取得回复数和"最后回复者"，不再逐行执行COUNT。
+导入本模块即完成计数处理函数的注册（在 create_app 中导入）。
+"""
+
+from collections import defaultdict
+from typing import Dict
+
+from sqlalchemy import bindparam, select, update
+
+from app import db
+from app.models import ForumTopic, ForumPost, beijing_time
+from app.utils import counters
+
+topics = ForumTopic.__table__
+posts = ForumPost.__table__
+
+
+def _sort_key(row):
+    """帖子先后顺序：创建时间，其次ID"""
+    return (row.created_at or beijing_time(), row.id or 0)
+
+
+@counters.register(ForumPost)
+def update_topic_counters(connection, rows, sign):
+    """帖子插入或删除时更新所属主题的计数和最后回复"""
+    by_topic = defaultdict(list)
+    for row in rows:
+        if row.topic_id:
+            by_topic[row.topic_id].append(row)
+
+    for topic_id, topic_rows in by_topic.items():
+        if sign > 0:
+            last = max(topic_rows, key=_sort_key)
+            connection.execute(update(topics).where(topics.c.id == topic_id).values(
+                reply_count=topics.c.reply_count + len(topic_rows),
+                last_post_id=last.id,
+                last_poster_id=last.user_id,
+                last_activity=last.created_at or beijing_time(),
+            ))
+            continue
+
+        connection.execute(update(topics).where(topics.c.id == topic_id).values(
+            reply_count=topics.c.reply_count - len(topic_rows)
+        ))
+
+        # 被删除的帖子中包含最后回复时，从剩余帖子中重新查找。
+        # bulk_delete 在DELETE语句之前调用处理函数，因此需要显式排除被删除的帖子
+        deleted_ids = [row.id for row in topic_rows]
+        latest = select(posts.c.id, posts.c.user_id).where(
+            posts.c.topic_id == topic_id, posts.c.id.notin_(deleted_ids)
+        ).order_by(posts.c.created_at.desc(), posts.c.id.desc()).limit(1)
+        remaining = connection.execute(latest).first()
+        connection.execute(update(topics).where(
+            topics.c.id == topic_id, topics.c.last_post_id.in_(deleted_ids)
+        ).values(
+            last_post_id=remaining.id if remaining else None,
+            last_poster_id=remaining.user_id if remaining else None,
+        ))
+
+
+def rebuild() -> int:
+    """根据帖子表重新计算全部主题的计数和最后回复，由本函数提交
+
+    Returns:
+        int: 更新的主题数
+    """
+    connection = db.session.connection()
+    counts: Dict[int, int] = defaultdict(int)
+    latest: Dict[int, tuple] = {}
+    rows = connection.execute(
+        select(posts.c.topic_id, posts.c.id, posts.c.user_id).order_by(posts.c.created_at, posts.c.id)
+    )
+    for topic_id, post_id, user_id in rows:
+        counts[topic_id] += 1
+        latest[topic_id] = (post_id, user_id)
+
+    connection.execute(update(topics).values(reply_count=0, last_post_id=None, last_poster_id=None))
+    if counts:
+        # executemany 批量更新
+        connection.execute(
+            update(topics).where(topics.c.id == bindparam('b_topic_id')).values(
+                reply_count=bindparam('b_count'),
+                last_post_id=bindparam('b_post_id'),
+                last_poster_id=bindparam('b_user_id'),
+            ),
+            [{'b_topic_id': topic_id, 'b_count': count,
+              'b_post_id': latest[topic_id][0], 'b_user_id': latest[topic_id][1]}
+             for topic_id, count in counts.items()]
+        )
+    db.session.commit()
+    return len(counts)
@@ -0,0 +1,167 @@
+"""
+非遗项目注册表模块
+
+内容列表的筛选框、内容发布/编辑表单的下拉选项、非遗列表和导航栏的分类都只需要
+非遗项目的 (id, 名称, 分类, 封面)，却在每个请求中加载完整行（包括 description 长文本）
+或执行 SELECT DISTINCT category。非遗项目数量少、改动少，本模块把这些字段缓存在进程内：
+
+1. 首次访问时用一条只取所需列的查询加载快照，之后的读取不访问数据库
+2. 非遗项目新增、修改、删除并提交后，全局版本号加一，下次访问时重新加载
+3. 快照超过 HERITAGE_REGISTRY_TTL 秒后也会重新加载，使多进程部署中其他进程的修改最终可见
+
+快照是不可变对象，并发请求可以安全共享；重新加载时加锁，避免多个线程同时查询。
+
+使用示例:
+    heritage_registry.choices()            # -> [(id, name), ...]
+    heritage_registry.get(3).name          # -> '太极拳'
+    heritage_registry.category_counts()    # -> {'武术': 12, '舞蹈': 5, ...}
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import HeritageItem
+
+# 未配置 HERITAGE_REGISTRY_TTL 时快照的有效期（秒）
+DEFAULT_TTL = 300
+
+# 会话中存在未提交的非遗项目修改时使用的标记键
+_DIRTY_KEY = '_heritage_registry_dirty'
+
+
+class HeritageEntry(NamedTuple):
+    """注册表中的一个非遗项目"""
+    id: int
+    name: str
+    category: Optional[str]
+    cover_image: Optional[str]
+
+
+class _Snapshot:
+    """某一版本的注册表数据
+
+    属性:
+        version: 加载时的版本号
+        loaded_at: 加载时间（time.monotonic()）
+        items: 按ID排序的项目列表
+        by_id: ID -> 项目
+        category_counts: 分类 -> 项目数，按项目数降序、分类名升序排列
+    """
+
+    def __init__(self, version: int, entries: List[HeritageEntry]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.items: Tuple[HeritageEntry, ...] = tuple(entries)
+        self.by_id: Dict[int, HeritageEntry] = {entry.id: entry for entry in entries}
+        counts = Counter(entry.category for entry in entries if entry.category)
+        self.category_counts: Dict[str, int] = dict(
+            sorted(counts.items(), key=lambda pair: (-pair[1], pair[0])))
+
+
+_version = 0
+_snapshot: Optional[_Snapshot] = None
+_lock = threading.Lock()
+
+
+def version() -> int:
+    """当前版本号，每次非遗项目变更提交后加一"""
+    return _version
+
+
+def invalidate():
+    """使当前快照失效，下次访问时重新加载
+
+    ORM增删改会自动调用；绕过ORM批量写入非遗项目的代码需要手动调用。
+    """
+    global _version
+    with _lock:
+        _version += 1
+
+
+def _ttl() -> float:
+    if has_app_context():
+        return current_app.config.get('HERITAGE_REGISTRY_TTL', DEFAULT_TTL)
+    return DEFAULT_TTL
+
+
+def _load(version_: int) -> _Snapshot:
+    """只查询注册表需要的列"""
+    rows = db.session.query(
+        HeritageItem.id, HeritageItem.name, HeritageItem.category, HeritageItem.cover_image
+    ).order_by(HeritageItem.id).all()
+    return _Snapshot(version_, [HeritageEntry(*row) for row in rows])
+
+
+def _current() -> _Snapshot:
+    """返回有效的快照，版本过期或超过有效期时重新加载"""
+    global _snapshot
+    snapshot = _snapshot
+    if (snapshot is not None and snapshot.version == _version
+            and time.monotonic() - snapshot.loaded_at < _ttl()):
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if (snapshot is None or snapshot.version != _version
+                or time.monotonic() - snapshot.loaded_at >= _ttl()):
+            snapshot = _snapshot = _load(_version)
+    return snapshot
+
+
+def get_items() -> Tuple[HeritageEntry, ...]:
+    """全部非遗项目，按ID排序"""
+    return _current().items
+
+
+def get(item_id: Optional[int]) -> Optional[HeritageEntry]:
+    """按ID查找非遗项目，不存在时返回None"""
+    if item_id is None:
+        return None
+    return _current().by_id.get(item_id)
+
+
+def choices() -> List[Tuple[int, str]]:
+    """表单下拉框选项 [(id, name), ...]"""
+    return [(entry.id, entry.name) for entry in _current().items]
+
+
+def categories() -> List[str]:
+    """全部分类，按名称排序"""
+    return sorted(_current().category_counts)
+
+
+def category_counts() -> Dict[str, int]:
+    """各分类的项目数，按项目数降序排列，用于分类筛选的计数"""
+    return dict(_current().category_counts)
+
+
+# ---------------------------------------------------------------------------
+# 失效：记录会话中的非遗项目修改，提交后更新版本号，回滚则丢弃
+# ---------------------------------------------------------------------------
+
+def _mark_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_DIRTY_KEY] = True
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(HeritageItem, _event_name, _mark_dirty)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        invalidate()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,152 @@
+"""
+JSON序列化模块
+
+API响应（jsonify / api_success）、tojson 模板过滤器、会话Cookie和 Socket.IO 数据包都经过JSON编码。
+本模块提供统一的编码实现，后端由 JSON_BACKEND 选择：
+1. orjson: 可选依赖，编码直接输出UTF-8字节，列表响应的序列化开销约为标准库的几分之一
+2. stdlib: 标准库 json，未安装 orjson 时自动退回
+两个后端的输出格式一致（紧凑、UTF-8不转义），并直接支持以下类型：
+- datetime / date / time: 按 JSON_DATETIME_FORMAT 格式化（默认 2024-01-01 12:00:00，与各 to_dict 的格式相同）
+- Decimal、UUID: 转为字符串
+- SQLAlchemy 查询返回的行（列投影，如 db.session.query(User.id, User.username)）: 转为以列名为键的对象
+- 具名元组: 与标准库一致，编码为数组
+- dataclass、带 __html__ 的对象（Markup）: 与 Flask 默认行为一致
+
+使用方式:
+- init_json(app) 在 create_app 中调用，替换 app.json 为 FastJSONProvider
+- 本模块本身可以作为 Socket.IO 的 json 模块（提供 dumps / loads），编码不依赖应用上下文
+
+相关配置项（见config.py）:
+- JSON_BACKEND: auto（默认，安装了 orjson 时使用）、orjson 或 stdlib
+- JSON_DATETIME_FORMAT: 日期时间的输出格式
+"""
+
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+DEFAULT_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_backend = 'orjson' if orjson is not None else 'stdlib'
+_datetime_format = DEFAULT_DATETIME_FORMAT
+
+
+def configure(backend: str = 'auto', datetime_format: str = DEFAULT_DATETIME_FORMAT) -> str:
+    """选择编码后端和日期时间格式，返回实际使用的后端
+
+    进程内全局生效：Socket.IO 在应用上下文之外编码数据包，不能按应用读取配置。
+    """
+    global _backend, _datetime_format
+    if backend not in BACKENDS:
+        raise ValueError(f'未知的JSON后端: {backend}')
+    if backend == 'orjson' and orjson is None:
+        raise ImportError('JSON_BACKEND=orjson 需要安装 orjson')
+    _backend = 'stdlib' if backend == 'stdlib' or orjson is None else 'orjson'
+    _datetime_format = datetime_format or DEFAULT_DATETIME_FORMAT
+    return _backend
+
+
+def backend() -> str:
+    """当前使用的编码后端"""
+    return _backend
+
+
+def default(obj: Any) -> Any:
+    """两个后端共用的扩展类型转换"""
+    if isinstance(obj, datetime.datetime):
+        return obj.strftime(_datetime_format)
+    if isinstance(obj, datetime.date):
+        return obj.strftime(_datetime_format.split(' ')[0])
+    if isinstance(obj, datetime.time):
+        return obj.strftime('%H:%M:%S')
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, tuple):
+        # orjson 不直接编码元组子类（具名元组），与标准库一样按数组输出
+        return list(obj)
+    if hasattr(obj, '_mapping'):
+        # SQLAlchemy Row
+        return dict(obj._mapping)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """编码为UTF-8字节"""
+    if _backend == 'orjson':
+        option = _ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, default=default, ensure_ascii=False, sort_keys=sort_keys,
+                      indent=2 if indent else None,
+                      separators=(',', ': ') if indent else (',', ':')).encode('utf-8')
+
+
+def dumps(obj: Any, **kwargs) -> str:
+    """编码为字符串，兼容标准库 json.dumps 的调用方式
+
+    只使用 sort_keys 和 indent 参数，separators、ensure_ascii 等参数被忽略，输出不转义非ASCII字符。
+    """
+    return dumps_bytes(obj, sort_keys=kwargs.get('sort_keys', False),
+                       indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+
+def loads(s, **kwargs) -> Any:
+    """解码字符串或字节，格式错误时抛出 ValueError（json.JSONDecodeError）"""
+    if _backend == 'orjson':
+        return orjson.loads(s)
+    return json.loads(s, **kwargs)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON 提供者：使用本模块的编码实现
+
+    保留 DefaultJSONProvider 的 sort_keys、compact 和 mimetype 属性；
+    jsonify 直接写入编码得到的字节，不再经过字符串中转。
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent) + b'\n',
+                                        mimetype=self.mimetype)
+
+
+def init_json(app):
+    """按配置选择编码后端，并把 app.json 替换为 FastJSONProvider"""
+    requested = app.config.get('JSON_BACKEND', 'auto')
+    try:
+        selected = configure(requested, app.config.get('JSON_DATETIME_FORMAT', DEFAULT_DATETIME_FORMAT))
+    except ImportError:
+        app.logger.warning('未安装 orjson，JSON编码退回到标准库')
+        selected = configure('stdlib', app.config.get('JSON_DATETIME_FORMAT', DEFAULT_DATETIME_FORMAT))
+    app.json = FastJSONProvider(app)
+    app.logger.info(f'JSON编码后端: {selected}')
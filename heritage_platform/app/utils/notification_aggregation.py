@@ -0,0 +1,163 @@
+"""
+通知聚合模块
+
+点赞、评论和回复都会给作者发一条通知。热门内容短时间内会为作者产生成百上千条通知和推送。
+本模块把同一接收者、同一类型、同一目标（如 content:12）在时间窗口内的通知合并为一行：
+
+    bob 等 24 人点赞了你的内容"太极拳入门"
+
+合并规则:
+1. 窗口（NOTIFICATION_AGGREGATE_WINDOW 秒）内存在同一 (接收者, 类型, 目标) 的未读通知时，
+   合并到该通知：参与人数加一、最近参与者放在最前、内容改为最新参与者的描述；否则插入新行。
+   合并时删除旧行并以新ID重新插入：通知列表按ID做键集分页、按ID上界批量已读（见 notification_feed.py），
+   原地更新的通知会停留在第一次互动的位置，并且会被客户端拿到新互动之前的 max_id 一并标记为已读
+2. 已读的通知不再合并，之后的互动生成新通知
+3. 同一个人重复互动（如取消后再次点赞）只移动到最近参与者的最前面，不重复计数
+
+写入不提交事务，推送事件通过发件箱（app/utils/outbox.py）随调用方的事务一起提交。
+新通知立即推送；聚合更新延迟 NOTIFICATION_PUSH_INTERVAL 秒推送，
+间隔内同一通知的多次更新合并为一次推送，事件的 replaces 列出被取代的旧通知ID，前端据此移除旧的显示。
+
+并发的首条通知可能各自插入一行，这种情况只会少合并一次，不影响正确性。
+"""
+
+import json
+from datetime import timedelta
+from typing import List, Optional
+
+from flask import current_app
+
+from app import db
+from app.models import Notification, OutboxEvent
+from app.models import beijing_time
+from app.utils import outbox
+
+# 未配置时的默认值
+DEFAULT_WINDOW = 24 * 3600
+DEFAULT_PUSH_INTERVAL = 5
+# 保存的最近参与者数量
+RECENT_ACTORS = 5
+
+
+def target_key(kind: str, target_id) -> str:
+    """通知目标的标识，如 target_key('content', 12) -> 'content:12'"""
+    return f'{kind}:{target_id}'
+
+
+def _parse_actor_ids(value: Optional[str]) -> List[int]:
+    return [int(v) for v in value.split(',') if v] if value else []
+
+
+def _describe(actor_name: str, actor_count: int, action: str) -> str:
+    if actor_count <= 1:
+        return f'{actor_name} {action}'
+    return f'{actor_name} 等 {actor_count} 人{action}'
+
+
+def notify(user_id: int, notification_type: str, target: str, action: str,
+           sender_id: int, sender_name: str, link: Optional[str] = None) -> Notification:
+    """发送可聚合的通知
+
+    Args:
+        user_id: 接收者ID
+        notification_type: 通知类型，如 like、reply
+        target: 通知目标，使用 target_key() 生成
+        action: 动作描述，如 '点赞了你的内容"标题"'，通知内容为 "参与者 + 动作"
+        sender_id: 本次触发通知的用户ID
+        sender_name: 本次触发通知的用户名
+        link: 相关链接
+
+    Returns:
+        Notification: 新建或更新后的通知（尚未提交）
+    """
+    now = beijing_time()
+    window = current_app.config.get('NOTIFICATION_AGGREGATE_WINDOW', DEFAULT_WINDOW)
+
+    notification = Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.type == notification_type,
+        Notification.target == target,
+        Notification.is_read == False,  # noqa: E712
+        Notification.updated_at >= now - timedelta(seconds=window)
+    ).order_by(Notification.id.desc()).first()
+
+    replaced_id = None
+    if notification is None:
+        actor_count = 1
+        actors = [sender_id]
+    else:
+        actors = _parse_actor_ids(notification.recent_actor_ids)
+        actor_count = notification.actor_count or 1
+        if sender_id not in actors:
+            # 最近参与者列表只保存前几位，列表之外的重复参与无法识别，仍会计数
+            actor_count += 1
+        actors = [sender_id] + [a for a in actors if a != sender_id]
+        link = link or notification.link
+        replaced_id = notification.id
+        # 以新ID重新插入，使合并后的通知排到列表最前面，且不会被旧的已读上界覆盖
+        db.session.delete(notification)
+
+    notification = Notification(
+        user_id=user_id,
+        sender_id=sender_id,
+        type=notification_type,
+        target=target,
+        content=_describe(sender_name, actor_count, action),
+        link=link,
+        actor_count=actor_count,
+        recent_actor_ids=','.join(str(a) for a in actors[:RECENT_ACTORS]),
+        created_at=now,
+        updated_at=now,
+    )
+    db.session.add(notification)
+    db.session.flush()
+    _queue_push(notification, sender_name, replaced_id)
+    return notification
+
+
+# ---------------------------------------------------------------------------
+# 推送合并
+# ---------------------------------------------------------------------------
+
+def _queue_push(notification: Notification, sender_name: str, replaced_id: Optional[int]):
+    """写入推送事件，由发件箱在提交后推送
+
+    新通知立即推送；聚合更新延迟 NOTIFICATION_PUSH_INTERVAL 秒，
+    期间同一目标的后续更新覆盖尚未推送的事件，只推送最新状态，
+    被覆盖事件要取代的旧通知ID合并到 replaces 中。
+    """
+    interval = current_app.config.get('NOTIFICATION_PUSH_INTERVAL', DEFAULT_PUSH_INTERVAL)
+    aggregated = replaced_id is not None
+    payload = {
+        'id': notification.id,
+        'type': notification.type,
+        'content': notification.content,
+        'link': notification.link,
+        'sender_id': notification.sender_id,
+        'sender_username': sender_name,
+        'target': notification.target,
+        'actor_count': notification.actor_count,
+        'recent_actor_ids': _parse_actor_ids(notification.recent_actor_ids),
+        'aggregated': aggregated,
+        'replaces': [],
+        'created_at': notification.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    room = f'user_{notification.user_id}'
+    if aggregated:
+        dedupe_key = f'notification:{notification.user_id}:{notification.type}:{notification.target}'
+        payload['replaces'] = _pending_replaces(dedupe_key) + [replaced_id]
+        outbox.enqueue('new_notification', payload, room, dedupe_key=dedupe_key, delay=interval)
+    else:
+        outbox.enqueue('new_notification', payload, room)
+
+
+def _pending_replaces(dedupe_key: str) -> List[int]:
+    """尚未推送的同目标事件要取代的旧通知ID（客户端还没有收到该事件中的通知）"""
+    row = OutboxEvent.query.filter(
+        OutboxEvent.dedupe_key == dedupe_key,
+        OutboxEvent.dispatched_at.is_(None),
+        OutboxEvent.claimed_at.is_(None),
+    ).with_entities(OutboxEvent.payload).first()
+    if row is None:
+        return []
+    return json.loads(row.payload).get('replaces') or []
@@ -0,0 +1,126 @@
+"""
+通知中心模块
+
+通知列表按ID倒序做键集分页：每次只取一页，下一页以本页最后一条通知的ID为游标（before），
+查询走 (user_id, id) 索引，翻到多深都不需要 OFFSET。取出的一页再按日期分组展示。
+
+批量已读使用一条集合UPDATE完成，不把未读通知逐条加载到ORM：
+
+    UPDATE notifications SET is_read = 1 WHERE user_id = ? AND is_read = 0 AND id <= ?
+
+id 上界取客户端看到的最新通知ID，页面打开之后才到达的新通知不会被误标为已读。
+
+使用示例:
+    page = load_notifications(user_id, before=request.args.get('before', type=int))
+    for day, items in page.groups: ...
+    mark_read_up_to(user_id, up_to_id=page.max_id)
+    db.session.commit()
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import groupby
+from typing import List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Notification
+
+# 默认每页通知数
+DEFAULT_PAGE_SIZE = 20
+# 每页通知数上限
+MAX_PAGE_SIZE = 100
+
+
+@dataclass
+class NotificationPage:
+    """一页通知
+
+    属性:
+        items: 本页通知，按ID倒序
+        next_cursor: 下一页的游标（本页最后一条通知的ID），没有更多时为None
+        max_id: 本页最新通知的ID，用于"标记已读到此"
+    """
+    items: List[Notification] = field(default_factory=list)
+    next_cursor: Optional[int] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def max_id(self) -> Optional[int]:
+        return self.items[0].id if self.items else None
+
+    @property
+    def groups(self) -> List[Tuple[date, List[Notification]]]:
+        """按日期分组 [(日期, 通知列表), ...]，日期倒序"""
+        return [(day, list(items)) for day, items in groupby(
+            self.items, key=lambda n: n.created_at.date() if n.created_at else None)]
+
+
+def load_notifications(user_id: int, before: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                       unread_only: bool = False) -> NotificationPage:
+    """按键集分页加载用户的通知
+
+    Args:
+        user_id: 接收者ID
+        before: 游标，只返回ID小于该值的通知；为空时从最新一条开始
+        limit: 每页数量，不超过 MAX_PAGE_SIZE
+        unread_only: 是否只返回未读通知
+
+    Returns:
+        NotificationPage: 一页通知（发送者已随查询加载）
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    query = Notification.query.options(joinedload(Notification.sender)).filter(
+        Notification.user_id == user_id)
+    if before:
+        query = query.filter(Notification.id < before)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+
+    # 多取一条判断是否还有下一页
+    rows = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = items[-1].id if len(rows) > limit else None
+    return NotificationPage(items, next_cursor)
+
+
+def parse_notification_id(value) -> Optional[int]:
+    """解析请求中的通知ID参数，空值返回None
+
+    Raises:
+        ValueError: 不是正整数
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    result = int(value)
+    if result <= 0:
+        raise ValueError(value)
+    return result
+
+
+def mark_read_up_to(user_id: int, up_to_id: Optional[int] = None) -> int:
+    """把用户的未读通知中ID不大于 up_to_id 的标记为已读（不提交，由调用方提交）
+
+    Args:
+        user_id: 接收者ID
+        up_to_id: 已读上界（包含），为空时标记全部未读通知
+
+    Returns:
+        int: 实际标记的通知数
+    """
+    stmt = update(Notification).where(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )
+    if up_to_id is not None:
+        stmt = stmt.where(Notification.id <= up_to_id)
+    result = db.session.execute(stmt.values(is_read=True).execution_options(synchronize_session=False))
+    return result.rowcount
+
@@ -0,0 +1,44 @@
+"""
+阻塞任务卸载模块
+
+应用运行在未打补丁的 eventlet 上（Socket.IO），请求在事件循环调度的绿色线程中执行，
+CPU密集或阻塞的调用会停住整个工作进程。本模块提供在原生线程中执行这类任务的公共工具：
+- in_green_thread(): 当前是否运行在 eventlet 绿色线程中
+- map_concurrent(func, items, max_workers): 在原生线程中并发执行，按输入顺序返回结果；
+  绿色线程中通过 eventlet.tpool 执行，等待期间事件循环继续处理其他请求，
+  普通线程中使用临时的线程池
+
+使用方（见 app/utils/passwords.py 和 app/api/batch.py）负责在任务中建立自己需要的上下文：
+原生线程中没有调用方的应用上下文和数据库会话。
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List
+
+
+def in_green_thread() -> bool:
+    """当前是否运行在 eventlet 事件循环调度的绿色线程中"""
+    if 'eventlet' not in sys.modules:
+        return False
+    import greenlet
+    # 绿色线程的父 greenlet 是事件循环；普通线程和主线程的根 greenlet 没有父级
+    return greenlet.getcurrent().parent is not None
+
+
+def map_concurrent(func: Callable, items: Iterable, max_workers: int) -> List:
+    """在最多 max_workers 个原生线程中执行 func(item)，按输入顺序返回结果
+
+    func 抛出的异常会在取结果时重新抛出，调用方应在 func 内部处理预期的错误。
+    """
+    items = list(items)
+    if not items:
+        return []
+    max_workers = max(1, min(max_workers, len(items)))
+    if in_green_thread():
+        import eventlet
+        from eventlet import tpool
+        pool = eventlet.GreenPool(max_workers)
+        return list(pool.imap(lambda item: tpool.execute(func, item), items))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='offload') as executor:
+        return list(executor.map(func, items))
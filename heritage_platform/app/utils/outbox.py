@@ -0,0 +1,300 @@
+"""
+实时推送发件箱模块
+
+过去请求在保存通知后立即同步调用 socketio.emit，推送的耗时计入请求延迟；
+send_notification 还会在调用方的事务中途提交，业务操作随后回滚时通知已经发出。
+本模块改为事务性发件箱：
+
+1. enqueue() 把推送事件写入 outbox_events 表，不提交，随调用方的事务一起提交或回滚
+2. 提交后唤醒后台分发器；分发器按ID顺序领取一批事件，按房间分组推送：
+   一个房间只有一个事件时直接推送原事件，有多个时合并为一个 event_batch 事件
+   （前端 websocket.js 会逐个分发给原事件的处理函数）
+3. 推送失败的事件按指数退避重试，超过 OUTBOX_MAX_ATTEMPTS 次后不再重试，保留在表中供排查
+4. 已分发的事件保留 OUTBOX_RETENTION_HOURS 小时后清理
+
+合并键（dedupe_key）: 同一合并键的事件尚未被领取时，新的事件直接覆盖其数据，
+配合 delay 参数可以把短时间内的多次更新合并为一次推送（见 notification_aggregation.py）。
+
+领取事件时把 available_at 推后一个租约时长并写入本次领取的随机令牌（claim_token），再按令牌读回领取到的行，
+多个进程同时运行分发器也不会重复推送（不按领取时间匹配：MySQL 的 DATETIME 列不保存微秒，
+写入的时间会被舍入，与参数中带微秒的时间不相等）。
+分发器在推送后异常退出时，租约到期后事件会被重新领取（至少推送一次）。
+
+使用示例:
+    outbox.enqueue('new_private_message', message_data, room=f'user_{receiver.id}')
+    db.session.commit()  # 提交后由分发器推送
+"""
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from typing import List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+
+from app import db, socketio
+from app.models import OutboxEvent
+from app.models import beijing_time
+
+# 一个房间有多个事件时合并推送使用的事件名
+BATCH_EVENT = 'event_batch'
+
+# 未配置时的默认值
+DEFAULTS = {
+    'OUTBOX_DISPATCHER_ENABLED': True,
+    'OUTBOX_BATCH_SIZE': 200,
+    'OUTBOX_POLL_INTERVAL': 1.0,
+    'OUTBOX_LEASE_SECONDS': 30,
+    'OUTBOX_MAX_ATTEMPTS': 8,
+    'OUTBOX_RETRY_BASE': 2.0,
+    'OUTBOX_RETENTION_HOURS': 24,
+}
+
+# 会话中是否写入了新事件，提交后据此唤醒分发器
+_ENQUEUED_KEY = '_outbox_enqueued'
+# 分发器空闲时检查唤醒标记的间隔（秒）
+_WAKE_CHECK_INTERVAL = 0.05
+# 清理已分发事件的间隔（秒）
+_CLEANUP_INTERVAL = 300
+
+
+def _config(app, key):
+    return app.config.get(key, DEFAULTS[key])
+
+
+def enqueue(event_name: str, payload: dict, room: str, dedupe_key: Optional[str] = None,
+            delay: float = 0) -> None:
+    """写入一条待推送的事件（随当前事务提交）
+
+    Args:
+        event_name: Socket.IO 事件名
+        payload: 事件数据，需可JSON序列化
+        room: 推送目标房间
+        dedupe_key: 合并键，存在尚未领取的同键事件时只更新其数据
+        delay: 延迟推送的秒数（仅对新写入的事件有效）
+    """
+    data = json.dumps(payload, ensure_ascii=False, default=str)
+    session = db.session
+    if dedupe_key:
+        result = session.execute(
+            update(OutboxEvent).where(
+                OutboxEvent.dedupe_key == dedupe_key,
+                OutboxEvent.dispatched_at.is_(None),
+                OutboxEvent.claimed_at.is_(None),
+                OutboxEvent.attempts < _config(current_app, 'OUTBOX_MAX_ATTEMPTS'),
+            ).values(event=event_name, room=room, payload=data).execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+
+    now = beijing_time()
+    session.add(OutboxEvent(
+        event=event_name,
+        room=room,
+        payload=data,
+        dedupe_key=dedupe_key,
+        created_at=now,
+        available_at=now + timedelta(seconds=delay) if delay else now,
+    ))
+    session.info[_ENQUEUED_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_after_commit(session):
+    if session.info.pop(_ENQUEUED_KEY, False):
+        _dispatcher.wake()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop(_ENQUEUED_KEY, None)
+
+
+# ---------------------------------------------------------------------------
+# 分发
+# ---------------------------------------------------------------------------
+
+def _claim(app, now) -> List[OutboxEvent]:
+    """领取一批可分发的事件，领取的事件在租约期内不会被其他分发器领取"""
+    lease_until = now + timedelta(seconds=_config(app, 'OUTBOX_LEASE_SECONDS'))
+    ids = db.session.execute(
+        select(OutboxEvent.id).where(
+            OutboxEvent.dispatched_at.is_(None),
+            OutboxEvent.available_at <= now,
+            OutboxEvent.attempts < _config(app, 'OUTBOX_MAX_ATTEMPTS'),
+        ).order_by(OutboxEvent.id).limit(_config(app, 'OUTBOX_BATCH_SIZE'))
+    ).scalars().all()
+    if not ids:
+        return []
+
+    # 条件更新：已被其他分发器领取的行 available_at 已推后，不会再次匹配
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(OutboxEvent).where(OutboxEvent.id.in_(ids), OutboxEvent.available_at <= now)
+        .values(available_at=lease_until, claimed_at=now, claim_token=token)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return db.session.execute(
+        select(OutboxEvent).where(OutboxEvent.id.in_(ids), OutboxEvent.claim_token == token)
+        .order_by(OutboxEvent.id)
+    ).scalars().all()
+
+
+def _group_by_room(rows: List[OutboxEvent]):
+    """按房间分组，同一合并键只保留最后一条，房间内保持事件顺序
+
+    Returns:
+        OrderedDict: 房间 -> [(事件名, 数据), ...]；同时返回每个房间涉及的事件ID
+    """
+    latest = {}
+    for row in rows:
+        if row.dedupe_key:
+            latest[row.dedupe_key] = row.id
+
+    rooms = OrderedDict()
+    room_ids = {}
+    for row in rows:
+        room_ids.setdefault(row.room, []).append(row.id)
+        if row.dedupe_key and latest[row.dedupe_key] != row.id:
+            continue
+        rooms.setdefault(row.room, []).append((row.event, json.loads(row.payload)))
+    return rooms, room_ids
+
+
+def dispatch_pending(app=None) -> int:
+    """领取并推送一批事件
+
+    Returns:
+        int: 本批处理的事件数（包括推送失败的）
+    """
+    app = app or current_app._get_current_object()
+    now = beijing_time()
+    rows = _claim(app, now)
+    if not rows:
+        return 0
+
+    attempts = {row.id: row.attempts for row in rows}
+    rooms, room_ids = _group_by_room(rows)
+    delivered, failed = [], []
+    for room, events in rooms.items():
+        try:
+            if len(events) == 1:
+                socketio.emit(events[0][0], events[0][1], to=room)
+            else:
+                socketio.emit(BATCH_EVENT, [{'event': name, 'data': data} for name, data in events], to=room)
+            delivered.extend(room_ids[room])
+        except Exception as e:
+            app.logger.error(f"推送房间 {room} 的事件失败: {str(e)}")
+            failed.extend((event_id, str(e)) for event_id in room_ids[room])
+
+    if delivered:
+        db.session.execute(
+            update(OutboxEvent).where(OutboxEvent.id.in_(delivered))
+            .values(dispatched_at=beijing_time()).execution_options(synchronize_session=False)
+        )
+    if failed:
+        base = _config(app, 'OUTBOX_RETRY_BASE')
+        max_attempts = _config(app, 'OUTBOX_MAX_ATTEMPTS')
+        for event_id, error in failed:
+            count = attempts[event_id] + 1
+            if count >= max_attempts:
+                app.logger.error(f"事件 {event_id} 已失败 {count} 次，不再重试")
+            db.session.execute(
+                update(OutboxEvent).where(OutboxEvent.id == event_id).values(
+                    attempts=count,
+                    last_error=error[:1000],
+                    claimed_at=None,
+                    claim_token=None,
+                    available_at=now + timedelta(seconds=base * 2 ** (count - 1)),
+                ).execution_options(synchronize_session=False)
+            )
+    db.session.commit()
+    return len(rows)
+
+
+def purge_dispatched(app=None) -> int:
+    """删除超过保留期的已分发事件
+
+    Returns:
+        int: 删除的行数
+    """
+    app = app or current_app._get_current_object()
+    cutoff = beijing_time() - timedelta(hours=_config(app, 'OUTBOX_RETENTION_HOURS'))
+    result = db.session.execute(delete(OutboxEvent).where(OutboxEvent.dispatched_at < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+class _Dispatcher:
+    """后台分发器
+
+    在第一次有事件提交时随 Socket.IO 的后台任务启动，之后每隔 OUTBOX_POLL_INTERVAL 秒
+    检查一次到期事件（包括延迟推送和重试）；有新事件提交时立即唤醒。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._app = None
+        self._woken = False
+
+    def wake(self):
+        self._woken = True
+        if self._app is None:
+            try:
+                app = current_app._get_current_object()
+            except RuntimeError:
+                return
+            self.start(app)
+
+    def start(self, app):
+        """启动分发器（每个进程只启动一次）"""
+        if not _config(app, 'OUTBOX_DISPATCHER_ENABLED'):
+            return
+        with self._lock:
+            if self._app is not None:
+                return
+            self._app = app
+        socketio.start_background_task(self._run)
+
+    def _run(self):
+        app = self._app
+        poll = _config(app, 'OUTBOX_POLL_INTERVAL')
+        batch_size = _config(app, 'OUTBOX_BATCH_SIZE')
+        since_cleanup = 0.0
+        while True:
+            self._woken = False
+            processed = 0
+            with app.app_context():
+                try:
+                    processed = dispatch_pending(app)
+                    if since_cleanup >= _CLEANUP_INTERVAL:
+                        purge_dispatched(app)
+                        since_cleanup = 0.0
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"发件箱分发失败: {str(e)}")
+                finally:
+                    db.session.remove()
+
+            # 本批已满说明还有积压，立即处理下一批
+            if processed >= batch_size:
+                socketio.sleep(0)
+                continue
+            waited = 0.0
+            while waited < poll and not self._woken:
+                socketio.sleep(_WAKE_CHECK_INTERVAL)
+                waited += _WAKE_CHECK_INTERVAL
+            since_cleanup += waited
+
+
+_dispatcher = _Dispatcher()
+
+
+def start_dispatcher(app):
+    """显式启动分发器（通常不需要，首次提交事件时会自动启动）"""
+    _dispatcher.start(app)
@@ -0,0 +1,128 @@
+"""
+密码哈希模块
+
+scrypt / pbkdf2 的每次计算需要数十毫秒CPU。应用运行在 eventlet 上（Socket.IO），
+在请求的绿色线程中直接计算会阻塞整个工作进程的事件循环，登录高峰时所有请求和推送一起停顿。
+本模块把哈希计算放到有界的执行器中：
+1. thread: 原生线程池。hashlib 的 scrypt / pbkdf2_hmac 计算期间释放GIL，多个哈希可以并行。
+   在 eventlet 绿色线程中通过 eventlet.tpool 执行，等待期间事件循环继续处理其他请求；
+   在普通线程中使用大小为 PASSWORD_HASH_WORKERS 的线程池
+2. process: 进程池（spawn 方式启动），哈希计算完全不占用应用进程的CPU时间片
+3. inline: 在调用线程中直接计算（命令行工具、测试）
+同时执行的哈希数量不超过 PASSWORD_HASH_WORKERS，超出的调用排队等待。
+
+算法和成本参数由 PASSWORD_HASH_METHOD 指定（Werkzeug 格式，如 scrypt:32768:8:1、pbkdf2:sha256:600000）。
+修改后已有的哈希仍然可以验证，needs_rehash() 会对旧参数的哈希返回True，
+登录成功时用本次输入的密码按新参数重新哈希（见 auth.login）。
+
+相关配置项（见config.py）:
+- PASSWORD_HASH_METHOD: 算法和成本参数
+- PASSWORD_SALT_LENGTH: 盐的长度
+- PASSWORD_HASH_EXECUTOR: thread / process / inline
+- PASSWORD_HASH_WORKERS: 同时执行的哈希数量上限
+- PASSWORD_REHASH_ON_LOGIN: 登录时是否按新参数重新哈希
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.utils.offload import in_green_thread
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+EXECUTOR_MODES = ('thread', 'process', 'inline')
+
+_executors: Dict[Tuple[str, int], Executor] = {}
+_green_semaphores: Dict[int, object] = {}
+_lock = threading.Lock()
+
+
+def _settings() -> Tuple[str, int, str, int]:
+    if not has_app_context():
+        return DEFAULT_METHOD, 16, 'inline', 1
+    config = current_app.config
+    mode = config.get('PASSWORD_HASH_EXECUTOR', 'thread')
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f'未知的密码哈希执行方式: {mode}')
+    return (config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD), config.get('PASSWORD_SALT_LENGTH', 16),
+            mode, max(1, int(config.get('PASSWORD_HASH_WORKERS', 4))))
+
+
+def _get_executor(mode: str, workers: int) -> Executor:
+    key = (mode, workers)
+    executor = _executors.get(key)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(key)
+            if executor is None:
+                if mode == 'process':
+                    # 不使用 fork，避免复制事件循环、数据库连接等父进程状态
+                    executor = ProcessPoolExecutor(max_workers=workers,
+                                                   mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                _executors[key] = executor
+    return executor
+
+
+def _green_semaphore(workers: int):
+    semaphore = _green_semaphores.get(workers)
+    if semaphore is None:
+        from eventlet.semaphore import Semaphore
+        semaphore = _green_semaphores.setdefault(workers, Semaphore(workers))
+    return semaphore
+
+
+def _offload(func: Callable, *args):
+    _, _, mode, workers = _settings()
+    if mode == 'inline':
+        return func(*args)
+    if in_green_thread():
+        from eventlet import tpool
+        # 绿色信号量限制并发，排队的登录只挂起自己的绿色线程；tpool 线程中的等待不阻塞事件循环
+        with _green_semaphore(workers):
+            if mode == 'process':
+                return tpool.execute(lambda: _get_executor(mode, workers).submit(func, *args).result())
+            return tpool.execute(func, *args)
+    return _get_executor(mode, workers).submit(func, *args).result()
+
+
+def hash_password(password: str) -> str:
+    """按配置的算法和成本参数生成密码哈希"""
+    method, salt_length, _, _ = _settings()
+    return _offload(generate_password_hash, password, method, salt_length)
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    """验证密码，使用哈希中记录的算法和参数，与当前配置无关"""
+    if not pwhash:
+        return False
+    return _offload(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    # Werkzeug 会补全省略的参数（如 "scrypt" -> "scrypt:32768:8:1"），用一次实际计算得到完整写法
+    return _offload(generate_password_hash, '', method, 1).split('$', 1)[0]
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """哈希的算法或成本参数与当前配置不一致时返回True"""
+    if not pwhash or '$' not in pwhash:
+        return True
+    method, _, _, _ = _settings()
+    return pwhash.split('$', 1)[0] != _method_prefix(method)
+
+
+def shutdown():
+    """关闭执行器（进程退出前或修改配置后调用）"""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,330 @@
+"""
+SQL查询分析模块
+
+本模块记录每个请求执行的SQL语句，用于发现N+1查询和约束路由的查询数量，包括：
+1. 查询记录：通过SQLAlchemy引擎事件记录每条语句及其耗时
+2. 语句归一化：去掉字面量、参数占位符和IN列表长度的差异，把同一"形状"的语句归为一组
+3. N+1检测：同一形状在一个请求内重复达到阈值时写入性能日志，并可输出到响应头
+4. 查询预算：视图可以用 @query_budget 声明允许的最大查询数，超出时记录警告；
+   测试中可使用 assert_query_budget 断言路由不超过预算，使性能回退直接导致测试失败
+
+相关配置项（见config.py）：
+- QUERY_PROFILER_ENABLED: 是否为每个请求记录查询
+- QUERY_PROFILER_HEADERS: 是否输出 X-Query-Count / X-Query-Time / X-Query-N-Plus-One 响应头
+- QUERY_N_PLUS_ONE_THRESHOLD: 同一形状重复多少次视为疑似N+1
+
+使用示例:
+    @user_bp.route('/profile')
+    @login_required
+    @query_budget(6)
+    def profile():
+        ...
+
+    # 测试中
+    response = assert_query_budget(client, '/user/profile')
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 当前上下文中处于激活状态的记录器，使用不可变元组避免不同上下文之间共享修改
+_active_recorders: ContextVar[Tuple['QueryRecorder', ...]] = ContextVar('query_recorders', default=())
+
+# 引擎事件只需注册一次，对所有引擎（包括之后添加的只读副本）生效
+_listeners_installed = False
+
+# 归一化使用的正则表达式
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAM_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(statement: str) -> str:
+    """将SQL语句归一化为"形状"
+
+    替换字符串/数字字面量和各种参数占位符为 ?，并把任意长度的IN列表折叠为 (?)，
+    使得只有参数不同的语句得到相同的结果。
+
+    Args:
+        statement: 原始SQL语句
+
+    Returns:
+        str: 归一化后的SQL语句
+
+    示例:
+        >>> normalize_sql("SELECT * FROM users WHERE id IN (?, ?, ?)")
+        'SELECT * FROM users WHERE id IN (?)'
+    """
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PARAM_PLACEHOLDER.sub('?', shape)
+    shape = _IN_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryRecorder:
+    """查询记录器
+
+    收集一段代码执行期间的所有SQL语句，并提供按形状统计和N+1嫌疑分析。
+
+    属性:
+        queries (list): (语句, 耗时秒数) 元组列表，按执行顺序排列
+    """
+
+    def __init__(self):
+        """初始化空的查询记录器"""
+        self.queries: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, duration: float):
+        """记录一条已执行的语句
+
+        Args:
+            statement: SQL语句
+            duration: 执行耗时（秒）
+        """
+        self.queries.append((statement, duration))
+
+    @property
+    def count(self) -> int:
+        """已记录的语句数量"""
+        return len(self.queries)
+
+    @property
+    def total_time(self) -> float:
+        """所有语句的累计耗时（秒）"""
+        return sum(duration for _, duration in self.queries)
+
+    def shapes(self) -> Counter:
+        """按归一化形状统计语句出现次数
+
+        Returns:
+            Counter: 形状到出现次数的映射
+        """
+        return Counter(normalize_sql(statement) for statement, _ in self.queries)
+
+    def suspects(self, threshold: int) -> List[Tuple[str, int]]:
+        """找出疑似N+1的语句形状
+
+        Args:
+            threshold: 同一形状出现次数达到该值即视为可疑
+
+        Returns:
+            list: (形状, 次数) 列表，按次数降序排列
+        """
+        return [(shape, n) for shape, n in self.shapes().most_common() if n >= threshold]
+
+    def summary(self, limit: int = 5) -> str:
+        """生成便于阅读的统计摘要，用于日志和断言信息
+
+        Args:
+            limit: 最多列出的形状数量
+
+        Returns:
+            str: 多行摘要文本
+        """
+        lines = [f"共 {self.count} 条查询，耗时 {self.total_time * 1000:.1f}ms"]
+        for shape, n in self.shapes().most_common(limit):
+            lines.append(f"  {n:>3} x {shape[:200]}")
+        return '\n'.join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """引擎事件：语句执行前记录开始时间"""
+    if _active_recorders.get():
+        conn.info.setdefault('query_profiler_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """引擎事件：语句执行后把语句和耗时交给所有激活的记录器"""
+    recorders = _active_recorders.get()
+    if not recorders:
+        return
+    starts = conn.info.get('query_profiler_start')
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+    for recorder in recorders:
+        recorder.record(statement, duration)
+
+
+def install_listeners():
+    """在Engine类上注册游标执行事件（幂等）"""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _listeners_installed = True
+
+
+def _push(recorder: QueryRecorder):
+    """激活记录器"""
+    _active_recorders.set(_active_recorders.get() + (recorder,))
+
+
+def _pop(recorder: QueryRecorder):
+    """停用记录器"""
+    _active_recorders.set(tuple(r for r in _active_recorders.get() if r is not recorder))
+
+
+@contextmanager
+def record_queries():
+    """在代码块执行期间记录SQL语句
+
+    可以嵌套使用，也可以与请求级别的记录同时存在，每个记录器都会收到全部语句。
+
+    Yields:
+        QueryRecorder: 查询记录器
+
+    示例:
+        with record_queries() as recorder:
+            client.get('/forum/')
+        print(recorder.summary())
+    """
+    install_listeners()
+    recorder = QueryRecorder()
+    _push(recorder)
+    try:
+        yield recorder
+    finally:
+        _pop(recorder)
+
+
+def query_budget(max_queries: int):
+    """声明视图的查询预算
+
+    被装饰的视图在一次请求中执行的语句数超过预算时会记录警告，
+    assert_query_budget 在未显式给出上限时也会使用这里声明的值。
+    应放在路由装饰器和 login_required 等装饰器之下。
+
+    Args:
+        max_queries: 允许的最大查询数
+
+    Returns:
+        装饰器函数
+    """
+    def decorator(f: Callable):
+        # 以属性形式保存，functools.wraps 会把它复制到外层包装函数上
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+
+def get_declared_budget(app, path: str, method: str = 'GET') -> Optional[int]:
+    """查找路由上声明的查询预算
+
+    Args:
+        app: Flask应用实例
+        path: 请求路径，可以包含查询字符串
+        method: 请求方法
+
+    Returns:
+        int or None: 声明的预算，未声明时返回None
+    """
+    adapter = app.url_map.bind('localhost')
+    endpoint, _ = adapter.match(path.split('?', 1)[0], method=method)
+    view = app.view_functions.get(endpoint)
+    return getattr(view, 'query_budget', None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """路由执行的查询数超出预算"""
+
+
+def assert_query_budget(client, path: str, max_queries: Optional[int] = None, method: str = 'GET', **kwargs):
+    """断言一次请求的查询数不超过预算
+
+    供测试使用。未给出 max_queries 时使用路由上 @query_budget 声明的值。
+
+    Args:
+        client: Flask测试客户端
+        path: 请求路径
+        max_queries: 允许的最大查询数，可选
+        method: 请求方法，默认为GET
+        **kwargs: 透传给 client.open 的其他参数，如 data、json、headers
+
+    Returns:
+        Response: 请求的响应对象，便于继续断言
+
+    Raises:
+        QueryBudgetExceeded: 查询数超出预算
+        ValueError: 既未给出上限，路由上也没有声明预算
+    """
+    if max_queries is None:
+        max_queries = get_declared_budget(client.application, path, method)
+        if max_queries is None:
+            raise ValueError(f"路由 {method} {path} 未声明查询预算")
+
+    with record_queries() as recorder:
+        response = client.open(path, method=method, **kwargs)
+
+    if recorder.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{method} {path} 执行了 {recorder.count} 条查询，超出预算 {max_queries}\n{recorder.summary()}"
+        )
+    return response
+
+
+def init_query_profiler(app):
+    """为应用启用请求级别的查询分析
+
+    在 QUERY_PROFILER_ENABLED 为真时注册请求钩子：
+    请求开始时激活记录器，请求结束时分析N+1嫌疑和查询预算，并按配置输出响应头。
+
+    Args:
+        app: Flask应用实例
+    """
+    if not app.config.get('QUERY_PROFILER_ENABLED'):
+        return
+
+    install_listeners()
+
+    @app.before_request
+    def start_query_recording():
+        recorder = QueryRecorder()
+        _push(recorder)
+        g.query_recorder = recorder
+
+    @app.after_request
+    def analyze_queries(response):
+        recorder = g.get('query_recorder')
+        if recorder is None:
+            return response
+
+        threshold = current_app.config.get('QUERY_N_PLUS_ONE_THRESHOLD', 5)
+        suspects = recorder.suspects(threshold)
+        perf_logger = current_app.config.get('PERF_LOGGER')
+
+        if suspects and perf_logger:
+            for shape, n in suspects:
+                perf_logger.info(f"疑似N+1查询: {request.method} {request.path} 同一语句执行 {n} 次: {shape[:300]}")
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and recorder.count > budget:
+            current_app.logger.warning(
+                f"查询预算超出: {request.method} {request.path} 执行 {recorder.count} 条，预算 {budget}"
+            )
+
+        if current_app.config.get('QUERY_PROFILER_HEADERS'):
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers['X-Query-Time'] = f"{recorder.total_time * 1000:.1f}ms"
+            if suspects:
+                response.headers['X-Query-N-Plus-One'] = str(len(suspects))
+            if budget is not None:
+                response.headers['X-Query-Budget'] = str(budget)
+        return response
+
+    @app.teardown_request
+    def stop_query_recording(exc=None):
+        recorder = g.pop('query_recorder', None)
+        if recorder is not None:
+            _pop(recorder)
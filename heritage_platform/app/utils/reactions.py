@@ -0,0 +1,138 @@
+"""
+点赞与收藏操作模块
+
+以幂等、尽量少的SQL语句完成点赞/收藏的添加、取消和切换：
+- 添加：一条 INSERT ... SELECT（冲突时忽略，内容不存在时不插入），根据影响行数判断结果
+- 取消：一条 DELETE，根据影响行数判断是否真的删除了记录
+- 计数：在同一事务中执行 COUNT，返回操作后的最新数量
+
+likes 和 favorites 表上的 (user_id, content_id) 唯一约束保证并发重复点击不会产生重复记录。
+直接执行Core语句不会触发模型事件，因此发生变化时通过 counters.apply 维护用户统计等汇总数据。
+"""
+
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import delete, func, literal, select
+
+from app import db
+from app.models import Content, Like, Favorite, beijing_time
+from app.utils import counters
+from app.utils.db_helpers import insert_ignore
+
+# 操作类型 -> 模型
+REACTION_MODELS = {
+    'like': Like,
+    'favorite': Favorite,
+}
+
+
+class ReactionResult:
+    """一次点赞/收藏操作的结果
+
+    属性:
+        active: 操作后用户是否处于已点赞/已收藏状态
+        changed: 本次操作是否实际改变了状态
+        count: 操作后内容的点赞/收藏总数
+    """
+
+    def __init__(self, active: bool, changed: bool, count: int):
+        self.active = active
+        self.changed = changed
+        self.count = count
+
+
+def _count(connection, model, content_id: int) -> int:
+    """统计内容的点赞/收藏数"""
+    table = model.__table__
+    return connection.execute(
+        select(func.count()).select_from(table).where(table.c.content_id == content_id)
+    ).scalar()
+
+
+def _content_exists(connection, content_id: int) -> bool:
+    """内容是否存在（仅在插入未生效时用于区分"已存在"和"内容不存在"）"""
+    contents = Content.__table__
+    return connection.execute(select(contents.c.id).where(contents.c.id == content_id)).first() is not None
+
+
+def _insert(connection, model, user_id: int, content_id: int) -> bool:
+    """插入一条点赞/收藏记录，返回是否实际插入
+
+    INSERT ... SELECT FROM contents 保证内容不存在时不会插入，也无需事先查询内容。
+    """
+    table = model.__table__
+    contents = Content.__table__
+    now = beijing_time()
+    source = select(
+        literal(user_id), contents.c.id, literal(now)
+    ).where(contents.c.id == content_id)
+    stmt = insert_ignore(connection, table).from_select(['user_id', 'content_id', 'created_at'], source)
+    inserted = connection.execute(stmt).rowcount == 1
+    if inserted:
+        counters.apply(model, connection, [
+            SimpleNamespace(id=None, user_id=user_id, content_id=content_id, created_at=now)
+        ], 1)
+    return inserted
+
+
+def _delete(connection, model, user_id: int, content_id: int) -> bool:
+    """删除点赞/收藏记录，返回是否实际删除"""
+    table = model.__table__
+    deleted = connection.execute(delete(table).where(
+        table.c.user_id == user_id, table.c.content_id == content_id
+    )).rowcount
+    if deleted:
+        counters.apply(model, connection, [
+            SimpleNamespace(id=None, user_id=user_id, content_id=content_id, created_at=None)
+        ] * deleted, -1)
+    return deleted > 0
+
+
+def set_reaction(kind: str, user_id: int, content_id: int, active: bool) -> Optional[ReactionResult]:
+    """设置点赞/收藏状态（幂等）
+
+    在调用方的事务中执行，不提交。
+
+    Args:
+        kind: 'like' 或 'favorite'
+        user_id: 用户ID
+        content_id: 内容ID
+        active: True 表示添加，False 表示取消
+
+    Returns:
+        ReactionResult: 操作结果；添加时内容不存在返回None
+    """
+    model = REACTION_MODELS[kind]
+    connection = db.session.connection()
+
+    if active:
+        changed = _insert(connection, model, user_id, content_id)
+        if not changed and not _content_exists(connection, content_id):
+            return None
+    else:
+        changed = _delete(connection, model, user_id, content_id)
+
+    return ReactionResult(active, changed, _count(connection, model, content_id))
+
+
+def toggle_reaction(kind: str, user_id: int, content_id: int) -> Optional[ReactionResult]:
+    """切换点赞/收藏状态：已存在则取消，否则添加
+
+    先尝试DELETE，未删除任何记录时再INSERT，不需要事先查询当前状态。
+    在调用方的事务中执行，不提交。
+
+    Args:
+        kind: 'like' 或 'favorite'
+        user_id: 用户ID
+        content_id: 内容ID
+
+    Returns:
+        ReactionResult: 操作结果；内容不存在返回None
+    """
+    model = REACTION_MODELS[kind]
+    connection = db.session.connection()
+
+    if _delete(connection, model, user_id, content_id):
+        return ReactionResult(False, True, _count(connection, model, content_id))
+    return set_reaction(kind, user_id, content_id, True)
@@ -0,0 +1,225 @@
+"""
+只读副本模块
+
+管理主库的只读副本（从库），供 RoutingSession 把读查询分流到副本：
+1. 副本作为 Flask-SQLAlchemy 的附加绑定（replica_0、replica_1 ...）创建，
+   与主库使用相同的连接池配置和 SQLite PRAGMA，不绑定任何模型，create_all 和迁移不会涉及
+2. 健康检查: 选择副本时，距上次检查超过 REPLICA_CHECK_INTERVAL 秒的副本先执行一次复制延迟探测；
+   无法连接、复制已停止或延迟超过 REPLICA_MAX_LAG 秒的副本暂不使用，查询回退到主库。
+   副本上的查询发生断线等连接错误时立即标记为不可用
+3. 复制延迟探测按数据库类型选择:
+   - MySQL: SHOW REPLICA STATUS（旧版本为 SHOW SLAVE STATUS）中的 Seconds_Behind_Source
+   - PostgreSQL: now() - pg_last_xact_replay_timestamp()
+   - 其他（如 SQLite）: 无复制状态，只检查能否连接
+   可通过 REPLICA_LAG_PROBE 配置项替换为自定义函数 probe(connection) -> 延迟秒数或None（None表示复制已停止）
+
+相关配置项（见config.py）:
+- SQLALCHEMY_REPLICA_URIS: 副本连接URI列表，为空时不启用读写分离
+- REPLICA_MAX_LAG: 允许的最大复制延迟（秒）
+- REPLICA_CHECK_INTERVAL: 健康检查间隔（秒）
+- REPLICA_STICKY_SECONDS: 用户写入后读取主库的时长（秒），保证读到自己的写入
+"""
+
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+# 副本在 SQLALCHEMY_BINDS 中的键前缀
+BIND_PREFIX = 'replica_'
+
+
+def _mysql_lag(connection) -> Optional[float]:
+    error = None
+    for statement, column in (('SHOW REPLICA STATUS', 'Seconds_Behind_Source'),
+                              ('SHOW SLAVE STATUS', 'Seconds_Behind_Master')):
+        try:
+            row = connection.execute(text(statement)).mappings().first()
+        except Exception as e:
+            # 旧版本不支持 SHOW REPLICA STATUS 时改用旧语句
+            error = e
+            continue
+        if row is None:
+            # 未配置复制（例如开发环境把主库当作副本），视为没有延迟
+            return 0.0
+        lag = row.get(column)
+        return float(lag) if lag is not None else None
+    # 两条语句都失败（例如账号缺少 REPLICATION CLIENT 权限）时无法确认延迟，副本按不健康处理
+    raise error
+
+
+def _postgresql_lag(connection) -> Optional[float]:
+    return connection.execute(text(
+        'SELECT CASE WHEN pg_is_in_recovery() '
+        'THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END'
+    )).scalar()
+
+
+def default_lag_probe(connection) -> Optional[float]:
+    """按数据库类型探测复制延迟（秒）"""
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        return _mysql_lag(connection)
+    if dialect == 'postgresql':
+        return _postgresql_lag(connection)
+    connection.execute(text('SELECT 1'))
+    return 0.0
+
+
+class _ReplicaState:
+    """单个副本的健康状态"""
+
+    __slots__ = ('engine', 'healthy', 'lag', 'error', 'checked_at', 'lock')
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.healthy = False
+        self.lag = None
+        self.error = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+
+class ReplicaSet:
+    """主库的一组只读副本
+
+    Args:
+        primary: 主库引擎
+        engines: 副本引擎列表
+        max_lag: 允许的最大复制延迟（秒）
+        check_interval: 健康检查间隔（秒）
+        lag_probe: 复制延迟探测函数，为空时使用 default_lag_probe
+        logger: 记录副本状态变化的日志对象
+    """
+
+    def __init__(self, primary: Engine, engines: List[Engine], max_lag: float = 5,
+                 check_interval: float = 5, lag_probe: Optional[Callable] = None, logger=None):
+        self.primary = primary
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe or default_lag_probe
+        self.logger = logger
+        self._states = [_ReplicaState(engine) for engine in engines]
+        self._by_engine: Dict[Engine, _ReplicaState] = {s.engine: s for s in self._states}
+        self._cursor = itertools.count()
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+    @property
+    def engines(self) -> List[Engine]:
+        return [state.engine for state in self._states]
+
+    def choose(self) -> Optional[Engine]:
+        """轮流选择一个健康的副本，全部不可用时返回None（回退到主库）"""
+        count = len(self._states)
+        start = next(self._cursor)
+        for offset in range(count):
+            state = self._states[(start + offset) % count]
+            self._refresh(state)
+            if state.healthy:
+                return state.engine
+        return None
+
+    def _refresh(self, state: _ReplicaState, force: bool = False):
+        if not force and time.monotonic() - state.checked_at < self.check_interval:
+            return
+        # 其他线程正在检查时沿用上一次的结果
+        if not state.lock.acquire(blocking=False):
+            return
+        try:
+            try:
+                with state.engine.connect() as connection:
+                    lag = self.lag_probe(connection)
+                if lag is None:
+                    self._set(state, False, None, '复制已停止')
+                elif lag > self.max_lag:
+                    self._set(state, False, lag, f'复制延迟 {lag:.1f} 秒')
+                else:
+                    self._set(state, True, lag, None)
+            except Exception as e:
+                self._set(state, False, None, str(e))
+            state.checked_at = time.monotonic()
+        finally:
+            state.lock.release()
+
+    def _set(self, state: _ReplicaState, healthy: bool, lag, error):
+        if healthy != state.healthy and self.logger:
+            if healthy:
+                self.logger.info(f"只读副本恢复可用: {state.engine.url.render_as_string(hide_password=True)}")
+            else:
+                self.logger.warning(
+                    f"只读副本不可用，读查询回退到主库: {state.engine.url.render_as_string(hide_password=True)} ({error})")
+        state.healthy = healthy
+        state.lag = lag
+        state.error = error
+
+    def _on_error(self, exception_context):
+        # 连接失败或断线时立即停用该副本，直到下一次健康检查成功
+        if exception_context.connection is not None and not exception_context.is_disconnect:
+            return
+        state = self._by_engine.get(exception_context.engine)
+        if state is not None:
+            self._set(state, False, None, str(exception_context.original_exception))
+            state.checked_at = time.monotonic()
+
+    def mark_down(self, engine: Engine, reason: str = '手动停用'):
+        """停用副本，直到下一次健康检查成功"""
+        state = self._by_engine.get(engine)
+        if state is not None:
+            self._set(state, False, None, reason)
+            state.checked_at = time.monotonic()
+
+    def check_all(self) -> List[Dict]:
+        """立即检查所有副本并返回状态"""
+        for state in self._states:
+            self._refresh(state, force=True)
+        return self.status()
+
+    def status(self) -> List[Dict]:
+        """各副本的当前状态"""
+        return [{
+            'url': state.engine.url.render_as_string(hide_password=True),
+            'healthy': state.healthy,
+            'lag': state.lag,
+            'error': state.error,
+            'checked_at': state.checked_at,
+        } for state in self._states]
+
+
+def configure_replica_binds(app):
+    """把 SQLALCHEMY_REPLICA_URIS 登记为附加绑定，需要在 db.init_app(app) 之前调用"""
+    uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not uris:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, uri in enumerate(uris):
+        binds[f'{BIND_PREFIX}{index}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def init_replicas(app):
+    """为主库创建副本集合，保存在 app.extensions['db_replicas']
+
+    Args:
+        app: Flask应用实例
+    """
+    from app import db
+
+    with app.app_context():
+        engines = db.engines
+        replicas = [engine for key, engine in sorted(engines.items(), key=lambda item: str(item[0]))
+                    if isinstance(key, str) and key.startswith(BIND_PREFIX)]
+        if not replicas:
+            return
+        app.extensions['db_replicas'] = ReplicaSet(
+            engines[None],
+            replicas,
+            max_lag=app.config.get('REPLICA_MAX_LAG', 5),
+            check_interval=app.config.get('REPLICA_CHECK_INTERVAL', 5),
+            lag_probe=app.config.get('REPLICA_LAG_PROBE'),
+            logger=app.logger,
+        )
+    app.logger.info(f"已启用读写分离，只读副本数: {len(replicas)}")
@@ -0,0 +1,274 @@
+"""
+数据保留与归档模块
+
+messages 和 notifications 表只增不减，多年前的已读通知和双方都已删除的私信
+一直留在原表中，拖慢收件箱和通知列表使用的索引。本模块按保留策略维护这两张表：
+
+1. 归档：把超过保留期的行分批复制到归档表（messages_archive、notifications_archive），
+   再从原表删除。每批在一个短事务中完成并立即提交，批次之间可以暂停，
+   不会长时间持有锁；复制使用"忽略重复"的INSERT，中途失败后重跑是安全的。
+2. 清除：双方都已删除的私信超过保留期后直接删除，不再归档。
+3. 读穿：会话视图在原表中找不到消息时读取归档表，归档后的历史记录仍可查看（只读），群组归档消息读取只读副本。
+
+保留策略见 config.py 中的 RETENTION_POLICIES，可以通过以下命令执行：
+    flask archive-old-data [--policy messages] [--dry-run]
+    flask purge-deleted-messages [--dry-run]
+
+归档通过Core语句直接删除原表数据，不触发模型事件，历史的活跃度汇总等统计不受影响。
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, literal, or_, select
+
+from app import db
+from app.models import (
+    Message, MessageReadStatus, Notification, MessageArchive, NotificationArchive
+)
+from app.models import beijing_time
+from app.utils.db_helpers import insert_ignore
+from app.utils.db_session import reads_from_replica
+
+# 未在配置中指定时使用的保留策略
+DEFAULT_POLICIES = {
+    'notifications': {'archive_after_days': 180},
+    'messages': {'archive_after_days': 365},
+    'deleted_messages': {'purge_after_days': 30},
+}
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BATCH_PAUSE = 0.1
+# 群组归档消息每页的条数
+DEFAULT_HISTORY_PAGE_SIZE = 50
+
+
+@dataclass
+class ArchivePolicy:
+    """归档策略
+
+    属性:
+        name: 策略名称
+        model: 原表模型
+        archive_model: 归档表模型
+        days: 保留天数，created_at 早于此的行会被归档
+        conditions: 额外的筛选条件（返回条件列表的函数）
+        clock: 原表 created_at 使用的时钟
+        dependents: 删除原表行之前需要先删除的从表行 [(从表模型, 外键列名), ...]
+    """
+    name: str
+    model: type
+    archive_model: type
+    days: int
+    conditions: Callable[[], list]
+    clock: Callable[[], datetime] = datetime.now
+    dependents: List[Tuple[type, str]] = field(default_factory=list)
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        return (now or self.clock()) - timedelta(days=self.days)
+
+
+def _config(key, default):
+    return current_app.config.get(key, default)
+
+
+def _policy_settings(name: str) -> dict:
+    policies = _config('RETENTION_POLICIES', None) or DEFAULT_POLICIES
+    return {**DEFAULT_POLICIES.get(name, {}), **policies.get(name, {})}
+
+
+def get_archive_policies() -> Dict[str, ArchivePolicy]:
+    """根据配置生成归档策略"""
+    return {
+        'notifications': ArchivePolicy(
+            name='notifications',
+            model=Notification,
+            archive_model=NotificationArchive,
+            days=_policy_settings('notifications')['archive_after_days'],
+            # 只归档已读通知，未读通知保留在原表中等待用户处理
+            conditions=lambda: [Notification.is_read == True],  # noqa: E712
+            clock=beijing_time,
+        ),
+        'messages': ArchivePolicy(
+            name='messages',
+            model=Message,
+            archive_model=MessageArchive,
+            days=_policy_settings('messages')['archive_after_days'],
+            # 双方都已删除的私信由 purge_deleted_messages 清除，不需要归档
+            conditions=lambda: [or_(Message.sender_deleted == False,  # noqa: E712
+                                    Message.receiver_deleted == False)],  # noqa: E712
+            dependents=[(MessageReadStatus, 'message_id')],
+        ),
+    }
+
+
+def _batches(id_query, batch_size: int, max_batches: Optional[int], pause: float, handle) -> int:
+    """按主键分批处理：每批查询一批ID，交给 handle 处理并提交
+
+    handle 需要把这批行移出 id_query 的结果，否则会重复处理同一批。
+    """
+    total = 0
+    batches = 0
+    while True:
+        ids = [row[0] for row in db.session.execute(id_query.limit(batch_size))]
+        if not ids:
+            break
+        handle(db.session.connection(), ids)
+        db.session.commit()
+        total += len(ids)
+        batches += 1
+        if len(ids) < batch_size or (max_batches and batches >= max_batches):
+            break
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+def _delete_rows(connection, model, ids, dependents):
+    for dependent, column in dependents:
+        connection.execute(delete(dependent).where(getattr(dependent, column).in_(ids)))
+    connection.execute(delete(model).where(model.id.in_(ids)))
+
+
+def archive(name: str, batch_size: Optional[int] = None, max_batches: Optional[int] = None,
+            dry_run: bool = False, now: Optional[datetime] = None) -> int:
+    """按策略把过期的行搬移到归档表
+
+    Args:
+        name: 策略名称（notifications 或 messages）
+        batch_size: 每批行数，默认取 RETENTION_BATCH_SIZE
+        max_batches: 最多处理的批数，为空时处理到没有过期数据为止
+        dry_run: 只统计将被归档的行数，不做修改
+        now: 计算截止时间使用的当前时间，默认取策略的时钟
+
+    Returns:
+        int: 归档（或将被归档）的行数
+    """
+    policy = get_archive_policies()[name]
+    model = policy.model
+    condition = and_(model.created_at < policy.cutoff(now), *policy.conditions())
+
+    if dry_run:
+        return db.session.query(func.count(model.id)).filter(condition).scalar()
+
+    columns = [column.name for column in model.__table__.columns]
+    archived_at = literal(beijing_time(), type_=db.DateTime)
+
+    def move(connection, ids):
+        source = select(*[model.__table__.c[c] for c in columns], archived_at).where(model.id.in_(ids))
+        connection.execute(insert_ignore(connection, policy.archive_model.__table__).from_select(
+            columns + ['archived_at'], source))
+        _delete_rows(connection, model, ids, policy.dependents)
+
+    total = _batches(
+        select(model.id).where(condition).order_by(model.id),
+        batch_size or _config('RETENTION_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+        max_batches,
+        _config('RETENTION_BATCH_PAUSE', DEFAULT_BATCH_PAUSE),
+        move,
+    )
+    current_app.logger.info(f"归档策略 {name}: 已归档 {total} 行")
+    return total
+
+
+def purge_deleted_messages(batch_size: Optional[int] = None, max_batches: Optional[int] = None,
+                           dry_run: bool = False, now: Optional[datetime] = None) -> int:
+    """清除双方都已删除、且超过保留期的私信（包括归档表中的）
+
+    Returns:
+        int: 清除（或将被清除）的行数
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=_policy_settings('deleted_messages')['purge_after_days'])
+    batch_size = batch_size or _config('RETENTION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    pause = _config('RETENTION_BATCH_PAUSE', DEFAULT_BATCH_PAUSE)
+
+    total = 0
+    for model, dependents in ((Message, [(MessageReadStatus, 'message_id')]), (MessageArchive, [])):
+        condition = and_(
+            model.message_type == 'personal',
+            model.sender_deleted == True,  # noqa: E712
+            model.receiver_deleted == True,  # noqa: E712
+            model.created_at < cutoff,
+        )
+        if dry_run:
+            total += db.session.query(func.count(model.id)).filter(condition).scalar()
+            continue
+        total += _batches(
+            select(model.id).where(condition).order_by(model.id), batch_size, max_batches, pause,
+            lambda connection, ids, model=model, dependents=dependents: _delete_rows(
+                connection, model, ids, dependents),
+        )
+
+    if not dry_run:
+        current_app.logger.info(f"已清除 {total} 条双方都已删除的私信")
+    return total
+
+
+# ---------------------------------------------------------------------------
+# 读穿：会话视图读取已归档的历史消息
+# ---------------------------------------------------------------------------
+
+def _visible_to(model, user_id: int):
+    """当前用户可见的私信/广播：自己发出且未删除，或发给自己且未删除"""
+    return and_(
+        or_(
+            and_(model.sender_id == user_id, model.sender_deleted == False),  # noqa: E712
+            and_(model.receiver_id == user_id, model.receiver_deleted == False)  # noqa: E712
+        ),
+        model.message_type.in_(('personal', 'broadcast'))
+    )
+
+
+def find_message(message_id: int, user_id: int):
+    """查找用户可见的私信，原表中不存在时读取归档表
+
+    Returns:
+        tuple: (消息对象, 是否来自归档)；都不存在时返回 (None, False)
+    """
+    message = Message.query.filter(Message.id == message_id, _visible_to(Message, user_id)).first()
+    if message is not None:
+        return message, False
+    archived = MessageArchive.query.filter(
+        MessageArchive.id == message_id, _visible_to(MessageArchive, user_id)).first()
+    return archived, archived is not None
+
+
+@reads_from_replica
+def archived_group_message_count(group_id: int) -> int:
+    """群组已归档的消息数"""
+    return db.session.query(func.count(MessageArchive.id)).filter(
+        MessageArchive.group_id == group_id).scalar()
+
+
+@reads_from_replica
+def archived_group_messages(group_id: int, before_id: Optional[int] = None,
+                            limit: Optional[int] = None) -> Tuple[List[MessageArchive], Optional[int]]:
+    """按 (created_at, id) 键集分页读取群组已归档的消息，从最近的往前翻
+
+    Args:
+        group_id: 群组ID
+        before_id: 游标，上一页最早一条消息的ID；为空时从最近的归档消息开始
+        limit: 每页的消息数，默认使用 RETENTION_HISTORY_PAGE_SIZE
+
+    Returns:
+        tuple: (本页消息，按时间升序，发送者随查询加载; 更早一页的游标，没有更多时为None)
+    """
+    limit = limit or _config('RETENTION_HISTORY_PAGE_SIZE', DEFAULT_HISTORY_PAGE_SIZE)
+    query = MessageArchive.query.options(db.joinedload(MessageArchive.sender)).filter(
+        MessageArchive.group_id == group_id)
+    if before_id:
+        cursor = db.session.query(MessageArchive.created_at).filter(
+            MessageArchive.id == before_id, MessageArchive.group_id == group_id).scalar_subquery()
+        query = query.filter(or_(
+            MessageArchive.created_at < cursor,
+            and_(MessageArchive.created_at == cursor, MessageArchive.id < before_id)
+        ))
+
+    # 多取一条判断是否还有更早的消息
+    rows = query.order_by(MessageArchive.created_at.desc(), MessageArchive.id.desc()).limit(limit + 1).all()
+    page = rows[:limit]
+    page.reverse()
+    next_cursor = page[0].id if len(rows) > limit else None
+    return page, next_cursor
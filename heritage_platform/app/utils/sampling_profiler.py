@@ -0,0 +1,283 @@
+"""
+运行中进程的采样分析模块
+
+在不重启进程的情况下分析线上工作进程的CPU热点和内存增长，包括：
+1. 栈采样：启动一个后台采样线程，每隔固定间隔通过 sys._current_frames() 读取所有线程的当前调用栈，
+   按栈计数聚合，输出折叠栈格式（flamegraph.pl / speedscope 的输入）。
+   采样线程只在采样期间存在，开销与采样间隔成正比，默认 5 毫秒一次。
+   使用 eventlet/gevent 时，主线程的当前栈就是正在运行的协程，挂起等待中的协程不会出现在采样中，
+   因此结果反映的是实际占用CPU的代码；在事件循环中空闲等待的栈默认被过滤掉
+2. 内存快照：基于 tracemalloc 记录一个基线快照，之后随时与当前快照比较，按分配位置列出增长最多的条目，
+   用于追查长期运行的工作进程的内存增长。tracemalloc 开启期间所有分配都有额外开销，排查完毕后应关闭
+
+eventlet/gevent 的猴子补丁会把 threading.Thread 和 time.sleep 换成协程版本，协程版的采样线程
+运行在被采样的操作系统线程上，只能采到它自己。因此采样线程使用补丁之前的原始实现
+（_thread.start_new_thread、time.sleep）启动为真正的操作系统线程，并按操作系统线程ID排除自身。
+
+没有选择基于定时器信号（setitimer）的实现：信号处理函数只能在主线程执行，并且会打断
+eventlet 事件循环中的系统调用；采样线程对应用代码没有侵入。
+
+同一进程同一时间只允许一个栈采样任务。
+
+相关配置项（见config.py）:
+- PROFILER_ENABLED: 是否开放分析接口，默认关闭，需通过环境变量 PROFILER_ENABLED=true 开启
+- PROFILER_MAX_SECONDS: 单次栈采样的最长时长（秒）
+- PROFILER_DEFAULT_INTERVAL_MS: 默认采样间隔（毫秒）
+- PROFILER_TRACEMALLOC_FRAMES: tracemalloc 为每次分配记录的栈深度
+"""
+
+import _thread
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+# 叶子帧是这些函数时视为空闲等待（事件循环、锁、套接字等待）
+IDLE_FUNCTIONS = frozenset({
+    'wait', 'select', 'poll', 'epoll', 'kqueue', 'sleep', 'accept', 'recv', 'recv_into',
+    'readinto', 'acquire', '_wait_for_tstate_lock',
+})
+
+# 单个栈保留的最大深度，超出部分从栈底截断
+MAX_STACK_DEPTH = 128
+
+_sampling_lock = threading.Lock()
+_memory_lock = threading.Lock()
+_memory_baseline: Optional[tracemalloc.Snapshot] = None
+_memory_baseline_time: Optional[float] = None
+
+
+def _os_thread_functions():
+    """未被 eventlet/gevent 猴子补丁替换的 (start_new_thread, get_ident, sleep)"""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        patcher = None
+    if patcher is not None and patcher.is_monkey_patched('thread'):
+        original_thread, original_time = patcher.original('_thread'), patcher.original('time')
+        return original_thread.start_new_thread, original_thread.get_ident, original_time.sleep
+
+    try:
+        from gevent import monkey
+    except ImportError:
+        monkey = None
+    if monkey is not None and monkey.is_module_patched('threading'):
+        return (monkey.get_original('_thread', 'start_new_thread'),
+                monkey.get_original('_thread', 'get_ident'),
+                monkey.get_original('time', 'sleep'))
+
+    return _thread.start_new_thread, _thread.get_ident, time.sleep
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有栈采样任务在运行"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    # 折叠栈格式中分号分隔帧、空格分隔计数
+    return f'{code.co_name}({filename}:{code.co_firstlineno})'.replace(';', ',').replace(' ', '_')
+
+
+def _collapse(frame) -> List[str]:
+    """把线程的当前帧转换为从栈底到栈顶的标签列表"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _is_idle(frame) -> bool:
+    return frame.f_code.co_name in IDLE_FUNCTIONS
+
+
+def sample_stacks(duration: float, interval: float = 0.005, include_idle: bool = False,
+                  wait: Optional[Callable[[float], None]] = None) -> Dict:
+    """对当前进程的所有线程做一段时间的栈采样
+
+    Args:
+        duration: 采样时长（秒）
+        interval: 采样间隔（秒）
+        include_idle: 是否保留空闲等待的栈
+        wait: 等待采样结束的函数，接收秒数；在 eventlet 中应传入 socketio.sleep，
+            避免阻塞事件循环，默认使用 time.sleep
+
+    Returns:
+        dict: {'stacks': Counter(折叠栈 -> 次数), 'samples': 采样次数,
+               'idle': 被过滤的空闲栈数, 'duration': 实际时长, 'interval': 采样间隔}
+
+    Raises:
+        ProfilerBusyError: 已有采样任务在运行
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        raise ProfilerBusyError('已有栈采样任务在运行')
+
+    result = {'stacks': Counter(), 'samples': 0, 'idle': 0, 'interval': interval}
+    start_new_thread, get_ident, sleep = _os_thread_functions()
+    # 采样线程与等待它的协程之间只通过这个标记通信，协程版的 Event 不能跨操作系统线程使用
+    done = []
+
+    # 线程名在调用方读取：猴子补丁后的 threading 只能在协程所在的线程中使用
+    names = {t.ident: t.name for t in threading.enumerate()}
+
+    def sampler():
+        own_id = get_ident()
+        start = time.perf_counter()
+        deadline = start + duration
+        try:
+            while time.perf_counter() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    if not include_idle and _is_idle(frame):
+                        result['idle'] += 1
+                        continue
+                    stack = [names.get(thread_id, str(thread_id)).replace(' ', '_')] + _collapse(frame)
+                    result['stacks'][';'.join(stack)] += 1
+                result['samples'] += 1
+                sleep(interval)
+        finally:
+            result['duration'] = time.perf_counter() - start
+            done.append(True)
+
+    try:
+        start_new_thread(sampler, ())
+        wait = wait or time.sleep
+        while not done:
+            wait(min(0.1, duration))
+        return result
+    finally:
+        _sampling_lock.release()
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """输出折叠栈文本，每行 "帧;帧;帧 次数"，按次数降序"""
+    return '\n'.join(f'{stack} {count}' for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int = 20) -> List[Dict]:
+    """按自身采样数（栈顶帧）和累计采样数（出现在栈中）统计热点函数"""
+    total = sum(stacks.values()) or 1
+    own, cumulative = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            cumulative[frame] += count
+    return [{
+        'function': frame,
+        'self': count,
+        'self_pct': round(count / total * 100, 2),
+        'cumulative': cumulative[frame],
+        'cumulative_pct': round(cumulative[frame] / total * 100, 2),
+    } for frame, count in own.most_common(limit)]
+
+
+# ---------------------------------------------------------------------------
+# tracemalloc 快照对比
+# ---------------------------------------------------------------------------
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def memory_status() -> Dict:
+    """tracemalloc 的当前状态"""
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return {
+        'tracing': tracing,
+        'frames': tracemalloc.get_traceback_limit() if tracing else None,
+        'traced_bytes': current,
+        'peak_bytes': peak,
+        'overhead_bytes': tracemalloc.get_tracemalloc_memory() if tracing else 0,
+        'baseline_at': _memory_baseline_time,
+    }
+
+
+def start_memory_tracking(frames: int = 10) -> Dict:
+    """开启 tracemalloc（如未开启）并记录基线快照"""
+    global _memory_baseline, _memory_baseline_time
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _memory_baseline = _take_snapshot()
+        _memory_baseline_time = time.time()
+    return memory_status()
+
+
+def stop_memory_tracking() -> Dict:
+    """关闭 tracemalloc 并丢弃基线快照"""
+    global _memory_baseline, _memory_baseline_time
+    with _memory_lock:
+        _memory_baseline = None
+        _memory_baseline_time = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return memory_status()
+
+
+def memory_diff(limit: int = 30, group_by: str = 'lineno', reset_baseline: bool = False) -> Dict:
+    """与基线快照比较，列出内存增长最多的分配位置
+
+    没有基线快照时列出当前占用最多的分配位置。
+
+    Args:
+        limit: 返回的条目数
+        group_by: 分组方式，lineno（分配的代码行）、filename 或 traceback（完整调用栈）
+        reset_baseline: 比较后是否把当前快照作为新的基线，便于观察连续区间内的增长
+
+    Raises:
+        RuntimeError: tracemalloc 未开启
+    """
+    global _memory_baseline, _memory_baseline_time
+    if group_by not in ('lineno', 'filename', 'traceback'):
+        raise ValueError('group_by 只能是 lineno、filename 或 traceback')
+
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc 未开启')
+        snapshot = _take_snapshot()
+        baseline = _memory_baseline
+        if baseline is not None:
+            stats = snapshot.compare_to(baseline, group_by)
+        else:
+            stats = snapshot.statistics(group_by)
+        if reset_baseline:
+            _memory_baseline = snapshot
+            _memory_baseline_time = time.time()
+
+    entries = []
+    for stat in stats[:limit]:
+        entry = {
+            'size_bytes': stat.size,
+            'count': stat.count,
+            'traceback': [f'{frame.filename}:{frame.lineno}' for frame in stat.traceback],
+        }
+        if baseline is not None:
+            entry['size_diff_bytes'] = stat.size_diff
+            entry['count_diff'] = stat.count_diff
+        entries.append(entry)
+
+    return {
+        **memory_status(),
+        'compared_to_baseline': baseline is not None,
+        'total_diff_bytes': sum(s.size_diff for s in stats) if baseline is not None else None,
+        'top': entries,
+    }
@@ -0,0 +1,375 @@
+"""
+API序列化模块
+
+模型的 to_dict 总是计算全部字段：每条内容三次COUNT查询、一次图片查询，非遗项目和帖子逐条查询作者，
+即使客户端的列表只需要标题。本模块按请求的字段和展开项序列化，只读取需要的列和关联：
+1. 查询阶段: query_options() 根据所选字段生成 load_only 列投影和关联的预加载选项
+2. 批量阶段: 计数、访问者状态和展开项对整页对象各执行一条查询（GROUP BY / IN），不再逐条查询
+3. 输出阶段: 只生成所选字段
+
+查询参数约定（app/api 下的列表和详情接口）:
+    fields=id,title,author_name        只返回这些字段，未指定时返回接口的默认字段（与原 to_dict 相同）
+    include=images,recent_comments     展开关联数据，替换接口默认的展开项；include= 为空表示不展开
+    fields=id,title,images             fields 中列出的展开项同样会被展开；指定 fields 而未指定 include 时只展开其中列出的
+    fields=id,recent_contents.title    嵌套展开项的字段和展开项以展开名为前缀
+未知的字段或展开项抛出 FieldSelectionError，接口返回 400。
+
+使用示例:
+    serializer = ContentSerializer.from_request(default_include=('images',))
+    pagination = Content.query.options(*serializer.query_options()).paginate(...)
+    items = serializer.dump_many(pagination.items)
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import request
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, load_only
+
+from app import db
+from app.models import Comment, Content, ContentImage, Favorite, ForumPost, ForumTopic, HeritageItem, Like, User
+from app.utils import heritage_registry
+from app.utils.viewer_state import get_viewer_state
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class FieldSelectionError(ValueError):
+    """fields / include 参数中包含未知的字段或展开项"""
+
+
+class Field:
+    """一个输出字段
+
+    Args:
+        columns: 需要加载的本模型列名
+        relations: 需要预加载的关联名（Serializer.relations 中的键）
+        value: 取值函数 value(obj)；设置了 prefetch 时为 value(obj, prefetched)
+        prefetch: 批量取数函数 prefetch(ids)，整页对象只调用一次
+    """
+
+    def __init__(self, columns: Sequence[str] = (), relations: Sequence[str] = (),
+                 value: Optional[Callable] = None, prefetch: Optional[Callable] = None):
+        self.columns = tuple(columns)
+        self.relations = tuple(relations)
+        self.value = value
+        self.prefetch = prefetch
+
+
+class Include:
+    """一个可展开的一对多关联，整页父对象的子对象用一条查询取得
+
+    Args:
+        serializer: 子对象的序列化器类（返回类的函数，允许引用后定义的类）
+        key: 子模型上指向父对象的外键列名
+        order_by: 返回排序表达式元组的函数
+        limit: 每个父对象最多返回的子对象数，None 表示不限
+    """
+
+    def __init__(self, serializer: Callable, key: str, order_by: Callable, limit: Optional[int] = None):
+        self.serializer = serializer
+        self.key = key
+        self.order_by = order_by
+        self.limit = limit
+
+    def fetch(self, parent_ids: List[int], child: 'Serializer') -> Dict[int, list]:
+        """查询父对象的子对象，返回 {父对象ID: [子对象]}"""
+        model = child.model
+        key = getattr(model, self.key)
+        query = model.query.options(*child.query_options(self.key)).filter(
+            key.in_(parent_ids)).order_by(*self.order_by())
+        if self.limit is not None:
+            if len(parent_ids) == 1:
+                query = query.limit(self.limit)
+            else:
+                # 每个父对象取前 limit 个：按父对象分区编号
+                rank = func.row_number().over(partition_by=key, order_by=self.order_by()).label('rank')
+                ranked = db.session.query(model.id.label('id'), rank).filter(key.in_(parent_ids)).subquery()
+                query = query.join(ranked, ranked.c.id == model.id).filter(ranked.c.rank <= self.limit)
+        grouped = defaultdict(list)
+        for obj in query:
+            grouped[getattr(obj, self.key)].append(obj)
+        return grouped
+
+
+def column(name: str) -> Field:
+    return Field((name,), value=lambda obj: getattr(obj, name))
+
+
+def timestamp(name: str) -> Field:
+    def value(obj):
+        moment = getattr(obj, name)
+        return moment.strftime(TIME_FORMAT) if moment else None
+    return Field((name,), value=value)
+
+
+def related(relation: str, attr: str, key: str) -> Field:
+    """多对一关联对象上的属性，关联为空时为None"""
+    def value(obj):
+        target = getattr(obj, relation)
+        return getattr(target, attr) if target is not None else None
+    return Field((key,), (relation,), value)
+
+
+def count_of(model, key: str) -> Field:
+    """子表中指向本对象的行数，整页对象一条 GROUP BY 查询"""
+    def prefetch(ids):
+        column_ = getattr(model, key)
+        return dict(db.session.query(column_, func.count()).filter(column_.in_(ids)).group_by(column_))
+    return Field(('id',), value=lambda obj, counts: counts.get(obj.id, 0), prefetch=prefetch)
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def _partition(names: Optional[Iterable[str]]) -> Tuple[Optional[List[str]], Dict[str, List[str]]]:
+    """把 a,b.c 拆分为本层名称 [a] 和嵌套名称 {b: [c]}"""
+    if names is None:
+        return None, {}
+    own, nested = [], defaultdict(list)
+    for name in names:
+        head, dot, rest = name.partition('.')
+        if dot:
+            nested[head].append(rest)
+        else:
+            own.append(head)
+    return own, dict(nested)
+
+
+class Serializer:
+    """按所选字段和展开项序列化一种模型
+
+    子类声明:
+        model: 模型类
+        fields: {输出字段名: Field}，字典顺序即输出顺序
+        relations: {关联名: 返回加载选项的函数}，关联属性可能是 User 上定义的backref，需在映射配置完成后构造
+        includes: {展开项名: Include}
+        default_fields: 默认字段，None 表示全部
+        default_include: 默认展开项
+    """
+    model = None
+    fields: Dict[str, Field] = {}
+    relations: Dict[str, Callable] = {}
+    includes: Dict[str, Include] = {}
+    default_fields: Optional[Tuple[str, ...]] = None
+    default_include: Tuple[str, ...] = ()
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, include: Optional[Iterable[str]] = None,
+                 default_fields: Optional[Sequence[str]] = None, default_include: Optional[Sequence[str]] = None):
+        own_fields, nested_fields = _partition(fields)
+        own_include, nested_include = _partition(include)
+
+        if own_fields is None:
+            names = list(default_fields or self.default_fields or self.fields)
+            expand = list(own_include if own_include is not None else
+                          default_include if default_include is not None else self.default_include)
+        else:
+            names = [name for name in own_fields if name not in self.includes]
+            expand = [name for name in own_fields if name in self.includes] + (own_include or [])
+        expand += list(nested_fields) + list(nested_include)
+
+        for name in names:
+            if name not in self.fields:
+                raise FieldSelectionError(f'未知字段: {name}')
+        for name in expand:
+            if name not in self.includes:
+                raise FieldSelectionError(f'无法展开: {name}')
+
+        self.field_names = list(dict.fromkeys(names))
+        self.children = {
+            name: self.includes[name].serializer()(fields=nested_fields.get(name), include=nested_include.get(name))
+            for name in dict.fromkeys(expand)
+        }
+
+    @classmethod
+    def from_request(cls, default_fields: Optional[Sequence[str]] = None,
+                     default_include: Optional[Sequence[str]] = None, args=None) -> 'Serializer':
+        """按请求的 fields 和 include 参数创建序列化器
+
+        Args:
+            default_fields: 接口的默认字段，默认为 cls.default_fields
+            default_include: 接口的默认展开项，默认为 cls.default_include
+            args: 查询参数，默认为 request.args
+        """
+        args = request.args if args is None else args
+        return cls(_split(args.get('fields')), _split(args.get('include')), default_fields, default_include)
+
+    def query_options(self, *extra_columns: str) -> list:
+        """查询选项：所选字段需要的列（主键总是加载）和关联的预加载"""
+        columns = {'id', *extra_columns}
+        relations = {}
+        for name in self.field_names:
+            field = self.fields[name]
+            columns.update(field.columns)
+            for relation in field.relations:
+                relations.setdefault(relation, self.relations[relation])
+        options = [load_only(*(getattr(self.model, name) for name in sorted(columns)))]
+        options.extend(factory() for factory in relations.values())
+        return options
+
+    def dump_many(self, objs: Iterable) -> List[dict]:
+        """序列化一组对象，计数和展开项对整组对象批量查询"""
+        objs = list(objs)
+        if not objs:
+            return []
+        ids = [obj.id for obj in objs]
+        prefetched = {name: self.fields[name].prefetch(ids)
+                      for name in self.field_names if self.fields[name].prefetch}
+
+        results = []
+        for obj in objs:
+            result = {}
+            for name in self.field_names:
+                field = self.fields[name]
+                result[name] = field.value(obj, prefetched[name]) if field.prefetch else field.value(obj)
+            results.append(result)
+
+        for name, child in self.children.items():
+            grouped = self.includes[name].fetch(ids, child)
+            dumped = iter(child.dump_many(item for parent_id in ids for item in grouped.get(parent_id, ())))
+            for parent_id, result in zip(ids, results):
+                result[name] = [next(dumped) for _ in grouped.get(parent_id, ())]
+        return results
+
+    def dump(self, obj) -> dict:
+        """序列化单个对象"""
+        return self.dump_many([obj])[0]
+
+
+class ContentImageSerializer(Serializer):
+    model = ContentImage
+    fields = {
+        'id': column('id'),
+        'content_id': column('content_id'),
+        'file_path': column('file_path'),
+        'caption': column('caption'),
+        'order': column('order'),
+        'created_at': timestamp('created_at'),
+    }
+
+
+class CommentSerializer(Serializer):
+    model = Comment
+    fields = {
+        'id': column('id'),
+        'user_id': column('user_id'),
+        'content_id': column('content_id'),
+        'author_name': related('author', 'username', 'user_id'),
+        'author_avatar': related('author', 'avatar', 'user_id'),
+        'text': column('text'),
+        'created_at': timestamp('created_at'),
+        'parent_id': column('parent_id'),
+        'reply_to_user_id': column('reply_to_user_id'),
+        'reply_to_name': related('reply_to_user', 'username', 'reply_to_user_id'),
+    }
+    relations = {
+        'author': lambda: joinedload(Comment.author).load_only(User.username, User.avatar),
+        'reply_to_user': lambda: joinedload(Comment.reply_to_user).load_only(User.username),
+    }
+
+
+class ContentSerializer(Serializer):
+    model = Content
+    fields = {
+        'id': column('id'),
+        'title': column('title'),
+        'heritage_id': column('heritage_id'),
+        'heritage_name': Field(('heritage_id',), value=lambda obj: getattr(
+            heritage_registry.get(obj.heritage_id), 'name', None)),
+        'user_id': column('user_id'),
+        'author_name': related('author', 'username', 'user_id'),
+        'author_avatar': related('author', 'avatar', 'user_id'),
+        'content_type': column('content_type'),
+        'text_content': column('text_content'),
+        'file_path': column('file_path'),
+        'cover_image': column('cover_image'),
+        'rich_content': column('rich_content'),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at'),
+        'comment_count': count_of(Comment, 'content_id'),
+        'like_count': count_of(Like, 'content_id'),
+        'favorite_count': count_of(Favorite, 'content_id'),
+        'views': column('views'),
+        # 当前用户的点赞和收藏状态，只在接口的默认字段中
+        'viewer': Field(('id',), value=lambda obj, state: state.to_dict(obj.id), prefetch=get_viewer_state),
+    }
+    relations = {
+        'author': lambda: joinedload(Content.author).load_only(User.username, User.avatar),
+    }
+    includes = {
+        'images': Include(lambda: ContentImageSerializer, 'content_id', lambda: (ContentImage.id,)),
+        'recent_comments': Include(lambda: CommentSerializer, 'content_id',
+                                   lambda: (Comment.created_at.desc(), Comment.id.desc()), limit=10),
+    }
+    default_fields = tuple(name for name in fields if name != 'viewer')
+    default_include = ('images',)
+
+
+class HeritageItemSerializer(Serializer):
+    model = HeritageItem
+    fields = {
+        'id': column('id'),
+        'name': column('name'),
+        'category': column('category'),
+        'description': column('description'),
+        'cover_image': column('cover_image'),
+        'created_by': column('created_by'),
+        'creator_name': related('creator', 'username', 'created_by'),
+        'created_at': timestamp('created_at'),
+        'content_count': count_of(Content, 'heritage_id'),
+    }
+    relations = {
+        'creator': lambda: joinedload(HeritageItem.creator).load_only(User.username),
+    }
+    includes = {
+        'recent_contents': Include(lambda: ContentSerializer, 'heritage_id',
+                                   lambda: (Content.created_at.desc(), Content.id.desc()), limit=10),
+    }
+
+
+class ForumTopicSerializer(Serializer):
+    model = ForumTopic
+    fields = {
+        'id': column('id'),
+        'title': column('title'),
+        'category': column('category'),
+        'user_id': column('user_id'),
+        'creator': related('creator', 'username', 'user_id'),
+        'views': column('views'),
+        'post_count': Field(('reply_count',), value=lambda obj: obj.post_count),
+        'last_post_id': column('last_post_id'),
+        'last_poster': related('last_poster', 'username', 'last_poster_id'),
+        'is_pinned': column('is_pinned'),
+        'is_closed': column('is_closed'),
+        'created_at': timestamp('created_at'),
+        'last_activity': timestamp('last_activity'),
+    }
+    relations = {
+        'creator': lambda: joinedload(ForumTopic.creator).load_only(User.username),
+        'last_poster': lambda: joinedload(ForumTopic.last_poster).load_only(User.username),
+    }
+
+
+class ForumPostSerializer(Serializer):
+    model = ForumPost
+    fields = {
+        'id': column('id'),
+        'topic_id': column('topic_id'),
+        'user_id': column('user_id'),
+        'author': related('author', 'username', 'user_id'),
+        'author_avatar': related('author', 'avatar', 'user_id'),
+        'content': column('content'),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at'),
+        'parent_id': column('parent_id'),
+        'reply_to_user_id': column('reply_to_user_id'),
+        'reply_to_username': related('reply_to_user', 'username', 'reply_to_user_id'),
+    }
+    relations = {
+        'author': lambda: joinedload(ForumPost.author).load_only(User.username, User.avatar),
+        'reply_to_user': lambda: joinedload(ForumPost.reply_to_user).load_only(User.username),
+    }
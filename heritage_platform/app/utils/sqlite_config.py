@@ -0,0 +1,84 @@
+"""
+SQLite配置模块
+
+本模块为使用SQLite数据库的部署（单机部署、测试和基准测试）提供连接级别的调优，包括：
+1. WAL日志模式：读操作不再阻塞写操作，适合多线程的Web服务
+2. synchronous=NORMAL：WAL模式下仍保证数据库一致性，同时显著减少fsync次数
+3. mmap_size / cache_size：使用内存映射和更大的页缓存减少系统调用
+4. busy_timeout：写锁冲突时等待而不是立即报 "database is locked"
+5. foreign_keys：开启外键约束，与MySQL(InnoDB)的行为保持一致
+
+PRAGMA通过引擎的connect事件在每个新连接上执行，配置项见config.py中的 SQLITE_PRAGMAS。
+
+同一事件中检查 LN/EXP 数学函数（热度计算使用，见 app/utils/trending.py）：
+SQLite 3.35+ 只有在编译时启用 SQLITE_ENABLE_MATH_FUNCTIONS 才提供这些函数，
+发行版的Python链接系统自带的 libsqlite3，不一定启用。缺少时在连接上注册Python实现。
+"""
+
+import math
+import sqlite3
+
+from sqlalchemy import event
+
+
+def _ln(x):
+    # 与SQLite内置函数一致：参数非正数时返回NULL而不是报错
+    return math.log(x) if x is not None and x > 0 else None
+
+
+def _exp(x):
+    if x is None:
+        return None
+    try:
+        return math.exp(x)
+    except OverflowError:
+        return math.inf
+
+
+def register_math_functions(dbapi_connection):
+    """SQLite未编译数学函数时，为连接注册 ln 和 exp"""
+    try:
+        dbapi_connection.execute('SELECT ln(1), exp(0)').fetchone()
+        return
+    except sqlite3.OperationalError:
+        pass
+    dbapi_connection.create_function('ln', 1, _ln, deterministic=True)
+    dbapi_connection.create_function('exp', 1, _exp, deterministic=True)
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """为SQLite引擎注册PRAGMA设置，并在缺少数学函数时补充
+
+    Args:
+        engine: SQLAlchemy引擎实例
+        pragmas (dict): PRAGMA名称到值的映射，如 {'journal_mode': 'WAL'}
+    """
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+        register_math_functions(dbapi_connection)
+
+
+def setup_sqlite(app):
+    """为应用中的SQLite引擎应用PRAGMA设置并补充数学函数
+
+    非SQLite数据库不做任何处理。需要在 db.init_app(app) 之后调用。
+
+    Args:
+        app: Flask应用实例
+    """
+    from app import db
+
+    # 未配置PRAGMA时仍需注册连接事件，保证数学函数可用
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                apply_sqlite_pragmas(engine, pragmas)
+                app.logger.info(f"SQLite引擎已应用PRAGMA设置: {engine.url}")
@@ -0,0 +1,373 @@
+"""
+请求追踪模块
+
+为每个请求记录嵌套的耗时区间（span），回答"慢请求的时间花在哪里"：SQL、模板渲染、
+Markdown、图片处理还是实时推送。自动覆盖：
+- db: SQLAlchemy 执行的每条语句（引擎游标事件）
+- render: render_template（Flask 模板信号）
+- markdown: markdown 模板过滤器
+- file / pillow: save_file 及其中的图片压缩、加水印
+- socket: socketio.emit
+其他代码可以用 span() 上下文管理器或 @traced 装饰器补充区间。没有进行中的追踪时两者都是空操作。
+
+输出方式:
+1. Server-Timing 响应头：按类别汇总各区间的自身耗时（不含子区间），与 app（视图代码本身）
+   相加等于请求总耗时，浏览器开发者工具的 Timing 面板可以直接查看
+2. 采样写入 JSON Lines 文件：按 TRACING_SAMPLE_RATE 随机采样，另外耗时超过 TRACING_SLOW_MS
+   的请求总是写入；每行是一个请求的完整区间列表，可用 `flask fold-traces` 转换为
+   折叠栈格式，交给 flamegraph.pl / speedscope 生成火焰图
+
+相关配置项（见config.py）:
+- TRACING_ENABLED: 是否为请求启用追踪，默认只在开发环境开启
+- TRACING_SERVER_TIMING: 是否输出 Server-Timing 响应头，默认只在开发环境开启（响应头对所有访问者可见）
+- TRACING_SAMPLE_RATE: 写入文件的采样比例（0 ~ 1）
+- TRACING_SLOW_MS: 超过该耗时（毫秒）的请求总是写入文件，0 表示不按耗时写入
+- TRACING_LOG_PATH: 追踪文件路径
+
+使用示例:
+    with tracing.span('heritage_registry.reload', 'cache'):
+        ...
+
+    @tracing.traced('export', 'file')
+    def export_contents(): ...
+"""
+
+import functools
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional
+
+from flask import before_render_template, current_app, g, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 当前上下文中进行中的追踪
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('current_trace', default=None)
+
+# 根区间（视图代码本身）的类别
+ROOT_CATEGORY = 'app'
+
+# Server-Timing 中各类别的说明（响应头只能包含 latin-1 字符，这里使用英文）
+CATEGORY_DESCRIPTIONS = {
+    'app': 'View code',
+    'db': 'SQL',
+    'render': 'Templates',
+    'markdown': 'Markdown',
+    'file': 'File save',
+    'pillow': 'Image processing',
+    'socket': 'Socket emit',
+    'cache': 'Cache',
+}
+
+# 区间名称中只保留SQL的动词和首个表名
+_SQL_TARGET = re.compile(r'^\s*(\w+).*?\b(?:FROM|INTO|UPDATE|JOIN)\s+["`]?(\w+)', re.IGNORECASE | re.DOTALL)
+
+_file_lock = threading.Lock()
+_listeners_installed = False
+
+
+class Span:
+    """一个耗时区间"""
+
+    __slots__ = ('id', 'parent_id', 'name', 'category', 'start', 'end', 'attrs', 'child_time')
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, category: str, attrs: dict):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+        # 直接子区间的累计耗时，用于计算自身耗时
+        self.child_time = 0.0
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def self_time(self) -> float:
+        return max(self.duration - self.child_time, 0.0)
+
+
+class Trace:
+    """一个请求的全部区间"""
+
+    def __init__(self, name: str):
+        self.spans: List[Span] = []
+        self._stack: List[Span] = []
+        self.root = self.begin(name, ROOT_CATEGORY, {})
+
+    def begin(self, name: str, category: str, attrs: dict) -> Span:
+        parent = self._stack[-1] if self._stack else None
+        span = Span(len(self.spans), parent.id if parent else None, name, category, attrs)
+        self.spans.append(span)
+        self._stack.append(span)
+        return span
+
+    def finish(self, span: Span):
+        span.end = time.perf_counter()
+        # 子区间未正常结束（如模板渲染抛出异常）时一并结束
+        while self._stack and self._stack[-1] is not span:
+            self.finish(self._stack[-1])
+        if self._stack:
+            self._stack.pop()
+        if span.parent_id is not None:
+            self.spans[span.parent_id].child_time += span.duration
+
+    def close(self):
+        while self._stack:
+            self.finish(self._stack[-1])
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """按类别汇总自身耗时和区间数 {类别: {'dur': 秒, 'count': 次数}}"""
+        result = defaultdict(lambda: {'dur': 0.0, 'count': 0})
+        for span in self.spans:
+            result[span.category]['dur'] += span.self_time
+            result[span.category]['count'] += 1
+        return dict(result)
+
+    def server_timing(self) -> str:
+        """生成 Server-Timing 响应头的值"""
+        parts = []
+        for category, data in sorted(self.breakdown().items(), key=lambda item: -item[1]['dur']):
+            desc = CATEGORY_DESCRIPTIONS.get(category, category)
+            if category != ROOT_CATEGORY:
+                desc = f"{desc} x{data['count']}"
+            parts.append(f'{category};dur={data["dur"] * 1000:.2f};desc="{desc}"')
+        parts.append(f'total;dur={self.root.duration * 1000:.2f}')
+        return ', '.join(parts)
+
+    def to_dict(self) -> dict:
+        base = self.root.start
+        return {
+            'duration_ms': round(self.root.duration * 1000, 3),
+            'spans': [{
+                'id': span.id,
+                'parent': span.parent_id,
+                'name': span.name,
+                'cat': span.category,
+                'start_ms': round((span.start - base) * 1000, 3),
+                'dur_ms': round(span.duration * 1000, 3),
+                **({'attrs': span.attrs} if span.attrs else {}),
+            } for span in self.spans],
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    """当前上下文中进行中的追踪，没有时返回None"""
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, category: str = 'app', **attrs):
+    """记录一个区间；没有进行中的追踪时不做任何事"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    item = trace.begin(name, category, attrs)
+    try:
+        yield item
+    finally:
+        trace.finish(item)
+
+
+def traced(name: Optional[str] = None, category: str = 'app'):
+    """把函数的每次调用记录为一个区间的装饰器"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            item = trace.begin(span_name, category, {})
+            try:
+                return func(*args, **kwargs)
+            finally:
+                trace.finish(item)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# 自动埋点
+# ---------------------------------------------------------------------------
+
+def _sql_name(statement: str) -> str:
+    match = _SQL_TARGET.match(statement)
+    if match:
+        return f'{match.group(1).upper()} {match.group(2)}'
+    return statement.split(None, 1)[0].upper() if statement.strip() else 'SQL'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    if trace is not None:
+        conn.info.setdefault('tracing_spans', []).append(
+            trace.begin(_sql_name(statement), 'db', {'sql': statement[:300]}))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    spans = conn.info.get('tracing_spans')
+    if trace is not None and spans:
+        trace.finish(spans.pop())
+
+
+def _handle_error(exception_context):
+    # 语句执行失败时 after_cursor_execute 不会触发，在这里结束区间
+    conn = exception_context.connection
+    trace = _current_trace.get()
+    spans = conn.info.get('tracing_spans') if conn is not None else None
+    if trace is not None and spans:
+        trace.finish(spans.pop())
+
+
+def _before_render(sender, template, context, **extra):
+    trace = _current_trace.get()
+    if trace is not None:
+        g.setdefault('_tracing_render_spans', []).append(
+            trace.begin(f'render {template.name}', 'render', {}))
+
+
+def _after_render(sender, template, context, **extra):
+    trace = _current_trace.get()
+    spans = g.get('_tracing_render_spans')
+    if trace is not None and spans:
+        trace.finish(spans.pop())
+
+
+def _install_listeners():
+    """注册引擎事件（幂等，对所有引擎生效）"""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+    _listeners_installed = True
+
+
+def _wrap_socketio_emit(socketio):
+    """把 socketio.emit 包装为带区间的版本（幂等）"""
+    if getattr(socketio.emit, '_traced', False):
+        return
+    original = socketio.emit
+
+    @functools.wraps(original)
+    def emit(event_name, *args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return original(event_name, *args, **kwargs)
+        item = trace.begin(f'emit {event_name}', 'socket', {'to': str(kwargs.get('to') or kwargs.get('room'))})
+        try:
+            return original(event_name, *args, **kwargs)
+        finally:
+            trace.finish(item)
+
+    emit._traced = True
+    socketio.emit = emit
+
+
+# ---------------------------------------------------------------------------
+# 采样写入与折叠栈
+# ---------------------------------------------------------------------------
+
+def _should_write(app, trace: Trace) -> bool:
+    slow_ms = app.config.get('TRACING_SLOW_MS', 0)
+    if slow_ms and trace.root.duration * 1000 >= slow_ms:
+        return True
+    rate = app.config.get('TRACING_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+def _write_trace(app, trace: Trace, status: int):
+    record = {
+        'ts': time.time(),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': status,
+        **trace.to_dict(),
+    }
+    line = json.dumps(record, ensure_ascii=False)
+    try:
+        with _file_lock, open(app.config['TRACING_LOG_PATH'], 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    except OSError as e:
+        app.logger.error(f"写入追踪文件失败: {str(e)}")
+
+
+def fold_trace(record: dict) -> Iterable[str]:
+    """把一条追踪记录转换为折叠栈格式的行（"根;子;孙 自身耗时微秒"）"""
+    spans = {s['id']: s for s in record['spans']}
+    child_time = defaultdict(float)
+    for s in record['spans']:
+        if s['parent'] is not None:
+            child_time[s['parent']] += s['dur_ms']
+
+    root_label = f"{record.get('method', '')} {record.get('endpoint') or record.get('path', '')}".strip()
+    for s in record['spans']:
+        frames = []
+        node = s
+        while node is not None:
+            label = root_label if node['parent'] is None else f"{node['cat']}:{node['name']}"
+            frames.append(label.replace(';', ',').replace(' ', '_'))
+            node = spans.get(node['parent']) if node['parent'] is not None else None
+        self_us = int(max(s['dur_ms'] - child_time[s['id']], 0) * 1000)
+        if self_us > 0:
+            yield f"{';'.join(reversed(frames))} {self_us}"
+
+
+# ---------------------------------------------------------------------------
+# 请求钩子
+# ---------------------------------------------------------------------------
+
+def init_tracing(app):
+    """为应用启用请求追踪
+
+    在 TRACING_ENABLED 为真时注册请求钩子和自动埋点。
+
+    Args:
+        app: Flask应用实例
+    """
+    if not app.config.get('TRACING_ENABLED'):
+        return
+
+    from app import socketio
+    _install_listeners()
+    _wrap_socketio_emit(socketio)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_trace():
+        g._trace_token = _current_trace.set(Trace(request.endpoint or request.path))
+
+    @app.after_request
+    def finish_trace(response):
+        trace = _current_trace.get()
+        if trace is None:
+            return response
+        trace.close()
+        if current_app.config.get('TRACING_SERVER_TIMING', False):
+            response.headers['Server-Timing'] = trace.server_timing()
+        if _should_write(current_app, trace):
+            _write_trace(current_app, trace, response.status_code)
+        return response
+
+    @app.teardown_request
+    def clear_trace(exc):
+        token = g.pop('_trace_token', None)
+        if token is not None:
+            _current_trace.reset(token)
@@ -0,0 +1,229 @@
+"""
+热度排行模块
+
+为内容和论坛主题维护随时间衰减的热度分（trending_score），热门列表只需按该索引列排序读取。
+
+每次互动（发布、浏览、点赞、收藏、评论、回帖）记为一个事件，权重为 w、发生时间为 t。
+某一时刻 now 的衰减热度为 Σ w·exp(-λ(now - t))，其中 λ = ln2 / 半衰期。
+由于所有条目共享同一个 exp(-λ·now) 因子，排序时只需比较 Σ w·exp(λ(t - EPOCH))。
+该值随时间指数增长，直接保存会溢出，因此保存其对数：
+
+    trending_score = ln Σ w·exp(λ(t - EPOCH))
+
+新事件的分值为 e = ln w + λ(t - EPOCH)，累加即 score = logaddexp(score, e)，
+在一条 UPDATE 语句中完成，不需要先读取旧值，并发写入也不会丢失增量。
+
+维护方式:
+1. 内容和主题插入时，以发布事件的分值作为初始热度（新内容有一段时间的曝光）
+2. 点赞、收藏、评论、回帖通过 counters 机制在同一事务中更新
+3. 浏览由 app.utils.deferred 合并后通过 record_views() 批量记录
+4. 修改半衰期或权重后，执行 `flask rebuild-trending` 按原始数据重新计算
+
+取消点赞、删除评论不会扣减热度：对数空间无法精确相减，且热度本身会随时间衰减。
+
+SQL中使用 EXP/LN 函数。SQLite只有编译时启用数学函数才内置这两个函数，
+缺少时由 app/utils/sqlite_config.py 在每个连接上注册Python实现。
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, event, func, select, update
+
+from app import db
+from app.models import Content, ForumTopic, Like, Favorite, Comment, ForumPost
+from app.models import beijing_time
+from app.utils import counters
+
+# 热度计算的时间基准，修改后需要重建全部热度
+EPOCH = datetime(2025, 1, 1)
+
+# 未配置 TRENDING_HALF_LIFE_HOURS 时的默认半衰期（小时）
+DEFAULT_HALF_LIFE_HOURS = 48
+
+# 各类事件的权重
+WEIGHTS = {
+    'create': 4.0,
+    'view': 1.0,
+    'like': 3.0,
+    'favorite': 4.0,
+    'comment': 5.0,
+    'post': 5.0,
+}
+
+# 支持的排序方式，用于校验 ?sort= 参数
+SORT_NEWEST = 'newest'
+SORT_TRENDING = 'trending'
+SORT_OPTIONS = (SORT_NEWEST, SORT_TRENDING)
+
+
+def parse_sort(value) -> str:
+    """校验排序参数，未知的值按最新排序"""
+    return value if value in SORT_OPTIONS else SORT_NEWEST
+
+
+def _decay_rate() -> float:
+    """每秒的衰减率 λ"""
+    hours = DEFAULT_HALF_LIFE_HOURS
+    if has_app_context():
+        hours = current_app.config.get('TRENDING_HALF_LIFE_HOURS', DEFAULT_HALF_LIFE_HOURS)
+    return math.log(2) / (hours * 3600)
+
+
+def event_score(weight: float, when=None) -> float:
+    """单个事件的对数分值 ln w + λ(t - EPOCH)"""
+    when = when or beijing_time()
+    return math.log(weight) + _decay_rate() * (when - EPOCH).total_seconds()
+
+
+def _logsumexp(values: Iterable[float]) -> float:
+    """在Python中合并多个对数分值"""
+    values = list(values)
+    top = max(values)
+    return top + math.log(sum(math.exp(v - top) for v in values))
+
+
+def _logaddexp_sql(dialect: str, column, value):
+    """logaddexp(column, value) 的SQL表达式: max(a, b) + ln(1 + exp(-|a - b|))"""
+    bigger = func.max(column, value) if dialect == 'sqlite' else func.greatest(column, value)
+    return bigger + func.ln(1 + func.exp(-func.abs(column - value)))
+
+
+def _keep_updated_at(table) -> dict:
+    """热度变化不是编辑，保持 updated_at 不变，不触发其 onupdate 自动更新"""
+    return {'updated_at': table.c.updated_at} if 'updated_at' in table.c else {}
+
+
+def add_scores(connection, model, scores: Dict[int, float]):
+    """把事件分值累加到多个条目的热度上
+
+    Args:
+        connection: 数据库连接（与调用方处于同一事务）
+        model: Content 或 ForumTopic
+        scores: 条目ID -> 本次事件的对数分值（同一条目的多个事件应先合并）
+    """
+    if not scores:
+        return
+    table = model.__table__
+    stmt = update(table).where(table.c.id == bindparam('_id')).values(
+        trending_score=_logaddexp_sql(connection.dialect.name, table.c.trending_score, bindparam('_score')),
+        **_keep_updated_at(table)
+    )
+    connection.execute(stmt, [{'_id': item_id, '_score': score} for item_id, score in scores.items()])
+
+
+def record(connection, model, events: Iterable[Tuple[int, str, datetime]]):
+    """记录一批事件
+
+    Args:
+        connection: 数据库连接
+        model: Content 或 ForumTopic
+        events: (条目ID, 事件类型, 发生时间) 列表，发生时间为空时取当前时间
+    """
+    grouped: Dict[int, List[float]] = defaultdict(list)
+    for item_id, kind, when in events:
+        if item_id is not None:
+            grouped[item_id].append(event_score(WEIGHTS[kind], when))
+    add_scores(connection, model, {item_id: _logsumexp(values) for item_id, values in grouped.items()})
+
+
+def record_views(connection, model, counts: Dict[int, int]):
+    """记录一批当前时刻的浏览
+
+    Args:
+        connection: 数据库连接
+        model: Content 或 ForumTopic
+        counts: {条目ID: 浏览次数}，n 次同时发生的浏览的分值为 e + ln n
+    """
+    score = event_score(WEIGHTS['view'], None)
+    add_scores(connection, model, {item_id: score + math.log(n) for item_id, n in counts.items() if n > 0})
+
+
+def order_by_trending(model):
+    """热门排序的ORDER BY子句（热度相同时新的在前）"""
+    return (model.trending_score.desc(), model.id.desc())
+
+
+# ---------------------------------------------------------------------------
+# 增量维护：发布时设置初始热度，互动时累加
+# ---------------------------------------------------------------------------
+
+def _set_initial_score(mapper, connection, target):
+    if not target.trending_score:
+        target.trending_score = event_score(WEIGHTS['create'], target.created_at)
+
+
+event.listen(Content, 'before_insert', _set_initial_score)
+event.listen(ForumTopic, 'before_insert', _set_initial_score)
+
+# 互动模型 -> (事件类型, 被互动的模型, 外键属性名)
+INTERACTIONS = [
+    (Like, 'like', Content, 'content_id'),
+    (Favorite, 'favorite', Content, 'content_id'),
+    (Comment, 'comment', Content, 'content_id'),
+    (ForumPost, 'post', ForumTopic, 'topic_id'),
+]
+
+
+def _make_handler(kind, target_model, key_attr):
+    def handler(connection, rows, sign):
+        if sign < 0:
+            return
+        record(connection, target_model,
+               [(getattr(row, key_attr), kind, getattr(row, 'created_at', None)) for row in rows])
+    return handler
+
+
+for _model, _kind, _target, _key in INTERACTIONS:
+    counters.register(_model)(_make_handler(_kind, _target, _key))
+
+
+# ---------------------------------------------------------------------------
+# 全量重建
+# ---------------------------------------------------------------------------
+
+def _rebuild_model(model, batch_size: int) -> int:
+    """按原始数据重新计算一个模型的热度
+
+    浏览没有时间记录，按发布时间计入。
+    """
+    scores: Dict[int, List[float]] = defaultdict(list)
+    for item_id, created_at, views in db.session.execute(
+            select(model.id, model.created_at, model.views)):
+        created_at = created_at or EPOCH
+        scores[item_id].append(event_score(WEIGHTS['create'], created_at))
+        if views:
+            scores[item_id].append(event_score(WEIGHTS['view'] * views, created_at))
+
+    for interaction, kind, target, key_attr in INTERACTIONS:
+        if target is not model:
+            continue
+        key = getattr(interaction, key_attr)
+        for item_id, when in db.session.execute(select(key, interaction.created_at)):
+            if item_id in scores:
+                scores[item_id].append(event_score(WEIGHTS[kind], when or EPOCH))
+
+    table = model.__table__
+    stmt = update(table).where(table.c.id == bindparam('_id')).values(
+        trending_score=bindparam('_score'), **_keep_updated_at(table))
+    params = [{'_id': item_id, '_score': _logsumexp(values)} for item_id, values in scores.items()]
+    for start in range(0, len(params), batch_size):
+        db.session.execute(stmt, params[start:start + batch_size])
+    return len(params)
+
+
+def rebuild(batch_size: int = 1000) -> Dict[str, int]:
+    """按原始数据重建全部内容和主题的热度
+
+    Returns:
+        dict: 各表更新的行数
+    """
+    result = {
+        'contents': _rebuild_model(Content, batch_size),
+        'forum_topics': _rebuild_model(ForumTopic, batch_size),
+    }
+    db.session.commit()
+    return result
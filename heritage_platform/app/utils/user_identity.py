@@ -0,0 +1,110 @@
+"""
+用户身份缓存模块
+
+Flask-Login 在每个已登录的HTTP请求和Socket.IO事件中都会调用 load_user 恢复当前用户。
+本模块把这一步改为读取缓存中的精简身份（id、用户名、角色、头像），不再每次查询完整的用户行：
+1. user_identity(user_id): 带缓存的投影查询，缓存依赖 "users:<id>" 行标签，
+   用户名、角色、头像、密码等任何ORM修改在事务提交后都会使其失效（见 app/utils/cache/invalidation.py）
+2. UserIdentity: 作为 current_user 的精简用户对象，is_admin、is_teacher 等角色判断直接使用缓存字段，
+   role_required 等权限检查不需要访问数据库；
+   访问或修改其他属性（邮箱、密码、关系等）时才按需加载完整的 User 对象，并在本次请求内复用
+3. 只有共享的缓存后端（sqlite、redis）才缓存身份：进程内后端的失效只影响本进程，
+   在一个工作进程中降级或删除的用户会在其他进程中继续以旧角色通过权限检查，直到缓存过期。
+   使用进程内后端（默认的 memory）或 null 时，每次都直接执行投影查询
+
+注意：绕过ORM直接用Core语句修改 users 表时，需要调用 invalidate_user(user_id) 使缓存失效。
+"""
+
+from typing import Any, Dict, Optional
+
+from flask_login import UserMixin
+
+from app import db
+from app.utils.cache import cached, get_cache, invalidate_tags
+from app.utils.cache.invalidation import watch
+
+# 缓存的字段，也是 UserIdentity 上可以直接读取的属性
+IDENTITY_FIELDS = ('id', 'username', 'role', 'avatar')
+
+# 进程启动后即登记 users 表，保证第一次读取身份之前的用户修改也会触发失效
+watch(['users'])
+
+
+@cached('user_identity', tags=[lambda user_id: f'users:{user_id}'], ttl=600)
+def user_identity(user_id: int) -> Optional[Dict[str, Any]]:
+    """读取用户的精简身份，用户不存在时返回None"""
+    from app.models import User
+
+    row = db.session.query(*(getattr(User, field) for field in IDENTITY_FIELDS)).filter(
+        User.id == user_id).first()
+    return dict(zip(IDENTITY_FIELDS, row)) if row is not None else None
+
+
+def _identity_cache_shared() -> bool:
+    """缓存后端是否在工作进程之间共享，只有共享后端的失效对所有进程生效"""
+    cache = get_cache()
+    return cache is not None and cache.backend.shared
+
+
+def invalidate_user(user_id: int):
+    """立即使用户的身份缓存失效"""
+    invalidate_tags(f'users:{user_id}')
+
+
+class UserIdentity(UserMixin):
+    """缓存中的精简用户对象，作为 current_user 使用
+
+    属性读取顺序：缓存字段和角色判断直接返回；其余属性从完整的 User 对象读取（首次访问时加载）。
+    属性赋值会写到完整的 User 对象上，由其所在的会话提交，缓存字段同时更新，
+    本次请求中后续读取到的是新值，提交后缓存失效。
+    """
+
+    def __init__(self, identity: Dict[str, Any]):
+        for field in IDENTITY_FIELDS:
+            object.__setattr__(self, field, identity[field])
+        object.__setattr__(self, '_user', None)
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_teacher(self):
+        return self.role == 'teacher'
+
+    def get_user(self):
+        """本次请求中的完整 User 对象"""
+        user = self._user
+        if user is None:
+            from app.models import User
+
+            user = db.session.get(User, self.id)
+            if user is None:
+                raise LookupError(f'用户 {self.id} 不存在')
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        # 只在常规属性查找失败时调用；私有属性不转发，避免 copy/pickle 等探测时加载用户
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_user(), name, value)
+        if name in IDENTITY_FIELDS:
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f'<UserIdentity {self.id} {self.username}>'
+
+
+def load_identity(user_id) -> Optional[UserIdentity]:
+    """Flask-Login 的用户加载实现"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    # 进程内缓存无法感知其他进程中的角色变更，权限检查需要读取数据库
+    identity = user_identity(user_id) if _identity_cache_shared() else user_identity.uncached(user_id)
+    return UserIdentity(identity) if identity is not None else None
@@ -0,0 +1,108 @@
+"""
+用户统计模块
+
+维护并查询每个用户的累计统计（UserStats），包括：
+1. 增量维护：内容、评论、点赞、收藏、主题、帖子、非遗项目插入或删除时，
+   在同一事务中用upsert语句累加作者对应的计数
+2. 数据校正：reconcile() 根据原始表重新计算全部用户的统计
+3. 查询接口：get_user_stats() 一条查询返回用户的全部计数
+
+导入本模块即完成计数处理函数的注册（在 create_app 中导入）。
+"""
+
+from collections import Counter
+from typing import Dict
+
+from flask import g, has_request_context
+from sqlalchemy import delete, func
+
+from app import db
+from app.models import (
+    User, HeritageItem, Content, Comment, Like, Favorite, ForumTopic, ForumPost, UserStats
+)
+from app.utils import counters
+from app.utils.db_helpers import upsert_increment
+
+# 需要统计的模型: (模型, 用户ID属性, UserStats列名)
+TRACKED_MODELS = [
+    (Content, 'user_id', 'content_count'),
+    (Comment, 'user_id', 'comment_count'),
+    (Like, 'user_id', 'like_count'),
+    (Favorite, 'user_id', 'favorite_count'),
+    (ForumTopic, 'user_id', 'topic_count'),
+    (ForumPost, 'user_id', 'post_count'),
+    (HeritageItem, 'created_by', 'heritage_count'),
+]
+
+STAT_COLUMNS = [column for _, _, column in TRACKED_MODELS]
+
+
+def _make_handler(user_attr: str, column: str):
+    """生成某个模型的计数处理函数，同一批变化按用户合并后执行upsert"""
+    def handler(connection, rows, sign):
+        per_user = Counter()
+        for row in rows:
+            user_id = getattr(row, user_attr)
+            if user_id:
+                per_user[user_id] += sign
+        for user_id, delta in per_user.items():
+            if delta:
+                upsert_increment(connection, UserStats.__table__, {'user_id': user_id}, {column: delta})
+    return handler
+
+
+for _model, _user_attr, _column in TRACKED_MODELS:
+    counters.register(_model)(_make_handler(_user_attr, _column))
+
+
+@counters.register(User)
+def _drop_deleted_user(connection, rows, sign):
+    """用户删除时一并删除其统计行（不依赖数据库的外键级联）"""
+    if sign < 0:
+        user_ids = [row.id for row in rows]
+        connection.execute(delete(UserStats.__table__).where(UserStats.user_id.in_(user_ids)))
+
+
+def get_user_stats(user_id: int) -> Dict[str, int]:
+    """获取用户的累计统计
+
+    同一请求内的结果缓存在 g 中，页面和上下文处理器多次读取时只查询一次。
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        dict: {'content_count': ..., 'comment_count': ..., ...}，用户没有统计行时各项为0
+    """
+    cache = g.setdefault('_user_stats', {}) if has_request_context() else {}
+    if user_id not in cache:
+        stats = db.session.get(UserStats, user_id)
+        cache[user_id] = {column: getattr(stats, column) if stats else 0 for column in STAT_COLUMNS}
+    return cache[user_id]
+
+
+def reconcile() -> int:
+    """根据原始数据重新计算全部用户的统计
+
+    清空统计表后对每个被统计的原始表按用户聚合并写入，由本函数提交。
+
+    Returns:
+        int: 写入的统计行数
+    """
+    connection = db.session.connection()
+    connection.execute(delete(UserStats.__table__))
+
+    # 批量插入要求每行包含相同的列，因此先用0填充全部计数列
+    per_user: Dict[int, dict] = {}
+    for model, user_attr, column in TRACKED_MODELS:
+        author = getattr(model, user_attr)
+        rows = db.session.query(author, func.count(model.id)).filter(author.isnot(None)).group_by(author)
+        for user_id, count in rows:
+            per_user.setdefault(user_id, dict.fromkeys(STAT_COLUMNS, 0))[column] = count
+
+    if per_user:
+        connection.execute(UserStats.__table__.insert(), [
+            {'user_id': user_id, **counts} for user_id, counts in per_user.items()
+        ])
+    db.session.commit()
+    return len(per_user)
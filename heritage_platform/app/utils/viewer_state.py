@@ -0,0 +1,100 @@
+"""
+访问者状态模块
+
+批量查询当前用户对一组内容的点赞和收藏状态，供列表页、详情页和API标记"已点赞/已收藏"。
+给定内容ID列表，每种关系只执行一条 IN 查询；结果缓存在本次请求的 g 中，
+同一请求内重复查询（如页面和上下文处理器）不会再访问数据库。
+
+使用示例:
+    state = get_viewer_state([c.id for c in items])
+    state.liked(content.id)      # -> bool
+    state.liked_ids              # -> set
+"""
+
+from typing import Dict, Iterable, Optional, Set
+
+from flask import g, has_request_context
+from flask_login import current_user
+
+from app import db
+from app.models import Like, Favorite
+
+# 关系名 -> 模型
+RELATIONS = {
+    'liked': Like,
+    'favorited': Favorite,
+}
+
+
+class ViewerState:
+    """一组内容的访问者状态
+
+    属性:
+        content_ids: 查询的内容ID
+        liked_ids: 其中已点赞的内容ID集合
+        favorited_ids: 其中已收藏的内容ID集合
+    """
+
+    def __init__(self, content_ids, liked_ids: Set[int], favorited_ids: Set[int]):
+        self.content_ids = list(content_ids)
+        self.liked_ids = liked_ids
+        self.favorited_ids = favorited_ids
+
+    def liked(self, content_id: int) -> bool:
+        """是否已点赞"""
+        return content_id in self.liked_ids
+
+    def favorited(self, content_id: int) -> bool:
+        """是否已收藏"""
+        return content_id in self.favorited_ids
+
+    def to_dict(self, content_id: int) -> dict:
+        """单个内容的状态字典，用于API响应"""
+        return {
+            'liked': self.liked(content_id),
+            'favorited': self.favorited(content_id),
+        }
+
+
+def _request_cache(user_id: int) -> Dict[str, Dict[int, bool]]:
+    """返回本次请求中该用户的状态缓存 {关系名: {内容ID: 是否存在}}"""
+    if not has_request_context():
+        return {name: {} for name in RELATIONS}
+    caches = g.setdefault('_viewer_state', {})
+    return caches.setdefault(user_id, {name: {} for name in RELATIONS})
+
+
+def get_viewer_state(content_ids: Iterable[int], user_id: Optional[int] = None) -> ViewerState:
+    """查询用户对一组内容的点赞和收藏状态
+
+    本次请求中已经查询过的内容直接使用缓存，其余内容每种关系一条查询。
+
+    Args:
+        content_ids: 内容ID列表
+        user_id: 用户ID，默认为当前登录用户；未登录时所有状态均为False
+
+    Returns:
+        ViewerState: 状态对象
+    """
+    content_ids = [cid for cid in dict.fromkeys(content_ids) if cid is not None]
+    if user_id is None:
+        if not current_user.is_authenticated:
+            return ViewerState(content_ids, set(), set())
+        user_id = current_user.id
+
+    cache = _request_cache(user_id)
+    for name, model in RELATIONS.items():
+        missing = [cid for cid in content_ids if cid not in cache[name]]
+        if not missing:
+            continue
+        found = {row[0] for row in db.session.query(model.content_id).filter(
+            model.user_id == user_id, model.content_id.in_(missing))}
+        for cid in missing:
+            cache[name][cid] = cid in found
+
+    return ViewerState(
+        content_ids,
+        {cid for cid in content_ids if cache['liked'][cid]},
+        {cid for cid in content_ids if cache['favorited'][cid]},
+    )
+
@@ -0,0 +1,15 @@
+"""
+性能基准测试包
+
+本包提供可复现的接口基准测试工具，包括：
+1. seed: 按规模批量生成合成数据（用户、非遗项目、内容、评论、点赞、收藏、论坛、私信、通知）
+2. scenarios: 需要测量的关键路由场景定义
+3. runner: 通过Flask测试客户端或真实HTTP服务器驱动场景并采集指标
+4. report: 计算p50/p95/p99延迟、吞吐量和查询数，保存为JSON并与基线比较
+
+所有工具均可离线运行，支持SQLite和本地MySQL两种数据库。
+
+使用示例（在 heritage_platform 目录下执行）:
+    python -m benchmarks.run --database sqlite --size small
+    python -m benchmarks.run --database mysql --mode http --baseline benchmarks/results/baseline.json
+"""
@@ -0,0 +1,153 @@
+"""
+缓存子系统微基准
+
+不依赖数据库和应用实例，直接测量各缓存后端的开销和单飞合并的效果：
+- hit: 命中时一次 get_or_compute 的耗时
+- miss: 未命中（计算函数立即返回）时读取、计算并写入的耗时
+- invalidate: 失效一个标签的耗时
+- stampede: 多个线程同时读取同一个冷键、计算耗时 --compute-ms 毫秒时，实际执行计算的次数
+  （单飞合并生效时应为1）
+
+在 heritage_platform 目录下执行:
+    python -m benchmarks.cache
+    python -m benchmarks.cache --backend memory --backend sqlite --iterations 20000
+    python -m benchmarks.cache --backend redis --redis-url redis://localhost:6379/15
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import click
+
+# 保证以脚本方式运行时可以导入 app
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from benchmarks.report import percentile  # noqa: E402
+from app.utils.cache.backends import MemoryBackend, RedisBackend, SQLiteBackend  # noqa: E402
+from app.utils.cache.core import Cache  # noqa: E402
+
+BACKENDS = ('memory', 'sqlite', 'redis')
+
+
+def make_backend(kind: str, workdir: str, redis_url: str):
+    if kind == 'memory':
+        return MemoryBackend(max_entries=100000)
+    if kind == 'sqlite':
+        return SQLiteBackend(os.path.join(workdir, 'cache.sqlite'), max_entries=100000)
+    return RedisBackend(redis_url)
+
+
+def _timed(samples, func):
+    start = time.perf_counter()
+    func()
+    samples.append((time.perf_counter() - start) * 1000)
+
+
+def _summary(samples):
+    return {
+        'p50_ms': round(percentile(samples, 50), 4),
+        'p95_ms': round(percentile(samples, 95), 4),
+        'mean_ms': round(sum(samples) / len(samples), 4) if samples else 0.0,
+    }
+
+
+def bench_backend(backend, iterations: int, threads: int, compute_ms: float) -> dict:
+    cache = Cache(backend, prefix='bench', default_ttl=600)
+    cache.clear()
+    tags = ('contents', 'users')
+
+    hit, miss, invalidate = [], [], []
+    cache.get_or_compute('hit', 'hot', lambda: {'value': 1}, tags=tags)
+    for _ in range(iterations):
+        _timed(hit, lambda: cache.get_or_compute('hit', 'hot', lambda: {'value': 1}, tags=tags))
+    for i in range(iterations):
+        _timed(miss, lambda: cache.get_or_compute('miss', f'cold:{i}', lambda: {'value': i}, tags=tags))
+    for _ in range(min(iterations, 2000)):
+        _timed(invalidate, lambda: cache.invalidate_tags(['contents']))
+
+    # 缓存击穿：多个线程同时读取同一个冷键
+    computes = []
+    barrier = threading.Barrier(threads)
+
+    def slow():
+        computes.append(1)
+        time.sleep(compute_ms / 1000)
+        return 'done'
+
+    def reader():
+        barrier.wait()
+        cache.get_or_compute('stampede', 'stampede', slow, tags=tags)
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stampede_ms = (time.perf_counter() - start) * 1000
+
+    metrics = cache.metrics.snapshot()
+    return {
+        'hit': _summary(hit),
+        'miss': _summary(miss),
+        'invalidate': _summary(invalidate),
+        'stampede': {
+            'threads': threads,
+            'computes': len(computes),
+            'coalesced': metrics.get('stampede', {}).get('coalesced', 0),
+            'wall_ms': round(stampede_ms, 2),
+        },
+    }
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'后端':<8}{'hit p50':>10}{'hit p95':>10}{'miss p50':>10}{'miss p95':>10}"
+             f"{'失效 p50':>10}{'击穿计算':>10}{'合并':>8}"]
+    for kind, data in results.items():
+        if 'error' in data:
+            lines.append(f"{kind:<8}  跳过: {data['error']}")
+            continue
+        lines.append(
+            f"{kind:<8}{data['hit']['p50_ms']:>10.4f}{data['hit']['p95_ms']:>10.4f}"
+            f"{data['miss']['p50_ms']:>10.4f}{data['miss']['p95_ms']:>10.4f}"
+            f"{data['invalidate']['p50_ms']:>10.4f}"
+            f"{data['stampede']['computes']:>8}/{data['stampede']['threads']:<3}"
+            f"{data['stampede']['coalesced']:>6}"
+        )
+    return '\n'.join(lines)
+
+
+@click.command()
+@click.option('--backend', 'backends', multiple=True, type=click.Choice(BACKENDS),
+              help='要测试的后端，可重复指定；默认测试 memory 和 sqlite')
+@click.option('--iterations', type=int, default=5000, show_default=True, help='命中/未命中各测量的次数')
+@click.option('--threads', type=int, default=32, show_default=True, help='缓存击穿测试的并发线程数')
+@click.option('--compute-ms', type=float, default=50, show_default=True, help='击穿测试中计算函数的耗时（毫秒）')
+@click.option('--redis-url', default='redis://localhost:6379/15', show_default=True, help='Redis后端的连接地址')
+@click.option('--output', default=None, help='结果JSON文件路径')
+def main(backends, iterations, threads, compute_ms, redis_url, output):
+    """测量缓存后端的开销和单飞合并效果"""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in backends or ('memory', 'sqlite'):
+            try:
+                backend = make_backend(kind, workdir, redis_url)
+                results[kind] = bench_backend(backend, iterations, threads, compute_ms)
+            except Exception as e:
+                results[kind] = {'error': str(e)}
+
+    click.echo(format_results(results))
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        click.echo(f'结果已保存到 {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+JSON编码微基准
+
+不启动应用，直接测量典型列表响应和 Socket.IO 数据包的编码耗时和大小（见 app/utils/json_provider.py）:
+- flask: Flask 默认 JSON 提供者（标准库，ASCII转义，日期按HTTP格式）
+- stdlib: 本项目编码实现的标准库后端
+- orjson: 本项目编码实现的 orjson 后端（需安装 orjson）
+
+负载:
+- content_list: 内容列表接口的默认字段（含图片和访问者状态）
+- content_titles: 只请求 id,title,author_name 的内容列表
+- forum_topics: 论坛主题列表
+- notifications: 直接包含 datetime 和 Decimal 的字典，不预先格式化
+- rows: SQLAlchemy 列投影查询返回的行（Flask 默认提供者不支持，跳过）
+- socketio_post: 论坛新回复推送的 Socket.IO 事件数据包（flask 一列为 python-socketio 默认使用的标准库 json 模块）
+
+在 heritage_platform 目录下执行:
+    python -m benchmarks.json_encoding
+    python -m benchmarks.json_encoding --items 100 --iterations 2000 --output /tmp/json.json
+"""
+
+import datetime
+import decimal
+import json
+import os
+import sys
+import timeit
+
+import click
+
+# 保证以脚本方式运行时可以导入 app
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from flask.json.provider import _default as flask_default  # noqa: E402
+
+from app.utils import json_provider  # noqa: E402
+
+ENCODERS = ('flask', 'stdlib', 'orjson')
+NOW = datetime.datetime(2024, 5, 1, 12, 30, 15)
+
+
+def _time(moment) -> str:
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def content_list(items: int) -> dict:
+    return {'items': [{
+        'id': i, 'title': f'非遗传承故事第{i}篇', 'heritage_id': i % 30, 'heritage_name': '昆曲',
+        'user_id': i % 50, 'author_name': f'用户{i % 50}', 'author_avatar': f'avatars/{i % 50}.png',
+        'content_type': 'article', 'text_content': '传统技艺的保护与传承。' * 20, 'file_path': '',
+        'cover_image': f'covers/{i}.jpg', 'rich_content': '<p>' + '图文内容' * 30 + '</p>',
+        'created_at': _time(NOW), 'updated_at': _time(NOW),
+        'comment_count': i * 3, 'like_count': i * 7, 'favorite_count': i, 'views': i * 101,
+        'images': [{'id': i * 10 + j, 'content_id': i, 'file_path': f'images/{i}_{j}.jpg', 'caption': None,
+                    'order': j, 'created_at': _time(NOW)} for j in range(2)],
+        'viewer': {'liked': i % 2 == 0, 'favorited': False},
+    } for i in range(items)], 'total': 1000, 'pages': 50, 'current_page': 1}
+
+
+def content_titles(items: int) -> dict:
+    return {'items': [{'id': i, 'title': f'非遗传承故事第{i}篇', 'author_name': f'用户{i % 50}'}
+                      for i in range(items)], 'total': 1000, 'pages': 50, 'current_page': 1}
+
+
+def forum_topics(items: int) -> dict:
+    return {'topics': [{
+        'id': i, 'title': f'讨论主题{i}', 'category': '讨论', 'user_id': i % 50, 'creator': f'用户{i % 50}',
+        'views': i * 13, 'post_count': i % 40, 'last_post_id': i * 5, 'last_poster': f'用户{(i + 1) % 50}',
+        'is_pinned': i < 2, 'is_closed': False, 'created_at': _time(NOW), 'last_activity': _time(NOW),
+    } for i in range(items)], 'total': 500, 'pages': 25, 'current_page': 1}
+
+
+def notifications(items: int) -> dict:
+    return {'items': [{
+        'id': i, 'type': 'comment', 'content': f'用户{i}评论了你的内容', 'is_read': i % 3 == 0,
+        'score': decimal.Decimal('4.50'), 'created_at': NOW - datetime.timedelta(minutes=i),
+    } for i in range(items)]}
+
+
+def rows(items: int) -> list:
+    """用内存SQLite生成真实的 Row 对象"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine('sqlite://')
+    with engine.connect() as connection:
+        return list(connection.execute(text(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :items) "
+            "SELECT i AS id, '用户' || i AS username, 'student' AS role, NULL AS avatar FROM n"),
+            {'items': items}))
+
+
+PAYLOADS = {
+    'content_list': content_list,
+    'content_titles': content_titles,
+    'forum_topics': forum_topics,
+    'notifications': notifications,
+    'rows': rows,
+}
+
+
+def make_encoder(name: str):
+    """返回与 jsonify 相同参数（排序键、紧凑）的编码函数，输出字节"""
+    if name == 'flask':
+        return lambda obj: json.dumps(obj, default=flask_default, ensure_ascii=True, sort_keys=True,
+                                      separators=(',', ':')).encode('utf-8')
+    json_provider.configure(name)
+    return lambda obj: json_provider.dumps_bytes(obj, sort_keys=True)
+
+
+def make_socketio_encoder(name: str):
+    """返回编码一个 Socket.IO 事件数据包的函数"""
+    from socketio import packet
+
+    module = json if name == 'flask' else json_provider
+    if name != 'flask':
+        json_provider.configure(name)
+
+    def encode(data):
+        original = packet.Packet.json
+        packet.Packet.json = module
+        try:
+            return packet.Packet(packet.EVENT, data=['new_forum_post', data], namespace='/forum').encode()
+        finally:
+            packet.Packet.json = original
+    return encode
+
+
+def measure(encode, obj, iterations: int, repeat: int) -> dict:
+    encoded = encode(obj)
+    timings = timeit.repeat(lambda: encode(obj), number=iterations, repeat=repeat)
+    return {
+        'us_per_op': round(min(timings) / iterations * 1e6, 2),
+        'bytes': len(encoded if isinstance(encoded, bytes) else encoded.encode('utf-8')),
+    }
+
+
+@click.command()
+@click.option('--encoder', 'encoders', type=click.Choice(ENCODERS), multiple=True, help='比较的编码实现，默认全部')
+@click.option('--items', type=int, default=20, show_default=True, help='每个列表负载的条目数')
+@click.option('--iterations', type=int, default=500, show_default=True, help='每轮编码次数')
+@click.option('--repeat', type=int, default=5, show_default=True, help='轮数，取最快一轮')
+@click.option('--output', default=None, help='把结果写入JSON文件')
+def main(encoders, items, iterations, repeat, output):
+    """测量典型API列表负载和Socket.IO数据包的JSON编码开销"""
+    encoders = [name for name in (encoders or ENCODERS)
+                if name != 'orjson' or json_provider.orjson is not None]
+    results = {}
+    for payload_name, build in PAYLOADS.items():
+        obj = build(items)
+        for name in encoders:
+            if payload_name == 'rows' and name == 'flask':
+                continue
+            results.setdefault(payload_name, {})[name] = measure(make_encoder(name), obj, iterations, repeat)
+    post = content_list(1)['items'][0]
+    results['socketio_post'] = {name: measure(make_socketio_encoder(name), post, iterations, repeat)
+                                for name in encoders}
+    json_provider.configure('auto')
+
+    click.echo(f'{"负载":<18}{"编码":<10}{"微秒/次":>10}{"字节":>10}{"相对flask":>12}')
+    for payload_name, by_encoder in results.items():
+        baseline = by_encoder.get('flask', {}).get('us_per_op')
+        for name, result in by_encoder.items():
+            speedup = f"{baseline / result['us_per_op']:.2f}x" if baseline else '-'
+            click.echo(f"{payload_name:<20}{name:<10}{result['us_per_op']:>12}{result['bytes']:>10}{speedup:>12}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'items': items, 'iterations': iterations, 'results': results}, f, ensure_ascii=False, indent=2)
+        click.echo(f'结果已写入 {output}')
+
+
+if __name__ == '__main__':
+    main()
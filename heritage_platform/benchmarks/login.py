@@ -0,0 +1,211 @@
+"""
+登录吞吐量基准
+
+在 eventlet WSGI 服务器（与 socketio.run 相同的运行方式）上并发执行登录，
+同时用一个探测线程持续请求静态文件，比较不同密码哈希执行方式（见 app/utils/passwords.py）下的:
+- 登录吞吐量（次/秒）和登录延迟
+- 探测请求的延迟：哈希计算阻塞事件循环时，与登录无关的请求也会一起停顿
+
+每个用户的哈希使用 --seed-method 生成；与 --method 不同时，每个用户首次登录会按新参数重新哈希，
+可用于观察重新哈希的开销。
+
+在 heritage_platform 目录下执行:
+    python -m benchmarks.login
+    python -m benchmarks.login --executor inline --executor thread --executor process --concurrency 16
+    python -m benchmarks.login --method pbkdf2:sha256:600000 --seed-method scrypt:32768:8:1
+"""
+
+import http.cookiejar
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import click
+
+# 保证以脚本方式运行时可以导入 app 和 config
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from benchmarks.report import percentile  # noqa: E402
+from benchmarks.runner import _NoRedirect, create_benchmark_app  # noqa: E402
+
+PASSWORD = 'login-bench'
+PROBE_PATH = '/static/css/main.css'
+
+
+def _summary(samples):
+    return {
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'max_ms': round(max(samples), 2) if samples else 0.0,
+    }
+
+
+def seed_users(app, count: int, method: str):
+    """创建 count 个使用同一个密码哈希的用户"""
+    from werkzeug.security import generate_password_hash
+    from app import db
+    from app.models import User
+
+    password_hash = generate_password_hash(PASSWORD, method)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.delete())
+        db.session.execute(User.__table__.insert(), [{
+            'username': f'login_{i}', 'email': f'login_{i}@example.com',
+            'password_hash': password_hash, 'role': 'student',
+        } for i in range(count)])
+        db.session.commit()
+
+
+def serve_until(app, work):
+    """在主线程的事件循环中运行 eventlet WSGI 服务器，同时在后台线程中执行 work(base_url)
+
+    服务器必须运行在主线程：eventlet.tpool 属于启动它的线程的事件循环，进程退出时在主线程中关闭。
+    """
+    import eventlet
+    import eventlet.wsgi
+
+    listener = eventlet.listen(('127.0.0.1', 0))
+    base_url = f'http://127.0.0.1:{listener.getsockname()[1]}'
+    server = eventlet.spawn(eventlet.wsgi.server, listener, app, log_output=False, max_size=1000)
+    errors = []
+
+    def target():
+        try:
+            work(base_url)
+        except BaseException as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    while worker.is_alive():
+        eventlet.sleep(0.05)
+    server.kill()
+    if errors:
+        raise errors[0]
+
+
+def _post_login(base_url: str, username: str) -> int:
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+    body = urllib.parse.urlencode({'username': username, 'password': PASSWORD}).encode()
+    try:
+        with opener.open(urllib.request.Request(base_url + '/auth/login', data=body), timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code
+
+
+def run_round(base_url: str, users: int, logins: int, concurrency: int) -> dict:
+    """并发执行 logins 次登录，期间持续发送探测请求"""
+    login_samples, probe_samples = [], []
+    errors = []
+    counter = iter(range(logins))
+    counter_lock = threading.Lock()
+    done = threading.Event()
+
+    def login_worker():
+        while True:
+            with counter_lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            status = _post_login(base_url, f'login_{index % users}')
+            login_samples.append((time.perf_counter() - start) * 1000)
+            if status != 302:
+                errors.append(status)
+
+    def probe_worker():
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + PROBE_PATH, timeout=60) as response:
+                    response.read()
+            except urllib.error.URLError:
+                pass
+            probe_samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    probe = threading.Thread(target=probe_worker, daemon=True)
+    probe.start()
+    workers = [threading.Thread(target=login_worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    probe.join()
+
+    return {
+        'logins': len(login_samples),
+        'errors': len(errors),
+        'logins_per_second': round(len(login_samples) / elapsed, 2) if elapsed else 0.0,
+        'login': _summary(login_samples),
+        'probe': {'requests': len(probe_samples), **_summary(probe_samples)},
+    }
+
+
+@click.command()
+@click.option('--executor', 'executors', type=click.Choice(['inline', 'thread', 'process']), multiple=True,
+              help='比较的哈希执行方式，默认 inline 和 thread')
+@click.option('--method', default='scrypt:32768:8:1', show_default=True, help='PASSWORD_HASH_METHOD')
+@click.option('--seed-method', default=None, help='种子用户的哈希参数，默认与 --method 相同')
+@click.option('--workers', type=int, default=4, show_default=True, help='PASSWORD_HASH_WORKERS')
+@click.option('--users', type=int, default=50, show_default=True, help='种子用户数')
+@click.option('--logins', type=int, default=100, show_default=True, help='每轮登录次数')
+@click.option('--concurrency', type=int, default=8, show_default=True, help='并发登录的客户端数')
+@click.option('--output', default=None, help='把结果写入JSON文件')
+def main(executors, method, seed_method, workers, users, logins, concurrency, output):
+    """在 eventlet 服务器上测量登录吞吐量和登录期间其他请求的延迟"""
+    from app.utils import passwords
+
+    executors = executors or ('inline', 'thread')
+    workdir = tempfile.mkdtemp(prefix='login-bench-')
+    results = {}
+    try:
+        app = create_benchmark_app(f"sqlite:///{os.path.join(workdir, 'login.sqlite')}")
+        app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers)
+
+        def run_all(base_url):
+            for executor in executors:
+                # 每轮重新生成用户，使 --seed-method 触发的重新哈希在每轮都发生
+                seed_users(app, users, seed_method or method)
+                app.config['PASSWORD_HASH_EXECUTOR'] = executor
+                # 预热：建立连接池、启动执行器
+                _post_login(base_url, 'login_0')
+                results[executor] = run_round(base_url, users, logins, concurrency)
+                passwords.shutdown()
+
+        serve_until(app, run_all)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    click.echo(f'{"执行方式":<10}{"登录/秒":>10}{"登录p50":>10}{"登录p95":>10}'
+               f'{"探测p50":>10}{"探测p95":>10}{"探测最大":>10}{"错误":>6}')
+    for executor, result in results.items():
+        click.echo(f"{executor:<14}{result['logins_per_second']:>10}{result['login']['p50_ms']:>12}"
+                   f"{result['login']['p95_ms']:>12}{result['probe']['p50_ms']:>12}"
+                   f"{result['probe']['p95_ms']:>12}{result['probe']['max_ms']:>12}{result['errors']:>8}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'method': method, 'seed_method': seed_method or method, 'workers': workers,
+                       'concurrency': concurrency, 'results': results}, f, ensure_ascii=False, indent=2)
+        click.echo(f'结果已写入 {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+读写分离本地验证
+
+使用两个SQLite数据库文件分别作为主库和只读副本，在不依赖MySQL复制环境的情况下
+验证 RoutingSession 的路由规则（见 app/utils/db_session.py 和 app/utils/replicas.py）：
+- 匿名GET请求的查询全部发往副本
+- 写请求发往主库，提交后同一用户在粘滞期内读主库，能立即看到自己的写入
+- 其他用户在同步前从副本读到旧数据，同步后读到新数据；粘滞期结束后作者也回到副本
+- 副本延迟超过 REPLICA_MAX_LAG 或无法连接时回退到主库，恢复后重新使用副本
+- @reads_from_replica 标记的查询辅助函数读副本，primary_reads() 和缓存计算读主库
+
+"复制"通过SQLite在线备份API把主库完整复制到副本（sync），两次同步之间副本上的数据就是"延迟"的数据。
+复制延迟和副本故障通过替换 REPLICA_LAG_PROBE 模拟。
+
+在 heritage_platform 目录下执行:
+    python -m benchmarks.replicas
+    python -m benchmarks.replicas --keep   # 保留临时数据库文件，便于检查
+"""
+
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import click
+from sqlalchemy import event
+
+# 保证以脚本方式运行时可以导入 app 和 config
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from config import DevelopmentConfig, config  # noqa: E402
+
+PASSWORD = 'replica-sandbox'
+STICKY_SECONDS = 1
+
+
+class Sandbox:
+    """主库、副本和按引擎统计的语句数"""
+
+    def __init__(self, workdir: str):
+        from app import create_app, db
+
+        self.primary_path = os.path.join(workdir, 'primary.sqlite')
+        self.replica_path = os.path.join(workdir, 'replica.sqlite')
+        self.replica_state = {'lag': 0.0, 'down': False}
+        state = self.replica_state
+
+        def lag_probe(connection):
+            if state['down']:
+                raise ConnectionError('副本已停止（模拟）')
+            return state['lag']
+
+        class ReplicaSandboxConfig(DevelopmentConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.primary_path}'
+            SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{self.replica_path}']
+            REPLICA_LAG_PROBE = staticmethod(lag_probe)
+            REPLICA_CHECK_INTERVAL = 0
+            REPLICA_STICKY_SECONDS = STICKY_SECONDS
+            WTF_CSRF_ENABLED = False
+            RATELIMIT_ENABLED = False
+            TRACING_SAMPLE_RATE = 0
+            LOG_LEVEL = logging.WARNING
+
+        config['replica_sandbox'] = ReplicaSandboxConfig
+        self.app = create_app('replica_sandbox')
+        self.db = db
+        self.statements = Counter()
+
+        with self.app.app_context():
+            self.primary = db.engines[None]
+            self.replica = self.app.extensions['db_replicas'].engines[0]
+        for name, engine in (('primary', self.primary), ('replica', self.replica)):
+            event.listen(engine, 'before_cursor_execute', self._counter(name))
+
+    def _counter(self, name):
+        def count(conn, cursor, statement, parameters, context, executemany):
+            self.statements[name] += 1
+        return count
+
+    def seed(self):
+        from app.models import Content, User
+
+        with self.app.app_context():
+            self.db.create_all()
+            for username, role in (('author', 'teacher'), ('reader', 'student')):
+                user = User(username=username, email=f'{username}@example.com', role=role)
+                user.password = PASSWORD
+                self.db.session.add(user)
+            self.db.session.flush()
+            author = User.query.filter_by(username='author').one()
+            content = Content(title='读写分离', text_content='正文', content_type='article', user_id=author.id)
+            self.db.session.add(content)
+            self.db.session.commit()
+            self.content_id = content.id
+        self.sync()
+
+    def sync(self):
+        """把主库完整复制到副本"""
+        self.replica.dispose()
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def client(self, username=None):
+        client = self.app.test_client()
+        if username:
+            response = client.post('/auth/login', data={'username': username, 'password': PASSWORD})
+            if response.status_code != 302:
+                raise RuntimeError(f'{username} 登录失败')
+        return client
+
+    def measure(self, func):
+        """执行 func 并返回 (结果, 主库语句数, 副本语句数)"""
+        self.statements.clear()
+        result = func()
+        return result, self.statements['primary'], self.statements['replica']
+
+    def get(self, client, path):
+        def request():
+            response = client.get(path)
+            body = response.get_data(as_text=True)
+            response.close()
+            return response.status_code, body
+        return self.measure(request)
+
+
+def run_checks(sandbox: Sandbox):
+    """执行各项检查，返回 (名称, 是否通过, 说明) 列表"""
+    from app.utils import retention
+    from app.utils.context_processors import nav_forum_categories
+    from app.utils.db_session import primary_reads
+    from app.utils.cache import clear as clear_cache
+
+    results = []
+
+    def check(name, passed, detail):
+        results.append((name, bool(passed), detail))
+
+    detail_path = f'/content/detail/{sandbox.content_id}'
+    anonymous = sandbox.client()
+    # 预热：首次请求计算的缓存（如导航栏的论坛分类）读取主库
+    sandbox.get(anonymous, detail_path)
+    (status, _), primary, replica = sandbox.get(anonymous, detail_path)
+    check('匿名GET读副本', status == 200 and primary == 0 and replica > 0,
+          f'状态 {status}，主库 {primary} 条，副本 {replica} 条')
+
+    author = sandbox.client('author')
+    reader = sandbox.client('reader')
+    # 预热读者的身份：使用共享缓存后端时，首次计算的身份缓存读取主库
+    sandbox.get(reader, detail_path)
+    comment = f'副本验证评论 {time.time():.0f}'
+
+    def post_comment():
+        response = author.post(detail_path, data={'text': comment})
+        response.close()
+        return response.status_code
+    status, primary, replica = sandbox.measure(post_comment)
+    check('写请求发往主库', status == 302 and primary > 0 and replica == 0,
+          f'状态 {status}，主库 {primary} 条，副本 {replica} 条')
+
+    (status, body), primary, replica = sandbox.get(author, detail_path)
+    check('作者在粘滞期内读主库', comment in body and replica == 0,
+          f'看到评论: {comment in body}，主库 {primary} 条，副本 {replica} 条')
+
+    (status, body), primary, replica = sandbox.get(reader, detail_path)
+    check('其他用户在同步前读到副本上的旧数据', comment not in body and primary == 0 and replica > 0,
+          f'看到评论: {comment in body}，主库 {primary} 条，副本 {replica} 条')
+
+    sandbox.sync()
+    (status, body), primary, replica = sandbox.get(reader, detail_path)
+    check('同步后其他用户读到新数据', comment in body and replica > 0, f'看到评论: {comment in body}')
+
+    time.sleep(STICKY_SECONDS + 0.1)
+    (status, body), primary, replica = sandbox.get(author, detail_path)
+    check('粘滞期结束后作者回到副本', primary == 0 and replica > 0, f'主库 {primary} 条，副本 {replica} 条')
+
+    sandbox.replica_state['lag'] = 60.0
+    (status, _), primary, replica = sandbox.get(anonymous, detail_path)
+    check('副本延迟过大时回退主库', status == 200 and replica == 0 and primary > 0,
+          f'主库 {primary} 条，副本 {replica} 条')
+    sandbox.replica_state['lag'] = 0.0
+
+    sandbox.replica_state['down'] = True
+    (status, _), primary, replica = sandbox.get(anonymous, detail_path)
+    check('副本故障时回退主库', status == 200 and replica == 0 and primary > 0,
+          f'主库 {primary} 条，副本 {replica} 条')
+    sandbox.replica_state['down'] = False
+
+    (status, _), primary, replica = sandbox.get(anonymous, detail_path)
+    check('副本恢复后重新使用', primary == 0 and replica > 0, f'主库 {primary} 条，副本 {replica} 条')
+
+    with sandbox.app.app_context():
+        _, primary, replica = sandbox.measure(lambda: retention.archived_group_message_count(1))
+        check('@reads_from_replica 辅助函数读副本', primary == 0 and replica == 1,
+              f'主库 {primary} 条，副本 {replica} 条')
+
+        def on_primary():
+            with primary_reads():
+                return retention.archived_group_message_count(1)
+        _, primary, replica = sandbox.measure(on_primary)
+        check('primary_reads() 范围内读主库', primary == 1 and replica == 0,
+              f'主库 {primary} 条，副本 {replica} 条')
+
+        clear_cache()
+        _, primary, replica = sandbox.measure(nav_forum_categories)
+        check('缓存计算读主库', primary == 1 and replica == 0, f'主库 {primary} 条，副本 {replica} 条')
+
+    return results
+
+
+@click.command()
+@click.option('--keep', is_flag=True, help='保留临时数据库文件')
+def main(keep):
+    """用两个SQLite数据库验证读写分离的路由规则"""
+    workdir = tempfile.mkdtemp(prefix='replica-sandbox-')
+    try:
+        sandbox = Sandbox(workdir)
+        sandbox.seed()
+        results = run_checks(sandbox)
+    finally:
+        if keep:
+            click.echo(f'数据库文件保留在 {workdir}')
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    failed = 0
+    for name, passed, detail in results:
+        failed += not passed
+        click.echo(f"{'通过' if passed else '失败'}  {name}: {detail}")
+    click.echo(f'{len(results) - failed}/{len(results)} 项检查通过')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+基准测试结果统计模块
+
+负责把原始采样数据汇总为统计指标、读写结果JSON，以及与保存的基线进行比较。
+
+结果JSON结构:
+    {
+        "meta": {"database": ..., "mode": ..., "size": ..., "created_at": ...},
+        "scenarios": {
+            "content_detail": {"requests": 200, "errors": 0, "p50_ms": ..., "p95_ms": ...,
+                               "p99_ms": ..., "mean_ms": ..., "throughput_rps": ...,
+                               "queries_mean": ..., "queries_max": ...},
+            ...
+        }
+    }
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）
+
+    Args:
+        samples: 样本列表
+        pct: 百分位，取值0-100
+
+    Returns:
+        float: 百分位数值，样本为空时返回0
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms: List[float], query_counts: List[int], errors: int, wall_seconds: float) -> Dict:
+    """汇总单个场景的采样数据
+
+    Args:
+        latencies_ms: 每个请求的延迟（毫秒）
+        query_counts: 每个请求的SQL查询数，无法获取时为空列表
+        errors: 失败请求数
+        wall_seconds: 场景总耗时（秒），用于计算吞吐量
+
+    Returns:
+        dict: 统计指标
+    """
+    count = len(latencies_ms)
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p95_ms': round(percentile(latencies_ms, 95), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+        'mean_ms': round(sum(latencies_ms) / count, 3) if count else 0.0,
+        'throughput_rps': round(count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        'queries_mean': round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+        'queries_max': max(query_counts) if query_counts else None,
+    }
+
+
+def save_results(results: Dict, path: str):
+    """保存结果为JSON文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> Dict:
+    """读取结果JSON文件"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.15) -> List[Dict]:
+    """与基线结果比较
+
+    延迟（p50/p95）增长或吞吐量下降超过容忍比例、或查询数增加时视为回退。
+
+    Args:
+        current: 本次运行结果
+        baseline: 基线结果
+        tolerance: 允许的相对波动比例
+
+    Returns:
+        list: 每个场景的比较结果，包含各指标变化率和是否回退
+    """
+    rows = []
+    for name, stats in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            rows.append({'scenario': name, 'missing_baseline': True, 'regression': False})
+            continue
+
+        def change(key: str) -> Optional[float]:
+            old, new = base.get(key), stats.get(key)
+            if old in (None, 0) or new is None:
+                return None
+            return (new - old) / old
+
+        row = {
+            'scenario': name,
+            'p50_change': change('p50_ms'),
+            'p95_change': change('p95_ms'),
+            'throughput_change': change('throughput_rps'),
+            'queries_before': base.get('queries_mean'),
+            'queries_after': stats.get('queries_mean'),
+        }
+        reasons = []
+        for key in ('p50_change', 'p95_change'):
+            if row[key] is not None and row[key] > tolerance:
+                reasons.append(key.split('_')[0])
+        if row['throughput_change'] is not None and row['throughput_change'] < -tolerance:
+            reasons.append('throughput')
+        if (row['queries_before'] is not None and row['queries_after'] is not None
+                and row['queries_after'] > row['queries_before']):
+            reasons.append('queries')
+        row['regression'] = bool(reasons)
+        row['reasons'] = reasons
+        rows.append(row)
+    return rows
+
+
+def _fmt_change(value: Optional[float]) -> str:
+    """格式化变化率"""
+    return '-' if value is None else f'{value * 100:+.1f}%'
+
+
+def format_results(results: Dict) -> str:
+    """把结果格式化为文本表格"""
+    lines = [f"{'场景':<24}{'请求':>6}{'错误':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'rps':>10}{'查询':>8}"]
+    for name, s in results['scenarios'].items():
+        queries = '-' if s['queries_mean'] is None else f"{s['queries_mean']:.1f}"
+        lines.append(
+            f"{name:<24}{s['requests']:>6}{s['errors']:>6}{s['p50_ms']:>10.2f}"
+            f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['throughput_rps']:>10.1f}{queries:>8}"
+        )
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """把基线比较结果格式化为文本表格"""
+    lines = [f"{'场景':<24}{'p50':>10}{'p95':>10}{'rps':>10}{'查询':>14}  结论"]
+    for row in rows:
+        if row.get('missing_baseline'):
+            lines.append(f"{row['scenario']:<24}{'基线中无此场景':>44}")
+            continue
+        queries = f"{row['queries_before']}->{row['queries_after']}"
+        verdict = '回退(' + ','.join(row['reasons']) + ')' if row['regression'] else '正常'
+        lines.append(
+            f"{row['scenario']:<24}{_fmt_change(row['p50_change']):>10}{_fmt_change(row['p95_change']):>10}"
+            f"{_fmt_change(row['throughput_change']):>10}{queries:>14}  {verdict}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,152 @@
+"""
+基准测试命令行入口
+
+在 heritage_platform 目录下执行:
+    python -m benchmarks.run --database sqlite --size small
+    python -m benchmarks.run --database mysql --mode http --concurrency 4
+    python -m benchmarks.run --save-baseline benchmarks/results/baseline.json
+    python -m benchmarks.run --baseline benchmarks/results/baseline.json --fail-on-regression
+
+--database 可以是 sqlite、mysql 或完整的数据库URI：
+- sqlite: 使用 benchmarks/.data/bench.sqlite 文件数据库
+- mysql: 使用config.py中的MySQL连接参数，数据库名追加 _bench 后缀，避免覆盖开发数据
+"""
+
+import os
+import platform
+import sys
+from datetime import datetime
+
+import click
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+# 保证以脚本方式运行时可以导入 app 和 config
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from config import Config  # noqa: E402
+from benchmarks import report  # noqa: E402
+from benchmarks.runner import create_benchmark_app, ClientDriver, HttpDriver, run_scenario  # noqa: E402
+from benchmarks.scenarios import PathFactory, select_scenarios  # noqa: E402
+from benchmarks.seed import PRESETS, seed, ensure_empty  # noqa: E402
+
+DATA_DIR = os.path.join(BASE_DIR, 'benchmarks', '.data')
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+
+
+def resolve_database_uri(database: str) -> str:
+    """把 --database 参数解析为数据库URI"""
+    if database == 'sqlite':
+        os.makedirs(DATA_DIR, exist_ok=True)
+        return 'sqlite:///' + os.path.join(DATA_DIR, 'bench.sqlite')
+    if database == 'mysql':
+        url = make_url(Config.SQLALCHEMY_DATABASE_URI)
+        return url.set(database=f'{url.database}_bench').render_as_string(hide_password=False)
+    return database
+
+
+def ensure_mysql_database(database_uri: str):
+    """MySQL数据库不存在时自动创建"""
+    url = make_url(database_uri)
+    engine = create_engine(url.set(database=''))
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(
+                f"CREATE DATABASE IF NOT EXISTS `{url.database}` "
+                "DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            ))
+    finally:
+        engine.dispose()
+
+
+@click.command()
+@click.option('--database', default='sqlite', show_default=True, help='sqlite、mysql 或完整的数据库URI')
+@click.option('--size', type=click.Choice(list(PRESETS)), default='small', show_default=True, help='合成数据规模')
+@click.option('--scale', type=float, default=None, help='在所选规模基础上的放大倍数')
+@click.option('--reuse', is_flag=True, help='复用已有数据，不重新建表和生成数据（需与上次规模一致）')
+@click.option('--mode', type=click.Choice(['client', 'http']), default='client', show_default=True,
+              help='client: Flask测试客户端；http: 真实HTTP服务器')
+@click.option('--requests', 'request_count', type=int, default=100, show_default=True, help='每个场景的请求数')
+@click.option('--warmup', type=int, default=3, show_default=True, help='每个场景的预热请求数')
+@click.option('--concurrency', type=int, default=1, show_default=True, help='并发会话数')
+@click.option('--scenario', 'scenario_names', multiple=True, help='只运行指定场景，可重复指定')
+@click.option('--no-writes', is_flag=True, help='跳过会写入数据的场景')
+@click.option('--output', default=None, help='结果JSON文件路径')
+@click.option('--baseline', default=None, help='与指定的基线结果比较')
+@click.option('--save-baseline', default=None, help='同时把本次结果保存为基线')
+@click.option('--tolerance', type=float, default=0.15, show_default=True, help='判定回退的相对波动阈值')
+@click.option('--fail-on-regression', is_flag=True, help='存在回退时以非零状态码退出')
+def main(database, size, scale, reuse, mode, request_count, warmup, concurrency, scenario_names,
+         no_writes, output, baseline, save_baseline, tolerance, fail_on_regression):
+    """运行接口基准测试"""
+    sizes = PRESETS[size].scaled(scale) if scale else PRESETS[size]
+    database_uri = resolve_database_uri(database)
+    dialect = make_url(database_uri).get_backend_name()
+    if dialect == 'mysql':
+        ensure_mysql_database(database_uri)
+
+    app = create_benchmark_app(database_uri)
+
+    with app.app_context():
+        from app import db
+        if not reuse:
+            click.echo('重新建表并生成合成数据...')
+            db.drop_all()
+            db.create_all()
+            ensure_empty()
+            counts = seed(sizes)
+            click.echo('  ' + ', '.join(f'{k}={v}' for k, v in counts.items()))
+
+    scenarios = select_scenarios(list(scenario_names), include_writes=not no_writes)
+    paths = PathFactory(sizes)
+    driver = ClientDriver(app) if mode == 'client' else HttpDriver(app)
+
+    results = {
+        'meta': {
+            'database': dialect,
+            'mode': mode,
+            'size': size,
+            'scale': scale,
+            'sizes': vars(sizes),
+            'requests': request_count,
+            'concurrency': concurrency,
+            'python': platform.python_version(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        },
+        'scenarios': {},
+    }
+    try:
+        for scenario in scenarios:
+            click.echo(f'运行场景 {scenario.name} ...')
+            results['scenarios'][scenario.name] = run_scenario(
+                driver, scenario, paths, request_count, concurrency=concurrency, warmup=warmup
+            )
+    finally:
+        driver.close()
+
+    output = output or os.path.join(
+        RESULTS_DIR, f"{dialect}-{mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    report.save_results(results, output)
+    click.echo(report.format_results(results))
+    click.echo(f'结果已保存到 {output}')
+
+    if save_baseline:
+        report.save_results(results, save_baseline)
+        click.echo(f'基线已保存到 {save_baseline}')
+
+    if baseline:
+        baseline_results = report.load_results(baseline)
+        for key in ('database', 'mode', 'size', 'concurrency'):
+            if baseline_results.get('meta', {}).get(key) != results['meta'][key]:
+                click.echo(f"警告: 基线的 {key} 与本次运行不同，比较结果仅供参考")
+        rows = report.compare(results, baseline_results, tolerance)
+        click.echo(report.format_comparison(rows))
+        if fail_on_regression and any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+基准测试运行模块
+
+提供两种驱动方式执行场景：
+- ClientDriver: 使用Flask测试客户端在进程内调用，排除网络和WSGI服务器的影响
+- HttpDriver: 在后台线程中启动真实的HTTP服务器，通过urllib发送请求
+
+每个请求的SQL查询数从查询分析模块输出的 X-Query-Count 响应头读取，
+因此基准测试配置会强制开启 QUERY_PROFILER_ENABLED 和 QUERY_PROFILER_HEADERS。
+"""
+
+import http.cookiejar
+import logging
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from werkzeug.serving import make_server
+
+from config import DevelopmentConfig, config
+from .report import summarize
+from .scenarios import Scenario, PathFactory
+from .seed import BENCH_PASSWORD
+
+# 场景中使用的登录身份对应的合成用户名
+IDENTITIES = {
+    'admin': 'bench_1',
+    'user': 'bench_2',
+}
+
+
+def create_benchmark_app(database_uri: str):
+    """创建基准测试用的应用实例
+
+    在开发环境配置的基础上替换数据库连接，关闭CSRF和速率限制，并开启查询统计响应头。
+
+    Args:
+        database_uri: 数据库连接URI
+
+    Returns:
+        Flask: 应用实例
+    """
+    from app import create_app
+
+    class BenchmarkConfig(DevelopmentConfig):
+        # SQLite的连接池参数和PRAGMA由 Config.init_app 和 setup_sqlite 自动处理
+        SQLALCHEMY_DATABASE_URI = database_uri
+        WTF_CSRF_ENABLED = False
+        RATELIMIT_ENABLED = False
+        PROPAGATE_EXCEPTIONS = False  # 路由异常记为500错误而不是中断测试
+        QUERY_PROFILER_ENABLED = True
+        QUERY_PROFILER_HEADERS = True
+        LOG_LEVEL = logging.WARNING
+
+    config['benchmark'] = BenchmarkConfig
+    return create_app('benchmark')
+
+
+def _query_count(headers) -> Optional[int]:
+    """从响应头读取SQL查询数"""
+    value = headers.get('X-Query-Count')
+    return int(value) if value is not None else None
+
+
+class ClientDriver:
+    """Flask测试客户端驱动"""
+
+    def __init__(self, app):
+        """初始化驱动
+
+        Args:
+            app: Flask应用实例
+        """
+        self.app = app
+
+    def session(self, identity: Optional[str]):
+        """创建一个会话，需要时先登录
+
+        Args:
+            identity: 登录身份，None表示匿名
+
+        Returns:
+            FlaskClient: 测试客户端
+        """
+        client = self.app.test_client()
+        if identity:
+            response = client.post('/auth/login', data={
+                'username': IDENTITIES[identity], 'password': BENCH_PASSWORD
+            })
+            if response.status_code != 302:
+                raise RuntimeError(f'基准测试用户 {IDENTITIES[identity]} 登录失败')
+        return client
+
+    def request(self, session, method: str, path: str, data: Optional[dict] = None) -> Tuple[int, Optional[int]]:
+        """发送请求
+
+        Returns:
+            tuple: (状态码, SQL查询数)
+        """
+        response = session.open(path, method=method, data=data)
+        response.close()
+        return response.status_code, _query_count(response.headers)
+
+    def close(self):
+        """释放资源（测试客户端无需清理）"""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """不自动跟随重定向，与测试客户端行为保持一致"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpDriver:
+    """真实HTTP服务器驱动
+
+    使用werkzeug的多线程WSGI服务器在本地随机端口上提供服务。
+    """
+
+    def __init__(self, app, host: str = '127.0.0.1'):
+        """启动HTTP服务器
+
+        Args:
+            app: Flask应用实例
+            host: 监听地址
+        """
+        self.server = make_server(host, 0, app, threaded=True)
+        self.base_url = f'http://{host}:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def session(self, identity: Optional[str]):
+        """创建一个带Cookie的会话，需要时先登录"""
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+        if identity:
+            status, _ = self.request(opener, 'POST', '/auth/login', {
+                'username': IDENTITIES[identity], 'password': BENCH_PASSWORD
+            })
+            if status != 302:
+                raise RuntimeError(f'基准测试用户 {IDENTITIES[identity]} 登录失败')
+        return opener
+
+    def request(self, session, method: str, path: str, data: Optional[dict] = None) -> Tuple[int, Optional[int]]:
+        """发送请求
+
+        Returns:
+            tuple: (状态码, SQL查询数)
+        """
+        body = urllib.parse.urlencode(data).encode() if data is not None else (b'' if method == 'POST' else None)
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with session.open(req, timeout=30) as response:
+                response.read()
+                return response.status, _query_count(response.headers)
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, _query_count(e.headers)
+
+    def close(self):
+        """停止HTTP服务器"""
+        self.server.shutdown()
+        self.thread.join(timeout=5)
+
+
+def run_scenario(driver, scenario: Scenario, paths: PathFactory, requests: int,
+                 concurrency: int = 1, warmup: int = 3) -> Dict:
+    """执行单个场景并汇总指标
+
+    Args:
+        driver: ClientDriver 或 HttpDriver
+        scenario: 场景定义
+        paths: 路径生成器
+        requests: 正式测量的请求数
+        concurrency: 并发会话数
+        warmup: 预热请求数，不计入统计
+
+    Returns:
+        dict: 统计指标
+    """
+    planned = [paths.build(scenario.path) for _ in range(requests)]
+    sessions = [driver.session(scenario.user) for _ in range(max(1, concurrency))]
+
+    for _ in range(warmup):
+        driver.request(sessions[0], scenario.method, paths.build(scenario.path), scenario.data)
+
+    latencies: List[float] = []
+    queries: List[int] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(index: int):
+        nonlocal errors
+        session = sessions[index]
+        for path in planned[index::len(sessions)]:
+            start = time.perf_counter()
+            status, query_count = driver.request(session, scenario.method, path, scenario.data)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if query_count is not None:
+                    queries.append(query_count)
+                if status not in scenario.expected:
+                    errors += 1
+
+    started = time.perf_counter()
+    if len(sessions) == 1:
+        worker(0)
+    else:
+        with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+            list(pool.map(worker, range(len(sessions))))
+    wall = time.perf_counter() - started
+
+    return summarize(latencies, queries, errors, wall)
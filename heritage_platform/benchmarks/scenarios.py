@@ -0,0 +1,118 @@
+"""
+基准测试场景定义模块
+
+每个场景描述一个需要测量的路由：请求方法、路径模板和登录身份。
+路径模板中的占位符（如 {content_id}）在每次请求时从合成数据的主键范围内随机取值，
+随机序列使用固定种子，保证多次运行访问相同的数据。
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .seed import SeedSizes
+
+
+@dataclass
+class Scenario:
+    """基准测试场景
+
+    属性:
+        name: 场景名称，作为结果JSON中的键
+        path: 路径模板，可包含 {content_id}、{topic_id}、{heritage_id}、{group_id} 占位符
+        method: 请求方法
+        user: 登录身份，'admin' 表示管理员，'user' 表示普通用户，None 表示匿名访问
+        data: POST请求的表单数据
+        expected: 视为成功的状态码集合
+        tags: 场景标签，'write' 表示会写入数据
+    """
+    name: str
+    path: str
+    method: str = 'GET'
+    user: Optional[str] = None
+    data: Optional[dict] = None
+    expected: tuple = (200,)
+    tags: List[str] = field(default_factory=list)
+
+
+# 默认场景：覆盖首页、列表、详情、个人中心、论坛、通知、私信和主要API
+SCENARIOS: List[Scenario] = [
+    Scenario('home', '/'),
+    Scenario('heritage_list', '/heritage/list'),
+    Scenario('heritage_detail', '/heritage/detail/{heritage_id}'),
+    Scenario('content_list', '/content/list'),
+    Scenario('content_list_trending', '/content/list?sort=trending'),
+    Scenario('content_detail', '/content/detail/{content_id}', user='user'),
+    Scenario('forum_index', '/forum/'),
+    Scenario('forum_index_trending', '/forum/?sort=trending'),
+    Scenario('forum_topic', '/forum/topic/{topic_id}', user='user'),
+    Scenario('forum_latest_topics', '/forum/api/latest_topics'),
+    Scenario('user_profile', '/user/profile', user='user'),
+    Scenario('user_favorites', '/user/my_favorites', user='user'),
+    Scenario('user_dashboard', '/user/dashboard', user='admin'),
+    Scenario('system_activity_stats', '/user/api/system-activity-stats', user='admin'),
+    Scenario('notifications', '/notification/notifications', user='user'),
+    Scenario('messages', '/message/messages', user='user'),
+    Scenario('message_group', '/message/groups/{group_id}', user='admin', expected=(200, 302)),
+    Scenario('api_contents', '/api/contents'),
+    Scenario('api_contents_titles', '/api/contents?fields=id,title,author_name&include='),
+    Scenario('api_heritage_items', '/api/heritage_items'),
+    Scenario('api_content_detail', '/api/contents/{content_id}'),
+    Scenario('api_forum_topics', '/api/forum/topics'),
+    Scenario('api_user_profile', '/api/user/profile', user='user'),
+    Scenario('api_unread_count', '/api/notifications/unread-count', user='user'),
+    Scenario('api_like_content', '/api/contents/{content_id}/like', method='POST', user='user',
+             expected=(200, 400), tags=['write']),
+    Scenario('api_like_toggle', '/api/contents/{content_id}/like/toggle', method='POST', user='user',
+             tags=['write']),
+]
+
+
+class PathFactory:
+    """按固定随机序列为路径模板填充主键"""
+
+    def __init__(self, sizes: SeedSizes, random_seed: int = 7):
+        """初始化路径生成器
+
+        Args:
+            sizes: 合成数据规模，决定各类主键的取值范围
+            random_seed: 随机种子
+        """
+        self.rng = random.Random(random_seed)
+        self.ranges: Dict[str, int] = {
+            'content_id': sizes.contents,
+            'topic_id': sizes.topics,
+            'heritage_id': sizes.heritage_items,
+            'group_id': sizes.groups,
+        }
+
+    def build(self, template: str) -> str:
+        """生成一个具体路径"""
+        values = {key: self.rng.randint(1, upper) for key, upper in self.ranges.items()}
+        return template.format(**values)
+
+
+def select_scenarios(names: Optional[List[str]] = None, include_writes: bool = True) -> List[Scenario]:
+    """按名称筛选场景
+
+    Args:
+        names: 需要运行的场景名称列表，为空时运行全部
+        include_writes: 是否包含会写入数据的场景
+
+    Returns:
+        list: 场景列表
+
+    Raises:
+        ValueError: 指定了不存在的场景名称
+    """
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    if names:
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"未知的场景: {', '.join(unknown)}")
+        selected = [known[name] for name in names]
+    else:
+        selected = list(SCENARIOS)
+    if not include_writes:
+        selected = [s for s in selected if 'write' not in s.tags]
+    return selected
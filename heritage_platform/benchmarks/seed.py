@@ -0,0 +1,333 @@
+"""
+合成数据生成模块
+
+按指定规模批量生成基准测试数据。所有数据使用固定随机种子生成，保证同一规模下的数据集可复现。
+数据通过Core层批量INSERT（executemany）写入，主键显式指定，避免逐行ORM插入的开销。
+批量插入不会触发模型事件，因此写入完成后会重建依赖事件维护的汇总数据。
+
+生成的用户密码统一为 BENCH_PASSWORD，第一个用户为管理员，便于场景中登录。
+"""
+
+import random
+from dataclasses import dataclass, asdict
+from datetime import timedelta
+from typing import Dict, List
+
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import (
+    User, HeritageItem, Content, Comment, Like, Favorite,
+    ForumTopic, ForumPost, Message, MessageGroup, UserGroup, Notification
+)
+from app.models import beijing_time
+
+# 所有合成用户的登录密码
+BENCH_PASSWORD = 'benchpass'
+
+# 每批写入的行数
+CHUNK_SIZE = 1000
+
+HERITAGE_CATEGORIES = ['传统体育', '民间武术', '民族舞蹈', '传统游艺', '杂技与竞技', '养生功法']
+FORUM_CATEGORIES = ['讨论', '问答', '分享', '活动', '建议']
+CONTENT_TYPES = ['article', 'article', 'article', 'image', 'video', 'multimedia']
+NOTIFICATION_TYPES = ['comment', 'like', 'reply', 'system', 'announcement']
+
+
+@dataclass
+class SeedSizes:
+    """各类数据的生成数量"""
+    users: int = 50
+    heritage_items: int = 12
+    contents: int = 200
+    comments: int = 1000
+    likes: int = 2000
+    favorites: int = 800
+    topics: int = 100
+    posts: int = 1000
+    groups: int = 5
+    messages: int = 1000
+    notifications: int = 2000
+
+    def scaled(self, factor: float) -> 'SeedSizes':
+        """按比例放大各项数量（非遗项目和群组数量按平方根放大）"""
+        values = {}
+        for key, value in asdict(self).items():
+            if key in ('heritage_items', 'groups'):
+                values[key] = max(1, int(value * factor ** 0.5))
+            else:
+                values[key] = max(1, int(value * factor))
+        return SeedSizes(**values)
+
+
+# 预设规模
+PRESETS: Dict[str, SeedSizes] = {
+    'tiny': SeedSizes().scaled(0.1),
+    'small': SeedSizes(),
+    'medium': SeedSizes().scaled(10),
+    'large': SeedSizes().scaled(50),
+}
+
+
+def _bulk_insert(model, rows: List[dict]):
+    """分批批量插入数据行"""
+    table = model.__table__
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+
+def _random_time(rng: random.Random, now, days: int = 90):
+    """生成最近若干天内的随机时间"""
+    return now - timedelta(seconds=rng.randint(0, days * 24 * 3600))
+
+
+def _unique_pairs(rng: random.Random, count: int, left: int, right: int):
+    """生成不重复的 (用户, 内容) 组合，用于点赞和收藏"""
+    count = min(count, left * right)
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.randint(1, left), rng.randint(1, right)))
+    return sorted(pairs)
+
+
+def ensure_empty():
+    """确认目标数据库中没有用户数据
+
+    合成数据使用显式主键，只能写入空库。
+
+    Raises:
+        RuntimeError: 数据库中已有数据
+    """
+    if db.session.query(User.id).first() is not None:
+        raise RuntimeError('目标数据库不为空，无法写入使用显式主键的合成数据')
+
+
+def seed(sizes: SeedSizes, random_seed: int = 42) -> Dict[str, int]:
+    """生成合成数据并提交
+
+    Args:
+        sizes: 各类数据的生成数量
+        random_seed: 随机种子，相同种子生成相同数据
+
+    Returns:
+        dict: 各表实际写入的行数
+    """
+    rng = random.Random(random_seed)
+    now = beijing_time()
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    counts = {}
+
+    # 用户：第一个为管理员，约10%为教师
+    users = []
+    for i in range(1, sizes.users + 1):
+        role = 'admin' if i == 1 else ('teacher' if i % 10 == 0 else 'student')
+        users.append({
+            'id': i,
+            'username': f'bench_{i}',
+            'email': f'bench_{i}@example.com',
+            'password_hash': password_hash,
+            'role': role,
+            'created_at': _random_time(rng, now, 120),
+        })
+    _bulk_insert(User, users)
+    counts['users'] = len(users)
+    teacher_ids = [u['id'] for u in users if u['role'] in ('admin', 'teacher')]
+
+    # 非遗项目
+    heritage_items = [{
+        'id': i,
+        'name': f'非遗项目{i}',
+        'category': HERITAGE_CATEGORIES[i % len(HERITAGE_CATEGORIES)],
+        'description': f'第{i}个合成非遗项目的介绍。' * 10,
+        'cover_image': f'uploads/images/heritage_{i}.jpg',
+        'created_by': rng.choice(teacher_ids),
+        'created_at': _random_time(rng, now, 120),
+    } for i in range(1, sizes.heritage_items + 1)]
+    _bulk_insert(HeritageItem, heritage_items)
+    counts['heritage_items'] = len(heritage_items)
+
+    # 内容
+    contents = []
+    for i in range(1, sizes.contents + 1):
+        created_at = _random_time(rng, now)
+        contents.append({
+            'id': i,
+            'title': f'合成内容{i}',
+            'heritage_id': rng.randint(1, sizes.heritage_items),
+            'user_id': rng.choice(teacher_ids),
+            'content_type': rng.choice(CONTENT_TYPES),
+            'text_content': f'## 内容{i}\n\n' + '这是一段用于基准测试的正文。' * 30,
+            'cover_image': f'uploads/images/cover_{i}.jpg',
+            'created_at': created_at,
+            'updated_at': created_at,
+            'views': rng.randint(0, 5000),
+        })
+    _bulk_insert(Content, contents)
+    counts['contents'] = len(contents)
+
+    # 评论：约30%为对同一内容下已有评论的回复
+    comments = []
+    roots_by_content: Dict[int, List[dict]] = {}
+    for i in range(1, sizes.comments + 1):
+        content_id = rng.randint(1, sizes.contents)
+        row = {
+            'id': i,
+            'user_id': rng.randint(1, sizes.users),
+            'content_id': content_id,
+            'text': f'评论{i}：写得很好，学习了。',
+            'created_at': _random_time(rng, now),
+            'parent_id': None,
+            'reply_to_user_id': None,
+        }
+        siblings = roots_by_content.setdefault(content_id, [])
+        if siblings and rng.random() < 0.3:
+            parent = rng.choice(siblings)
+            row['parent_id'] = parent['id']
+            row['reply_to_user_id'] = parent['user_id']
+        siblings.append(row)
+        comments.append(row)
+    _bulk_insert(Comment, comments)
+    counts['comments'] = len(comments)
+
+    # 点赞和收藏：同一用户对同一内容只有一条记录
+    likes = [{
+        'id': i, 'user_id': u, 'content_id': c, 'created_at': _random_time(rng, now)
+    } for i, (u, c) in enumerate(_unique_pairs(rng, sizes.likes, sizes.users, sizes.contents), 1)]
+    _bulk_insert(Like, likes)
+    counts['likes'] = len(likes)
+
+    favorites = [{
+        'id': i, 'user_id': u, 'content_id': c, 'created_at': _random_time(rng, now)
+    } for i, (u, c) in enumerate(_unique_pairs(rng, sizes.favorites, sizes.users, sizes.contents), 1)]
+    _bulk_insert(Favorite, favorites)
+    counts['favorites'] = len(favorites)
+
+    # 论坛主题：每个主题都有一个首帖，其余帖子随机分配到各主题
+    topics = []
+    posts = []
+    post_id = 0
+    for i in range(1, sizes.topics + 1):
+        created_at = _random_time(rng, now)
+        user_id = rng.randint(1, sizes.users)
+        topics.append({
+            'id': i,
+            'title': f'合成主题{i}',
+            'category': rng.choice(FORUM_CATEGORIES),
+            'user_id': user_id,
+            'views': rng.randint(0, 2000),
+            'is_pinned': i <= 2,
+            'is_closed': False,
+            'created_at': created_at,
+            'last_activity': created_at,
+        })
+        post_id += 1
+        posts.append({
+            'id': post_id, 'topic_id': i, 'user_id': user_id,
+            'content': f'主题{i}的首帖内容。' * 5,
+            'created_at': created_at, 'updated_at': created_at,
+            'parent_id': None, 'reply_to_user_id': None,
+        })
+
+    posts_by_topic: Dict[int, List[dict]] = {}
+    for _ in range(max(0, sizes.posts - sizes.topics)):
+        post_id += 1
+        topic = rng.choice(topics)
+        created_at = max(topic['created_at'], _random_time(rng, now))
+        row = {
+            'id': post_id, 'topic_id': topic['id'], 'user_id': rng.randint(1, sizes.users),
+            'content': f'回复{post_id}：赞同楼主的观点。',
+            'created_at': created_at, 'updated_at': created_at,
+            'parent_id': None, 'reply_to_user_id': None,
+        }
+        siblings = posts_by_topic.setdefault(topic['id'], [])
+        if siblings and rng.random() < 0.3:
+            parent = rng.choice(siblings)
+            row['parent_id'] = parent['id']
+            row['reply_to_user_id'] = parent['user_id']
+        siblings.append(row)
+        posts.append(row)
+        topic['last_activity'] = max(topic['last_activity'], created_at)
+
+    _bulk_insert(ForumTopic, topics)
+    _bulk_insert(ForumPost, posts)
+    counts['topics'] = len(topics)
+    counts['posts'] = len(posts)
+
+    # 消息群组及成员
+    groups = []
+    memberships = []
+    membership_id = 0
+    members_by_group: Dict[int, List[int]] = {}
+    for i in range(1, sizes.groups + 1):
+        creator_id = rng.choice(teacher_ids)
+        groups.append({
+            'id': i, 'name': f'合成群组{i}', 'description': '基准测试群组',
+            'creator_id': creator_id, 'group_type': 'class',
+            'created_at': _random_time(rng, now, 120), 'updated_at': now,
+        })
+        member_ids = set(rng.sample(range(1, sizes.users + 1), min(sizes.users, 20)))
+        member_ids.add(creator_id)
+        members_by_group[i] = sorted(member_ids)
+        for user_id in members_by_group[i]:
+            membership_id += 1
+            memberships.append({
+                'id': membership_id, 'user_id': user_id, 'group_id': i,
+                'role': 'admin' if user_id == creator_id else 'member',
+                'joined_at': now,
+            })
+    _bulk_insert(MessageGroup, groups)
+    _bulk_insert(UserGroup, memberships)
+    counts['groups'] = len(groups)
+
+    # 私信和群组消息：约20%为群组消息
+    messages = []
+    for i in range(1, sizes.messages + 1):
+        sender_id = rng.randint(1, sizes.users)
+        row = {
+            'id': i, 'sender_id': sender_id, 'receiver_id': None, 'group_id': None,
+            'content': f'消息{i}：你好，关于课程的问题想请教一下。',
+            'created_at': _random_time(rng, now),
+            'is_read': rng.random() < 0.6,
+            'sender_deleted': False, 'receiver_deleted': False,
+            'message_type': 'personal',
+        }
+        if groups and rng.random() < 0.2:
+            group_id = rng.randint(1, sizes.groups)
+            row['group_id'] = group_id
+            row['sender_id'] = rng.choice(members_by_group[group_id])
+            row['message_type'] = 'group'
+        else:
+            receiver_id = rng.randint(1, sizes.users)
+            row['receiver_id'] = receiver_id if receiver_id != sender_id else (receiver_id % sizes.users) + 1
+        messages.append(row)
+    _bulk_insert(Message, messages)
+    counts['messages'] = len(messages)
+
+    # 通知
+    notifications = []
+    for i in range(1, sizes.notifications + 1):
+        notification_type = rng.choice(NOTIFICATION_TYPES)
+        content_id = rng.randint(1, sizes.contents)
+        notifications.append({
+            'id': i,
+            'user_id': rng.randint(1, sizes.users),
+            'sender_id': rng.randint(1, sizes.users),
+            'type': notification_type,
+            'content': f'合成通知{i}（{notification_type}）',
+            'link': f'/content/detail/{content_id}',
+            'is_read': rng.random() < 0.5,
+            'created_at': _random_time(rng, now),
+        })
+    _bulk_insert(Notification, notifications)
+    counts['notifications'] = len(notifications)
+
+    db.session.commit()
+
+    # 批量插入绕过了模型事件，需要根据原始数据重建汇总表
+    from app.utils import activity_stats, forum_counters, heritage_registry, trending, user_stats
+    activity_stats.backfill()
+    user_stats.reconcile()
+    forum_counters.rebuild()
+    trending.rebuild()
+    heritage_registry.invalidate()
+    return counts
@@ -4,12 +4,12 @@
 本模块定义了应用的各种配置参数，包括基础配置和特定环境配置。
 配置参数包括：
 - 安全设置（密钥等）
-- 数据库连接参数
+- 数据库连接参数（MySQL，或通过 DATABASE_URL / sqlite 配置使用SQLite）
 - 文件上传设置
-- Redis服务配置
+- 缓存配置（进程内、单机共享文件或Redis）
 - 日志系统配置
 
-模块提供了不同环境（开发、生产）的配置类，以及用于选择配置的字典。
+模块提供了不同环境（开发、生产、SQLite单机）的配置类，以及用于选择配置的字典。
 应用初始化时会根据环境变量选择适当的配置类。
 """
 
@@ -34,8 +34,8 @@ class Config:
     DB_HOST = os.environ.get('DB_HOST') or 'localhost'  # 数据库主机地址，默认为localhost
     DB_NAME = os.environ.get('DB_NAME') or 'heritage_platform'  # 数据库名称，默认为heritage_platform
 
-    # 构建完整的数据库URI
-    SQLALCHEMY_DATABASE_URI = (
+    # 构建完整的数据库URI，设置了DATABASE_URL环境变量时优先使用（如 sqlite:///heritage_platform.sqlite）
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or (
         f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'  # 使用pymysql驱动连接MySQL
         if DB_PASSWORD else
         'mysql+pymysql://root@localhost/heritage_platform'  # 如果未设置密码，使用默认连接字符串
@@ -51,15 +51,119 @@ class Config:
         'pool_recycle': 1800,  # 连接自动回收时间（秒），防止连接过期
     }
 
+    # SQLite连接池配置，数据库URI为sqlite时替换上面的MySQL连接池配置
+    # SQLite同一时刻只允许一个写入者，过多连接只会增加锁等待，因此使用较小的连接池
+    SQLITE_ENGINE_OPTIONS = {
+        'pool_size': 5,  # 连接池中保持的连接数量
+        'max_overflow': 5,  # 允许的最大连接溢出数
+        'pool_timeout': 30,  # 等待获取连接的超时时间（秒）
+        'connect_args': {'check_same_thread': False},  # 允许连接在线程间复用（由连接池保证同一时刻只被一个线程使用）
+    }
+
+    # SQLite连接级别的PRAGMA设置，在每个新连接上执行（见 app/utils/sqlite_config.py）
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # 预写日志模式，读写互不阻塞
+        'synchronous': 'NORMAL',  # WAL模式下安全且更快的同步级别
+        'mmap_size': 256 * 1024 * 1024,  # 内存映射256MB
+        'cache_size': -64000,  # 页缓存约64MB（负数表示KB）
+        'busy_timeout': 5000,  # 等待写锁的超时时间（毫秒）
+        'temp_store': 'MEMORY',  # 临时表和索引放在内存中
+        'foreign_keys': 'ON',  # 开启外键约束，与MySQL行为一致
+    }
+
     # 文件上传配置
     UPLOAD_FOLDER = os.path.join(basedir, 'app/static/uploads')  # 上传文件存储目录
 
-    # 注意：Redis服务配置已移除，应用将使用内存存储代替
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 上传文件大小限制（16MB）
 
     # 日志配置
     LOG_LEVEL = os.environ.get('LOG_LEVEL') or logging.INFO  # 日志记录级别，默认为INFO
 
+    # SQL查询分析配置（见 app/utils/query_profiler.py）
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'false').lower() == 'true'  # 是否记录每个请求的SQL语句
+    QUERY_PROFILER_HEADERS = False  # 是否在响应头中输出查询数量和N+1嫌疑
+    QUERY_N_PLUS_ONE_THRESHOLD = 5  # 同一形状的语句在一个请求内重复多少次视为疑似N+1
+
+    # 非遗项目注册表配置（见 app/utils/heritage_registry.py）
+    HERITAGE_REGISTRY_TTL = int(os.environ.get('HERITAGE_REGISTRY_TTL', 300))  # 进程内快照的最长有效期（秒）
+
+    # 热度排行配置（见 app/utils/trending.py），修改后需执行 flask rebuild-trending
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 48))  # 热度半衰期（小时）
+
+    # 通知聚合配置（见 app/utils/notification_aggregation.py）
+    NOTIFICATION_AGGREGATE_WINDOW = int(os.environ.get('NOTIFICATION_AGGREGATE_WINDOW', 24 * 3600))  # 同一目标的未读通知合并的时间窗口（秒）
+    NOTIFICATION_PUSH_INTERVAL = float(os.environ.get('NOTIFICATION_PUSH_INTERVAL', 5))  # 同一通知两次推送的最短间隔（秒）
+
+    # 查询结果缓存配置（见 app/utils/cache）
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')  # memory: 进程内；sqlite: 单机多进程共享；redis: Redis兼容服务；null: 不缓存
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))  # 未指定有效期时的默认值（秒）
+    CACHE_MAX_ENTRIES = 10000  # 进程内/SQLite后端的最大条目数
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH') or os.path.join(basedir, 'instance', 'cache.sqlite')  # SQLite后端的文件路径
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/1')  # Redis后端的连接地址，建议使用单独的数据库编号
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'heritage')  # 键前缀，多个应用共用后端时区分
+    CACHE_LOCK_TIMEOUT = 10  # 单飞锁有效期，也是等待其他进程计算结果的最长时间（秒）
+
+    # 实时推送发件箱配置（见 app/utils/outbox.py）
+    OUTBOX_DISPATCHER_ENABLED = os.environ.get('OUTBOX_DISPATCHER_ENABLED', 'true').lower() == 'true'  # 是否在本进程运行后台分发器
+    OUTBOX_BATCH_SIZE = 200  # 每次领取并推送的事件数
+    OUTBOX_POLL_INTERVAL = 1.0  # 空闲时检查到期事件（延迟推送、重试）的间隔（秒）
+    OUTBOX_LEASE_SECONDS = 30  # 领取事件的租约时长（秒），分发器异常退出后事件在租约到期后重新推送
+    OUTBOX_MAX_ATTEMPTS = 8  # 推送失败的最大重试次数
+    OUTBOX_RETRY_BASE = 2.0  # 重试退避的基数（秒），第n次失败后等待 基数*2^(n-1) 秒
+    OUTBOX_RETENTION_HOURS = 24  # 已分发事件的保留时长（小时）
+
+    # 请求追踪配置（见 app/utils/tracing.py）
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'  # 是否记录每个请求的耗时区间，每条SQL语句都有额外开销
+    TRACING_SERVER_TIMING = os.environ.get('TRACING_SERVER_TIMING', 'false').lower() == 'true'  # 是否在响应中输出 Server-Timing 头，会向所有访问者暴露各环节耗时
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0))  # 写入追踪文件的请求比例（0 ~ 1）
+    TRACING_SLOW_MS = float(os.environ.get('TRACING_SLOW_MS', 1000))  # 耗时超过该值（毫秒）的请求总是写入追踪文件，0 表示不按耗时写入
+    TRACING_LOG_PATH = os.environ.get('TRACING_LOG_PATH') or os.path.join(basedir, 'logs', 'traces.jsonl')  # 追踪文件路径，可用 flask fold-traces 转换为火焰图输入
+
+    # 运行中进程的采样分析配置（见 app/utils/sampling_profiler.py），接口仅管理员可用
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true'  # 是否开放栈采样和内存快照接口，默认关闭，排查问题时通过环境变量开启
+    PROFILER_MAX_SECONDS = 60  # 单次栈采样的最长时长（秒）
+    PROFILER_DEFAULT_INTERVAL_MS = 5  # 默认采样间隔（毫秒）
+    PROFILER_TRACEMALLOC_FRAMES = 10  # tracemalloc 为每次分配记录的栈深度，越深越准确、开销越大
+
+    # 只读请求与延后写入配置（见 app/utils/db_session.py 和 app/utils/deferred.py）
+    READ_ONLY_REQUESTS = os.environ.get('READ_ONLY_REQUESTS', 'true').lower() == 'true'  # GET/HEAD/OPTIONS 请求是否使用只读会话
+    READ_ONLY_AUTOCOMMIT = True  # 只读请求是否使用自动提交连接，不持有事务
+    DEFERRED_WRITES_ENABLED = True  # 浏览量、已读标记等附带写入是否在响应发送后执行
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', 5))  # 浏览量缓冲区写入数据库的间隔（秒）
+
+    # 读写分离配置（见 app/utils/replicas.py），只读请求和标记的查询辅助函数读取副本
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]  # 只读副本连接URI，多个用逗号分隔
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))  # 允许的最大复制延迟（秒），超过时读查询回退到主库
+    REPLICA_CHECK_INTERVAL = 5  # 副本健康检查间隔（秒）
+    REPLICA_STICKY_SECONDS = 10  # 用户提交写入后继续读取主库的时长（秒），应大于正常的复制延迟
+    REPLICA_LAG_PROBE = None  # 自定义复制延迟探测函数 probe(connection) -> 秒数或None，为空时按数据库类型探测
+
+    # JSON编码配置（见 app/utils/json_provider.py）
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')  # auto: 安装了orjson时使用orjson，否则标准库；orjson；stdlib
+    JSON_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # 响应中日期时间的格式，与各模型 to_dict 一致
+
+    # 批量请求配置（见 app/api/batch.py）
+    BATCH_MAX_REQUESTS = 20  # 单个 /api/batch 请求中子请求数量的上限
+    BATCH_CONCURRENCY_ENABLED = os.environ.get('BATCH_CONCURRENCY_ENABLED', 'true').lower() == 'true'  # 是否并发执行声明为独立的GET子请求
+    BATCH_MAX_WORKERS = 4  # 并发执行子请求的线程数上限，每个线程占用一个数据库连接
+
+    # 密码哈希配置（见 app/utils/passwords.py）
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')  # Werkzeug格式的算法和成本参数，如 pbkdf2:sha256:600000；修改后用户下次登录时重新哈希
+    PASSWORD_SALT_LENGTH = 16  # 盐的长度
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')  # thread: 原生线程池；process: 进程池；inline: 在调用线程中直接计算
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))  # 同时执行的哈希数量上限，一般不超过CPU核数
+    PASSWORD_REHASH_ON_LOGIN = True  # 登录成功时是否把旧参数的哈希按当前参数重新哈希
+
+    # 数据保留策略（见 app/utils/retention.py），由 flask archive-old-data / purge-deleted-messages 执行
+    RETENTION_POLICIES = {
+        'notifications': {'archive_after_days': int(os.environ.get('RETENTION_NOTIFICATION_DAYS', 180))},  # 已读通知归档
+        'messages': {'archive_after_days': int(os.environ.get('RETENTION_MESSAGE_DAYS', 365))},  # 消息归档
+        'deleted_messages': {'purge_after_days': int(os.environ.get('RETENTION_DELETED_MESSAGE_DAYS', 30))},  # 双方已删除的私信清除
+    }
+    RETENTION_BATCH_SIZE = 500  # 每批搬移或删除的行数，每批一个短事务
+    RETENTION_BATCH_PAUSE = 0.1  # 批次之间的暂停时间（秒），减少对在线请求的影响
+    RETENTION_HISTORY_PAGE_SIZE = 50  # 群组已归档历史消息每页显示的条数
+
     @staticmethod
     def init_app(app):
         """初始化应用配置
@@ -79,6 +183,15 @@ class Config:
         app.logger.addHandler(handler)  # 将处理器添加到应用的日志记录器
         app.logger.setLevel(app.config['LOG_LEVEL'])  # 设置应用日志记录器的级别
 
+        # 使用SQLite时替换为适合SQLite的连接池配置
+        database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        if database_uri.startswith('sqlite'):
+            engine_options = dict(app.config['SQLITE_ENGINE_OPTIONS'])
+            if database_uri in ('sqlite://', 'sqlite:///:memory:'):
+                # 内存数据库使用单连接池，不支持溢出和超时参数
+                engine_options = {'connect_args': engine_options.get('connect_args', {})}
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
         # 确保上传目录存在，创建不同类型文件的上传子目录
         upload_path = os.path.join(app.root_path, 'static/uploads')  # 获取上传目录的绝对路径
         os.makedirs(os.path.join(upload_path, 'images'), exist_ok=True)  # 创建图片上传目录
@@ -92,6 +205,11 @@ class DevelopmentConfig(Config):
     适用于本地开发和测试的配置，启用调试模式。
     """
     DEBUG = True  # 启用Flask的调试模式，显示详细错误信息和自动重新加载
+    QUERY_PROFILER_ENABLED = True  # 开发环境默认记录SQL查询，便于发现N+1问题
+    QUERY_PROFILER_HEADERS = True  # 开发环境在响应头中输出查询统计
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'  # 开发环境默认记录请求耗时区间
+    TRACING_SERVER_TIMING = True  # 开发环境在响应中输出 Server-Timing 头
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.1))  # 开发环境默认采样部分请求写入追踪文件
 
 
 class ProductionConfig(Config):
@@ -131,9 +249,19 @@ class ProductionConfig(Config):
         app.logger.addHandler(file_handler)  # 将文件处理器添加到应用的日志记录器
 
 
+class SqliteConfig(DevelopmentConfig):
+    """SQLite单机配置
+
+    不依赖MySQL服务器，适用于单机部署、测试和基准测试。
+    数据库文件默认位于应用实例目录（instance/heritage_platform.sqlite）。
+    """
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///heritage_platform.sqlite'
+
+
 # 配置字典，用于根据环境名称选择配置类
 config = {
     'development': DevelopmentConfig,  # 开发环境配置
     'production': ProductionConfig,    # 生产环境配置
+    'sqlite': SqliteConfig,            # SQLite单机配置
     'default': DevelopmentConfig       # 默认使用开发环境配置
 }
@@ -53,6 +53,10 @@ def create_database_if_not_exists():
     try:
         # 从应用配置中提取数据库连接信息
         db_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        if db_uri.startswith('sqlite'):
+            # SQLite数据库文件会在首次连接时自动创建
+            print(f"使用SQLite数据库: {db_uri}")
+            return
         db_info = parse_db_url(db_uri)
         
         user = db_info['user']
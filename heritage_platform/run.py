@@ -45,6 +45,144 @@ def create_admin():
         db.session.rollback()
         click.echo(f'创建管理员失败: {str(e)}', err=True)
 
+@app.cli.command()
+def backfill_activity():
+    """根据原始数据重建每日活跃度汇总表"""
+    from app.utils.activity_stats import backfill
+
+    try:
+        result = backfill()
+        click.echo(f"活跃度汇总重建完成: 全站 {result['daily_rows']} 天, 用户 {result['user_daily_rows']} 条")
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'重建活跃度汇总失败: {str(e)}', err=True)
+
+@app.cli.command()
+def reconcile_user_stats():
+    """根据原始数据重新计算全部用户的统计"""
+    from app.utils.user_stats import reconcile
+
+    try:
+        count = reconcile()
+        click.echo(f'用户统计校正完成: {count} 个用户')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'校正用户统计失败: {str(e)}', err=True)
+
+@app.cli.command()
+def rebuild_forum_counters():
+    """根据帖子表重新计算论坛主题的回复数和最后回复"""
+    from app.utils.forum_counters import rebuild
+
+    try:
+        count = rebuild()
+        click.echo(f'论坛主题计数重建完成: {count} 个主题')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'重建论坛主题计数失败: {str(e)}', err=True)
+
+@app.cli.command()
+def rebuild_trending():
+    """根据点赞、收藏、评论、回帖和浏览数据重新计算内容和主题的热度"""
+    from app.utils.trending import rebuild
+
+    try:
+        result = rebuild()
+        click.echo(f"热度重建完成: {result['contents']} 条内容, {result['forum_topics']} 个主题")
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'重建热度失败: {str(e)}', err=True)
+
+@app.cli.command()
+@click.option('--policy', type=click.Choice(['notifications', 'messages']), multiple=True,
+              help='只执行指定的归档策略，默认全部执行')
+@click.option('--batch-size', type=int, default=None, help='每批行数')
+@click.option('--max-batches', type=int, default=None, help='最多处理的批数')
+@click.option('--dry-run', is_flag=True, help='只统计将被归档的行数')
+def archive_old_data(policy, batch_size, max_batches, dry_run):
+    """按保留策略把过期的消息和已读通知搬移到归档表"""
+    from app.utils import retention
+
+    for name in policy or retention.get_archive_policies():
+        try:
+            count = retention.archive(name, batch_size=batch_size, max_batches=max_batches, dry_run=dry_run)
+            click.echo(f"{name}: {'将归档' if dry_run else '已归档'} {count} 行")
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'归档 {name} 失败: {str(e)}', err=True)
+
+@app.cli.command()
+@click.option('--batch-size', type=int, default=None, help='每批行数')
+@click.option('--dry-run', is_flag=True, help='只统计将被清除的行数')
+def purge_deleted_messages(batch_size, dry_run):
+    """清除双方都已删除且超过保留期的私信"""
+    from app.utils import retention
+
+    try:
+        count = retention.purge_deleted_messages(batch_size=batch_size, dry_run=dry_run)
+        click.echo(f"{'将清除' if dry_run else '已清除'} {count} 条私信")
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'清除私信失败: {str(e)}', err=True)
+
+@app.cli.command()
+def clear_cache():
+    """清空查询结果缓存（共享后端会影响所有进程）"""
+    from app.utils import cache
+
+    try:
+        cache.clear()
+        click.echo('缓存已清空')
+    except Exception as e:
+        click.echo(f'清空缓存失败: {str(e)}', err=True)
+
+@app.cli.command()
+def replica_status():
+    """检查只读副本的连接和复制延迟"""
+    replicas = app.extensions.get('db_replicas')
+    if replicas is None:
+        click.echo('未配置只读副本（SQLALCHEMY_REPLICA_URIS）')
+        return
+    for item in replicas.check_all():
+        lag = f"{item['lag']:.1f}秒" if item['lag'] is not None else '未知'
+        state = '可用' if item['healthy'] else f"不可用: {item['error']}"
+        click.echo(f"{item['url']}  延迟 {lag}  {state}")
+
+@app.cli.command()
+@click.option('--input', 'input_path', default=None, help='追踪文件路径，默认为 TRACING_LOG_PATH')
+@click.option('--output', default=None, help='折叠栈输出路径，默认输出到标准输出')
+@click.option('--path-prefix', default=None, help='只转换路径以此开头的请求')
+def fold_traces(input_path, output, path_prefix):
+    """把采样的请求追踪转换为折叠栈格式（flamegraph.pl / speedscope 的输入）"""
+    import json
+    from collections import Counter
+    from app.utils.tracing import fold_trace
+
+    input_path = input_path or app.config['TRACING_LOG_PATH']
+    stacks = Counter()
+    try:
+        with open(input_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if path_prefix and not record.get('path', '').startswith(path_prefix):
+                    continue
+                for folded in fold_trace(record):
+                    stack, value = folded.rsplit(' ', 1)
+                    stacks[stack] += int(value)
+    except (OSError, ValueError) as e:
+        click.echo(f'读取追踪文件失败: {str(e)}', err=True)
+        return
+
+    lines = [f'{stack} {value}' for stack, value in sorted(stacks.items())]
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        click.echo(f'已写入 {len(lines)} 条折叠栈到 {output}')
+    else:
+        click.echo('\n'.join(lines))
+
 if __name__ == '__main__':
     # 使用socketio启动应用而非app.run
     socketio.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), allow_unsafe_werkzeug=True)
@@ -0,0 +1,69 @@
+"""
+测试公共夹具
+
+每个测试使用独立的SQLite数据库文件，由 benchmarks/seed.py 以固定随机种子写入合成数据，
+合成用户的密码均为 BENCH_PASSWORD，bench_1 为管理员。
+
+在 heritage_platform 目录下执行:
+    python -m pytest -q
+"""
+
+import logging
+import os
+import sys
+
+import pytest
+
+# 保证从任意目录运行时都可以导入 app
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from config import DevelopmentConfig, config  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """写入了合成数据的应用实例"""
+    from app import create_app, db
+    from benchmarks.seed import SeedSizes, seed
+
+    class TestingConfig(DevelopmentConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.sqlite')
+        WTF_CSRF_ENABLED = False
+        RATELIMIT_ENABLED = False
+        CACHE_BACKEND = 'memory'
+        OUTBOX_DISPATCHER_ENABLED = False  # 不启动后台推送线程
+        DEFERRED_WRITES_ENABLED = False  # 附带写入在请求内同步执行，查询数可以复现
+        TRACING_ENABLED = False
+        LOG_LEVEL = logging.WARNING
+
+    config['testing'] = TestingConfig
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        # 每类数据都多于一页列表的条目数，逐行查询会明显超出预算
+        seed(SeedSizes(users=30, heritage_items=6, contents=40, comments=120, likes=200, favorites=150,
+                       topics=30, posts=150, groups=3, messages=100, notifications=100))
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """以合成用户身份登录，返回同一个测试客户端"""
+    from benchmarks.seed import BENCH_PASSWORD
+
+    def do_login(username):
+        response = client.post('/auth/login', data={'username': username, 'password': BENCH_PASSWORD})
+        assert response.status_code == 302, f'用户 {username} 登录失败'
+        return client
+    return do_login
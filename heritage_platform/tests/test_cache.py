@@ -0,0 +1,137 @@
+"""
+缓存子系统测试
+"""
+
+import threading
+import time
+
+import pytest
+
+from app import db
+from app.models import HeritageItem
+from app.utils.cache import cached
+from app.utils.cache.backends import MISSING, MemoryBackend, SQLiteBackend
+from app.utils.cache.core import Cache
+
+calls = []
+
+
+@cached('test_heritage_names', tags=[HeritageItem])
+def heritage_names():
+    calls.append(1)
+    return [name for (name,) in db.session.query(HeritageItem.name).order_by(HeritageItem.id)]
+
+
+@pytest.fixture
+def ctx(app):
+    calls.clear()
+    with app.app_context():
+        yield
+
+
+def _rename_first(name):
+    item = db.session.get(HeritageItem, 1)
+    item.name = name
+    db.session.flush()
+
+
+def test_invalidated_after_commit(ctx):
+    before = heritage_names()
+    assert heritage_names() == before
+    assert len(calls) == 1
+
+    _rename_first('提交后的名称')
+    # 提交之前仍然读取旧值
+    assert heritage_names() == before
+    db.session.commit()
+
+    assert heritage_names()[0] == '提交后的名称'
+    assert len(calls) == 2
+
+
+def test_not_invalidated_after_rollback(ctx):
+    before = heritage_names()
+
+    _rename_first('回滚的名称')
+    db.session.rollback()
+
+    assert heritage_names() == before
+    assert len(calls) == 1
+
+    # 回滚丢弃了待失效的标签，之后无关的提交也不会使缓存失效
+    db.session.commit()
+    heritage_names()
+    assert len(calls) == 1
+
+
+def test_concurrent_misses_compute_once():
+    cache = Cache(MemoryBackend())
+    started = threading.Event()
+    release = threading.Event()
+    computes = []
+    results = []
+
+    def compute():
+        computes.append(1)
+        started.set()
+        release.wait(5)
+        return {'value': 42}
+
+    def worker():
+        results.append(cache.get_or_compute('hot', 'hot', compute, tags=('items',)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # 等其余调用方都进入等待后再放行计算
+    deadline = time.monotonic() + 5
+    while cache.metrics.snapshot()['hot']['coalesced'] < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(computes) == 1
+    assert results == [{'value': 42}] * 8
+    stats = cache.metrics.snapshot()['hot']
+    assert stats['misses'] == 8 and stats['coalesced'] == 7 and stats['computes'] == 1
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    path = str(tmp_path / 'cache' / 'cache.sqlite')
+    backend = SQLiteBackend(path)
+
+    backend.set('a', {'ids': [1, 2], 'name': '非遗'})
+    backend.set('none', None)
+    assert backend.get('a') == {'ids': [1, 2], 'name': '非遗'}
+    assert backend.get_many(['a', 'none', 'missing']) == {'a': {'ids': [1, 2], 'name': '非遗'}, 'none': None}
+    assert backend.get('missing') is MISSING
+
+    assert backend.add('a', 'other') is False
+    assert backend.add('lock', 1, ttl=0.05) is True
+    time.sleep(0.1)
+    assert backend.get('lock') is MISSING
+    assert backend.add('lock', 2) is True
+
+    # 另一个进程打开同一个文件能读到相同的数据
+    other = SQLiteBackend(path)
+    assert other.get('lock') == 2
+    other.delete('a')
+    assert backend.get('a') is MISSING
+    assert backend.size() == 2
+
+    backend.clear()
+    assert other.size() == 0
+
+
+def test_sqlite_backend_shares_invalidation(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    first, second = Cache(SQLiteBackend(path)), Cache(SQLiteBackend(path))
+
+    assert first.get_or_compute('n', 'n', lambda: 1, tags=('items',)) == 1
+    assert second.get_or_compute('n', 'n', lambda: 2, tags=('items',)) == 1
+
+    second.invalidate_tags(['items'])
+    assert first.get_or_compute('n', 'n', lambda: 3, tags=('items',)) == 3
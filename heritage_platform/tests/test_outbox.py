@@ -0,0 +1,68 @@
+"""
+发件箱分发测试
+"""
+
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import OutboxEvent
+from app.utils import outbox
+
+# 带微秒的时间：MySQL 的 DATETIME(0) 列会把它舍入到整秒
+NOW = datetime(2026, 10, 19, 12, 0, 0, 654321)
+_MICROSECONDS = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\.\d+$')
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    events = []
+    monkeypatch.setattr(outbox.socketio, 'emit', lambda name, data, to=None: events.append((name, data, to)))
+    monkeypatch.setattr(outbox, 'beijing_time', lambda: NOW)
+    return events
+
+
+@pytest.fixture
+def second_precision(app):
+    """模拟 MySQL DATETIME(0)：写入 outbox_events 的时间去掉微秒，查询参数保持原样"""
+    def truncate(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(('INSERT INTO OUTBOX', 'UPDATE OUTBOX')):
+            return statement, parameters
+        set_clause = statement.split(' WHERE ')[0]
+        count = set_clause.count('?')
+        parameters = tuple(
+            _MICROSECONDS.sub(r'\1', value) if i < count and isinstance(value, str) else value
+            for i, value in enumerate(parameters))
+        return statement, parameters
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', truncate, retval=True)
+    yield
+    event.remove(engine, 'before_cursor_execute', truncate)
+
+
+def test_dispatch_with_second_precision_datetimes(app, emitted, second_precision):
+    with app.app_context():
+        outbox.enqueue('new_notification', {'id': 1}, 'user_2')
+        db.session.commit()
+
+        assert outbox.dispatch_pending(app) == 1
+        assert emitted == [('new_notification', {'id': 1}, 'user_2')]
+        row = OutboxEvent.query.one()
+        assert row.dispatched_at is not None
+        assert row.claimed_at == NOW.replace(microsecond=0)
+
+
+def test_claimed_events_are_not_claimed_again(app, emitted):
+    with app.app_context():
+        outbox.enqueue('new_notification', {'id': 1}, 'user_2')
+        outbox.enqueue('new_notification', {'id': 2}, 'user_2')
+        db.session.commit()
+
+        claimed = outbox._claim(app, NOW)
+        assert [row.payload for row in claimed] == ['{"id": 1}', '{"id": 2}']
+        assert outbox._claim(app, NOW) == []
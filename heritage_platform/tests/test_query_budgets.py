@@ -0,0 +1,94 @@
+"""
+路由查询预算测试
+
+未指定上限时使用路由上 @query_budget 声明的值（见 app/utils/query_profiler.py）。
+每个测试都从冷缓存开始，合成数据中每类列表都有多条记录，逐行加载关联数据会超出预算。
+"""
+
+from sqlalchemy import func
+
+from app import db
+from app.models import Message, UserGroup
+from app.utils.query_profiler import QueryBudgetExceeded, assert_query_budget, record_queries
+
+
+def test_user_profile(login):
+    client = login('bench_2')
+    response = assert_query_budget(client, '/user/profile')
+    assert response.status_code == 200
+
+
+def test_api_user_profile(login):
+    client = login('bench_2')
+    response = assert_query_budget(client, '/api/user/profile')
+    assert response.status_code == 200
+
+
+def test_my_favorites(login):
+    client = login('bench_2')
+    response = assert_query_budget(client, '/user/my_favorites')
+    assert response.status_code == 200
+
+
+def test_forum_index(client, login):
+    response = assert_query_budget(client, '/forum/')
+    assert response.status_code == 200
+
+    login('bench_2')
+    for path in ('/forum/', '/forum/?sort=trending', '/forum/?page=2'):
+        response = assert_query_budget(client, path)
+        assert response.status_code == 200
+
+
+def test_api_lists(client, login):
+    login('bench_2')
+    for path in ('/api/contents?per_page=20',
+                 '/api/contents?per_page=20&fields=id,title,author_name&include=',
+                 '/api/heritage_items?per_page=20',
+                 '/api/forum/topics?per_page=20',
+                 '/api/user/favorites?per_page=20'):
+        response = assert_query_budget(client, path)
+        assert response.status_code == 200
+        assert response.get_json()['success'] is not False
+
+
+def test_api_list_query_count_does_not_grow_with_page_size(login):
+    client = login('bench_2')
+    for path in ('/api/contents', '/api/heritage_items', '/api/forum/topics', '/api/user/favorites'):
+        counts = []
+        # 先请求一次，让导航等缓存就绪，只比较列表本身的查询
+        client.get(f'{path}?per_page=1')
+        for per_page in (1, 20):
+            with record_queries() as recorder:
+                client.get(f'{path}?per_page={per_page}')
+            counts.append(recorder.count)
+        assert counts[0] == counts[1], f'{path} 的查询数随每页条数变化: {counts}'
+
+
+def test_broadcast_to_groups_loads_members_in_one_query(app, login):
+    client = login('bench_1')
+    with app.app_context():
+        group_ids = [g for (g,) in db.session.query(UserGroup.group_id).distinct()]
+        recipients = db.session.query(func.count(func.distinct(UserGroup.user_id))).filter(
+            UserGroup.user_id != 1).scalar()
+    assert len(group_ids) > 1 and recipients > 1
+
+    # 身份、群组选项、成员各一条，每位接收者一条 INSERT
+    budget = 3 + recipients
+    response = assert_query_budget(client, '/message/broadcast', budget, method='POST', data={
+        'recipient_type': 'specific_groups', 'groups': group_ids, 'content': '群发测试'})
+    assert response.status_code == 302
+
+    with app.app_context():
+        sent = Message.query.filter_by(message_type='broadcast', content='群发测试').count()
+    assert sent == recipients
+
+
+def test_budget_exceeded_raises(login):
+    client = login('bench_2')
+    try:
+        assert_query_budget(client, '/user/profile', 1)
+    except QueryBudgetExceeded as e:
+        assert '超出预算 1' in str(e)
+    else:
+        raise AssertionError('应当超出预算')
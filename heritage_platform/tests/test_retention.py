@@ -0,0 +1,112 @@
+"""
+数据保留与归档测试
+
+合成数据都在最近90天内，不会被归档；测试自己写入更早的消息，只检查这些行。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Message, MessageArchive, MessageGroup, MessageReadStatus
+from app.utils import retention
+
+OLD = datetime(2020, 1, 1, 8, 0, 0)
+
+
+@pytest.fixture
+def ctx(app):
+    app.config['RETENTION_BATCH_PAUSE'] = 0
+    with app.app_context():
+        yield
+
+
+def _add_messages(count, **fields):
+    values = dict(sender_id=1, receiver_id=2)
+    values.update(fields)
+    messages = [Message(content=f'旧消息{i}', created_at=OLD + timedelta(minutes=i), **values)
+                for i in range(count)]
+    db.session.add_all(messages)
+    db.session.commit()
+    return [m.id for m in messages]
+
+
+def _archive_row(message_id, **fields):
+    values = dict(id=message_id, sender_id=1, receiver_id=2, content='已归档', created_at=OLD,
+                  message_type='personal', archived_at=OLD)
+    values.update(fields)
+    return MessageArchive(**values)
+
+
+def test_archive_is_idempotent_after_partial_run(ctx):
+    ids = _add_messages(5)
+
+    # 第一次只跑了一批就中断
+    assert retention.archive('messages', batch_size=2, max_batches=1, now=datetime.now()) == 2
+    # 模拟复制后、删除前失败：归档表里已有这行，原表里还在
+    db.session.add(_archive_row(ids[2], content='旧消息2', created_at=OLD + timedelta(minutes=2)))
+    db.session.commit()
+
+    assert retention.archive('messages', batch_size=2, now=datetime.now()) == 3
+    assert Message.query.filter(Message.id.in_(ids)).count() == 0
+    archived = MessageArchive.query.filter(MessageArchive.id.in_(ids)).order_by(MessageArchive.id).all()
+    assert [m.id for m in archived] == ids
+    assert [m.content for m in archived] == [f'旧消息{i}' for i in range(5)]
+
+    # 已经没有过期数据，重跑不会再改动
+    assert retention.archive('messages', batch_size=2, now=datetime.now()) == 0
+    assert MessageArchive.query.filter(MessageArchive.id.in_(ids)).count() == 5
+
+
+def test_archive_deletes_dependents(ctx):
+    group_id = db.session.query(MessageGroup.id).first()[0]
+    old_ids = _add_messages(2, group_id=group_id, receiver_id=None, message_type='group')
+    recent = Message(sender_id=1, group_id=group_id, content='新消息', message_type='group')
+    db.session.add(recent)
+    db.session.flush()
+    for message_id in old_ids + [recent.id]:
+        db.session.add(MessageReadStatus(message_id=message_id, user_id=2))
+    db.session.commit()
+
+    assert retention.archive('messages', now=datetime.now()) == 2
+    assert MessageReadStatus.query.filter(MessageReadStatus.message_id.in_(old_ids)).count() == 0
+    assert MessageReadStatus.query.filter_by(message_id=recent.id).count() == 1
+    assert db.session.get(Message, recent.id) is not None
+
+
+def test_purge_removes_rows_from_both_tables(ctx):
+    deleted = _add_messages(2, sender_deleted=True, receiver_deleted=True)
+    kept = _add_messages(1, sender_deleted=True)
+    db.session.add_all([
+        _archive_row(90001, sender_deleted=True, receiver_deleted=True),
+        _archive_row(90002, receiver_deleted=True),
+    ])
+    db.session.commit()
+
+    # 以 OLD 之后60天为当前时间，合成数据还没有超过保留期
+    now = OLD + timedelta(days=60)
+    assert retention.purge_deleted_messages(dry_run=True, now=now) == 3
+    assert retention.purge_deleted_messages(now=now) == 3
+    assert Message.query.filter(Message.id.in_(deleted)).count() == 0
+    assert Message.query.filter(Message.id.in_(kept)).count() == 1
+    assert db.session.get(MessageArchive, 90001) is None
+    assert db.session.get(MessageArchive, 90002) is not None
+
+
+def test_archived_group_messages_pages_across_equal_created_at(ctx):
+    group_id = db.session.query(MessageGroup.id).first()[0]
+    # 同一秒内的多条消息，只按时间翻页会重复或漏掉
+    db.session.add_all([_archive_row(90000 + i, receiver_id=None, group_id=group_id, message_type='group',
+                                     created_at=OLD + timedelta(minutes=i // 4))
+                        for i in range(10)])
+    db.session.commit()
+
+    pages = []
+    page, cursor = retention.archived_group_messages(group_id, limit=3)
+    pages.append([m.id for m in page])
+    while cursor:
+        page, cursor = retention.archived_group_messages(group_id, before_id=cursor, limit=3)
+        pages.append([m.id for m in page])
+
+    assert pages == [[90007, 90008, 90009], [90004, 90005, 90006], [90001, 90002, 90003], [90000]]
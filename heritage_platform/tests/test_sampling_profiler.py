@@ -0,0 +1,81 @@
+"""
+栈采样测试
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from app.utils import sampling_profiler
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在打了 eventlet 猴子补丁的子进程中采样一个持续占用CPU的协程
+EVENTLET_SCRIPT = '''
+import eventlet
+eventlet.monkey_patch()
+import json, time
+from app.utils import sampling_profiler
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+def busy_greenlet():
+    for _ in range(10):
+        busy_work(0.05)
+        eventlet.sleep(0)
+
+eventlet.spawn(busy_greenlet)
+eventlet.sleep(0)
+result = sampling_profiler.sample_stacks(0.4, 0.005, wait=eventlet.sleep)
+print(json.dumps({'samples': result['samples'], 'stacks': list(result['stacks'])}))
+'''
+
+
+def _busy_work(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_work, args=(stop,), daemon=True)
+    worker.start()
+    try:
+        result = sampling_profiler.sample_stacks(0.2, 0.005)
+    finally:
+        stop.set()
+    assert result['samples'] > 0
+    assert any('_busy_work' in stack for stack in result['stacks'])
+    assert not any('sampler(' in stack for stack in result['stacks'])
+
+
+def test_samples_busy_greenlet_under_eventlet():
+    output = subprocess.run(
+        [sys.executable, '-c', EVENTLET_SCRIPT], cwd=BASE_DIR, capture_output=True, text=True, timeout=60)
+    assert output.returncode == 0, output.stderr
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    assert result['samples'] > 0
+    # 采样线程是独立的操作系统线程：能采到占用CPU的协程，采不到采样线程自身
+    assert any('busy_work' in stack for stack in result['stacks'])
+    assert not any('sampler(' in stack for stack in result['stacks'])
+
+
+def test_busy_error_while_sampling():
+    assert sampling_profiler._sampling_lock.acquire(blocking=False)
+    try:
+        started = time.perf_counter()
+        try:
+            sampling_profiler.sample_stacks(1)
+        except sampling_profiler.ProfilerBusyError:
+            pass
+        else:
+            raise AssertionError('应当拒绝并发的采样任务')
+        assert time.perf_counter() - started < 0.5
+    finally:
+        sampling_profiler._sampling_lock.release()
@@ -0,0 +1,68 @@
+"""
+SQLite连接配置测试
+"""
+
+import math
+import sqlite3
+
+import pytest
+
+from app.utils.sqlite_config import register_math_functions
+
+
+class _NoMathConnection:
+    """模拟未编译数学函数的SQLite连接：查询 ln/exp 报错，记录注册的函数"""
+
+    def __init__(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.functions = {}
+
+    def execute(self, sql):
+        if not self.functions and ('ln(' in sql or 'exp(' in sql):
+            raise sqlite3.OperationalError('no such function: ln')
+        return self.connection.execute(sql)
+
+    def create_function(self, name, narg, func, deterministic=False):
+        self.functions[name] = func
+        self.connection.create_function(name, narg, func, deterministic=deterministic)
+
+
+def test_registers_math_functions_when_missing():
+    connection = _NoMathConnection()
+    register_math_functions(connection)
+    assert set(connection.functions) == {'ln', 'exp'}
+
+    # 热度累加使用的 logaddexp 表达式: max(a, b) + ln(1 + exp(-|a - b|))
+    value = connection.execute('SELECT max(2.0, 3.0) + ln(1 + exp(-abs(2.0 - 3.0)))').fetchone()[0]
+    assert math.isclose(value, math.log(math.exp(2.0) + math.exp(3.0)))
+    assert connection.execute('SELECT ln(0), ln(NULL), exp(NULL)').fetchone() == (None, None, None)
+
+
+def test_keeps_builtin_math_functions():
+    connection = sqlite3.connect(':memory:')
+    try:
+        connection.execute('SELECT ln(1)')
+    except sqlite3.OperationalError:
+        pytest.skip('本机SQLite未编译数学函数')
+
+    registered = []
+    original = connection.create_function
+
+    class Recorder:
+        execute = connection.execute
+
+        def create_function(self, *args, **kwargs):
+            registered.append(args[0])
+            return original(*args, **kwargs)
+
+    register_math_functions(Recorder())
+    assert registered == []
+
+
+def test_app_engine_has_math_functions(app):
+    from sqlalchemy import text
+
+    from app import db
+
+    with app.app_context():
+        assert math.isclose(db.session.execute(text('SELECT exp(ln(2.0))')).scalar(), 2.0)